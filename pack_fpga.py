@@ -13,8 +13,20 @@ import shutil
 import hashlib
 import datetime
 import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# .bit 文件解析（源码树中直接导入单个模块，不加载整个Vivado插件）
+_VIVADO_PLUGIN_DIR = Path(__file__).resolve().parent / 'src' / 'plugins' / 'vivado'
+if _VIVADO_PLUGIN_DIR.is_dir():
+    sys.path.insert(0, str(_VIVADO_PLUGIN_DIR))
+try:
+    from bitfile import BITSWAP_TABLE, Bitfile, BitfileError, parse_header, read_header
+except ImportError:
+    from plugins.vivado.bitfile import (BITSWAP_TABLE, Bitfile, BitfileError,
+                                        parse_header, read_header)
+
 # 默认配置
 DEFAULT_BOOTGEN_PATH = r"C:\Xilinx\SDK\2018.2\bin\bootgen.bat"
 DEFAULT_FPGA_ARCH = "zynq"
@@ -28,6 +40,14 @@ DEFAULT_PROJECT_NAME = "project"
 DEFAULT_IMPL_NUM = "impl_1"
 DEFAULT_FPGA_TOP = "system_wrapper"
 
+# 解析bit文件头时读取的文件开头长度（bit文件头不会超过这个长度）
+BIN_HEADER_WINDOW = 4096
+# 时间戳模式 HH:MM:SS
+TIMESTAMP_PATTERN = re.compile(rb'\d\d:\d\d:\d\d')
+TIMESTAMP_LENGTH = 8
+# 流式处理的块大小
+CHUNK_SIZE = 8 * 1024 * 1024
+
 def parse_arguments():
     """解析命令行参数"""
     parser = argparse.ArgumentParser(description='FPGA二进制文件打包工具')
@@ -37,8 +57,9 @@ def parse_arguments():
                         help=f'FSBL.elf路径 (默认: {DEFAULT_FSBL_PATH})')
     parser.add_argument('--uboot', default=DEFAULT_UBOOT_PATH,
                         help=f'u-boot.elf路径 (默认: {DEFAULT_UBOOT_PATH})')
-    parser.add_argument('--bit',
-                        help=f'bit文件路径 (默认: {DEFAULT_BIT_DIR}\\{DEFAULT_BIT_NAME})')
+    parser.add_argument('--bit', nargs='+',
+                        help=f'bit或bin文件路径，可指定多个并行打包 '
+                             f'(默认: {DEFAULT_BIT_DIR}\\{DEFAULT_BIT_NAME})')
     parser.add_argument('--arch', default=DEFAULT_FPGA_ARCH,
                         help=f'FPGA架构 (默认: {DEFAULT_FPGA_ARCH})')
     parser.add_argument('--version-file', default=DEFAULT_VERSION_FILE,
@@ -48,13 +69,19 @@ def parse_arguments():
     parser.add_argument('--fpga-top', default=DEFAULT_FPGA_TOP,
                         help=f'FPGA顶层模块名 (默认: {DEFAULT_FPGA_TOP})')
     parser.add_argument('--no-copy-bit', action='store_true',
-                        help='不复制bit文件到输出目录，直接使用原路径')
+                        help='（兼容旧参数）输入文件总是直接从原路径读取')
+    parser.add_argument('--jobs', '-j', type=int, default=0,
+                        help='并行打包的线程数 (默认: CPU核数)')
     parser.add_argument('--keep-bif', action='store_true',
                         help='保留临时BIF文件（默认删除）')
     parser.add_argument('--dry-run', action='store_true',
                         help='仅显示将要执行的命令，不实际执行')
     parser.add_argument('--pure-fpga', action='store_true',
                         help='纯FPGA模式，不包含FSBL和uboot')
+    parser.add_argument('--use-bootgen', action='store_true',
+                        help='纯FPGA模式也调用bootgen（默认直接从bit文件生成bin）')
+    parser.add_argument('--bitswap', action='store_true',
+                        help='纯FPGA模式生成bin时按位反转每个字节（SelectMAP/BPI配置）')
 
     return parser.parse_args()
 
@@ -115,81 +142,205 @@ def calculate_md5(filepath):
         return "0" * 32
 
 def extract_timestamp_from_bit(bit_path):
-    """从bit文件中提取时间戳（格式HH:MM:SS）"""
+    """从bit文件头的时间字段提取时间戳（格式HH:MM:SS）"""
     try:
-        with open(bit_path, 'rb') as f:
-            data = f.read(500)  # 读取前500字节，足够包含头部
-
-            # 搜索时间戳模式：两个数字，冒号，两个数字，冒号，两个数字
-            # 对应字节模式：\d\d:\d\d:\d\d
-            import re
-            # 使用正则表达式在字节数据中搜索模式
-            # re.DOTALL使.匹配任何字符，包括换行
-            pattern = rb'(\d\d):(\d\d):(\d\d)'
-            match = re.search(pattern, data)
-            if match:
-                timestamp_bytes = match.group(0)
-                if len(timestamp_bytes) == 8:
-                    return timestamp_bytes
-                else:
-                    print(f"警告: 找到的时间戳长度不正确: {timestamp_bytes}")
-
-            # 如果正则匹配失败，回退到固定偏移110（向后兼容）
-            if len(data) >= 118:
-                f.seek(110)
-                timestamp_bytes = f.read(8)
-                if len(timestamp_bytes) == 8:
-                    # 验证格式：应该是数字和冒号
-                    if all(48 <= b <= 57 or b == 58 for b in timestamp_bytes):  # 0-9或:
-                        return timestamp_bytes
-
-            print(f"警告: 无法从bit文件提取时间戳: {bit_path}")
-            return b'00:00:00'  # 默认值
-    except Exception as e:
+        timestamp = read_header(bit_path).timestamp
+    except (BitfileError, OSError) as e:
         print(f"警告: 提取bit文件时间戳失败: {e}")
         return b'00:00:00'
+    if not re.fullmatch(rb'\d\d:\d\d:\d\d', timestamp):
+        print(f"警告: bit文件时间戳格式不正确: {timestamp!r}")
+        return b'00:00:00'
+    return timestamp
+
+def header_timestamp_offset(head, size):
+    """bin文件保留了bit文件头时返回时间字段的偏移，否则返回None
+
+    Args:
+        head: 文件开头的内容（至少BIN_HEADER_WINDOW字节，文件更短时为全部内容）
+        size: 文件总大小
+    """
+    try:
+        return parse_header(bytes(head[:BIN_HEADER_WINDOW]), size).time_offset
+    except BitfileError:
+        return None
+
+def scan_timestamp_offset(f, chunk_size=CHUNK_SIZE):
+    """从当前位置开始分块扫描文件，返回第一个 HH:MM:SS 的绝对偏移，找不到时返回None
+
+    相邻块之间保留 TIMESTAMP_LENGTH - 1 字节，跨块的时间戳同样能找到。
+    """
+    position = f.tell()
+    carry = b''
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return None
+        data = carry + chunk
+        match = TIMESTAMP_PATTERN.search(data)
+        if match:
+            return position - len(carry) + match.start()
+        position += len(chunk)
+        carry = data[-(TIMESTAMP_LENGTH - 1):]
 
 def fix_bin_timestamp(bin_path, bit_path):
-    """修复bin文件的时间戳，使其与bit文件一致"""
+    """修复bin文件的时间戳，使其与bit文件一致
+
+    bin文件保留了bit文件头时按字段位置直接修改时间字段（只读文件开头）；
+    否则分块扫描整个文件查找第一个时间戳（bootgen镜像中比特流分区不在开头）。
+    """
     try:
         # 从bit文件获取时间戳
         timestamp = extract_timestamp_from_bit(bit_path)
 
         with open(bin_path, 'r+b') as f:  # 读写二进制模式
-            data = f.read()
-
-            # 在bin文件中搜索时间戳模式
-            import re
-            pattern = rb'(\d\d):(\d\d):(\d\d)'
-            match = re.search(pattern, data)
-            if match:
-                current = match.group(0)
-                if current != timestamp:
-                    # 替换时间戳
-                    start = match.start()
-                    f.seek(start)
-                    f.write(timestamp)
-                    print(f"修复bin文件时间戳: {current.decode('ascii', errors='ignore')} -> {timestamp.decode('ascii', errors='ignore')}")
-                    return True
-                else:
-                    # 时间戳已相同，无需修复
-                    return True
-            else:
-                # 未找到时间戳模式，尝试固定偏移110
-                if len(data) >= 118:
-                    f.seek(110)
-                    current = f.read(8)
-                    if current != timestamp:
-                        f.seek(110)
-                        f.write(timestamp)
-                        print(f"修复bin文件时间戳(固定偏移): {current.decode('ascii', errors='ignore')} -> {timestamp.decode('ascii', errors='ignore')}")
-                        return True
+            head = f.read(BIN_HEADER_WINDOW)
+            start = header_timestamp_offset(head, os.fstat(f.fileno()).st_size)
+            if start is None:
+                f.seek(0)
+                start = scan_timestamp_offset(f)
+            if start is None:
                 print(f"警告: 在bin文件中未找到时间戳模式: {bin_path}")
                 return False
+
+            f.seek(start)
+            current = f.read(TIMESTAMP_LENGTH)
+            if current != timestamp:
+                f.seek(start)
+                f.write(timestamp)
+                _report_patch(current, timestamp)
+            return True
     except Exception as e:
         print(f"警告: 修复bin文件时间戳失败: {e}")
         return False
 
+def iter_file_chunks(path, chunk_size=CHUNK_SIZE):
+    """按块读取文件内容（复用同一个缓冲区）"""
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, 'rb') as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            yield view[:n]
+
+def iter_bit_payload(bit_path, bitswap=False, chunk_size=CHUNK_SIZE):
+    """按块读取bit文件的配置数据（mmap零拷贝，可选按位反转）"""
+    with Bitfile(bit_path) as bit:
+        payload = bit.payload
+        for start in range(0, len(payload), chunk_size):
+            with payload[start:start + chunk_size] as chunk:
+                yield chunk.tobytes().translate(BITSWAP_TABLE) if bitswap else chunk
+
+def _report_patch(current, timestamp):
+    if current != timestamp:
+        old = current.decode('ascii', errors='ignore')
+        new = timestamp.decode('ascii', errors='ignore')
+        print(f"修复bin文件时间戳: {old} -> {new}")
+
+def patch_timestamp_chunks(chunks, size, timestamp):
+    """在块流中修补时间戳，产出修补后的块（内存占用与块大小相当）
+
+    先攒够BIN_HEADER_WINDOW字节解析bit文件头：解析成功时按字段位置修补；
+    否则继续在流中查找第一个 HH:MM:SS（块之间保留 TIMESTAMP_LENGTH - 1 字节），
+    找到并修补后其余内容原样输出。
+    """
+    head = bytearray()
+    chunks = iter(chunks)
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= BIN_HEADER_WINDOW:
+            break
+    start = header_timestamp_offset(head, size)
+    if start is not None:
+        _report_patch(bytes(head[start:start + TIMESTAMP_LENGTH]), timestamp)
+        head[start:start + TIMESTAMP_LENGTH] = timestamp
+        yield head
+        yield from chunks
+        return
+
+    # 没有bit文件头：流式扫描整个文件
+    buffer = head
+    while True:
+        match = TIMESTAMP_PATTERN.search(buffer)
+        if match:
+            _report_patch(match.group(0), timestamp)
+            buffer[match.start():match.end()] = timestamp
+            yield buffer
+            yield from chunks
+            return
+        chunk = next(chunks, None)
+        if chunk is None:
+            print("警告: 在bin文件中未找到时间戳模式，MD5可能不一致")
+            yield buffer
+            return
+        carry = len(buffer) - (TIMESTAMP_LENGTH - 1)
+        if carry > 0:
+            yield bytes(buffer[:carry])
+            buffer = buffer[carry:]
+        buffer += chunk
+
+def apply_default_mode(path):
+    """把临时文件权限改为普通新建文件的权限（0o666 去掉umask）
+
+    mkstemp 创建的文件权限固定为0600，直接重命名会让发布文件只有属主可读。
+    """
+    umask = os.umask(0)
+    os.umask(umask)
+    os.chmod(path, 0o666 & ~umask)
+
+def stream_image(chunks, size, output_dir, timestamp=None):
+    """一次遍历输入：修补时间戳、计算MD5和SHA256、写入输出目录中的临时文件
+
+    Args:
+        chunks: 输入内容的块迭代器
+        size: 输入总大小（用于定位时间戳字段）
+        output_dir: 输出目录（临时文件与最终文件在同一目录，便于原子重命名）
+        timestamp: 需要写入的时间戳（bytes），为None时不修补
+
+    Returns:
+        (临时文件路径, MD5, SHA256, 字节数)
+    """
+    md5, sha256 = hashlib.md5(), hashlib.sha256()
+    fd, temp_path = tempfile.mkstemp(prefix='.pack-', suffix='.bin.tmp', dir=output_dir)
+    written = 0
+    if timestamp is not None:
+        chunks = patch_timestamp_chunks(chunks, size, timestamp)
+
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            for chunk in chunks:
+                md5.update(chunk)
+                sha256.update(chunk)
+                out.write(chunk)
+                written += len(chunk)
+        apply_default_mode(temp_path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return temp_path, md5.hexdigest(), sha256.hexdigest(), written
+
+def copy_atomic(source, dest):
+    """复制文件：先写同目录下的临时文件，再原子重命名"""
+    fd, temp_path = tempfile.mkstemp(prefix='.pack-', suffix='.tmp',
+                                     dir=os.path.dirname(dest) or '.')
+    os.close(fd)
+    try:
+        shutil.copy2(source, temp_path)
+        os.replace(temp_path, dest)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+def write_text_atomic(path, text):
+    """写文本文件：先写临时文件，再原子重命名"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
 def create_bif_file(bif_path, arch, bootloader, bitfile, uboot, pure_fpga=False):
     """创建BIF文件"""
     if pure_fpga:
@@ -260,19 +411,42 @@ def find_ltx_file(bit_path):
 
     return None
 
-def main():
-    args = parse_arguments()
+class PackError(Exception):
+    """打包单个镜像失败"""
+    pass
+
+def _timestamp_bit_for_bin(input_file):
+    """为bin输入查找对应的bit文件（用于时间戳修复）"""
+    # 首先尝试同目录同名的.bit文件
+    possible_bit = os.path.splitext(input_file)[0] + '.bit'
+    if os.path.exists(possible_bit):
+        return possible_bit
+    # 尝试默认bit文件路径
+    default_bit = os.path.join(DEFAULT_BIT_DIR, DEFAULT_BIT_NAME)
+    if os.path.exists(default_bit):
+        return default_bit
+    print("警告: 无法找到对应的bit文件用于时间戳修复，MD5可能不一致")
+    return None
 
-    # 确定输入文件路径（可能是.bit或.bin）
-    if args.bit:
-        input_file = args.bit
-    else:
-        # 默认bit文件路径
-        input_file = os.path.join(DEFAULT_BIT_DIR, DEFAULT_BIT_NAME)
+def pack_image(input_file, args, pure_fpga, name_prefix, bif_name="create_bin.bif"):
+    """打包一个bit/bin文件
+
+    输入只读取一遍：时间戳修补、MD5/SHA256计算和输出文件写入在同一次遍历中
+    完成，写入临时文件后按MD5重命名为最终文件名。调用bootgen时bootgen的输出
+    是唯一的中间文件。
+
+    Args:
+        input_file: 输入的bit或bin文件
+        args: 命令行参数
+        pure_fpga: 是否为纯FPGA模式
+        name_prefix: 输出文件名前缀（版本_日期_githead）
+        bif_name: BIF文件名（多个输入并行打包时各不相同）
 
+    Returns:
+        打包结果字典，dry-run时返回None
+    """
     if not os.path.exists(input_file):
-        print(f"错误: 输入文件不存在: {input_file}")
-        sys.exit(1)
+        raise PackError(f"输入文件不存在: {input_file}")
 
     # 确定文件扩展名
     file_ext = os.path.splitext(input_file)[1].lower()
@@ -282,24 +456,112 @@ def main():
         print(f"警告: 输入文件扩展名不是.bit或.bin: {input_file}")
         # 继续尝试处理，但可能失败
 
+    intermediate = None  # bootgen生成的中间bin文件，打包完成后删除
+    source = timestamp_bit = None
+    try:
+        if input_is_bin:
+            # 直接读取现有的bin文件
+            print(f"输入文件是bin文件，跳过bootgen步骤: {input_file}")
+            if args.dry_run:
+                return None
+            source = input_file
+            timestamp_bit = _timestamp_bit_for_bin(input_file)
+        elif input_is_bit and pure_fpga and not args.use_bootgen:
+            # 纯FPGA镜像就是bit文件的配置数据，直接从mmap读取，不调用bootgen
+            print(f"从bit文件生成bin: {input_file}" + ("（按位反转）" if args.bitswap else ""))
+            if args.dry_run:
+                return None
+            try:
+                header = read_header(input_file)
+            except BitfileError as e:
+                raise PackError(f"解析bit文件失败: {e}")
+            print(f"设计: {header.design_name}  器件: {header.part}  "
+                  f"生成时间: {header.date} {header.time}")
+            size = header.data_length
+            chunks = iter_bit_payload(input_file, args.bitswap)
+            timestamp = None
+        else:
+            # 输入是bit文件或其他，需要运行bootgen（直接引用原始bit文件，不再复制）
+            bif_path = os.path.join(args.output_dir, bif_name)
+            create_bif_file(bif_path, args.arch, args.fsbl, input_file, args.uboot,
+                            pure_fpga)
+            fd, intermediate = tempfile.mkstemp(prefix='.bootgen-', suffix='.bin',
+                                                dir=args.output_dir)
+            os.close(fd)
+            try:
+                if not run_bootgen(args.bootgen, bif_path, args.arch, intermediate,
+                                   args.dry_run):
+                    raise PackError(f"bootgen执行失败: {input_file}")
+            finally:
+                # 删除临时BIF文件（除非指定保留）
+                if not args.keep_bif and os.path.exists(bif_path) and not args.dry_run:
+                    os.remove(bif_path)
+                    print(f"删除临时BIF文件: {bif_path}")
+            if args.dry_run:
+                return None
+            if not os.path.getsize(intermediate):
+                raise PackError(f"bootgen未生成bin文件: {input_file}")
+            timestamp_bit = input_file
+            source = intermediate
+
+        if source is not None:
+            size = os.path.getsize(source)
+            chunks = iter_file_chunks(source)
+            timestamp = None
+            if timestamp_bit:
+                timestamp = extract_timestamp_from_bit(timestamp_bit)
+
+        # 一次遍历：修补时间戳、计算摘要、写入临时文件
+        temp_bin, md5_full, sha256_full, written = stream_image(
+            chunks, size, args.output_dir, timestamp)
+    finally:
+        if intermediate and os.path.exists(intermediate):
+            os.remove(intermediate)
+
+    # 按MD5命名，原子重命名为最终文件
+    new_basename = f"{name_prefix}_{md5_full[:6]}"
+    new_bin_name = f"{new_basename}.bin"
+    new_bin_path = os.path.join(args.output_dir, new_bin_name)
+    os.replace(temp_bin, new_bin_path)
+    print(f"生成bin文件: {new_bin_name} ({written} 字节)")
+
+    # 复制ltx文件，直接写成最终文件名
+    new_ltx_path = None
+    ltx_source = find_ltx_file(input_file)
+    if ltx_source:
+        new_ltx_path = os.path.join(args.output_dir, f"{new_basename}.ltx")
+        copy_atomic(ltx_source, new_ltx_path)
+        print(f"复制ltx文件: {os.path.basename(ltx_source)} -> "
+              f"{os.path.basename(new_ltx_path)}")
+    else:
+        print(f"警告: 未找到对应的.ltx文件: {input_file}")
+
+    return {
+        'input': input_file,
+        'bin': new_bin_path,
+        'bin_name': new_bin_name,
+        'ltx': new_ltx_path,
+        'md5': md5_full,
+        'sha256': sha256_full,
+        'size': written,
+    }
+
+def main():
+    args = parse_arguments()
+
+    # 确定输入文件路径（可能是.bit或.bin，可以有多个）
+    input_files = args.bit or [os.path.join(DEFAULT_BIT_DIR, DEFAULT_BIT_NAME)]
+
     # 确保输出目录存在
     ensure_dir(args.output_dir)
 
-    # 复制输入文件到输出目录（除非指定不复制）
     if args.no_copy_bit:
-        file_in_output = input_file
-        if input_is_bin:
-            print(f"警告: 输入文件是bin文件且使用了--no-copy-bit选项，重命名将移动原始文件: {input_file}")
-    else:
-        file_in_output = os.path.join(args.output_dir, os.path.basename(input_file))
-        if not args.dry_run and input_file != file_in_output:
-            print(f"复制输入文件: {input_file} -> {file_in_output}")
-            shutil.copy2(input_file, file_in_output)
+        print("提示: 输入文件不再复制到输出目录，--no-copy-bit 已无需指定")
 
     # 确定是否为纯FPGA模式
     pure_fpga = args.pure_fpga
     # 如果未显式指定pure_fpga，但fsbl和uboot文件都不存在，则自动检测为纯FPGA模式
-    if not pure_fpga and not args.pure_fpga:
+    if not pure_fpga:
         # 检查默认路径下的文件是否存在，且用户未显式覆盖fsbl/uboot参数
         # 如果fsbl和uboot都不存在，则可能是纯FPGA工程
         if (args.fsbl == DEFAULT_FSBL_PATH and args.uboot == DEFAULT_UBOOT_PATH and
@@ -322,153 +584,69 @@ def main():
     else:
         print("纯FPGA模式，跳过FSBL和uboot检查")
 
-    # 创建临时BIF文件路径（仅在需要时使用）
-    bif_path = os.path.join(args.output_dir, "create_bin.bif")
-
-    # 根据输入文件类型决定处理流程
-    if input_is_bin:
-        # 直接使用现有的bin文件
-        print(f"输入文件是bin文件，跳过bootgen步骤")
-        initial_bin = file_in_output
-        # 不需要BIF文件和bootgen
-        bif_needed = False
-    else:
-        # 输入是bit文件或其他，需要运行bootgen
-        bif_needed = True
-        # 创建BIF文件（根据是否为纯FPGA模式）
-        if not create_bif_file(bif_path, args.arch, args.fsbl, file_in_output, args.uboot, pure_fpga):
-            sys.exit(1)
-
-        # 输出bin文件路径（初始名称）
-        initial_bin = os.path.join(args.output_dir, f"{args.fpga_top}.bin")
-
-        # 运行bootgen
-        if not run_bootgen(args.bootgen, bif_path, args.arch, initial_bin, args.dry_run):
-            if not args.keep_bif:
-                if os.path.exists(bif_path) and not args.dry_run:
-                    os.remove(bif_path)
-            sys.exit(1)
-
-        # 删除临时BIF文件（除非指定保留）
-        if not args.keep_bif and os.path.exists(bif_path) and not args.dry_run:
-            os.remove(bif_path)
-            print(f"删除临时BIF文件: {bif_path}")
+    # 版本号、git HEAD和日期对所有镜像相同，只获取一次
+    # 使用完整的版本字符串（包含V前缀），如"V25.09.0.0.1"
+    version_str = read_version_file(args.version_file)
+    name_prefix = f"{version_str}_{get_current_date()}_{get_git_head()}"
+
+    # 多个镜像在线程池中并行打包（读写文件和计算摘要时会释放GIL）
+    def bif_name(index, input_file):
+        if len(input_files) == 1:
+            return "create_bin.bif"
+        return f"create_bin_{index}_{Path(input_file).stem}.bif"
+
+    jobs = max(1, min(args.jobs or os.cpu_count() or 1, len(input_files)))
+    results, failed = [], False
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(pack_image, input_file, args, pure_fpga, name_prefix,
+                               bif_name(index, input_file))
+                   for index, input_file in enumerate(input_files)]
+        for input_file, future in zip(input_files, futures):
+            try:
+                results.append(future.result())
+            except (PackError, BitfileError, OSError) as e:
+                print(f"错误: {e}")
+                failed = True
+    if failed:
+        sys.exit(1)
 
     # 如果是dry-run模式，到此结束
     if args.dry_run:
         print("dry-run模式，跳过后续步骤")
         return
 
-    # 修复bin文件时间戳以确保MD5一致性
-    if not args.dry_run:
-        # 确定bit文件路径用于时间戳修复
-        bit_for_timestamp = None
-        if input_is_bit:
-            # 输入是bit文件，使用原始bit文件
-            bit_for_timestamp = input_file
-        elif input_is_bin:
-            # 输入是bin文件，尝试查找对应的bit文件
-            # 首先尝试同目录同名的.bit文件
-            possible_bit = os.path.splitext(input_file)[0] + '.bit'
-            if os.path.exists(possible_bit):
-                bit_for_timestamp = possible_bit
-            else:
-                # 尝试默认bit文件路径
-                default_bit = os.path.join(DEFAULT_BIT_DIR, DEFAULT_BIT_NAME)
-                if os.path.exists(default_bit):
-                    bit_for_timestamp = default_bit
-                else:
-                    print("警告: 无法找到对应的bit文件用于时间戳修复，MD5可能不一致")
-
-        if bit_for_timestamp and os.path.exists(bit_for_timestamp):
-            if not fix_bin_timestamp(initial_bin, bit_for_timestamp):
-                print("警告: 时间戳修复失败，MD5可能不一致")
-        else:
-            print("警告: 未找到bit文件用于时间戳修复，MD5可能不一致")
-
-    # 计算生成的bin文件的MD5
-    if not os.path.exists(initial_bin):
-        print(f"错误: 生成的bin文件不存在: {initial_bin}")
-        sys.exit(1)
-
-    md5_full = calculate_md5(initial_bin)
-    md5_short = md5_full[:6]
-    print(f"bin文件MD5: {md5_full}")
-    print(f"MD5前6位: {md5_short}")
-
-    # 读取版本号
-    version_str = read_version_file(args.version_file)
-    # 使用完整的版本字符串（包含V前缀），如"V25.09.0.0.1"
-    ver_part = version_str  # 直接使用，不截断
-
-    # 获取git HEAD
-    git_head = get_git_head()
-
-    # 获取当前日期
-    current_date = get_current_date()
-
-    # 构建新文件名
-    new_basename = f"{ver_part}_{current_date}_{git_head}_{md5_short}"
-    new_bin_name = f"{new_basename}.bin"
-    new_bin_path = os.path.join(args.output_dir, new_bin_name)
-
-    # 重命名bin文件
-    print(f"重命名bin文件: {os.path.basename(initial_bin)} -> {new_bin_name}")
-    os.rename(initial_bin, new_bin_path)
-
-    # 查找并重命名ltx文件
-    ltx_source = find_ltx_file(input_file)
-    if ltx_source:
-        ltx_name = os.path.basename(ltx_source)
-        ltx_dest = os.path.join(args.output_dir, ltx_name)
-        # 复制ltx文件到输出目录
-        shutil.copy2(ltx_source, ltx_dest)
-        # 重命名
-        new_ltx_name = f"{new_basename}.ltx"
-        new_ltx_path = os.path.join(args.output_dir, new_ltx_name)
-        os.rename(ltx_dest, new_ltx_path)
-        print(f"复制并重命名ltx文件: {ltx_name} -> {new_ltx_name}")
-    else:
-        print("警告: 未找到对应的.ltx文件")
-
-    # 保存bin文件名到文件（类似Makefile中的BINNAME）
-    binname_file = os.path.join(args.output_dir, "BINNAME")
-    with open(binname_file, 'w') as f:
-        f.write(new_bin_path)
-
-    # 保存MD5到文件（类似Makefile中的APP_MD5_TXT）
-    md5_file = os.path.join(args.output_dir, "APP_MD5_TXT")
-    with open(md5_file, 'w') as f:
-        f.write(f"MD5哈希值: {md5_full}\n")
-
-    # 输出打包信息
-    print("\n" + "-" * 70)
-    print(" " * 30 + "打包成功")
-    print("-" * 70)
-    print(f"[bin文件]: {new_bin_path}")
-    print(f"[bin MD5]: {md5_full}")
-    print(f"[FLASH命令]: qspibootudp /apps/{new_bin_name}")
-    print(f"[上传命令]: .\\xota3.bat ..\\..\\bin\\{new_bin_name} .\\all.txt")
-    print("-" * 70)
+    # 保存bin文件名和摘要（类似Makefile中的BINNAME、APP_MD5_TXT），每个镜像一行
+    write_text_atomic(os.path.join(args.output_dir, "BINNAME"),
+                      "\n".join(result['bin'] for result in results))
+    write_text_atomic(os.path.join(args.output_dir, "APP_MD5_TXT"),
+                      "".join(f"MD5哈希值: {result['md5']}\n" for result in results))
+    write_text_atomic(os.path.join(args.output_dir, "APP_SHA256_TXT"),
+                      "".join(f"SHA256哈希值: {result['sha256']}\n" for result in results))
 
-    # 记录日志（可选）
+    # 获取当前分支和完整git HEAD（用于日志）
     try:
-        # 获取当前分支
         branch_result = subprocess.run(['git', 'rev-parse', '--abbrev-ref', 'HEAD'],
                                       capture_output=True, text=True)
         current_branch = branch_result.stdout.strip() if branch_result.returncode == 0 else "unknown"
-
-        # 获取完整git HEAD
         head_result = subprocess.run(['git', 'rev-parse', 'HEAD'],
                                     capture_output=True, text=True)
         current_head = head_result.stdout.strip() if head_result.returncode == 0 else "unknown"
+    except Exception:
+        current_branch = current_head = "unknown"
 
-        log_msg = f"make pack:{new_bin_name} branch:{current_branch} head:{current_head} MD5:{md5_full}"
-        print(f"[日志]: {log_msg}")
-    except:
-        pass
-
+    # 输出打包信息
+    print("\n" + "-" * 70)
+    print(" " * 30 + "打包成功")
     print("-" * 70)
+    for result in results:
+        print(f"[bin文件]: {result['bin']}")
+        print(f"[bin MD5]: {result['md5']}")
+        print(f"[bin SHA256]: {result['sha256']}")
+        print(f"[FLASH命令]: qspibootudp /apps/{result['bin_name']}")
+        print(f"[上传命令]: .\\xota3.bat ..\\..\\bin\\{result['bin_name']} .\\all.txt")
+        print(f"[日志]: make pack:{result['bin_name']} branch:{current_branch} "
+              f"head:{current_head} MD5:{result['md5']}")
+        print("-" * 70)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -8,8 +8,9 @@ FPGABuilder启动脚本
 import os
 import sys
 
-# 调试模式控制
-DEBUG = os.environ.get('FPGABuilder_DEBUG', '').lower() in ('1', 'true', 'yes', 'on')
+# 调试模式控制（兼容 FPGABuilder_DEBUG）
+DEBUG = any(os.environ.get(name, '').lower() in ('1', 'true', 'yes', 'on')
+            for name in ('FPGABUILDER_DEBUG', 'FPGABuilder_DEBUG'))
 
 def debug_print(*args, **kwargs):
     """只在调试模式下打印信息"""
@@ -57,9 +58,16 @@ else:
 
 # 导入并运行主模块
 try:
-    # 导入cli模块
+    import atexit
+    from core import startup
+    startup.mark('启动脚本')
+
+    # 导入cli模块（插件等重量级模块在命令中按需导入）
     from core.cli import main
     debug_print("Successfully imported core.cli module")
+    startup.mark('导入CLI')
+    # 退出时先记录命令执行阶段，再输出启动计时报告
+    atexit.register(startup.mark, '执行命令')
 
     # 运行主函数
     main()
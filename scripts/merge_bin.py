@@ -19,14 +19,23 @@ import struct
 class BinMerger:
     """二进制文件合并器"""
 
-    def __init__(self, output_file: str = "boot.bin", platform: str = "zynq"):
+    # 流式复制和填充的分块大小
+    CHUNK_SIZE = 8 * 1024 * 1024
+
+    def __init__(self, output_file: str = "boot.bin", platform: str = "zynq",
+                 pad_byte: int = 0xFF):
         """
         Args:
             output_file: 输出文件路径
             platform: 平台类型 ('zynq', 'versal', 'microblaze')
+            pad_byte: 简单合并时组件之间空隙的填充值（默认0xFF，Flash擦除值；
+                为0时生成稀疏文件）
         """
+        if not 0 <= pad_byte <= 0xFF:
+            raise ValueError(f"填充值必须在0x00-0xFF之间: {pad_byte}")
         self.output_file = Path(output_file)
         self.platform = platform
+        self.pad_byte = pad_byte
         self.components: List[Dict] = []
 
     def add_component(self, file_path: str, offset: str = "0x00000000",
@@ -57,27 +66,107 @@ class BinMerger:
             'size': file_path.stat().st_size
         })
 
+    def find_overlaps(self) -> List[Tuple[Dict, Dict]]:
+        """按偏移排序后检查相邻区间，返回所有重叠的组件对（不修改组件顺序）"""
+        ordered = sorted(self.components, key=lambda x: x['offset'])
+        overlaps = []
+        furthest = None  # 已检查区间中结束地址最大的组件
+        for comp in ordered:
+            if furthest is not None and furthest['offset'] + furthest['size'] > comp['offset']:
+                overlaps.append((furthest, comp))
+            if furthest is None or comp['offset'] + comp['size'] > furthest['offset'] + furthest['size']:
+                furthest = comp
+        return overlaps
+
     def merge_simple(self):
-        """简单合并：按偏移地址将文件内容写入输出文件"""
-        # 找到最大偏移和文件大小
-        max_offset = 0
-        max_end = 0
-        for comp in self.components:
-            end = comp['offset'] + comp['size']
-            if end > max_end:
-                max_end = end
+        """简单合并：按偏移地址流式写入输出文件
+
+        先检查组件区间是否重叠，再按偏移顺序依次写入：组件内容用
+        copy_file_range/sendfile 在内核中分块复制，组件之间的空隙填充
+        pad_byte（默认0xFF，即Flash擦除值）。内存占用与镜像大小无关。
+        """
+        overlaps = self.find_overlaps()
+        if overlaps:
+            details = "; ".join(
+                f"{a['name']} [0x{a['offset']:08x}, 0x{a['offset'] + a['size']:08x}) 与 "
+                f"{b['name']} [0x{b['offset']:08x}, 0x{b['offset'] + b['size']:08x})"
+                for a, b in overlaps)
+            raise ValueError(f"组件地址重叠: {details}")
+
+        ordered = sorted(self.components, key=lambda x: x['offset'])
+        max_end = max((comp['offset'] + comp['size'] for comp in ordered), default=0)
 
-        # 创建输出文件
         with open(self.output_file, 'wb') as f:
-            # 写入每个组件
-            for comp in self.components:
-                f.seek(comp['offset'])
+            position = 0
+            for comp in ordered:
+                self._pad(f, comp['offset'] - position)
                 with open(comp['path'], 'rb') as src:
-                    f.write(src.read())
+                    copied = self._copy(src, f, comp['size'])
+                if copied != comp['size']:
+                    raise IOError(f"{comp['name']} 在合并过程中被修改: "
+                                  f"预期 {comp['size']} 字节，实际 {copied} 字节")
+                position = comp['offset'] + comp['size']
                 print(f"写入 {comp['name']} 到偏移 0x{comp['offset']:08x}")
+            f.truncate(max_end)
 
         print(f"合并完成: {self.output_file} (大小: {max_end} 字节)")
 
+    def _pad(self, dst, length: int):
+        """在输出文件当前位置写入length字节的填充值
+
+        填充值为0时直接跳过，由文件系统生成稀疏空洞；其他填充值复用同一个
+        分块缓冲区写入，不在内存中生成整段空隙。
+        """
+        if length <= 0:
+            return
+        if self.pad_byte == 0:
+            dst.seek(length, os.SEEK_CUR)
+            return
+        chunk = memoryview(bytes([self.pad_byte]) * min(length, self.CHUNK_SIZE))
+        while length > 0:
+            n = min(length, len(chunk))
+            dst.write(chunk[:n])
+            length -= n
+
+    def _copy(self, src, dst, length: int) -> int:
+        """把src的length字节复制到dst当前位置，返回实际复制的字节数
+
+        依次尝试 os.copy_file_range（同一文件系统内可共享数据块）和
+        os.sendfile，都不可用时退回到固定缓冲区的readinto/write循环。
+        """
+        dst.flush()
+        src_fd, dst_fd = src.fileno(), dst.fileno()
+        kernel_copies = []
+        if hasattr(os, 'copy_file_range'):
+            kernel_copies.append(lambda done, n: os.copy_file_range(src_fd, dst_fd, n))
+        if hasattr(os, 'sendfile'):
+            kernel_copies.append(lambda done, n: os.sendfile(dst_fd, src_fd, done, n))
+
+        copied = 0
+        for kernel_copy in kernel_copies:
+            try:
+                while copied < length:
+                    n = kernel_copy(copied, min(length - copied, self.CHUNK_SIZE))
+                    if n == 0:
+                        break
+                    copied += n
+            except OSError:
+                if copied:
+                    raise
+                continue  # 跨文件系统、平台不支持等，换下一种方式
+            # 系统调用直接移动了文件描述符的位置，同步到Python文件对象
+            dst.seek(os.lseek(dst_fd, 0, os.SEEK_CUR))
+            return copied
+
+        buffer = memoryview(bytearray(max(1, min(length, self.CHUNK_SIZE))))
+        while copied < length:
+            n = src.readinto(buffer[:min(length - copied, len(buffer))])
+            if not n:
+                break
+            dst.write(buffer[:n])
+            copied += n
+        return copied
+
     def generate_bif(self, bif_path: Path) -> str:
         """生成BIF（Boot Image Format）文件内容
 
@@ -215,18 +304,13 @@ class BinMerger:
         """验证偏移地址是否重叠"""
         self.components.sort(key=lambda x: x['offset'])
 
-        for i in range(len(self.components) - 1):
-            curr = self.components[i]
-            next_comp = self.components[i + 1]
-
-            curr_end = curr['offset'] + curr['size']
-            if curr_end > next_comp['offset']:
-                print(f"错误: 文件重叠检测到:")
-                print(f"  {curr['name']} (偏移: 0x{curr['offset']:08x}, 大小: {curr['size']})")
-                print(f"  {next_comp['name']} (偏移: 0x{next_comp['offset']:08x})")
-                return False
+        overlaps = self.find_overlaps()
+        for curr, next_comp in overlaps:
+            print(f"错误: 文件重叠检测到:")
+            print(f"  {curr['name']} (偏移: 0x{curr['offset']:08x}, 大小: {curr['size']})")
+            print(f"  {next_comp['name']} (偏移: 0x{next_comp['offset']:08x})")
 
-        return True
+        return not overlaps
 
 
 def parse_arguments():
@@ -248,6 +332,8 @@ def parse_arguments():
     parser.add_argument('--bootgen-path', help='bootgen工具路径 (可选)')
     parser.add_argument('--simple-merge', action='store_true',
                        help='使用简单合并而非bootgen')
+    parser.add_argument('--pad-byte', default='0xFF',
+                       help='简单合并时空隙的填充值 (默认: 0xFF)')
 
     # 常用组件的快捷选项
     parser.add_argument('--fsbl', help='FSBL文件路径')
@@ -275,7 +361,7 @@ def main():
     args = parse_arguments()
 
     try:
-        merger = BinMerger(args.output, args.platform)
+        merger = BinMerger(args.output, args.platform, int(args.pad_byte, 0))
 
         # 添加快捷选项指定的组件
         if args.fsbl:
@@ -101,18 +101,17 @@ class Packager:
         print("wheel包构建完成")
         return True
 
-    def build_executable(self, onefile=True):
-        """构建独立可执行文件"""
-        print("构建独立可执行文件...")
+    @property
+    def bundle_name(self):
+        """单目录模式的程序目录名（带版本号，不同版本互不覆盖）"""
+        return f"FPGABuilder-{self.version}"
 
-        try:
-            import PyInstaller
-        except ImportError:
-            print("错误: PyInstaller未安装")
-            print("运行: pip install pyinstaller")
-            return False
+    def pyinstaller_spec(self, onefile=True):
+        """生成PyInstaller spec文件内容
 
-        # 创建临时spec文件
+        单文件模式每次启动都要把整个程序解压到临时目录；单目录模式输出
+        dist/FPGABuilder-<版本>/，解压（安装）一次后每次启动直接复用。
+        """
         spec_content = fr"""
 # -*- mode: python ; coding: utf-8 -*-
 
@@ -130,9 +129,25 @@ a = Analysis(
     hiddenimports=[
         'core',
         'core.config',
+        'core.config_layers',
+        'core.config_models',
         'core.project',
         'core.plugin_manager',
         'core.plugin_base',
+        'core.admission',
+        'core.async_process',
+        'core.tool_cache',
+        'core.tool_inventory',
+        'core.build_graph',
+        'core.multi_project',
+        'core.build_matrix',
+        'core.artifact_cache',
+        'core.distributed',
+        'core.build_service',
+        'core.file_watch',
+        'core.hooks',
+        'core.release_archive',
+        'core.startup',
         'core.__init__',
         'plugins',
         'plugins.vivado',
@@ -140,6 +155,11 @@ a = Analysis(
         'plugins.vivado.file_scanner',
         'plugins.vivado.tcl_templates',
         'plugins.vivado.packbin_templates',
+        'plugins.vivado.impl_sweep',
+        'plugins.vivado.watch',
+        'plugins.vivado.preflight',
+        'plugins.vivado.bitfile',
+        'plugins.vivado.cfgmem',
         'plugins.vivado.__init__',
         'plugins.__init__',
         'click',
@@ -171,7 +191,11 @@ a = Analysis(
 
 pyz = PYZ(a.pure)
 
-exe = EXE(
+{{exe_and_collect}}
+"""
+
+        if onefile:
+            exe_and_collect = """exe = EXE(
     pyz,
     a.scripts,
     a.binaries,
@@ -193,8 +217,54 @@ exe = EXE(
     icon=None,
 )
 
-{'# 单文件模式' if onefile else ''}
+# 单文件模式
+"""
+        else:
+            exe_and_collect = f"""exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='FPGABuilder',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=True,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+    icon=None,
+)
+
+# 单目录模式：程序目录带版本号，启动时不再解压
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='{self.bundle_name}',
+)
 """
+        return spec_content.replace('{exe_and_collect}', exe_and_collect)
+
+    def build_executable(self, onefile=True):
+        """构建独立可执行文件"""
+        print("构建独立可执行文件...")
+
+        try:
+            import PyInstaller
+        except ImportError:
+            print("错误: PyInstaller未安装")
+            print("运行: pip install pyinstaller")
+            return False
+
+        # 创建临时spec文件
+        spec_content = self.pyinstaller_spec(onefile)
 
         # 写入spec文件
         spec_file = self.project_root / "FPGABuilder.spec"
@@ -226,6 +296,8 @@ exe = EXE(
             for exe_file in self.output_dir.glob("FPGABuilder*"):
                 if exe_file.is_file():
                     print(f"可执行文件已创建: {exe_file}")
+                elif not onefile and exe_file.name == self.bundle_name:
+                    print(f"程序目录已创建: {exe_file}")
         else:
             print("警告: 未找到可执行文件，可能构建失败")
 
@@ -838,6 +910,8 @@ def main():
     parser.add_argument("--sdist", action="store_true", help="构建源代码分发包")
     parser.add_argument("--wheel", action="store_true", help="构建wheel包")
     parser.add_argument("--exe", action="store_true", help="构建独立可执行文件")
+    parser.add_argument("--onedir", action="store_true",
+                        help="与--exe一起使用：构建带版本号的单目录程序（启动时不解压，冷启动更快）")
     parser.add_argument("--installer", action="store_true", help="构建Windows安装程序")
     parser.add_argument("--offline-installer", action="store_true", help="构建Windows离线安装程序（包含Python和所有依赖）")
     parser.add_argument("--all", action="store_true", help="打包所有格式")
@@ -870,7 +944,7 @@ def main():
         success = packager.build_wheel() and success
 
     if args.exe:
-        success = packager.build_executable() and success
+        success = packager.build_executable(onefile=not args.onedir) and success
 
     if args.installer:
         success = packager.build_windows_installer() and success
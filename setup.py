@@ -79,7 +79,7 @@ setup(
     packages=find_packages(where="src"),
     include_package_data=True,
     package_data={
-        "": ["*.yaml", "*.yml", "*.tcl", "*.template", "*.md", "*.txt"],
+        "": ["*.yaml", "*.yml", "*.tcl", "*.template", "*.md", "*.txt", "plugin.json"],
         "fpga_builder": ["config/*.yaml", "config/templates/*", "templates/*"],
     },
     python_requires=">=3.8",
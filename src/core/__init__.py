@@ -6,10 +6,23 @@ __version__ = "0.2.0"
 __author__ = "YiHok"
 __license__ = "Creative Commons Attribution-NonCommercial-ShareAlike 4.0 International"
 
-from .config import ConfigManager
-from .project import ProjectManager
-from .plugin_manager import PluginManager
-from .cli import CLI
+# 子模块按需导入：导入core（如运行 fpgab --version）时不加载yaml、GitPython等
+_EXPORTS = {
+    "ConfigManager": ".config",
+    "ProjectManager": ".project",
+    "PluginManager": ".plugin_manager",
+    "CLI": ".cli",
+}
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        import importlib
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "ConfigManager",
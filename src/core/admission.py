@@ -0,0 +1,635 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+主机级内存准入控制
+
+同一主机上的多个fpgab进程通过 ~/.fpga_builder/admission 下的锁文件和
+共享状态文件协调Vivado运行：根据历史记录估算每个阶段的峰值内存，
+在可用内存不足时延迟启动新的Vivado进程，避免布线阶段被OOM终止。
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import psutil
+except ImportError:  # psutil为可选依赖
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+GiB = 1024 ** 3
+
+# 没有历史记录时各阶段的默认峰值内存估算
+DEFAULT_STAGE_ESTIMATES: Dict[str, int] = {
+    'create_project': 2 * GiB,
+    'synthesize': 6 * GiB,
+    'implement': 12 * GiB,
+    'generate_bitstream': 4 * GiB,
+}
+DEFAULT_ESTIMATE = 4 * GiB
+
+# 每个键保留的历史记录条数
+HISTORY_LIMIT = 10
+
+# 排队条目在最后一次轮询后保留的时间（秒），超过后视为已放弃排队
+WAITING_GRACE = 60.0
+
+# 比较进程启动时间时允许的误差（秒），不同查询方式的精度不同
+START_TIME_TOLERANCE = 1.0
+
+# Windows进程查询常量
+_PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+_ERROR_ACCESS_DENIED = 5
+_STILL_ACTIVE = 259
+# FILETIME（1601年起的100ns计数）与Unix时间的差值
+_FILETIME_EPOCH = 116444736000000000
+
+
+class AdmissionError(Exception):
+    """准入控制错误"""
+    pass
+
+
+class AdmissionTimeoutError(AdmissionError):
+    """等待准入超时"""
+    pass
+
+
+def default_state_dir() -> Path:
+    """获取默认共享状态目录"""
+    return Path.home() / '.fpga_builder' / 'admission'
+
+
+def format_bytes(value: Optional[int]) -> str:
+    """格式化字节数为GiB字符串"""
+    if value is None:
+        return "未知"
+    return f"{value / GiB:.1f} GiB"
+
+
+def get_available_memory() -> Optional[int]:
+    """获取主机当前可用内存（字节），无法获取时返回None"""
+    if psutil is not None:
+        try:
+            return int(psutil.virtual_memory().available)
+        except Exception:
+            pass
+
+    if sys.platform.startswith('linux'):
+        try:
+            with open('/proc/meminfo', 'r', encoding='ascii') as f:
+                for line in f:
+                    if line.startswith('MemAvailable:'):
+                        return int(line.split()[1]) * 1024
+        except (OSError, ValueError, IndexError):
+            pass
+
+    if sys.platform == 'win32':
+        try:
+            import ctypes
+
+            class _MemoryStatusEx(ctypes.Structure):
+                _fields_ = [
+                    ('dwLength', ctypes.c_ulong),
+                    ('dwMemoryLoad', ctypes.c_ulong),
+                    ('ullTotalPhys', ctypes.c_ulonglong),
+                    ('ullAvailPhys', ctypes.c_ulonglong),
+                    ('ullTotalPageFile', ctypes.c_ulonglong),
+                    ('ullAvailPageFile', ctypes.c_ulonglong),
+                    ('ullTotalVirtual', ctypes.c_ulonglong),
+                    ('ullAvailVirtual', ctypes.c_ulonglong),
+                    ('ullAvailExtendedVirtual', ctypes.c_ulonglong),
+                ]
+
+            status = _MemoryStatusEx()
+            status.dwLength = ctypes.sizeof(_MemoryStatusEx)
+            if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+                return int(status.ullAvailPhys)
+        except Exception:
+            pass
+
+    return None
+
+
+def _win_query_process(pid: int) -> Tuple[bool, Optional[float]]:
+    """Windows下通过OpenProcess查询进程：返回(是否存活, 启动时间)"""
+    import ctypes
+    from ctypes import wintypes
+
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    kernel32.OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+    kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+    handle = kernel32.OpenProcess(_PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        # 拒绝访问说明进程存在（属于其他用户），其他错误说明进程不存在
+        return ctypes.get_last_error() == _ERROR_ACCESS_DENIED, None
+    try:
+        code = wintypes.DWORD()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+            return True, None
+        if code.value != _STILL_ACTIVE:
+            return False, None
+        times = [wintypes.FILETIME() for _ in range(4)]
+        if not kernel32.GetProcessTimes(handle, *(ctypes.byref(t) for t in times)):
+            return True, None
+        created = (times[0].dwHighDateTime << 32) | times[0].dwLowDateTime
+        return True, (created - _FILETIME_EPOCH) / 1e7
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def _linux_start_time(pid: int) -> Optional[float]:
+    """通过/proc获取进程启动时间（Unix时间）"""
+    try:
+        with open(f'/proc/{pid}/stat', 'r', encoding='ascii', errors='ignore') as f:
+            stat = f.read()
+        ticks = int(stat[stat.rindex(')') + 2:].split()[19])
+        with open('/proc/stat', 'r', encoding='ascii') as f:
+            boot = next(int(line.split()[1]) for line in f if line.startswith('btime'))
+        return boot + ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError, StopIteration):
+        return None
+
+
+def _process_start_time(pid: int) -> Optional[float]:
+    """获取进程启动时间（Unix时间），无法获取时返回None"""
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).create_time()
+        except psutil.Error:
+            return None
+    if sys.platform == 'win32':
+        try:
+            return _win_query_process(pid)[1]
+        except (OSError, AttributeError):
+            return None
+    if sys.platform.startswith('linux'):
+        return _linux_start_time(pid)
+    return None
+
+
+def _pid_alive(pid: int, started: Optional[float] = None) -> bool:
+    """检查进程是否仍在运行
+
+    给出started（记录条目时的进程启动时间）时还会核对启动时间，
+    PID被新进程复用时视为原进程已退出。
+    """
+    if pid <= 0:
+        return False
+    current = None
+    if psutil is not None:
+        try:
+            current = psutil.Process(pid).create_time()
+        except psutil.NoSuchProcess:
+            return False
+        except psutil.Error:
+            return True
+    elif sys.platform == 'win32':
+        # Windows下os.kill(pid, 0)会终止进程，改用OpenProcess/GetExitCodeProcess
+        try:
+            alive, current = _win_query_process(pid)
+        except (OSError, AttributeError):
+            return True
+        if not alive:
+            return False
+    else:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        except OSError:
+            return False
+        if sys.platform.startswith('linux'):
+            current = _linux_start_time(pid)
+    if started is not None and current is not None:
+        return abs(current - started) <= START_TIME_TOLERANCE
+    return True
+
+
+def get_process_tree_rss(pid: int) -> int:
+    """获取进程及其所有子进程的常驻内存总和（字节）"""
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            procs = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return 0
+        total = 0
+        for proc in procs:
+            try:
+                total += proc.memory_info().rss
+            except psutil.Error:
+                continue
+        return total
+
+    if not sys.platform.startswith('linux'):
+        return 0
+
+    # 无psutil时通过/proc构建进程树
+    children: Dict[int, List[int]] = {}
+    rss: Dict[int, int] = {}
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return 0
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'r', encoding='ascii',
+                      errors='ignore') as f:
+                stat = f.read()
+            # comm字段可能包含空格，从最后一个')'之后开始解析
+            fields = stat[stat.rindex(')') + 2:].split()
+            ppid = int(fields[1])
+            rss[int(entry)] = int(fields[21]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    total = 0
+    stack = [pid]
+    seen = set()
+    while stack:
+        current = stack.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        total += rss.get(current, 0)
+        stack.extend(children.get(current, []))
+    return total
+
+
+class FileLock:
+    """跨平台的进程间文件锁"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    def __enter__(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+        if sys.platform == 'win32':
+            import msvcrt
+            while True:
+                try:
+                    msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.05)
+        else:
+            import fcntl
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if sys.platform == 'win32':
+                import msvcrt
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+
+class MemorySampler(threading.Thread):
+    """后台采样进程树内存，记录峰值"""
+
+    def __init__(self, pid: int, interval: float = 2.0,
+                 on_sample: Optional[Callable[[int], None]] = None):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.on_sample = on_sample
+        self.peak = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            current = get_process_tree_rss(self.pid)
+            if current > self.peak:
+                self.peak = current
+            if self.on_sample:
+                try:
+                    self.on_sample(current)
+                except Exception as e:
+                    logger.debug(f"内存采样回调失败: {e}")
+            self._stop_event.wait(self.interval)
+
+    def stop(self) -> int:
+        """停止采样并返回峰值"""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout=self.interval + 1)
+        return self.peak
+
+
+@dataclass
+class AdmissionTicket:
+    """一次已获准入的Vivado运行"""
+    run_id: str
+    key: str
+    stage: str
+    reserved: int
+    controller: 'AdmissionController'
+    started: float = field(default_factory=time.time)
+    sampler: Optional[MemorySampler] = None
+    failed: bool = False
+
+    def track(self, pid: int) -> None:
+        """开始跟踪Vivado进程的内存占用"""
+        self.controller._update_run(self.run_id, tool_pid=pid)
+        self.sampler = MemorySampler(
+            pid,
+            interval=self.controller.sample_interval,
+            on_sample=lambda rss: self.controller._update_run(self.run_id, rss=rss)
+        )
+        self.sampler.start()
+
+    @property
+    def peak(self) -> int:
+        return self.sampler.peak if self.sampler else 0
+
+
+class AdmissionController:
+    """基于内存估算的Vivado运行准入控制器"""
+
+    def __init__(self, state_dir: Optional[Path] = None,
+                 memory_margin: float = 0.15,
+                 poll_interval: float = 10.0,
+                 sample_interval: float = 2.0,
+                 timeout: Optional[float] = None,
+                 reporter: Optional[Callable[[str], None]] = None):
+        self.state_dir = Path(state_dir) if state_dir else default_state_dir()
+        self.memory_margin = memory_margin
+        self.poll_interval = poll_interval
+        self.sample_interval = sample_interval
+        self.timeout = timeout
+        self.reporter = reporter or print
+        self.lock_path = self.state_dir / 'admission.lock'
+        self.state_path = self.state_dir / 'state.json'
+        self._update_lock = threading.Lock()
+        self._last_update: Dict[str, float] = {}
+        self._pid_started = _process_start_time(os.getpid())
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any],
+                    reporter: Optional[Callable[[str], None]] = None
+                    ) -> Optional['AdmissionController']:
+        """根据配置创建控制器，未启用时返回None"""
+        disabled = ('0', 'false', 'no', 'off')
+        if os.environ.get('FPGABUILDER_ADMISSION', '').lower() in disabled:
+            return None
+        settings = config.get('build', {}).get('admission', {})
+        if not settings.get('enabled', True):
+            return None
+        state_dir = settings.get('state_dir')
+        return cls(
+            state_dir=Path(state_dir).expanduser() if state_dir else None,
+            memory_margin=settings.get('memory_margin', 0.15),
+            poll_interval=settings.get('poll_interval', 10.0),
+            timeout=settings.get('timeout'),
+            reporter=reporter
+        )
+
+    # ------------------------------------------------------------------
+    # 共享状态
+    # ------------------------------------------------------------------
+
+    def _load_state(self) -> Dict[str, Any]:
+        """读取共享状态（调用方需持有锁）"""
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        state.setdefault('running', {})
+        state.setdefault('waiting', {})
+        state.setdefault('history', {})
+        return state
+
+    def _save_state(self, state: Dict[str, Any]) -> None:
+        """原子写入共享状态（调用方需持有锁）"""
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    def _prune(self, state: Dict[str, Any]) -> None:
+        """清理已退出进程（含PID已被复用的）遗留的条目和过期的排队条目"""
+        now = time.time()
+        for section in ('running', 'waiting'):
+            for run_id, entry in list(state[section].items()):
+                if not _pid_alive(entry.get('pid', -1), entry.get('pid_started')):
+                    del state[section][run_id]
+                elif section == 'waiting' and entry.get('expires', now) < now:
+                    # 进程仍在但已停止轮询（如守护进程中被取消的任务）
+                    del state[section][run_id]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """获取当前共享状态快照（用于状态显示）"""
+        with FileLock(self.lock_path):
+            state = self._load_state()
+            self._prune(state)
+        state['available'] = get_available_memory()
+        return state
+
+    # ------------------------------------------------------------------
+    # 内存估算
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def history_key(part: str, project: str, stage: str) -> str:
+        """生成历史记录键"""
+        return f"{part or 'unknown'}|{project or 'unknown'}|{stage}"
+
+    def estimate(self, part: str, project: str, stage: str,
+                 state: Optional[Dict[str, Any]] = None) -> int:
+        """估算阶段的峰值内存
+
+        优先使用同一器件/工程的历史峰值，其次使用同一器件其他工程的记录，
+        最后回退到按阶段的默认值。
+        """
+        if state is None:
+            with FileLock(self.lock_path):
+                state = self._load_state()
+
+        history = state.get('history', {})
+        peaks = history.get(self.history_key(part, project, stage), [])
+        if not peaks:
+            suffix = f"|{stage}"
+            prefix = f"{part or 'unknown'}|"
+            peaks = [
+                peak
+                for key, values in history.items()
+                if key.startswith(prefix) and key.endswith(suffix)
+                for peak in values
+            ]
+
+        if peaks:
+            return int(max(peaks) * (1 + self.memory_margin))
+        return DEFAULT_STAGE_ESTIMATES.get(stage, DEFAULT_ESTIMATE)
+
+    @staticmethod
+    def _outstanding(state: Dict[str, Any], exclude: Optional[str] = None) -> int:
+        """运行中任务尚未用到的预留内存总和"""
+        total = 0
+        for run_id, entry in state['running'].items():
+            if run_id == exclude:
+                continue
+            total += max(0, entry.get('reserved', 0) - entry.get('rss', 0))
+        return total
+
+    # ------------------------------------------------------------------
+    # 准入
+    # ------------------------------------------------------------------
+
+    def acquire(self, part: str, project: str, stage: str) -> AdmissionTicket:
+        """等待直到有足够内存启动新的Vivado运行"""
+        key = self.history_key(part, project, stage)
+        run_id = f"{os.getpid()}-{threading.get_ident()}-{time.time_ns()}"
+        deadline = time.time() + self.timeout if self.timeout else None
+        last_reason = None
+
+        while True:
+            with FileLock(self.lock_path):
+                state = self._load_state()
+                self._prune(state)
+
+                need = self.estimate(part, project, stage, state)
+                available = get_available_memory()
+                outstanding = self._outstanding(state)
+                effective = None if available is None else available - outstanding
+
+                waiting = state['waiting'].setdefault(run_id, {
+                    'pid': os.getpid(),
+                    'pid_started': self._pid_started,
+                    'key': key,
+                    'stage': stage,
+                    'since': time.time()
+                })
+                waiting['expires'] = (time.time() + 3 * self.poll_interval
+                                      + WAITING_GRACE)
+                # 先到先得：只有最早排队的任务可以被准入，避免大任务饿死
+                oldest = min(state['waiting'].items(),
+                             key=lambda item: item[1]['since'])[0]
+
+                if not state['running']:
+                    admitted, reason = True, None
+                elif effective is None:
+                    admitted, reason = True, None
+                elif oldest != run_id:
+                    admitted = False
+                    reason = "前面还有排队的Vivado任务"
+                elif need <= effective:
+                    admitted, reason = True, None
+                else:
+                    admitted = False
+                    reason = (
+                        f"需要约 {format_bytes(need)}，当前可用 {format_bytes(available)}，"
+                        f"其中 {format_bytes(outstanding)} 已预留给 "
+                        f"{len(state['running'])} 个运行中的Vivado任务"
+                    )
+
+                if admitted:
+                    del state['waiting'][run_id]
+                    state['running'][run_id] = {
+                        'pid': os.getpid(),
+                        'pid_started': self._pid_started,
+                        'key': key,
+                        'stage': stage,
+                        'reserved': need,
+                        'rss': 0,
+                        'started': time.time()
+                    }
+                    self._save_state(state)
+                    return AdmissionTicket(run_id=run_id, key=key, stage=stage,
+                                           reserved=need, controller=self)
+
+                state['waiting'][run_id]['reason'] = reason
+                self._save_state(state)
+
+            if reason != last_reason:
+                self.reporter(f"[WAIT] 延迟启动Vivado ({stage}): {reason}")
+                last_reason = reason
+
+            if deadline and time.time() >= deadline:
+                self._forget(run_id)
+                raise AdmissionTimeoutError(f"等待内存准入超时 ({stage}): {reason}")
+
+            try:
+                time.sleep(self.poll_interval)
+            except BaseException:
+                # Ctrl-C等中断时移除排队条目，不阻塞后续任务
+                self._forget(run_id)
+                raise
+
+    def release(self, ticket: AdmissionTicket, success: bool = True) -> None:
+        """释放准入并记录峰值内存"""
+        peak = ticket.sampler.stop() if ticket.sampler else 0
+        success = success and not ticket.failed
+        with FileLock(self.lock_path):
+            state = self._load_state()
+            state['running'].pop(ticket.run_id, None)
+            # 失败的运行可能提前退出，其峰值不代表真实需求
+            if success and peak > 0:
+                peaks = state['history'].setdefault(ticket.key, [])
+                peaks.append(peak)
+                del peaks[:-HISTORY_LIMIT]
+            self._save_state(state)
+
+    def _forget(self, run_id: str) -> None:
+        """移除排队条目"""
+        with FileLock(self.lock_path):
+            state = self._load_state()
+            state['waiting'].pop(run_id, None)
+            self._save_state(state)
+
+    def _update_run(self, run_id: str, **values) -> None:
+        """更新运行中条目（采样回调，限制写入频率）"""
+        with self._update_lock:
+            now = time.time()
+            last = self._last_update.get(run_id, 0)
+            if 'rss' in values and now - last < self.poll_interval:
+                return
+            self._last_update[run_id] = now
+        with FileLock(self.lock_path):
+            state = self._load_state()
+            entry = state['running'].get(run_id)
+            if entry is None:
+                return
+            if 'rss' in values:
+                entry['rss'] = max(entry.get('rss', 0), values['rss'])
+            if 'tool_pid' in values:
+                entry['tool_pid'] = values['tool_pid']
+            self._save_state(state)
+
+    @contextmanager
+    def admit(self, part: str, project: str, stage: str) -> Iterator[AdmissionTicket]:
+        """上下文管理器形式的准入"""
+        ticket = self.acquire(part, project, stage)
+        success = False
+        try:
+            yield ticket
+            success = True
+        finally:
+            self.release(ticket, success=success)
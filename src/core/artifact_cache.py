@@ -0,0 +1,371 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+内容寻址的构建产物缓存
+
+以构建阶段的指纹（输入文件哈希、相关配置子树、Vivado版本、器件）为键，
+保存该阶段的输出（DCP、.bit、.ltx、.bin、报告等）。缓存目录可以是本地
+目录或团队共享的NFS路径，同一提交只需要构建一次。
+
+目录结构:
+    objects/<前2位>/<sha256>     文件内容（按内容去重）
+    entries/<前2位>/<键>.json    阶段产物清单，修改时间即最近使用时间
+    stats.json                   命中/未命中/节省字节数统计
+
+所有写入先写临时文件再原子重命名，超过容量上限时按最近使用时间淘汰。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from .admission import FileLock
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 1
+
+# 默认容量上限
+DEFAULT_MAX_SIZE = 50 * 1024 ** 3
+
+# 未被清单引用的内容文件在此时间内不回收（可能正在被其他进程写入）
+ORPHAN_GRACE_SECONDS = 600
+
+_SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+def parse_size(value: Union[str, int, float, None]) -> Optional[int]:
+    """解析容量字符串，如 50G、512M、1073741824"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMGT]?)(?:i?B)?\s*', str(value),
+                         re.IGNORECASE)
+    if not match:
+        raise ValueError(f"无效的容量: {value}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+
+def format_size(value: int) -> str:
+    """格式化字节数"""
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if abs(value) < 1024 or unit == 'GiB':
+            return f"{value:.1f} {unit}" if unit != 'B' else f"{value} B"
+        value /= 1024
+    return f"{value:.1f} GiB"
+
+
+def default_cache_dir() -> Path:
+    """获取默认缓存目录（环境变量 FPGABUILDER_CACHE_DIR 优先）"""
+    env_dir = os.environ.get('FPGABUILDER_CACHE_DIR')
+    if env_dir:
+        return Path(env_dir).expanduser()
+    return Path.home() / '.fpga_builder' / 'cache'
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _atomic_write_json(path: Path, data: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _atomic_copy(src: Path, dest: Path) -> None:
+    """复制到临时文件后原子重命名"""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = dest.with_name(f".{dest.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, dest)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class ArtifactCache:
+    """内容寻址的构建产物缓存"""
+
+    def __init__(self, root: Optional[Path] = None,
+                 max_size: Optional[int] = DEFAULT_MAX_SIZE):
+        self.root = Path(root).expanduser() if root else default_cache_dir()
+        self.max_size = max_size
+        self.objects_dir = self.root / 'objects'
+        self.entries_dir = self.root / 'entries'
+        self.stats_path = self.root / 'stats.json'
+        self.lock_path = self.root / 'cache.lock'
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional['ArtifactCache']:
+        """根据 build.cache 配置创建缓存，未配置时返回None
+
+        设置环境变量 FPGABUILDER_CACHE_DIR 也会启用缓存；FPGABUILDER_CACHE=0 禁用。
+        """
+        disabled = ('0', 'false', 'no', 'off')
+        if os.environ.get('FPGABUILDER_CACHE', '').lower() in disabled:
+            return None
+        settings = config.get('build', {}).get('cache')
+        if settings is None and not os.environ.get('FPGABUILDER_CACHE_DIR'):
+            return None
+        settings = settings or {}
+        if not settings.get('enabled', True):
+            return None
+        path = settings.get('path')
+        return cls(
+            root=Path(path).expanduser() if path else None,
+            max_size=parse_size(settings.get('max_size', DEFAULT_MAX_SIZE))
+        )
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest
+
+    def _entry_path(self, key: str) -> Path:
+        return self.entries_dir / key[:2] / f"{key}.json"
+
+    def _update_stats(self, **deltas: int) -> None:
+        try:
+            with FileLock(self.lock_path):
+                try:
+                    with open(self.stats_path, 'r', encoding='utf-8') as f:
+                        stats = json.load(f)
+                except (OSError, ValueError):
+                    stats = {}
+                for name, delta in deltas.items():
+                    stats[name] = stats.get(name, 0) + delta
+                _atomic_write_json(self.stats_path, stats)
+        except OSError as e:
+            logger.warning(f"无法更新缓存统计: {e}")
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """获取产物清单，所有内容文件都存在时才算命中"""
+        try:
+            with open(self._entry_path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get('format') != CACHE_FORMAT_VERSION:
+            return None
+        for item in entry.get('files', []):
+            try:
+                if os.stat(self._object_path(item['sha256'])).st_size != item['size']:
+                    return None
+            except OSError:
+                return None
+        return entry
+
+    def restore(self, key: str, base_dir: Path) -> Optional[List[str]]:
+        """将缓存的产物恢复到base_dir下，未命中时返回None
+
+        Returns:
+            恢复的文件（相对base_dir的路径）
+        """
+        entry = self.lookup(key)
+        if entry is None:
+            self._update_stats(misses=1)
+            return None
+
+        restored = []
+        restored_bytes = 0
+        try:
+            for item in entry['files']:
+                dest = Path(base_dir) / item['path']
+                _atomic_copy(self._object_path(item['sha256']), dest)
+                if item.get('mode'):
+                    os.chmod(dest, item['mode'])
+                restored.append(item['path'])
+                restored_bytes += item['size']
+        except OSError as e:
+            # 恢复过程中内容文件被淘汰：按未命中处理
+            logger.warning(f"从缓存恢复失败: {e}")
+            self._update_stats(misses=1)
+            return None
+
+        # 更新最近使用时间
+        try:
+            os.utime(self._entry_path(key))
+        except OSError:
+            pass
+        self._update_stats(hits=1, bytes_saved=restored_bytes)
+        return restored
+
+    def store(self, key: str, name: str, files: Iterable[Path], base_dir: Path,
+              metadata: Optional[Dict[str, Any]] = None) -> int:
+        """保存阶段产物
+
+        Args:
+            key: 阶段指纹
+            name: 阶段名称
+            files: 产物文件
+            base_dir: 产物路径的基准目录（恢复时相对此目录）
+            metadata: 附加信息（如耗时，用于统计）
+
+        Returns:
+            新写入的字节数（已存在的内容不重复写入）
+        """
+        base_dir = Path(base_dir)
+        items = []
+        written = 0
+        for path in files:
+            path = Path(path)
+            if not path.is_absolute():
+                path = base_dir / path
+            if not path.is_file():
+                continue
+            digest = _hash_file(path)
+            size = path.stat().st_size
+            blob = self._object_path(digest)
+            if not blob.exists():
+                _atomic_copy(path, blob)
+                written += size
+            items.append({
+                'path': Path(os.path.relpath(path, base_dir)).as_posix(),
+                'sha256': digest,
+                'size': size,
+                'mode': path.stat().st_mode & 0o777,
+            })
+        if not items:
+            return 0
+
+        _atomic_write_json(self._entry_path(key), {
+            'format': CACHE_FORMAT_VERSION,
+            'key': key,
+            'name': name,
+            'created': time.time(),
+            'files': items,
+            'metadata': metadata or {},
+        })
+        self._update_stats(stores=1, bytes_stored=written)
+        if self.max_size is not None:
+            self.evict()
+        return written
+
+    def _scan(self) -> Dict[str, Any]:
+        """列出所有清单和内容文件"""
+        entries = []
+        if self.entries_dir.is_dir():
+            for path in self.entries_dir.glob('*/*.json'):
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        entry = json.load(f)
+                    entries.append((path.stat().st_mtime, path, entry))
+                except (OSError, ValueError):
+                    continue
+        objects = {}
+        if self.objects_dir.is_dir():
+            for path in self.objects_dir.glob('*/*'):
+                if path.name.startswith('.'):
+                    continue
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                objects[path.name] = (st.st_size, st.st_mtime, path)
+        return {'entries': entries, 'objects': objects}
+
+    def evict(self, max_size: Optional[int] = None) -> int:
+        """按最近使用时间淘汰清单，并回收未被引用的内容文件
+
+        Returns:
+            淘汰的清单数
+        """
+        limit = self.max_size if max_size is None else max_size
+        removed = 0
+        with FileLock(self.lock_path):
+            scan = self._scan()
+            objects = scan['objects']
+            total = sum(size for size, _, _ in objects.values())
+            if limit is not None and total > limit:
+                # 最久未使用的清单在前
+                entries = sorted(scan['entries'], key=lambda e: e[0])
+                refcount: Dict[str, int] = {}
+                for _, _, entry in entries:
+                    for item in entry.get('files', []):
+                        refcount[item['sha256']] = refcount.get(item['sha256'], 0) + 1
+                for _, path, entry in entries:
+                    if total <= limit:
+                        break
+                    try:
+                        path.unlink()
+                    except OSError:
+                        continue
+                    removed += 1
+                    for item in entry.get('files', []):
+                        digest = item['sha256']
+                        refcount[digest] -= 1
+                        if refcount[digest] == 0 and digest in objects:
+                            size, _, blob = objects.pop(digest)
+                            try:
+                                blob.unlink()
+                                total -= size
+                            except OSError:
+                                pass
+            self._collect_orphans(objects)
+        if removed:
+            self._update_stats(evictions=removed)
+        return removed
+
+    def _collect_orphans(self, objects: Dict[str, Any]) -> None:
+        """删除不被任何清单引用的内容文件（调用方需持有锁）"""
+        referenced = set()
+        for _, _, entry in self._scan()['entries']:
+            referenced.update(item['sha256'] for item in entry.get('files', []))
+        now = time.time()
+        for digest, (_, mtime, path) in list(objects.items()):
+            if digest not in referenced and now - mtime > ORPHAN_GRACE_SECONDS:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计"""
+        try:
+            with open(self.stats_path, 'r', encoding='utf-8') as f:
+                stats = json.load(f)
+        except (OSError, ValueError):
+            stats = {}
+        scan = self._scan()
+        lookups = stats.get('hits', 0) + stats.get('misses', 0)
+        return {
+            'path': str(self.root),
+            'entries': len(scan['entries']),
+            'size': sum(size for size, _, _ in scan['objects'].values()),
+            'max_size': self.max_size,
+            'hits': stats.get('hits', 0),
+            'misses': stats.get('misses', 0),
+            'hit_rate': stats.get('hits', 0) / lookups if lookups else 0.0,
+            'bytes_saved': stats.get('bytes_saved', 0),
+            'stores': stats.get('stores', 0),
+            'bytes_stored': stats.get('bytes_stored', 0),
+            'evictions': stats.get('evictions', 0),
+        }
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with FileLock(self.lock_path):
+            for directory in (self.entries_dir, self.objects_dir):
+                shutil.rmtree(directory, ignore_errors=True)
+            try:
+                self.stats_path.unlink()
+            except OSError:
+                pass
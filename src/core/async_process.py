@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+基于asyncio的外部工具执行
+
+通过 asyncio.create_subprocess_exec 启动EDA工具，逐行流式转发输出，
+任务被取消或出错时终止整个进程树。单个事件循环即可并发驱动多个构建。
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, List, Optional, TypeVar, Union
+
+try:
+    import psutil
+except ImportError:  # psutil为可选依赖
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# 输出回调: (流名称 'stdout'/'stderr', 一行文本)
+OutputCallback = Callable[[str, str], None]
+
+
+@dataclass
+class ProcessResult:
+    """外部进程执行结果"""
+    args: List[str]
+    returncode: int
+    stdout: str
+    stderr: str
+
+    def to_completed_process(self) -> subprocess.CompletedProcess:
+        """转换为 subprocess.CompletedProcess"""
+        return subprocess.CompletedProcess(self.args, self.returncode,
+                                           self.stdout, self.stderr)
+
+
+def kill_process_tree(pid: int) -> None:
+    """终止进程及其所有子进程"""
+    if psutil is not None:
+        try:
+            parent = psutil.Process(pid)
+            children = parent.children(recursive=True)
+        except psutil.Error:
+            return
+        for proc in children + [parent]:
+            try:
+                proc.kill()
+            except psutil.Error:
+                pass
+        return
+
+    if sys.platform == 'win32':
+        subprocess.run(['taskkill', '/F', '/T', '/PID', str(pid)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return
+
+    # POSIX: 子进程以新会话启动，进程组ID即为pid
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+# 每次从管道读取的字节数。按块读取后自行切分行，不受 StreamReader
+# 默认64 KiB单行长度限制（Vivado偶尔会输出超长的单行日志）
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def _emit(data: bytes, name: str, chunks: List[str],
+          on_output: Optional[OutputCallback]) -> None:
+    text = data.decode('utf-8', errors='ignore')
+    chunks.append(text)
+    if on_output is not None:
+        on_output(name, text.rstrip('\r\n'))
+
+
+async def _pump(stream: asyncio.StreamReader, name: str, chunks: List[str],
+                on_output: Optional[OutputCallback]) -> None:
+    """读取输出流直至结束"""
+    pending = b''
+    while True:
+        data = await stream.read(READ_CHUNK_SIZE)
+        if not data:
+            break
+        pending += data
+        *lines, pending = pending.split(b'\n')
+        for line in lines:
+            _emit(line + b'\n', name, chunks, on_output)
+    if pending:
+        _emit(pending, name, chunks, on_output)
+
+
+async def run_process(cmd: List[str], cwd: Optional[Union[str, Path]] = None,
+                      env: Optional[dict] = None,
+                      on_output: Optional[OutputCallback] = None,
+                      on_start: Optional[Callable[[int], None]] = None
+                      ) -> ProcessResult:
+    """异步运行外部进程
+
+    Args:
+        cmd: 命令及参数
+        cwd: 工作目录
+        env: 环境变量
+        on_output: 每读取一行输出时调用
+        on_start: 进程启动后以pid调用（例如用于内存采样）
+
+    任务被取消或读取输出出错时会终止整个进程树，然后重新抛出异常。
+    """
+    kwargs: dict = {}
+    if sys.platform == 'win32':
+        kwargs['creationflags'] = subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs['start_new_session'] = True
+
+    process = await asyncio.create_subprocess_exec(
+        *[str(c) for c in cmd],
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=str(cwd) if cwd else None,
+        env=env,
+        **kwargs
+    )
+    if on_start is not None:
+        on_start(process.pid)
+
+    stdout_chunks: List[str] = []
+    stderr_chunks: List[str] = []
+    try:
+        await asyncio.gather(
+            _pump(process.stdout, 'stdout', stdout_chunks, on_output),
+            _pump(process.stderr, 'stderr', stderr_chunks, on_output),
+        )
+        returncode = await process.wait()
+    except BaseException as e:
+        # 取消、输出回调异常或读取错误时都不能留下孤儿进程
+        if isinstance(e, asyncio.CancelledError):
+            logger.info(f"任务已取消，终止进程树: {process.pid}")
+        else:
+            logger.warning(f"读取进程输出失败，终止进程树: {process.pid}: {e}")
+        kill_process_tree(process.pid)
+        try:
+            await asyncio.shield(process.wait())
+        except Exception:
+            pass
+        raise
+
+    return ProcessResult(
+        args=[str(c) for c in cmd],
+        returncode=returncode,
+        stdout=''.join(stdout_chunks),
+        stderr=''.join(stderr_chunks)
+    )
+
+
+async def run_blocking(func: Callable[..., T], *args: Any) -> T:
+    """在线程池中运行阻塞函数，避免阻塞事件循环"""
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, func, *args)
+
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """在同步代码中运行协程
+
+    当前线程没有运行中的事件循环时直接使用 asyncio.run；
+    否则（例如在Jupyter或其他协程中调用同步接口）在独立线程中运行。
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    outcome: dict = {}
+
+    def _target():
+        try:
+            outcome['value'] = asyncio.run(coro)
+        except BaseException as e:  # 将异常传回调用线程
+            outcome['error'] = e
+
+    thread = threading.Thread(target=_target, daemon=True)
+    thread.start()
+    thread.join()
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['value']
@@ -0,0 +1,630 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+基于指纹的构建图
+
+构建阶段被建模为带有声明输入/输出的节点组成的有向无环图。每个节点的指纹
+覆盖输入文件哈希、相关配置子树、工具版本和依赖节点的指纹。与make/ninja
+类似，只运行过期的节点，相互独立的节点在同一个事件循环中并行运行。
+节点状态保存在 <project_dir>/.fpgab/graph_state.json 中，每个阶段的有效配置
+指纹另外记录在其输出目录的 .fpgab-<阶段>.json 中。配置了产物缓存时，
+可缓存节点在运行前先按指纹从缓存恢复输出。
+"""
+
+import asyncio
+import glob
+import hashlib
+import inspect
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Union
+
+from .async_process import run_blocking, run_sync
+from .config_hash import (config_fingerprint, config_hashes, get_config_value,
+                          hash_value, normalize_config_keys)
+from .plugin_base import BuildResult
+
+logger = logging.getLogger(__name__)
+
+STATE_FORMAT_VERSION = 1
+
+# 节点动作：返回BuildResult的协程函数或普通函数
+NodeAction = Callable[[], Union[BuildResult, Awaitable[BuildResult]]]
+
+
+class BuildGraphError(Exception):
+    """构建图错误"""
+    pass
+
+
+@dataclass
+class BuildNode:
+    """构建图节点"""
+    name: str                                           # 节点名称
+    action: NodeAction                                  # 执行动作
+    deps: List[str] = field(default_factory=list)       # 依赖节点
+    inputs: List[Path] = field(default_factory=list)    # 输入文件（按内容哈希）
+    outputs: List[str] = field(default_factory=list)    # 输出文件（glob模式）
+    config_keys: List[str] = field(default_factory=list)  # 相关配置键（点分路径）
+    values: Dict[str, Any] = field(default_factory=dict)  # 其他参与指纹的值
+    tool_version: str = ""                              # 工具版本
+    description: str = ""                               # 描述
+    resources: Dict[str, float] = field(default_factory=lambda: {'cpu': 1})  # 运行时占用的资源
+    cacheable: bool = False                             # 输出可以保存到产物缓存
+    artifacts: List[str] = field(default_factory=list)  # 缓存的文件（glob模式，默认为outputs）
+    # 上游节点的输出从缓存恢复（而不是由工具自身的工程流程产生）时改用的动作，
+    # 例如从恢复的检查点以非工程模式继续；None表示总是使用action
+    detached_action: Optional[NodeAction] = None
+
+
+@dataclass
+class NodeDecision:
+    """节点是否需要运行的判断结果"""
+    name: str
+    stale: bool
+    reasons: List[str]
+    record: Dict[str, Any]
+
+
+@dataclass
+class GraphResult:
+    """构建图执行结果"""
+    success: bool
+    ran: List[str] = field(default_factory=list)        # 实际运行的节点
+    restored: List[str] = field(default_factory=list)   # 从产物缓存恢复的节点
+    up_to_date: List[str] = field(default_factory=list)  # 已是最新而跳过的节点
+    failed: List[str] = field(default_factory=list)     # 失败的节点
+    blocked: List[str] = field(default_factory=list)    # 因依赖失败未运行的节点
+    results: Dict[str, BuildResult] = field(default_factory=dict)
+    decisions: Dict[str, NodeDecision] = field(default_factory=dict)
+    duration: float = 0.0
+
+
+class ResourcePool:
+    """全局资源池
+
+    按容量（CPU核数、内存、许可证数等）限制同时运行的节点。资源需求超过
+    容量的节点在没有其他节点运行时仍可运行，避免永久阻塞。未声明容量的
+    资源不受限制。
+    """
+
+    def __init__(self, capacities: Dict[str, Optional[float]]):
+        self.capacities = {k: v for k, v in capacities.items() if v is not None}
+        self.in_use: Dict[str, float] = {k: 0 for k in self.capacities}
+        self.running = 0
+        self._condition: Optional[asyncio.Condition] = None
+
+    def _fits(self, request: Dict[str, float]) -> bool:
+        if self.running == 0:
+            return True
+        return all(
+            self.in_use[key] + amount <= self.capacities[key]
+            for key, amount in request.items() if key in self.capacities
+        )
+
+    async def acquire(self, request: Dict[str, float]) -> None:
+        """等待直到资源满足需求"""
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._fits(request))
+            for key, amount in request.items():
+                if key in self.in_use:
+                    self.in_use[key] += amount
+            self.running += 1
+
+    async def release(self, request: Dict[str, float]) -> None:
+        """释放资源"""
+        async with self._condition:
+            for key, amount in request.items():
+                if key in self.in_use:
+                    self.in_use[key] -= amount
+            self.running -= 1
+            self._condition.notify_all()
+
+
+def stage_record_path(outputs: Iterable[str], name: str,
+                      base_dir: Path) -> Optional[Path]:
+    """阶段配置指纹记录的位置：第一个输出所在的（不含通配符的）目录"""
+    for pattern in outputs:
+        directory = Path(pattern).parent
+        while glob.has_magic(str(directory)):
+            directory = directory.parent
+        if not directory.is_absolute():
+            directory = base_dir / directory
+        return directory / f'.fpgab-{name}.json'
+    return None
+
+
+class FileHasher:
+    """文件内容哈希，按(大小, 修改时间)缓存结果避免重复读取"""
+
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, cache: Optional[Dict[str, List[Any]]] = None):
+        self.cache: Dict[str, List[Any]] = cache if cache is not None else {}
+
+    def hash_file(self, path: Path) -> Optional[str]:
+        """计算文件哈希，文件不存在时返回None"""
+        key = str(Path(path).absolute())
+        try:
+            st = os.stat(key)
+        except OSError:
+            self.cache.pop(key, None)
+            return None
+
+        cached = self.cache.get(key)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+
+        digest = hashlib.sha256()
+        with open(key, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.CHUNK_SIZE), b''):
+                digest.update(chunk)
+        result = digest.hexdigest()
+        self.cache[key] = [st.st_size, st.st_mtime_ns, result]
+        return result
+
+
+class BuildGraph:
+    """构建图"""
+
+    def __init__(self, nodes: Iterable[BuildNode], config: Dict[str, Any],
+                 state_dir: Path, base_dir: Optional[Path] = None,
+                 reporter: Callable[[str], None] = print, cache: Optional[Any] = None):
+        """
+        Args:
+            nodes: 构建节点
+            config: 工程配置
+            state_dir: 状态目录
+            base_dir: 相对路径的基准目录
+            reporter: 进度输出函数
+            cache: 产物缓存（ArtifactCache），为None时不使用缓存
+        """
+        self.nodes: Dict[str, BuildNode] = {}
+        for node in nodes:
+            if node.name in self.nodes:
+                raise BuildGraphError(f"重复的构建节点: {node.name}")
+            self.nodes[node.name] = node
+        for node in self.nodes.values():
+            for dep in node.deps:
+                if dep not in self.nodes:
+                    raise BuildGraphError(f"节点 {node.name} 依赖未知节点: {dep}")
+
+        self.config = config
+        self.state_dir = Path(state_dir)
+        self.state_file = self.state_dir / 'graph_state.json'
+        self.base_dir = Path(base_dir) if base_dir else Path.cwd()
+        self.reporter = reporter
+        self.cache = cache
+        self._state = self._load_state()
+        self.hasher = FileHasher(self._state.setdefault('hashes', {}))
+        self._order = self._topological_order()
+
+    def _load_state(self) -> Dict[str, Any]:
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if isinstance(state, dict) and state.get('format') == STATE_FORMAT_VERSION:
+                return state
+        except (OSError, ValueError):
+            pass
+        return {'format': STATE_FORMAT_VERSION, 'nodes': {}, 'hashes': {}}
+
+    def _save_state(self) -> None:
+        """原子写入状态文件"""
+        try:
+            self.state_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.state_file.with_name(
+                f"{self.state_file.name}.{os.getpid()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._state, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.state_file)
+        except OSError as e:
+            logger.warning(f"无法保存构建状态: {e}")
+
+    def _topological_order(self) -> List[str]:
+        """拓扑排序，存在环时抛出异常"""
+        order: List[str] = []
+        marks: Dict[str, int] = {}
+
+        def visit(name: str, path: List[str]):
+            mark = marks.get(name)
+            if mark == 2:
+                return
+            if mark == 1:
+                cycle = ' -> '.join(path[path.index(name):] + [name])
+                raise BuildGraphError(f"构建图存在循环依赖: {cycle}")
+            marks[name] = 1
+            for dep in self.nodes[name].deps:
+                visit(dep, path + [name])
+            marks[name] = 2
+            order.append(name)
+
+        for name in self.nodes:
+            visit(name, [])
+        return order
+
+    def closure(self, targets: Iterable[str]) -> List[str]:
+        """获取目标及其所有依赖（按拓扑顺序）"""
+        needed: Set[str] = set()
+        stack = list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in self.nodes:
+                raise BuildGraphError(f"未知构建目标: {name}")
+            if name in needed:
+                continue
+            needed.add(name)
+            stack.extend(self.nodes[name].deps)
+        return [name for name in self._order if name in needed]
+
+    def _missing_outputs(self, node: BuildNode) -> List[str]:
+        missing = []
+        for pattern in node.outputs:
+            path = Path(pattern)
+            if not path.is_absolute():
+                path = self.base_dir / path
+            if not glob.glob(str(path)):
+                missing.append(pattern)
+        return missing
+
+    def _artifact_files(self, node: BuildNode) -> List[Path]:
+        """展开节点需要缓存的文件"""
+        files: List[Path] = []
+        for pattern in node.artifacts or node.outputs:
+            path = Path(pattern)
+            if not path.is_absolute():
+                path = self.base_dir / path
+            files.extend(Path(p) for p in sorted(glob.glob(str(path), recursive=True))
+                         if os.path.isfile(p))
+        return files
+
+    def cache_key(self, name: str, record: Dict[str, Any]) -> str:
+        """节点在产物缓存中的键"""
+        return hash_value({
+            'node': name,
+            'fingerprint': record['fingerprint'],
+            'part': get_config_value(self.config, 'fpga.part'),
+        })
+
+    def _node_record(self, node: BuildNode,
+                     fingerprints: Dict[str, str]) -> Dict[str, Any]:
+        """计算节点的指纹记录"""
+        inputs = {}
+        for path in node.inputs:
+            full = Path(path) if Path(path).is_absolute() else self.base_dir / path
+            # 工作区内的文件按相对路径记录，不同工作区中相同的输入得到相同的指纹（产物缓存键）
+            try:
+                key = full.relative_to(self.base_dir).as_posix()
+            except ValueError:
+                key = str(path)
+            inputs[key] = self.hasher.hash_file(full)
+        config = config_hashes(self.config, node.config_keys)
+        values = {key: hash_value(value) for key, value in node.values.items()}
+        deps = {dep: fingerprints[dep] for dep in node.deps}
+        record = {
+            'inputs': inputs,
+            'config': config,
+            'values': values,
+            'tool': node.tool_version,
+            'deps': deps,
+        }
+        record['fingerprint'] = hash_value(record)
+        record['config_fingerprint'] = hash_value(config)
+        return record
+
+    def _write_stage_record(self, node: BuildNode, record: Dict[str, Any]) -> None:
+        """在阶段输出目录旁记录有效配置指纹"""
+        path = stage_record_path(node.outputs, node.name, self.base_dir)
+        if path is None:
+            return
+        data = {
+            'stage': node.name,
+            'config_fingerprint': record.get('config_fingerprint'),
+            'config': record.get('config', {}),
+            'fingerprint': record.get('fingerprint'),
+            'finished_at': record.get('finished_at'),
+        }
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+        except OSError as e:
+            logger.warning(f"无法记录阶段 {node.name} 的配置指纹: {e}")
+
+    @staticmethod
+    def _diff_reasons(previous: Dict[str, Any], record: Dict[str, Any]) -> List[str]:
+        """比较新旧指纹记录，给出变化原因"""
+        reasons = []
+        if previous.get('tool') != record['tool']:
+            reasons.append(f"工具版本变化: {previous.get('tool') or '无'} -> "
+                           f"{record['tool'] or '无'}")
+
+        for key in sorted(set(previous.get('config', {})) | set(record['config'])):
+            if previous.get('config', {}).get(key) != record['config'].get(key):
+                reasons.append(f"配置变化: {key}")
+
+        for key in sorted(set(previous.get('values', {})) | set(record['values'])):
+            if previous.get('values', {}).get(key) != record['values'].get(key):
+                reasons.append(f"参数变化: {key}")
+
+        old_inputs = previous.get('inputs', {})
+        new_inputs = record['inputs']
+        added = sorted(set(new_inputs) - set(old_inputs))
+        removed = sorted(set(old_inputs) - set(new_inputs))
+        changed = sorted(k for k in set(old_inputs) & set(new_inputs)
+                         if old_inputs[k] != new_inputs[k])
+        for label, files in (('新增输入', added), ('删除输入', removed), ('输入文件变化', changed)):
+            if files:
+                shown = ', '.join(files[:5])
+                more = f" 等{len(files)}个文件" if len(files) > 5 else ""
+                reasons.append(f"{label}: {shown}{more}")
+
+        for dep in sorted(record['deps']):
+            if previous.get('deps', {}).get(dep) != record['deps'][dep]:
+                reasons.append(f"依赖 {dep} 已变化")
+        return reasons
+
+    def plan(self, targets: Iterable[str],
+             force: bool = False) -> Dict[str, NodeDecision]:
+        """判断目标闭包中每个节点是否需要运行"""
+        decisions: Dict[str, NodeDecision] = {}
+        fingerprints: Dict[str, str] = {}
+
+        for name in self.closure(targets):
+            node = self.nodes[name]
+            record = self._node_record(node, fingerprints)
+            fingerprints[name] = record['fingerprint']
+            previous = self._state['nodes'].get(name)
+
+            reasons: List[str] = []
+            if force:
+                reasons.append("强制重新构建")
+            elif previous is None:
+                reasons.append("无构建记录")
+            else:
+                if previous.get('status') != 'success':
+                    reasons.append("上次运行失败")
+                if previous.get('fingerprint') != record['fingerprint']:
+                    reasons.extend(self._diff_reasons(previous, record) or ["指纹变化"])
+                missing = self._missing_outputs(node)
+                if missing:
+                    reasons.append(f"输出缺失: {', '.join(missing)}")
+                rerun_deps = [dep for dep in node.deps if decisions[dep].stale]
+                for dep in rerun_deps:
+                    if f"依赖 {dep} 已变化" not in reasons:
+                        reasons.append(f"依赖 {dep} 将重新运行")
+
+            decisions[name] = NodeDecision(name=name, stale=bool(reasons),
+                                           reasons=reasons, record=record)
+        return decisions
+
+    def explain(self, decisions: Dict[str, NodeDecision]) -> List[str]:
+        """生成每个节点的运行原因说明"""
+        lines = []
+        for name, decision in decisions.items():
+            if decision.stale:
+                lines.append(f"[RUN]  {name}: {'; '.join(decision.reasons)}")
+            else:
+                lines.append(f"[SKIP] {name}: 已是最新")
+        return lines
+
+    async def _run_action(self, action: NodeAction) -> BuildResult:
+        if inspect.iscoroutinefunction(action):
+            return await action()
+        result = await run_blocking(action)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    async def run_async(self, targets: Iterable[str], jobs: int = 4,
+                        force: bool = False, explain: bool = False,
+                        dry_run: bool = False,
+                        pool: Optional[ResourcePool] = None) -> GraphResult:
+        """运行目标及其过期的依赖节点
+
+        Args:
+            targets: 构建目标
+            jobs: 最大并行节点数（未指定pool时使用）
+            force: 忽略指纹，重新运行所有节点
+            explain: 输出每个节点重新运行的原因
+            dry_run: 只判断，不运行
+            pool: 共享的全局资源池（多个构建图共同调度）
+        """
+        start = time.monotonic()
+        decisions = self.plan(targets, force=force)
+        result = GraphResult(success=True, decisions=decisions)
+
+        if explain or dry_run:
+            for line in self.explain(decisions):
+                self.reporter(line)
+        if dry_run:
+            result.up_to_date = [n for n, d in decisions.items() if not d.stale]
+            return result
+
+        if pool is None:
+            pool = ResourcePool({'cpu': max(1, jobs)})
+        done: Dict[str, asyncio.Future] = {}
+        # 输出不是由工程流程产生的节点（从缓存恢复，或以detached_action运行）。
+        # 例如恢复的综合检查点不会让Vivado工程中的synth_1变为完成状态，下游节点
+        # 若仍按工程流程运行会重新综合，因此改用detached_action。
+        detached: Set[str] = set()
+        total = sum(1 for d in decisions.values() if d.stale)
+        counter = {'started': 0}
+
+        async def execute(name: str) -> bool:
+            node = self.nodes[name]
+            dep_ok = True
+            for dep in node.deps:
+                if not await done[dep]:
+                    dep_ok = False
+            if not dep_ok:
+                result.blocked.append(name)
+                return False
+
+            decision = decisions[name]
+            if not decision.stale:
+                if self._state['nodes'].get(name, {}).get('detached'):
+                    detached.add(name)
+                result.up_to_date.append(name)
+                return True
+
+            use_cache = self.cache is not None and node.cacheable
+            cache_key = self.cache_key(name, decision.record) if use_cache else None
+            if use_cache and not force:
+                node_start = time.monotonic()
+                try:
+                    restored = await run_blocking(self.cache.restore, cache_key,
+                                                  self.base_dir)
+                except OSError as e:
+                    logger.warning(f"节点 {name} 从缓存恢复失败: {e}")
+                    restored = None
+                if restored is not None:
+                    counter['started'] += 1
+                    self.reporter(f"[{counter['started']}/{total}] [CACHE] "
+                                  f"{node.description or name}: "
+                                  f"从缓存恢复 {len(restored)} 个文件")
+                    record = dict(decision.record)
+                    record['status'] = 'success'
+                    record['restored'] = True
+                    record['detached'] = True
+                    detached.add(name)
+                    record['duration'] = time.monotonic() - node_start
+                    record['finished_at'] = time.time()
+                    self._state['nodes'][name] = record
+                    self._save_state()
+                    self._write_stage_record(node, record)
+                    result.results[name] = BuildResult(
+                        success=True, artifacts={'restored': restored}, logs={},
+                        metrics={'cache_hit': True}, errors=[]
+                    )
+                    result.restored.append(name)
+                    return True
+
+            action = node.action
+            if (node.detached_action is not None
+                    and any(dep in detached for dep in node.deps)):
+                action = node.detached_action
+            await pool.acquire(node.resources)
+            try:
+                counter['started'] += 1
+                self.reporter(f"[{counter['started']}/{total}] "
+                              f"{node.description or name}")
+                node_start = time.monotonic()
+                try:
+                    node_result = await self._run_action(action)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    node_result = BuildResult(
+                        success=False, artifacts={}, logs={'exception': str(e)},
+                        metrics={}, errors=[f"节点 {name} 执行异常: {e}"]
+                    )
+            finally:
+                await pool.release(node.resources)
+
+            record = dict(decision.record)
+            record['status'] = 'success' if node_result.success else 'failed'
+            if action is not node.action:
+                record['detached'] = True
+                detached.add(name)
+            record['duration'] = time.monotonic() - node_start
+            record['finished_at'] = time.time()
+            self._state['nodes'][name] = record
+            self._save_state()
+
+            result.results[name] = node_result
+            if node_result.success:
+                self._write_stage_record(node, record)
+                if use_cache:
+                    try:
+                        await run_blocking(self.cache.store, cache_key, name,
+                                           self._artifact_files(node), self.base_dir,
+                                           {'duration': record['duration']})
+                    except OSError as e:
+                        logger.warning(f"节点 {name} 的产物无法保存到缓存: {e}")
+                result.ran.append(name)
+                return True
+            result.failed.append(name)
+            return False
+
+        loop = asyncio.get_event_loop()
+        for name in decisions:
+            done[name] = loop.create_task(execute(name))
+        try:
+            await asyncio.gather(*done.values())
+        finally:
+            # 保存文件哈希缓存
+            self._save_state()
+
+        result.success = not result.failed and not result.blocked
+        result.duration = time.monotonic() - start
+        return result
+
+    def run(self, targets: Iterable[str], jobs: int = 4, force: bool = False,
+            explain: bool = False, dry_run: bool = False) -> GraphResult:
+        """同步运行构建图"""
+        return run_sync(self.run_async(targets, jobs=jobs, force=force,
+                                       explain=explain, dry_run=dry_run))
+
+
+async def run_build_async(graph: BuildGraph, targets: Iterable[str], jobs: int = 4,
+                          force: bool = False, explain: bool = False,
+                          dry_run: bool = False, pool: Optional[ResourcePool] = None,
+                          hook_failure: Optional[str] = None,
+                          on_output: Optional[Callable[[str, str], None]] = None
+                          ) -> GraphResult:
+    """运行构建图及其前后的 build.hooks 钩子
+
+    fpgab build（单工程、--all-projects、构建矩阵）和构建服务都通过此函数构建，
+    同一工程无论从哪个入口构建都执行相同的 pre_build / post_bitstream 钩子。
+    按abort策略失败的钩子以同名伪节点记录在结果的failed中。
+
+    Args:
+        hook_failure: 钩子失败策略（覆盖 build.hooks.on_failure）
+        on_output: 钩子输出回调（默认通过构建图的reporter输出）
+    """
+    from .hooks import HookError, HookResult, HookRunResult, run_stage_hooks_async
+
+    async def run_hooks(stage: str) -> HookRunResult:
+        try:
+            return await run_stage_hooks_async(graph.config, stage,
+                                               base_dir=graph.base_dir,
+                                               state_dir=graph.state_dir,
+                                               on_output=on_output,
+                                               reporter=graph.reporter,
+                                               on_failure=hook_failure)
+        except HookError as e:
+            graph.reporter(f"[ERROR] {e}")
+            failed = HookResult(stage, 'failed', error=str(e))
+            return HookRunResult(stage, {stage: failed})
+
+    def hook_failed(result: GraphResult, stage: str, hooks: HookRunResult) -> None:
+        result.success = False
+        result.failed.append(stage)
+        result.results[stage] = BuildResult(success=False, artifacts={}, logs={},
+                                            metrics={}, errors=hooks.errors)
+
+    if not dry_run:
+        hooks = await run_hooks('pre_build')
+        if not hooks.success:
+            result = GraphResult(success=False)
+            hook_failed(result, 'pre_build', hooks)
+            return result
+
+    result = await graph.run_async(targets, jobs=jobs, force=force, explain=explain,
+                                   dry_run=dry_run, pool=pool)
+
+    # post_bitstream钩子只在比特流重新生成或从缓存恢复时执行
+    bitstream_ready = 'bitstream' in result.ran or 'bitstream' in result.restored
+    if not dry_run and result.success and bitstream_ready:
+        hooks = await run_hooks('post_bitstream')
+        if not hooks.success:
+            hook_failed(result, 'post_bitstream', hooks)
+    return result
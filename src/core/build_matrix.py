@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+构建矩阵
+
+同一套RTL面向多个器件、板卡和顶层模块时，不再维护多份工程配置，而是在
+配置的 matrix 段中列出各维度的取值，展开为多个变体。每个变体有独立的
+工程目录和比特流输出目录，可以作为多工程构建的条目并行运行。
+"""
+
+import copy
+import itertools
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .multi_project import ProjectEntry
+
+# 矩阵维度及其在配置中的位置
+MATRIX_AXES = ('part', 'board', 'top_module', 'defines')
+
+
+class MatrixError(Exception):
+    """构建矩阵配置错误"""
+    pass
+
+
+@dataclass
+class MatrixVariant:
+    """构建矩阵中的一个变体"""
+    name: str                   # 变体名称（用作目录名）
+    values: Dict[str, Any]      # 各维度取值，defines为宏定义组名称
+    config: Dict[str, Any]      # 变体的完整配置
+
+
+def _safe_name(value: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', str(value)).strip('_') or 'x'
+
+
+def _deep_merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    """递归合并字典，override中的值优先"""
+    result = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(result.get(key), dict):
+            result[key] = _deep_merge(result[key], value)
+        else:
+            result[key] = copy.deepcopy(value)
+    return result
+
+
+def _define_sets(value: Any) -> Dict[str, Dict[str, Any]]:
+    """将defines维度规范化为 {名称: 宏定义组}"""
+    if isinstance(value, dict):
+        return {str(name): dict(defines or {}) for name, defines in value.items()}
+    sets = {}
+    for index, defines in enumerate(value or []):
+        defines = dict(defines or {})
+        if defines:
+            name = '_'.join(str(k) if v is None else f'{k}{v}'
+                            for k, v in defines.items())
+        else:
+            name = 'default'
+        sets[name if name not in sets else f'{name}_{index}'] = defines
+    return sets
+
+
+def _with_suffix(path: str, name: str) -> str:
+    """在文件名后追加变体名称: boot.bin -> boot_<name>.bin"""
+    p = Path(path)
+    return str(p.with_name(f'{p.stem}_{name}{p.suffix}')).replace('\\', '/')
+
+
+def variant_config(base: Dict[str, Any], name: str, values: Dict[str, Any],
+                   define_sets: Dict[str, Dict[str, Any]],
+                   overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """生成变体的配置
+
+    变体使用独立的工程目录 <project_dir>/<name> 和比特流目录
+    <bitstream.output_dir>/<name>，显式配置的合并文件和MCS文件名追加变体名称。
+    """
+    config = copy.deepcopy({k: v for k, v in base.items() if k != 'matrix'})
+    fpga = config.setdefault('fpga', {})
+    for axis in ('part', 'board', 'top_module'):
+        if axis in values:
+            fpga[axis] = values[axis]
+    if 'defines' in values:
+        fpga['defines'] = dict(fpga.get('defines') or {},
+                               **define_sets[values['defines']])
+
+    # 按维度取值覆盖配置
+    for axis, value in values.items():
+        override = ((overrides or {}).get(axis) or {}).get(value)
+        if override:
+            config = _deep_merge(config, override)
+
+    project_dir = str(base.get('project_dir', './build')).rstrip('/\\')
+    config['project_dir'] = f'{project_dir}/{name}'
+
+    build = config.setdefault('build', {})
+    bitstream = build.setdefault('bitstream', {})
+    base_bitstream = base.get('build', {}).get('bitstream', {})
+    base_dir = base_bitstream.get('output_dir', 'build/bitstreams')
+    bitstream['output_dir'] = f"{base_dir}/{name}"
+    for section in ('bin_merge', 'flash'):
+        output_path = build.get(section, {}).get('output_path')
+        if output_path:
+            build[section]['output_path'] = _with_suffix(output_path, name)
+    sweep = build.get('implementation', {}).get('sweep')
+    if isinstance(sweep, dict) and sweep.get('work_dir'):
+        sweep['work_dir'] = f"{sweep['work_dir']}/{name}"
+    return config
+
+
+def _matches(values: Dict[str, Any], pattern: Dict[str, Any]) -> bool:
+    return all(values.get(key) == value for key, value in pattern.items()
+               if key in MATRIX_AXES)
+
+
+def expand_matrix(config: Dict[str, Any]) -> List[MatrixVariant]:
+    """展开构建矩阵，配置中没有matrix段时返回空列表
+
+    各维度取笛卡尔积，去掉与exclude部分匹配的组合，再追加include中的变体。
+    变体名称由各维度取值组成，例如 xc7a35tcsg324-1_revA。
+    """
+    matrix = config.get('matrix')
+    if not matrix:
+        return []
+
+    unknown = set(matrix) - set(MATRIX_AXES) - {'include', 'exclude', 'overrides'}
+    if unknown:
+        raise MatrixError(f"未知的矩阵维度: {', '.join(sorted(unknown))}")
+
+    define_sets = _define_sets(matrix.get('defines'))
+    axes = []
+    for axis in MATRIX_AXES:
+        if axis == 'defines':
+            if define_sets:
+                axes.append((axis, list(define_sets)))
+        elif matrix.get(axis):
+            axes.append((axis, [str(v) for v in matrix[axis]]))
+
+    combos: List[Dict[str, Any]] = []
+    if axes:
+        for combo in itertools.product(*(values for _, values in axes)):
+            values = dict(zip((axis for axis, _ in axes), combo))
+            excludes = matrix.get('exclude', []) or []
+            if not any(_matches(values, pattern) for pattern in excludes):
+                combos.append(values)
+
+    named: List[Dict[str, Any]] = [{'values': values} for values in combos]
+    for item in matrix.get('include', []) or []:
+        values = {axis: item[axis] for axis in MATRIX_AXES if axis in item}
+        if 'defines' in values:
+            if isinstance(values['defines'], dict):
+                # 直接给出宏定义组
+                set_name = item.get('name') or 'include'
+                define_sets[set_name] = dict(values['defines'])
+                values['defines'] = set_name
+            elif values['defines'] not in define_sets:
+                raise MatrixError(f"未知的宏定义组: {values['defines']}")
+        named.append({'values': values, 'name': item.get('name')})
+
+    if not named:
+        raise MatrixError("构建矩阵没有任何变体")
+
+    variants: List[MatrixVariant] = []
+    seen = set()
+    for entry in named:
+        values = entry['values']
+        name = entry.get('name') or '_'.join(
+            _safe_name(values[axis]) for axis in MATRIX_AXES if axis in values)
+        name = _safe_name(name)
+        if name in seen:
+            raise MatrixError(f"构建矩阵变体名称重复: {name}")
+        seen.add(name)
+        variants.append(MatrixVariant(
+            name=name,
+            values=values,
+            config=variant_config(config, name, values, define_sets,
+                                  matrix.get('overrides')),
+        ))
+    return variants
+
+
+def select_variants(variants: List[MatrixVariant],
+                    names: List[str]) -> List[MatrixVariant]:
+    """按名称选择变体，名称不存在时抛出异常"""
+    if not names:
+        return variants
+    by_name = {variant.name: variant for variant in variants}
+    missing = [name for name in names if name not in by_name]
+    if missing:
+        raise MatrixError(f"未知的构建矩阵变体: {', '.join(missing)}（可选: {', '.join(by_name)}）")
+    return [by_name[name] for name in names]
+
+
+def expand_matrix_entries(entries: List[ProjectEntry]) -> List[ProjectEntry]:
+    """将多工程构建中带有matrix段的工程展开为每个变体一个条目
+
+    变体条目命名为 <工程>:<变体>；依赖该工程的下游工程依赖其所有变体。
+    """
+    expanded: List[ProjectEntry] = []
+    names_of: Dict[str, List[str]] = {}
+    for entry in entries:
+        variants = expand_matrix(entry.config)
+        if not variants:
+            expanded.append(entry)
+            names_of[entry.name] = [entry.name]
+            continue
+        names_of[entry.name] = []
+        for variant in variants:
+            name = f'{entry.name}:{variant.name}'
+            expanded.append(ProjectEntry(name=name, root=entry.root,
+                                         config_file=entry.config_file,
+                                         config=variant.config,
+                                         depends_on=list(entry.depends_on)))
+            names_of[entry.name].append(name)
+
+    for entry in expanded:
+        entry.depends_on = [name for dep in entry.depends_on
+                            for name in names_of.get(dep, [dep])]
+    return expanded
@@ -0,0 +1,456 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+构建服务
+
+`fpgab serve` 在本机运行一个守护进程，CI、夜间构建和开发者通过
+`fpgab submit` 提交构建请求，由守护进程统一排队执行，避免同一主机上
+多个互不知情的 fpgab 进程争抢资源。
+
+- 优先级队列：交互式请求优先于夜间构建，同一优先级按提交顺序执行；
+- 请求合并：指纹相同（同一工程、目标且输入相同）的请求在排队或运行期间
+  合并为一次执行，所有提交者收到同一份日志和结果；
+- 通信使用Unix套接字（Windows上为TCP），消息格式与分布式构建相同。
+  Unix套接字只允许当前用户连接；TCP端点要求每个请求携带共享令牌
+  （与构建节点相同的令牌，未配置时生成 ~/.fpga_builder/service.token）。
+"""
+
+import asyncio
+import itertools
+import logging
+import os
+import secrets
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .distributed import RemoteError, load_token, read_frame, token_matches, write_frame
+
+logger = logging.getLogger(__name__)
+
+# 优先级（数值越小越先执行）
+PRIORITIES = {'interactive': 0, 'ci': 5, 'nightly': 10}
+DEFAULT_PRIORITY = 'interactive'
+
+# 保留已完成任务的数量（用于status查询）
+HISTORY_SIZE = 50
+
+# 执行函数: (请求, 日志输出函数) -> 结果字典（至少包含success）
+BuildExecutor = Callable[[Dict[str, Any], Callable[[str], None]],
+                         Awaitable[Dict[str, Any]]]
+# 指纹函数: 请求 -> 指纹（阻塞函数，在线程池中执行）
+Fingerprinter = Callable[[Dict[str, Any]], str]
+
+
+class BuildServiceError(Exception):
+    """构建服务错误"""
+    pass
+
+
+def default_socket_path() -> Path:
+    """默认套接字路径（环境变量 FPGABUILDER_SOCKET 优先）"""
+    env_path = os.environ.get('FPGABUILDER_SOCKET')
+    if env_path:
+        return Path(env_path).expanduser()
+    return Path.home() / '.fpga_builder' / 'fpgab.sock'
+
+
+def default_token_path() -> Path:
+    """未配置共享令牌时自动生成的令牌文件"""
+    return Path.home() / '.fpga_builder' / 'service.token'
+
+
+def service_token(token_file: Optional[str] = None,
+                  create: bool = False) -> Optional[str]:
+    """获取构建服务的共享令牌
+
+    优先使用令牌文件或环境变量（见 distributed.load_token），其次读取
+    default_token_path()；create为True且文件不存在时生成新令牌（仅当前用户可读）。
+    """
+    try:
+        token = load_token(token_file)
+    except RemoteError as e:
+        raise BuildServiceError(str(e)) from e
+    if token is not None:
+        return token
+    path = default_token_path()
+    try:
+        return path.read_text(encoding='utf-8').strip() or None
+    except FileNotFoundError:
+        if not create:
+            return None
+    except OSError as e:
+        raise BuildServiceError(f"无法读取令牌文件 {path}: {e}") from e
+    path.parent.mkdir(parents=True, exist_ok=True)
+    token = secrets.token_hex(32)
+    try:
+        fd = os.open(str(path), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        # 另一个进程同时生成了令牌
+        return path.read_text(encoding='utf-8').strip() or None
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(token + '\n')
+    return token
+
+
+def parse_endpoint(endpoint: Optional[str]) -> Tuple[str, Any]:
+    """解析服务地址: host:port 为TCP，其他为Unix套接字路径
+
+    Returns:
+        ('tcp', (host, port)) 或 ('unix', Path)
+    """
+    if not endpoint:
+        if sys.platform == 'win32':
+            return 'tcp', ('127.0.0.1', 7600)
+        return 'unix', default_socket_path()
+    host, sep, port = endpoint.rpartition(':')
+    if sep and port.isdigit() and '/' not in endpoint:
+        return 'tcp', (host or '127.0.0.1', int(port))
+    return 'unix', Path(endpoint).expanduser()
+
+
+async def open_endpoint(endpoint: Optional[str]):
+    """连接构建服务"""
+    kind, address = parse_endpoint(endpoint)
+    try:
+        if kind == 'tcp':
+            return await asyncio.open_connection(*address)
+        return await asyncio.open_unix_connection(str(address))
+    except (OSError, ConnectionError) as e:
+        raise BuildServiceError(f"无法连接构建服务 {address}: {e}（是否已运行 fpgab serve？）") from e
+
+
+@dataclass
+class ServiceJob:
+    """服务中的一个构建任务（可能对应多个请求）"""
+    id: str
+    key: str
+    request: Dict[str, Any]
+    priority: str
+    submitted: float = field(default_factory=time.time)
+    state: str = 'queued'                   # queued / running / done
+    requests: int = 1                       # 合并的请求数
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    log: List[str] = field(default_factory=list)
+    subscribers: List[asyncio.Queue] = field(default_factory=list)
+
+    @property
+    def rank(self) -> int:
+        return PRIORITIES.get(self.priority, PRIORITIES[DEFAULT_PRIORITY])
+
+    def emit(self, line: str) -> None:
+        self.log.append(line)
+        for queue in self.subscribers:
+            queue.put_nowait(('output', line))
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'state': self.state,
+            'priority': self.priority,
+            'requests': self.requests,
+            'project': self.request.get('project_dir'),
+            'target': self.request.get('target'),
+            'submitted': self.submitted,
+            'started': self.started,
+            'finished': self.finished,
+            'success': ((self.result or {}).get('success')
+                        if self.state == 'done' else None),
+        }
+
+
+class BuildService:
+    """构建服务：优先级队列 + 相同指纹请求合并"""
+
+    def __init__(self, executor: BuildExecutor, fingerprint: Fingerprinter,
+                 concurrency: int = 1, token: Optional[str] = None):
+        """
+        Args:
+            executor: 执行构建请求的协程函数
+            fingerprint: 计算请求指纹的函数，指纹相同的请求合并执行
+            concurrency: 同时执行的任务数
+            token: 共享令牌，设置后拒绝令牌不一致的请求；TCP端点必须设置
+        """
+        self.executor = executor
+        self.token = token
+        self.fingerprint = fingerprint
+        self.concurrency = max(1, concurrency)
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._seq = itertools.count()
+        self._inflight: Dict[str, ServiceJob] = {}
+        self._history: List[ServiceJob] = []
+        self._runners: List[asyncio.Task] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.endpoint: Any = None
+
+    # ------------------------------------------------------------ 队列
+
+    def _ensure_started(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+            loop = asyncio.get_event_loop()
+            self._runners = [loop.create_task(self._runner())
+                             for _ in range(self.concurrency)]
+
+    async def submit(self, request: Dict[str, Any]) -> Tuple[ServiceJob, bool]:
+        """提交请求
+
+        Returns:
+            (任务, 是否合并到已有任务)
+        """
+        self._ensure_started()
+        priority = request.get('priority') or DEFAULT_PRIORITY
+        if priority not in PRIORITIES:
+            raise BuildServiceError(f"未知的优先级: {priority}（可选: {', '.join(PRIORITIES)}）")
+
+        loop = asyncio.get_event_loop()
+        key = await loop.run_in_executor(None, self.fingerprint, request)
+        job = self._inflight.get(key)
+        if job is not None:
+            job.requests += 1
+            if job.state == 'queued' and PRIORITIES[priority] < job.rank:
+                # 提升优先级：重新入队，旧的队列项在出队时被跳过
+                job.priority = priority
+                self._queue.put_nowait((job.rank, next(self._seq), job))
+            return job, True
+
+        job = ServiceJob(id=uuid.uuid4().hex[:8], key=key, request=dict(request),
+                         priority=priority)
+        self._inflight[key] = job
+        self._queue.put_nowait((job.rank, next(self._seq), job))
+        return job, False
+
+    def position(self, job: ServiceJob) -> int:
+        """任务在队列中的位置（0表示正在运行或已完成）"""
+        if job.state != 'queued':
+            return 0
+        queued = sorted({id(j): (r, s, j) for r, s, j in self._queue._queue
+                         if j.state == 'queued' and r == j.rank}.values(),
+                        key=lambda item: item[:2])
+        for index, (_, _, other) in enumerate(queued):
+            if other is job:
+                return index + 1
+        return 0
+
+    async def wait(self, job: ServiceJob) -> Dict[str, Any]:
+        """等待任务完成"""
+        queue = self.subscribe(job, replay=False)
+        try:
+            while True:
+                kind, payload = await queue.get()
+                if kind == 'result':
+                    return payload
+        finally:
+            self.unsubscribe(job, queue)
+
+    def subscribe(self, job: ServiceJob, replay: bool = True) -> asyncio.Queue:
+        """订阅任务日志和结果，replay时先回放已有日志"""
+        queue: asyncio.Queue = asyncio.Queue()
+        if replay:
+            for line in job.log:
+                queue.put_nowait(('output', line))
+        if job.state == 'done':
+            queue.put_nowait(('result', job.result))
+        else:
+            job.subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, job: ServiceJob, queue: asyncio.Queue) -> None:
+        if queue in job.subscribers:
+            job.subscribers.remove(queue)
+
+    async def _runner(self) -> None:
+        while True:
+            rank, _, job = await self._queue.get()
+            if job.state != 'queued' or rank != job.rank:
+                # 已提升优先级的旧队列项
+                continue
+            job.state = 'running'
+            job.started = time.time()
+            job.emit(f"[{job.id}] 开始构建 ({job.priority}, {job.requests} 个请求)")
+            try:
+                result = await self.executor(job.request, job.emit)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"任务 {job.id} 执行异常")
+                result = {'success': False, 'error': str(e)}
+            job.result = dict(result, id=job.id, requests=job.requests)
+            job.state = 'done'
+            job.finished = time.time()
+            self._inflight.pop(job.key, None)
+            self._history.append(job)
+            del self._history[:-HISTORY_SIZE]
+            for queue in list(job.subscribers):
+                queue.put_nowait(('result', job.result))
+            job.subscribers.clear()
+
+    def status(self) -> Dict[str, Any]:
+        """服务状态"""
+        active = sorted(self._inflight.values(),
+                        key=lambda j: (j.state != 'running', j.rank, j.submitted))
+        return {
+            'type': 'status',
+            'pid': os.getpid(),
+            'concurrency': self.concurrency,
+            'active': [job.summary() for job in active],
+            'history': [job.summary() for job in reversed(self._history[-10:])],
+        }
+
+    # ------------------------------------------------------------ 服务端
+
+    async def start(self, endpoint: Optional[str] = None) -> asyncio.AbstractServer:
+        """开始监听"""
+        self._ensure_started()
+        kind, address = parse_endpoint(endpoint)
+        if kind == 'tcp':
+            # 请求中的配置文件及其钩子以服务账户执行，TCP上必须验证令牌
+            if not self.token:
+                raise BuildServiceError("TCP端点需要共享令牌")
+            self._server = await asyncio.start_server(self._handle, *address)
+        else:
+            address.parent.mkdir(parents=True, exist_ok=True)
+            if address.exists():
+                # 残留的套接字文件：确认没有服务在监听后删除
+                try:
+                    _, writer = await asyncio.open_unix_connection(str(address))
+                    writer.close()
+                    raise BuildServiceError(f"构建服务已在运行: {address}")
+                except (OSError, ConnectionError):
+                    address.unlink()
+            # 在umask下创建套接字文件，创建时即只允许当前用户连接
+            umask = os.umask(0o177)
+            try:
+                self._server = await asyncio.start_unix_server(self._handle,
+                                                               str(address))
+            finally:
+                os.umask(umask)
+        self.endpoint = address
+        return self._server
+
+    async def serve_forever(self, endpoint: Optional[str] = None) -> None:
+        if self._server is None:
+            await self.start(endpoint)
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for task in self._runners:
+            task.cancel()
+        await asyncio.gather(*self._runners, return_exceptions=True)
+        if isinstance(self.endpoint, Path):
+            try:
+                self.endpoint.unlink()
+            except OSError:
+                pass
+
+    async def _handle(self, reader: asyncio.StreamReader,
+                      writer: asyncio.StreamWriter) -> None:
+        try:
+            header = await read_frame(reader)
+            kind = header.get('type')
+            if self.token and not token_matches(self.token, header.get('token')):
+                logger.warning(f"拒绝未授权的请求: {kind}")
+                write_frame(writer, {'type': 'error', 'message': "未授权的请求（令牌不一致）"})
+            elif kind == 'status':
+                write_frame(writer, self.status())
+            elif kind == 'submit':
+                await self._handle_submit(header, writer)
+            else:
+                write_frame(writer, {'type': 'error', 'message': f"未知请求: {kind}"})
+            await writer.drain()
+        except (ConnectionError, BuildServiceError) as e:
+            try:
+                write_frame(writer, {'type': 'error', 'message': str(e)})
+                await writer.drain()
+            except (ConnectionError, OSError):
+                pass
+        except Exception:
+            logger.exception("处理请求时发生异常")
+        finally:
+            writer.close()
+
+    async def _handle_submit(self, header: Dict[str, Any],
+                             writer: asyncio.StreamWriter) -> None:
+        request = header.get('request') or {}
+        job, coalesced = await self.submit(request)
+        write_frame(writer, {'type': 'accepted', 'id': job.id, 'coalesced': coalesced,
+                             'state': job.state, 'position': self.position(job)})
+        await writer.drain()
+        if header.get('detach'):
+            return
+
+        follow = header.get('follow', True)
+        queue = self.subscribe(job, replay=follow)
+        try:
+            while True:
+                kind, payload = await queue.get()
+                if kind == 'output':
+                    if follow:
+                        write_frame(writer, {'type': 'output', 'line': payload})
+                        await writer.drain()
+                else:
+                    write_frame(writer, {'type': 'result', 'result': payload})
+                    return
+        finally:
+            # 客户端断开时只取消订阅，任务继续为其他请求执行
+            self.unsubscribe(job, queue)
+
+
+# ---------------------------------------------------------------- 客户端
+
+
+async def submit_request(request: Dict[str, Any], endpoint: Optional[str] = None,
+                         follow: bool = True, detach: bool = False,
+                         on_output: Optional[Callable[[str], None]] = None,
+                         on_accepted: Optional[Callable[[Dict[str, Any]], None]] = None,
+                         token: Optional[str] = None) -> Dict[str, Any]:
+    """向构建服务提交请求，等待结果（detach时返回受理信息）"""
+    reader, writer = await open_endpoint(endpoint)
+    try:
+        write_frame(writer, {'type': 'submit', 'request': request, 'follow': follow,
+                             'detach': detach, 'token': token})
+        await writer.drain()
+        while True:
+            header = await read_frame(reader)
+            kind = header.get('type')
+            if kind == 'accepted':
+                if on_accepted is not None:
+                    on_accepted(header)
+                if detach:
+                    return header
+            elif kind == 'output':
+                if on_output is not None:
+                    on_output(header.get('line', ''))
+            elif kind == 'result':
+                return header['result']
+            elif kind == 'error':
+                raise BuildServiceError(header.get('message', '构建服务错误'))
+    except ConnectionError as e:
+        raise BuildServiceError(f"与构建服务的连接中断: {e}") from e
+    finally:
+        writer.close()
+
+
+async def query_status(endpoint: Optional[str] = None,
+                       token: Optional[str] = None) -> Dict[str, Any]:
+    """查询构建服务状态"""
+    reader, writer = await open_endpoint(endpoint)
+    try:
+        write_frame(writer, {'type': 'status', 'token': token})
+        await writer.drain()
+        header = await read_frame(reader)
+        if header.get('type') == 'error':
+            raise BuildServiceError(header.get('message', '构建服务错误'))
+        return header
+    finally:
+        writer.close()
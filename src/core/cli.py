@@ -11,21 +11,62 @@ import click
 from pathlib import Path
 from typing import Optional
 
-# 标准相对导入
-from .config import ConfigManager
-from .project import ProjectManager
-from .plugin_manager import PluginManager
-# 直接导入Vivado插件以避免插件发现问题
-try:
-    from plugins.vivado.plugin import VivadoPlugin
-except ImportError:
-    VivadoPlugin = None
+# 配置管理（yaml等）、工程管理（GitPython）和厂商插件都在用到的命令中才导入，
+# 保证 --version/--help 等命令的冷启动时间（见 tests/test_startup.py）
+
+
+def load_vivado_plugin():
+    """导入Vivado插件类，不可用时返回None"""
+    first_import = 'plugins.vivado.plugin' not in sys.modules
+    # 直接导入Vivado插件以避免插件发现问题
+    try:
+        from plugins.vivado.plugin import VivadoPlugin
+    except ImportError:
+        return None
+    if first_import:
+        from .startup import mark
+        mark('导入Vivado插件')
+    return VivadoPlugin
+
+
+def _create_config_manager(obj):
+    from .config import ConfigManager
+    if obj.get('config'):
+        return ConfigManager(config_path=Path(obj['config']))
+    return ConfigManager()
+
+
+def _create_plugin_manager(obj):
+    from .plugin_manager import PluginManager
+    plugin_manager = PluginManager()
+    plugin_manager.discover_plugins()
+    return plugin_manager
+
+
+class ContextObjects(dict):
+    """命令上下文对象：配置管理器和插件管理器在第一次使用时才创建"""
+
+    factories = {
+        'config_manager': _create_config_manager,
+        'plugin_manager': _create_plugin_manager,
+    }
+
+    def __missing__(self, key):
+        factory = self.factories.get(key)
+        if factory is None:
+            raise KeyError(key)
+        value = self[key] = factory(self)
+        return value
 
 
 class CLI:
     """命令行接口类"""
 
     def __init__(self):
+        from .config import ConfigManager
+        from .plugin_manager import PluginManager
+        from .project import ProjectManager
+
         self.config_manager = ConfigManager()
         self.project_manager = ProjectManager()
         self.plugin_manager = PluginManager()
@@ -39,84 +80,30 @@ class CLI:
         cli()
 
     @staticmethod
-    def _execute_hook(hook_config, hook_name):
-        """执行钩子命令并处理错误"""
-        import subprocess
-        import shutil
-        from pathlib import Path
+    def _execute_hook(hook_config, hook_name, on_failure='abort', timeout=None,
+                      state_dir=None, jobs=None):
+        """执行钩子命令并处理错误
+
+        没有依赖关系的钩子并行运行，输出实时转发；失败时按 on_failure 策略
+        （abort/continue）处理，不交互询问。返回是否继续构建。
+        """
+        from .async_process import run_sync
+        from .hooks import HookEngine, HookError, parse_hooks
 
         if not hook_config:
             return True  # 无钩子配置，继续
 
-        click.echo(f"执行 {hook_name} 钩子...")
-
-        # 支持字符串或字符串数组
-        if isinstance(hook_config, list):
-            commands = hook_config
-        else:
-            # 字符串，按换行符分割，过滤空行
-            commands = [cmd.strip() for cmd in str(hook_config).split('\n') if cmd.strip()]
-
-        for cmd in commands:
-            click.echo(f"  运行: {cmd}")
-
-            # 检查是否为文件路径
-            cmd_path = Path(cmd)
-            if cmd_path.exists() and cmd_path.is_file():
-                # 如果是脚本文件，根据扩展名决定如何执行
-                if cmd_path.suffix in ['.py', '.pyw']:
-                    # Python脚本
-                    full_cmd = [sys.executable, str(cmd_path)]
-                elif cmd_path.suffix in ['.sh', '.bash']:
-                    # Shell脚本
-                    if os.name == 'nt':
-                        full_cmd = ['bash', str(cmd_path)]
-                    else:
-                        full_cmd = ['bash', str(cmd_path)]
-                elif cmd_path.suffix in ['.tcl']:
-                    # TCL脚本，通过Vivado执行？这里简单使用source命令
-                    # 实际应该在Vivado环境中执行，这里跳过文件检查
-                    click.echo(f"  警告: TCL脚本应在Vivado环境中执行，跳过")
-                    continue
-                else:
-                    # 其他文件，尝试作为可执行文件
-                    full_cmd = [str(cmd_path)]
-            else:
-                # 直接命令
-                # 在Windows上使用shell=True，以便支持内部命令
-                full_cmd = cmd
-                shell = True
-
-            try:
-                # 执行命令
-                if isinstance(full_cmd, list):
-                    # 列表形式，使用subprocess.run
-                    result = subprocess.run(full_cmd, capture_output=True, text=True, shell=False)
-                else:
-                    # 字符串形式，使用shell
-                    result = subprocess.run(full_cmd, capture_output=True, text=True, shell=True)
-
-                if result.returncode != 0:
-                    click.echo(f"  错误: 钩子命令执行失败 (退出码: {result.returncode})")
-                    click.echo(f"  标准输出: {result.stdout}")
-                    click.echo(f"  标准错误: {result.stderr}")
-
-                    # 询问用户是否继续
-                    if not click.confirm(f"{hook_name} 钩子执行失败，是否继续构建？", default=False):
-                        return False
-                    else:
-                        click.echo("  用户选择继续构建")
-                else:
-                    click.echo(f"  成功: {result.stdout}")
-
-            except Exception as e:
-                click.echo(f"  异常: 执行钩子命令时出错: {e}")
-                if not click.confirm(f"{hook_name} 钩子执行出错，是否继续构建？", default=False):
-                    return False
-                else:
-                    click.echo("  用户选择继续构建")
+        try:
+            hooks = parse_hooks(hook_config, hook_name, on_failure=on_failure,
+                                timeout=timeout)
+        except HookError as e:
+            click.echo(f"[ERROR] {e}")
+            return False
 
-        return True  # 继续构建
+        engine = HookEngine(Path.cwd(), jobs=jobs, state_dir=state_dir,
+                            reporter=click.echo)
+        result = run_sync(engine.run_async(hooks, hook_name))
+        return result.success
 
 
 # Click命令组
@@ -125,22 +112,32 @@ class CLI:
 @click.option('-c', '--config', type=click.Path(exists=True),
               help='指定配置文件')
 @click.option('-v', '--verbose', is_flag=True, help='详细输出')
+@click.option('--no-config-cache', 'no_config_cache', is_flag=True,
+              help='不使用解析后配置的缓存（build/.cache）')
+@click.option('--set', 'overrides', multiple=True, metavar='KEY=VALUE',
+              help='覆盖配置值，如 --set fpga.part=xc7a100tcsg324-1（可多次指定）')
 @click.pass_context
-def cli(ctx, config, verbose):
+def cli(ctx, config, verbose, no_config_cache, overrides):
     """FPGABuilder - FPGA自动构建工具链"""
-    ctx.ensure_object(dict)
+    ctx.obj = ContextObjects(ctx.obj or {})
     ctx.obj['config'] = config
     ctx.obj['verbose'] = verbose
-
-    # 初始化配置
-    if config:
-        ctx.obj['config_manager'] = ConfigManager(config_path=Path(config))
-    else:
-        ctx.obj['config_manager'] = ConfigManager()
-
-    # 初始化插件管理器
-    ctx.obj['plugin_manager'] = PluginManager()
-    ctx.obj['plugin_manager'].discover_plugins()
+    if no_config_cache:
+        # 子进程和单独创建的ConfigManager同样不使用缓存
+        os.environ['FPGABUILDER_CONFIG_CACHE'] = '0'
+    if overrides:
+        from .config_layers import ENV_OVERRIDES, parse_override
+        for item in overrides:
+            if '\n' in item:
+                raise click.BadParameter(f"覆盖值不能包含换行: {item!r}", param_hint='--set')
+            try:
+                parse_override(item)
+            except Exception as e:
+                raise click.BadParameter(str(e), param_hint='--set')
+        # 通过环境变量传给所有ConfigManager（包括构建节点和子进程），命令行优先于已有的环境变量
+        existing = os.environ.get(ENV_OVERRIDES, '')
+        os.environ[ENV_OVERRIDES] = '\n'.join([existing, *overrides]).strip('\n')
+    # 配置管理器和插件管理器在命令第一次使用时创建（ContextObjects）
 
 
 # init命令
@@ -345,19 +342,46 @@ def config(ctx, gui):
 
 
 # build命令
+BUILD_TARGETS = {
+    'project': ['create_project'],
+    'ip': ['ip_generate'],
+    'bd': ['bd_generate'],
+    'synth': ['synth'],
+    'impl': ['impl'],
+    'bitstream': ['bitstream'],
+    'packbin': ['packbin'],
+    'mcs': ['mcs'],
+}
+
+
 @cli.command()
-@click.option('--target', type=click.Choice(['synth', 'impl', 'bitstream', 'all']),
+@click.option('--target', type=click.Choice(list(BUILD_TARGETS) + ['all']),
               default='all', help='构建目标')
-@click.option('--jobs', '-j', default=4, help='并行作业数')
+@click.option('--jobs', '-j', type=int, help='并行作业数（默认4，--all-projects时为CPU核数）')
+@click.option('--explain', is_flag=True, help='说明每个节点重新运行的原因')
+@click.option('--force', is_flag=True, help='忽略指纹，重新运行所有节点')
+@click.option('--dry-run', '-n', is_flag=True, help='只显示需要运行的节点，不执行')
+@click.option('--all-projects', 'all_projects',
+              type=click.Path(exists=True, file_okay=False),
+              help='构建目录下的所有工程（共享全局作业池）')
+@click.option('--licenses', type=int, help='同时运行的Vivado许可证数上限（--all-projects/构建矩阵）')
+@click.option('--variant', 'variants', multiple=True, help='只构建指定的构建矩阵变体（可多次指定）')
+@click.option('--no-cache', 'no_cache', is_flag=True, help='不使用产物缓存（build.cache）')
+@click.option('--hook-failure', 'hook_failure',
+              type=click.Choice(['abort', 'continue']),
+              help='钩子失败时的处理策略（覆盖 build.hooks.on_failure）')
 @click.pass_context
-def build(ctx, target, jobs):
-    """构建工程"""
-    click.echo(f"构建目标: {target}")
-    click.echo(f"并行作业: {jobs}")
+def build(ctx, target, jobs, explain, force, dry_run, all_projects, licenses, variants,
+          no_cache, hook_failure):
+    """构建工程（只运行输入发生变化的阶段）"""
+    if all_projects:
+        build_all_projects(ctx, Path(all_projects), target, jobs, explain, force,
+                           dry_run, licenses, use_cache=not no_cache,
+                           hook_failure=hook_failure)
+        return
 
-    # 获取配置管理器和插件管理器
+    # 获取配置管理器
     config_manager = ctx.obj['config_manager']
-    plugin_manager = ctx.obj['plugin_manager']
 
     # 查找配置文件
     config_file = config_manager.find_config_file(Path.cwd())
@@ -372,87 +396,225 @@ def build(ctx, target, jobs):
         click.echo(f"[ERROR] 加载配置文件失败: {e}")
         return
 
+    if config.get('matrix'):
+        build_matrix_variants(ctx, config, config_file, list(variants), target, jobs,
+                              explain, force, dry_run, licenses, use_cache=not no_cache,
+                              hook_failure=hook_failure)
+        return
+    if variants:
+        click.echo("[ERROR] 配置中没有构建矩阵（matrix），不能使用 --variant")
+        return
+
+    jobs = jobs or 4
+    click.echo(f"构建目标: {target}")
+    click.echo(f"并行作业: {jobs}")
+
     # 获取FPGA厂商
     vendor = config.get('fpga', {}).get('vendor', 'xilinx')
     if vendor not in ['xilinx', 'altera', 'lattice']:
         click.echo(f"[ERROR] 不支持的FPGA厂商: {vendor}")
         return
 
-    # 执行pre-build钩子（如果有）
-    hooks = config.get('build', {}).get('hooks', {})
-    pre_build_hook = hooks.get('pre_build')
-    if pre_build_hook:
-        if not CLI._execute_hook(pre_build_hook, 'pre-build'):
-            click.echo("构建被用户取消")
-            return
-
     # 获取插件（临时直接实例化Vivado插件，避免插件发现问题）
     plugin = None
     if vendor == 'xilinx':
+        VivadoPlugin = load_vivado_plugin()
         if VivadoPlugin is None:
             click.echo("[ERROR] 无法导入Vivado插件")
             return
         plugin = VivadoPlugin()
+        plugin.hook_failure = hook_failure
     else:
         click.echo(f"[ERROR] 暂不支持的FPGA厂商: {vendor}")
         return
 
     # 执行构建目标
     try:
-        if target == 'all':
-            click.echo("运行综合...")
-            synth_result = plugin.synthesize(config)
-            if not synth_result.success:
-                click.echo("[ERROR] 综合失败")
-                return
-            click.echo("运行实现...")
-            impl_result = plugin.implement(config)
-            if not impl_result.success:
-                click.echo("[ERROR] 实现失败")
-                return
-            click.echo("生成比特流...")
-            bit_result = plugin.generate_bitstream(config)
-            if not bit_result.success:
-                click.echo("[ERROR] 比特流生成失败")
-                return
-            click.echo("[OK] 构建完成")
-            # 执行post-bitstream钩子（如果有）
-            post_bitstream_hook = hooks.get('post_bitstream')
-            if post_bitstream_hook:
-                if not CLI._execute_hook(post_bitstream_hook, 'post-bitstream'):
-                    click.echo("警告: post-bitstream钩子执行失败，但构建已完成")
-        elif target == 'synth':
-            click.echo("运行综合...")
-            result = plugin.synthesize(config)
-            if result.success:
-                click.echo("[OK] 综合完成")
-            else:
-                click.echo("[ERROR] 综合失败")
-        elif target == 'impl':
-            click.echo("运行实现...")
-            result = plugin.implement(config)
-            if result.success:
-                click.echo("[OK] 实现完成")
-            else:
-                click.echo("[ERROR] 实现失败")
-        elif target == 'bitstream':
-            click.echo("生成比特流...")
-            result = plugin.generate_bitstream(config)
-            if result.success:
-                click.echo("[OK] 比特流生成完成")
-                # 执行post-bitstream钩子（如果有）
-                post_bitstream_hook = hooks.get('post_bitstream')
-                if post_bitstream_hook:
-                    if not CLI._execute_hook(post_bitstream_hook, 'post-bitstream'):
-                        click.echo("警告: post-bitstream钩子执行失败，但构建已完成")
-            else:
-                click.echo("[ERROR] 比特流生成失败")
+        from .artifact_cache import ArtifactCache
+        from .async_process import run_sync
+        from .build_graph import BuildGraph, run_build_async
+
+        nodes = plugin.build_graph_nodes(config)
+        targets = resolve_build_targets(target, {node.name for node in nodes})
+        if targets is None:
+            click.echo(f"[ERROR] 当前配置没有构建目标: {target}")
+            return
+
+        project_dir = Path(config.get('project_dir', './build'))
+        cache = None if no_cache else ArtifactCache.from_config(config)
+        graph = BuildGraph(nodes, config, state_dir=project_dir / '.fpgab',
+                           base_dir=Path.cwd(), reporter=click.echo, cache=cache)
+        # pre_build / post_bitstream 钩子与 --all-projects 和构建服务共用同一流程
+        result = run_sync(run_build_async(graph, targets, jobs=jobs, force=force,
+                                          explain=explain, dry_run=dry_run,
+                                          hook_failure=hook_failure))
+
+        if dry_run:
+            stale = [name for name, decision in result.decisions.items()
+                     if decision.stale]
+            click.echo(f"需要运行 {len(stale)} 个节点: {', '.join(stale) if stale else '无'}")
+            return
+
+        if not result.success:
+            for name in result.failed:
+                click.echo(f"[ERROR] {name} 失败")
+                for error in result.results[name].errors:
+                    click.echo(f"  {error}")
+            for name in result.blocked:
+                click.echo(f"[WARN] {name} 因依赖失败未运行")
+            return
+
+        if not result.ran and not result.restored:
+            click.echo("[OK] 所有目标均已是最新，无需重新构建")
+        else:
+            restored = f"从缓存恢复 {len(result.restored)} 个节点, " if result.restored else ""
+            click.echo(f"[OK] 构建完成: 运行 {len(result.ran)} 个节点, {restored}"
+                       f"跳过 {len(result.up_to_date)} 个最新节点 ({result.duration:.1f}s)")
     except Exception as e:
         click.echo(f"[ERROR] 构建过程中发生错误: {e}")
         import traceback
         traceback.print_exc()
 
 
+def resolve_build_targets(target, available):
+    """将构建目标映射为构建图节点，配置中不存在该目标时返回None"""
+    if target == 'all':
+        return [name for name in ('bitstream', 'packbin', 'mcs') if name in available]
+    targets = BUILD_TARGETS[target]
+    if any(name not in available for name in targets):
+        return None
+    return targets
+
+
+def build_all_projects(ctx, root, target, jobs, explain, force, dry_run, licenses,
+                       use_cache=True, hook_failure=None):
+    """构建目录下的所有工程，所有阶段共享一个全局资源池"""
+    from .build_matrix import MatrixError, expand_matrix_entries
+    from .multi_project import MultiProjectError, discover_projects
+
+    config_manager = ctx.obj['config_manager']
+
+    def load_project_config(config_file):
+        try:
+            return config_manager.load_config(config_file)
+        except Exception as e:
+            click.echo(f"[WARN] 跳过工程 {config_file}: {e}")
+            return None
+
+    try:
+        entries = expand_matrix_entries(discover_projects(root, load_project_config))
+    except (MultiProjectError, MatrixError) as e:
+        click.echo(f"[ERROR] {e}")
+        return
+    if not entries:
+        click.echo(f"[ERROR] 未在 {root} 下找到工程配置文件")
+        return
+
+    click.echo(f"发现 {len(entries)} 个工程:")
+    for entry in entries:
+        deps = f" (依赖: {', '.join(entry.depends_on)})" if entry.depends_on else ""
+        click.echo(f"  - {entry.name}: {entry.root}{deps}")
+
+    run_project_entries(ctx, entries, target, jobs, explain, force, dry_run, licenses,
+                        use_cache, hook_failure=hook_failure)
+
+
+def build_matrix_variants(ctx, config, config_file, names, target, jobs, explain, force,
+                          dry_run, licenses, use_cache=True, hook_failure=None):
+    """并行构建构建矩阵的所有变体，源文件扫描结果在变体之间共享"""
+    from .build_matrix import MatrixError, expand_matrix, select_variants
+    from .multi_project import ProjectEntry
+
+    try:
+        variants = select_variants(expand_matrix(config), names)
+    except MatrixError as e:
+        click.echo(f"[ERROR] {e}")
+        return
+
+    root = Path(config_file).parent.resolve()
+    click.echo(f"构建矩阵: {len(variants)} 个变体")
+    for variant in variants:
+        values = ', '.join(f"{axis}={value}" for axis, value in variant.values.items())
+        click.echo(f"  - {variant.name}: {values} -> {variant.config['project_dir']}")
+
+    entries = [
+        ProjectEntry(name=variant.name, root=root, config_file=Path(config_file),
+                     config=variant.config)
+        for variant in variants
+    ]
+    run_project_entries(ctx, entries, target, jobs, explain, force, dry_run, licenses,
+                        use_cache, hook_failure=hook_failure)
+
+
+def run_project_entries(ctx, entries, target, jobs, explain, force, dry_run, licenses,
+                        use_cache=True, hook_failure=None):
+    """通过全局资源池构建多个工程条目并输出汇总"""
+    import time
+    from .artifact_cache import ArtifactCache
+    from .build_graph import BuildGraph
+    from .multi_project import MultiProjectBuilder, MultiProjectError, format_summary
+
+    unsupported = [e.name for e in entries
+                   if e.config.get('fpga', {}).get('vendor', 'xilinx') != 'xilinx']
+    if unsupported:
+        click.echo(f"[ERROR] 暂不支持的FPGA厂商: {', '.join(unsupported)}")
+        return
+    VivadoPlugin = load_vivado_plugin()
+    if VivadoPlugin is None:
+        click.echo("[ERROR] 无法导入Vivado插件")
+        return
+
+    # 扫描和依赖分析与器件无关，所有条目共享
+    from plugins.vivado.file_scanner import ScanCache
+    from plugins.vivado.preflight import SharedElaboration
+    scan_cache = ScanCache()
+    # RTL预检展开只与器件系列有关，只有器件型号不同的变体共享
+    elaboration = SharedElaboration()
+
+    def graph_factory(entry, reporter):
+        plugin = VivadoPlugin()
+        plugin.working_dir = entry.root
+        plugin.scan_cache = scan_cache
+        plugin.elaboration_share = elaboration
+        plugin.hook_failure = hook_failure
+        nodes = plugin.build_graph_nodes(entry.config)
+        project_dir = entry.root / entry.config.get('project_dir', './build')
+        cache = ArtifactCache.from_config(entry.config) if use_cache else None
+        return BuildGraph(nodes, entry.config, state_dir=project_dir / '.fpgab',
+                          base_dir=entry.root, reporter=reporter, cache=cache)
+
+    def targets_for(graph):
+        targets = resolve_build_targets(target, set(graph.nodes))
+        if targets is None:
+            raise MultiProjectError(f"工程没有构建目标: {target}")
+        return targets
+
+    try:
+        builder = MultiProjectBuilder(entries, graph_factory, targets_for,
+                                      jobs=jobs, licenses=licenses, reporter=click.echo,
+                                      hook_failure=hook_failure)
+    except MultiProjectError as e:
+        click.echo(f"[ERROR] {e}")
+        return
+
+    caps = builder.capacities
+    click.echo(f"全局作业池: {caps['cpu']} 个作业, 内存 "
+               f"{caps['memory'] // (1024 ** 3) if caps['memory'] else '不限'} GiB, "
+               f"许可证 {caps['license'] or '不限'}")
+
+    start = time.monotonic()
+    summaries = builder.run(force=force, explain=explain, dry_run=dry_run)
+    click.echo("")
+    for line in format_summary(summaries, time.monotonic() - start):
+        click.echo(line)
+    if scan_cache.hits:
+        click.echo(f"源文件扫描: {scan_cache.misses} 次扫描, {scan_cache.hits} 次复用")
+    if elaboration.hits:
+        click.echo(f"RTL预检展开: {elaboration.misses} 次展开, {elaboration.hits} 次复用")
+    if not all(summary.success for summary in summaries):
+        ctx.exit(1)
+
+
 # synth命令
 @cli.command()
 @click.option('--jobs', '-j', default=4, help='并行作业数')
@@ -586,6 +748,7 @@ def gui(ctx):
     # 获取插件（临时直接实例化Vivado插件，避免插件发现问题）
     plugin = None
     if vendor == 'xilinx':
+        VivadoPlugin = load_vivado_plugin()
         if VivadoPlugin is None:
             click.echo("[ERROR] 无法导入Vivado插件")
             return
@@ -641,6 +804,7 @@ def prepare(ctx):
     # 获取插件（临时直接实例化Vivado插件，避免插件发现问题）
     plugin = None
     if vendor == 'xilinx':
+        VivadoPlugin = load_vivado_plugin()
         if VivadoPlugin is None:
             click.echo("[ERROR] 无法导入Vivado插件")
             return
@@ -692,6 +856,7 @@ def gui(ctx):
         return
 
     # 创建Vivado插件实例
+    VivadoPlugin = load_vivado_plugin()
     if VivadoPlugin is None:
         click.echo("[ERROR] 无法导入Vivado插件")
         return
@@ -730,6 +895,7 @@ def clean(ctx, level):
         return
 
     # 创建Vivado插件实例
+    VivadoPlugin = load_vivado_plugin()
     if VivadoPlugin is None:
         click.echo("[ERROR] 无法导入Vivado插件")
         return
@@ -769,6 +935,7 @@ def build(ctx, steps, jobs):
         return
 
     # 创建Vivado插件实例
+    VivadoPlugin = load_vivado_plugin()
     if VivadoPlugin is None:
         click.echo("[ERROR] 无法导入Vivado插件")
         return
@@ -819,6 +986,82 @@ def build(ctx, steps, jobs):
             click.echo("[ERROR] 比特流生成失败")
 
 
+@vivado.command()
+@click.option('--jobs', '-j', type=int,
+              help='同时运行的实现分支数（默认取 build.implementation.sweep.jobs）')
+@click.option('--strategy', '-s', 'strategies', multiple=True, help='只探索指定的实现策略（可多次指定）')
+@click.option('--stop-on-pass/--no-stop-on-pass', default=None, help='有分支满足时序后取消其余分支')
+@click.option('--no-promote', is_flag=True, help='不从最佳分支生成比特流')
+@click.option('--list', 'list_only', is_flag=True, help='只列出将要运行的分支')
+@click.pass_context
+def explore(ctx, jobs, strategies, stop_on_pass, no_promote, list_only):
+    """从综合检查点并行探索实现策略，选出时序最好的结果"""
+    # 获取配置
+    config_manager = ctx.obj['config_manager']
+    config_file = config_manager.find_config_file(Path.cwd())
+    if not config_file:
+        click.echo("[ERROR] 未找到项目配置文件")
+        return
+
+    try:
+        config = config_manager.load_config(config_file)
+    except Exception as e:
+        click.echo(f"[ERROR] 加载配置文件失败: {e}")
+        return
+
+    # 创建Vivado插件实例
+    VivadoPlugin = load_vivado_plugin()
+    if VivadoPlugin is None:
+        click.echo("[ERROR] 无法导入Vivado插件")
+        return
+
+    from plugins.vivado.impl_sweep import (SweepError, SweepResult, expand_sweep,
+                                           format_results)
+
+    if list_only:
+        if strategies:
+            sweep_config = {'strategies': list(strategies)}
+        else:
+            implementation = config.get('build', {}).get('implementation', {})
+            sweep_config = implementation.get('sweep') or {}
+        try:
+            variants = expand_sweep(sweep_config)
+        except SweepError as e:
+            click.echo(f"[ERROR] {e}")
+            return
+        click.echo(f"实现分支 ({len(variants)}):")
+        for variant in variants:
+            click.echo(f"  - {variant.name}: {variant.describe()}")
+        return
+
+    plugin = VivadoPlugin()
+    result = plugin.explore_implementation(
+        config, jobs=jobs, stop_on_pass=stop_on_pass, promote=not no_promote,
+        strategies=list(strategies) or None, reporter=click.echo
+    )
+
+    sweep = result.metrics.get('sweep')
+    if sweep:
+        click.echo("")
+        for line in format_results([SweepResult.from_dict(item) for item in sweep]):
+            click.echo(line)
+        click.echo("")
+
+    for warning in result.warnings:
+        click.echo(f"[WARN] {warning}")
+    if result.success:
+        winner = result.artifacts.get('sweep_winner')
+        if winner:
+            click.echo(f"[OK] 已从最佳分支 {winner} 生成比特流")
+        else:
+            click.echo(f"[OK] 实现探索完成，最佳检查点: {result.artifacts.get('best_checkpoint')}")
+    else:
+        click.echo("[ERROR] 实现探索失败")
+        for error in result.errors:
+            click.echo(f"  {error}")
+        ctx.exit(1)
+
+
 @vivado.command()
 @click.pass_context
 def import_files(ctx):
@@ -839,6 +1082,7 @@ def import_files(ctx):
         return
 
     # 创建Vivado插件实例
+    VivadoPlugin = load_vivado_plugin()
     if VivadoPlugin is None:
         click.echo("[ERROR] 无法导入Vivado插件")
         return
@@ -879,6 +1123,7 @@ def program(ctx, cable, target, bitfile, flash):
         return
 
     # 创建Vivado插件实例
+    VivadoPlugin = load_vivado_plugin()
     if VivadoPlugin is None:
         click.echo("[ERROR] 无法导入Vivado插件")
         return
@@ -957,6 +1202,7 @@ def synth(ctx):
         return
 
     # 创建Vivado插件实例
+    VivadoPlugin = load_vivado_plugin()
     if VivadoPlugin is None:
         click.echo("[ERROR] 无法导入Vivado插件")
         return
@@ -991,6 +1237,7 @@ def impl(ctx):
         return
 
     # 创建Vivado插件实例
+    VivadoPlugin = load_vivado_plugin()
     if VivadoPlugin is None:
         click.echo("[ERROR] 无法导入Vivado插件")
         return
@@ -1025,6 +1272,7 @@ def bitstream(ctx):
         return
 
     # 创建Vivado插件实例
+    VivadoPlugin = load_vivado_plugin()
     if VivadoPlugin is None:
         click.echo("[ERROR] 无法导入Vivado插件")
         return
@@ -1080,6 +1328,7 @@ def packbin(ctx, output, fsbl, fsbl_offset, bitstream, bitstream_offset,
         return
 
     # 创建Vivado插件实例
+    VivadoPlugin = load_vivado_plugin()
     if VivadoPlugin is None:
         click.echo("[ERROR] 无法导入Vivado插件")
         return
@@ -1186,13 +1435,86 @@ def clean(ctx, all):
               default='zip', help='打包格式')
 @click.option('--output', type=click.Path(), default='.',
               help='输出路径')
+@click.option('--archive', is_flag=True, help='把发布镜像存入去重归档（按内容只保存一份）')
+@click.option('--archive-dir', type=click.Path(),
+              help='归档目录（默认 build.archive.path 或 ~/.fpga_builder/archive）')
+@click.option('--from', 'source_dir', type=click.Path(), default='bin',
+              help='未指定文件时从该目录的 BINNAME 读取 pack_fpga.py 的输出（默认: bin）')
+@click.option('--no-link', is_flag=True, help='不在归档的 releases/ 目录下建立硬链接，只记录索引')
+@click.argument('files', nargs=-1, type=click.Path(exists=True, dir_okay=False))
 @click.pass_context
-def pack(ctx, format, output):
-    """打包发布"""
+def pack(ctx, format, output, archive, archive_dir, source_dir, no_link, files):
+    """打包发布
+
+    使用 --archive 时把 pack_fpga.py 生成的镜像（及同名.ltx）存入归档。
+    """
+    if archive:
+        archive_releases(ctx, archive_dir, files, source_dir, link=not no_link)
+        return
     click.echo(f"打包发布，格式: {format}, 输出: {output}")
     package_project(format, output)
 
 
+def _load_release_archive(ctx, archive_dir=None):
+    """获取发布归档：命令行指定的目录优先，其次是工程配置 build.archive.path"""
+    from .release_archive import ReleaseArchive
+
+    if archive_dir:
+        return ReleaseArchive(Path(archive_dir))
+    config_manager = ctx.obj['config_manager']
+    config_file = config_manager.find_config_file(Path.cwd())
+    if config_file:
+        try:
+            return ReleaseArchive.from_config(config_manager.load_config(config_file))
+        except Exception as e:
+            click.echo(f"[WARN] 加载配置文件失败，使用默认归档目录: {e}")
+    return ReleaseArchive()
+
+
+def archive_releases(ctx, archive_dir, files, source_dir, link=True):
+    """把发布镜像存入归档"""
+    from .artifact_cache import format_size
+    from .release_archive import ArchiveError
+
+    release_archive = _load_release_archive(ctx, archive_dir)
+    if not files:
+        binname = Path(source_dir) / 'BINNAME'
+        if not binname.is_file():
+            click.echo(f"[ERROR] 未指定文件，且 {binname} 不存在（先运行 pack_fpga.py）")
+            ctx.exit(1)
+        # BINNAME中的路径相对于运行pack_fpga.py时的目录；在当前目录找不到时
+        # 按BINNAME所在目录解析（镜像与BINNAME写在同一输出目录）
+        files = []
+        for line in binname.read_text(encoding='utf-8').splitlines():
+            if not line.strip():
+                continue
+            path = Path(line.strip())
+            if not path.exists():
+                path = Path(source_dir) / path.name
+            files.append(str(path))
+
+    failed = False
+    for file in files:
+        path = Path(file)
+        ltx = path.with_suffix('.ltx')
+        try:
+            record = release_archive.add(path, ltx_path=ltx if ltx.is_file() else None,
+                                         link=link)
+        except (ArchiveError, OSError) as e:
+            click.echo(f"[ERROR] 归档 {path} 失败: {e}")
+            failed = True
+            continue
+        click.echo(f"[OK] 已归档 {record.name} (sha256 {record.sha256[:12]}, "
+                   f"{format_size(record.size)})")
+
+    stats = release_archive.stats()
+    click.echo(f"归档目录: {stats['path']}，发布 {stats['releases']} 个，"
+               f"内容 {format_size(stats['stored_size'])}"
+               f"（去重比 {stats['dedup_ratio']:.1f}x）")
+    if failed:
+        ctx.exit(1)
+
+
 @cli.command()
 @click.option('--plugin', '-p', help='指定插件名称')
 @click.option('--verbose', '-v', is_flag=True, help='详细输出')
@@ -1238,6 +1560,489 @@ def compatibility(ctx, plugin, verbose):
                             click.echo(f"      路径: {tool_info['path']}")
 
 
+def _service_request_graph(request, reporter, on_output=None):
+    """为构建服务的请求创建构建图，返回(配置, 构建图, 目标)"""
+    from .artifact_cache import ArtifactCache
+    from .build_graph import BuildGraph
+    from .build_service import BuildServiceError
+    from .config import ConfigManager
+
+    config_file = Path(request['config_file'])
+    root = config_file.parent
+    config = ConfigManager().load_config(config_file)
+    if config.get('matrix'):
+        raise BuildServiceError("构建服务暂不支持构建矩阵，请使用 fpgab build")
+    VivadoPlugin = load_vivado_plugin()
+    vendor = config.get('fpga', {}).get('vendor', 'xilinx')
+    if vendor != 'xilinx' or VivadoPlugin is None:
+        raise BuildServiceError("构建服务仅支持Vivado工程")
+
+    plugin = VivadoPlugin()
+    plugin.working_dir = root
+    nodes = plugin.build_graph_nodes(config, on_output)
+    targets = resolve_build_targets(request.get('target', 'all'),
+                                    {node.name for node in nodes})
+    if targets is None:
+        raise BuildServiceError(f"当前配置没有构建目标: {request.get('target')}")
+    project_dir = root / config.get('project_dir', './build')
+    cache = ArtifactCache.from_config(config) if request.get('cache', True) else None
+    graph = BuildGraph(nodes, config, state_dir=project_dir / '.fpgab', base_dir=root,
+                       reporter=reporter, cache=cache)
+    return config, graph, targets
+
+
+def _service_fingerprint(request):
+    """构建请求的指纹：工程、目标和各目标节点的输入指纹"""
+    from .config_hash import hash_value
+    from .build_service import BuildServiceError
+
+    try:
+        _, graph, targets = _service_request_graph(request,
+                                                   reporter=lambda message: None)
+        decisions = graph.plan(targets)
+    except BuildServiceError:
+        raise
+    except Exception as e:
+        raise BuildServiceError(f"无法计算请求指纹: {e}") from e
+    return hash_value({
+        'config_file': str(Path(request['config_file']).resolve()),
+        'target': request.get('target', 'all'),
+        'force': bool(request.get('force')),
+        'cache': request.get('cache', True),
+        'hook_failure': request.get('hook_failure'),
+        'nodes': {name: decision.record['fingerprint']
+                  for name, decision in decisions.items()},
+    })
+
+
+async def _service_executor(request, emit):
+    """在构建服务中执行构建请求"""
+    from .async_process import run_blocking
+    from .build_graph import run_build_async
+
+    def on_output(stream, line):
+        emit(line)
+
+    try:
+        _, graph, targets = await run_blocking(_service_request_graph, request, emit,
+                                               on_output)
+    except Exception as e:
+        emit(f"[ERROR] {e}")
+        return {'success': False, 'error': str(e)}
+    # 与 fpgab build 相同，执行 pre_build / post_bitstream 钩子
+    result = await run_build_async(graph, targets, jobs=request.get('jobs') or 4,
+                                   force=bool(request.get('force')),
+                                   hook_failure=request.get('hook_failure'),
+                                   on_output=on_output)
+    errors = [error for name in result.failed
+              for error in result.results[name].errors]
+    return {
+        'success': result.success,
+        'ran': result.ran,
+        'restored': result.restored,
+        'up_to_date': result.up_to_date,
+        'failed': result.failed,
+        'blocked': result.blocked,
+        'errors': errors,
+        'duration': result.duration,
+    }
+
+
+# serve命令
+@cli.command()
+@click.option('--socket', 'endpoint',
+              help='Unix套接字路径或 host:port（默认 ~/.fpga_builder/fpgab.sock）')
+@click.option('--jobs', '-j', type=int, default=1, show_default=True, help='同时执行的构建请求数')
+@click.option('--token-file', type=click.Path(dir_okay=False),
+              help='共享令牌文件（TCP端点必需，默认自动生成 ~/.fpga_builder/service.token）')
+@click.pass_context
+def serve(ctx, endpoint, jobs, token_file):
+    """运行构建服务（优先级队列，合并相同的构建请求）"""
+    import asyncio
+    from .build_service import (BuildService, BuildServiceError, parse_endpoint,
+                                service_token)
+
+    try:
+        # TCP端点没有令牌时自动生成，同一用户的 fpgab submit 读取同一文件
+        token = service_token(token_file, create=parse_endpoint(endpoint)[0] == 'tcp')
+    except BuildServiceError as e:
+        click.echo(f"[ERROR] {e}")
+        ctx.exit(1)
+    service = BuildService(_service_executor, _service_fingerprint, concurrency=jobs,
+                           token=token)
+
+    async def main():
+        await service.start(endpoint)
+        click.echo(f"[OK] 构建服务已启动: {service.endpoint}, 同时执行 {service.concurrency} 个请求")
+        try:
+            await service.serve_forever()
+        finally:
+            await service.close()
+
+    try:
+        asyncio.run(main())
+    except BuildServiceError as e:
+        click.echo(f"[ERROR] {e}")
+        ctx.exit(1)
+    except KeyboardInterrupt:
+        click.echo("构建服务已停止")
+
+
+# submit命令
+@cli.command()
+@click.option('--target', type=click.Choice(list(BUILD_TARGETS) + ['all']),
+              default='all', help='构建目标')
+@click.option('--priority', type=click.Choice(['interactive', 'ci', 'nightly']),
+              default='interactive', show_default=True, help='请求优先级')
+@click.option('--jobs', '-j', type=int, help='并行作业数（默认4）')
+@click.option('--force', is_flag=True, help='忽略指纹，重新运行所有节点')
+@click.option('--no-cache', 'no_cache', is_flag=True, help='不使用产物缓存')
+@click.option('--hook-failure', 'hook_failure',
+              type=click.Choice(['abort', 'continue']),
+              help='钩子失败时的处理策略（覆盖 build.hooks.on_failure）')
+@click.option('--quiet', '-q', is_flag=True, help='不输出构建日志，只等待结果')
+@click.option('--detach', is_flag=True, help='提交后立即返回，不等待结果')
+@click.option('--status', 'show_status', is_flag=True, help='显示构建服务的队列状态')
+@click.option('--socket', 'endpoint', help='构建服务地址')
+@click.option('--token-file', type=click.Path(dir_okay=False), help='构建服务的共享令牌文件')
+@click.pass_context
+def submit(ctx, target, priority, jobs, force, no_cache, hook_failure, quiet, detach,
+           show_status, endpoint, token_file):
+    """向构建服务提交构建请求"""
+    from .async_process import run_sync
+    from .build_service import (BuildServiceError, query_status, service_token,
+                                submit_request)
+
+    try:
+        token = service_token(token_file)
+    except BuildServiceError as e:
+        click.echo(f"[ERROR] {e}")
+        ctx.exit(1)
+
+    if show_status:
+        try:
+            status = run_sync(query_status(endpoint, token=token))
+        except BuildServiceError as e:
+            click.echo(f"[ERROR] {e}")
+            ctx.exit(1)
+        click.echo(f"构建服务 (pid {status['pid']}), 同时执行 {status['concurrency']} 个请求")
+        for job in status['active']:
+            click.echo(f"  {job['id']}  {job['state']:<8} {job['priority']:<12} "
+                       f"{job['target']:<10} {job['requests']} 个请求  {job['project']}")
+        if not status['active']:
+            click.echo("  队列为空")
+        return
+
+    config_file = ctx.obj['config_manager'].find_config_file(Path.cwd())
+    if not config_file:
+        click.echo("[ERROR] 未找到项目配置文件 (fpga_project.yaml)")
+        ctx.exit(1)
+
+    request = {
+        'config_file': str(Path(config_file).resolve()),
+        'project_dir': str(Path(config_file).resolve().parent),
+        'target': target,
+        'priority': priority,
+        'jobs': jobs,
+        'force': force,
+        'cache': not no_cache,
+        'hook_failure': hook_failure,
+        'user': os.environ.get('USER') or os.environ.get('USERNAME'),
+    }
+
+    def on_accepted(header):
+        if header['coalesced']:
+            click.echo(f"[OK] 与进行中的请求 {header['id']} 合并")
+        elif header['position']:
+            click.echo(f"[OK] 请求 {header['id']} 已排队，位置 {header['position']}")
+        else:
+            click.echo(f"[OK] 请求 {header['id']} 已受理")
+
+    try:
+        result = run_sync(submit_request(request, endpoint, follow=not quiet,
+                                         detach=detach, on_output=click.echo,
+                                         on_accepted=on_accepted, token=token))
+    except BuildServiceError as e:
+        click.echo(f"[ERROR] {e}")
+        ctx.exit(1)
+    if detach:
+        return
+
+    if result.get('success'):
+        click.echo(f"[OK] 构建完成: 运行 {len(result.get('ran', []))} 个节点, "
+                   f"从缓存恢复 {len(result.get('restored', []))} 个, "
+                   f"跳过 {len(result.get('up_to_date', []))} 个最新节点 "
+                   f"({result.get('duration', 0):.1f}s)")
+        return
+    for name in result.get('failed', []):
+        click.echo(f"[ERROR] {name} 失败")
+    for error in result.get('errors', []) or [result.get('error', '构建失败')]:
+        click.echo(f"  {error}")
+    ctx.exit(1)
+
+
+# watch命令
+@cli.command()
+@click.option('--debounce', type=float, default=0.3, show_default=True, help='防抖时间（秒）')
+@click.option('--poll', is_flag=True, help='使用轮询代替文件系统通知')
+@click.option('--no-initial-check', is_flag=True, help='启动时不展开顶层模块')
+@click.option('--verbose-vivado', is_flag=True, help='输出Vivado会话的全部日志')
+@click.option('--timeout', type=float, default=600, show_default=True,
+              help='单次检查超时（秒），超时后重新启动Vivado会话；0表示不限')
+@click.pass_context
+def watch(ctx, debounce, poll, no_initial_check, verbose_vivado, timeout):
+    """监视源文件，修改后在常驻Vivado会话中快速检查受影响的模块"""
+    import asyncio
+    from .config import ConfigManager
+    from .file_watch import FileWatcher
+
+    try:
+        from plugins.vivado.file_scanner import FileScanner
+        from plugins.vivado.plugin import VivadoPlugin
+        from plugins.vivado.watch import VivadoSession, WatchSession
+    except ImportError as e:
+        click.echo(f"[ERROR] 无法导入Vivado插件: {e}")
+        return
+
+    config_manager = ctx.obj['config_manager']
+    config_file = config_manager.find_config_file(Path.cwd())
+    if not config_file:
+        click.echo("[ERROR] 未找到项目配置文件 (fpga_project.yaml)")
+        return
+    try:
+        config = config_manager.load_config(config_file)
+    except Exception as e:
+        click.echo(f"[ERROR] 加载配置文件失败: {e}")
+        return
+
+    plugin = VivadoPlugin()
+    if not plugin.initialize(config):
+        click.echo("[ERROR] 监视模式需要本机安装Vivado")
+        return
+
+    root = Path(config_file).parent
+    command = [plugin._resolve_vivado_executable(), '-mode', 'tcl', '-nojournal',
+               '-nolog']
+    session = VivadoSession(command, cwd=root,
+                            on_output=click.echo if verbose_vivado else None,
+                            timeout=timeout or None)
+    watcher = FileWatcher([], debounce=debounce, use_polling=True if poll else None)
+    watch_session = WatchSession(
+        config, lambda cfg: FileScanner(root).scan_files(cfg), session, watcher,
+        config_file=config_file,
+        reload_config=lambda: ConfigManager().load_config(config_file),
+        reporter=click.echo)
+    click.echo(f"启动Vivado会话 ({config.get('fpga', {}).get('part', '')})...")
+    try:
+        asyncio.run(watch_session.run(initial_check=not no_initial_check))
+    except KeyboardInterrupt:
+        click.echo("监视已停止")
+    except RuntimeError as e:
+        click.echo(f"[ERROR] {e}")
+
+
+# worker命令
+@cli.command()
+@click.option('--listen', default='127.0.0.1:7601', show_default=True,
+              help='监听地址 [host:]port（对其他主机提供服务时使用 0.0.0.0:7601）')
+@click.option('--token-file', type=click.Path(dir_okay=False),
+              help='共享令牌文件（默认读取环境变量 FPGABUILDER_WORKER_TOKEN）')
+@click.option('--slots', type=int, help='同时运行的任务数（默认CPU核数的一半）')
+@click.option('--work-dir', type=click.Path(file_okay=False), help='任务工作目录的根目录')
+@click.option('--name', help='节点名称（默认主机名）')
+@click.option('--keep-jobs', is_flag=True, help='保留任务工作目录（调试用）')
+@click.pass_context
+def worker(ctx, listen, token_file, slots, work_dir, name, keep_jobs):
+    """作为分布式构建节点运行
+
+    只运行携带共享令牌的任务，且只执行 vivado -mode batch -source <任务脚本>。
+    """
+    import asyncio
+    from .distributed import (DEFAULT_HOST, TOKEN_ENV, BuildWorker, RemoteError,
+                              load_token, parse_address)
+
+    try:
+        if ':' not in listen:
+            listen = f'{DEFAULT_HOST}:{listen}'
+        host, port = parse_address(listen)
+        token = load_token(token_file)
+    except RemoteError as e:
+        click.echo(f"[ERROR] {e}")
+        return
+    if token is None:
+        click.echo(f"[ERROR] 未配置共享令牌：使用 --token-file 或设置环境变量 {TOKEN_ENV}")
+        ctx.exit(1)
+    build_worker = BuildWorker(host=host, port=port, slots=slots, name=name,
+                               keep_jobs=keep_jobs,
+                               work_root=Path(work_dir) if work_dir else None,
+                               token=token)
+    tools = build_worker.info()['tools']
+    if not tools.get('vivado'):
+        click.echo("[WARN] 工具链清单中没有Vivado，请先运行 fpgab debug tools --refresh")
+    for tool, versions in tools.items():
+        click.echo(f"  {tool}: {', '.join(versions)}")
+    click.echo(f"[OK] 构建节点 {build_worker.name} 监听 {host}:{port}, "
+               f"{build_worker.slots} 个任务槽")
+    try:
+        asyncio.run(build_worker.serve_forever())
+    except KeyboardInterrupt:
+        click.echo("构建节点已停止")
+
+
+# cache命令组
+@cli.group()
+def cache():
+    """产物缓存管理"""
+    pass
+
+
+def _load_artifact_cache(ctx):
+    """按当前工程配置获取产物缓存，工程未配置时使用默认缓存目录"""
+    from .artifact_cache import ArtifactCache
+
+    config_manager = ctx.obj['config_manager']
+    config_file = config_manager.find_config_file(Path.cwd())
+    if config_file:
+        try:
+            config = config_manager.load_config(config_file)
+            artifact_cache = ArtifactCache.from_config(config)
+            if artifact_cache is not None:
+                return artifact_cache
+        except Exception as e:
+            click.echo(f"[WARN] 加载配置文件失败，使用默认缓存目录: {e}")
+    return ArtifactCache()
+
+
+@cache.command('stats')
+@click.pass_context
+def cache_stats(ctx):
+    """显示缓存命中率和节省的构建量"""
+    from .artifact_cache import format_size
+
+    stats = _load_artifact_cache(ctx).stats()
+    limit = format_size(stats['max_size']) if stats['max_size'] else '不限'
+    click.echo(f"缓存目录: {stats['path']}")
+    click.echo(f"条目: {stats['entries']}, 占用: {format_size(stats['size'])} / {limit}")
+    click.echo(f"命中: {stats['hits']}, 未命中: {stats['misses']}, "
+               f"命中率: {stats['hit_rate']:.1%}")
+    click.echo(f"恢复的数据量: {format_size(stats['bytes_saved'])}")
+    click.echo(f"保存: {stats['stores']} 次, 写入 {format_size(stats['bytes_stored'])}, "
+               f"淘汰 {stats['evictions']} 个条目")
+
+
+@cache.command('prune')
+@click.option('--max-size', help='容量上限（如 20G，默认使用配置中的上限）')
+@click.pass_context
+def cache_prune(ctx, max_size):
+    """按最近使用时间淘汰条目直到不超过容量上限"""
+    from .artifact_cache import parse_size
+
+    artifact_cache = _load_artifact_cache(ctx)
+    try:
+        limit = parse_size(max_size) if max_size else None
+    except ValueError as e:
+        click.echo(f"[ERROR] {e}")
+        return
+    removed = artifact_cache.evict(limit)
+    click.echo(f"[OK] 淘汰 {removed} 个缓存条目")
+
+
+@cache.command('clear')
+@click.confirmation_option(prompt='确定清空产物缓存吗？')
+@click.pass_context
+def cache_clear(ctx):
+    """清空产物缓存"""
+    artifact_cache = _load_artifact_cache(ctx)
+    artifact_cache.clear()
+    click.echo(f"[OK] 已清空缓存: {artifact_cache.root}")
+
+
+@cli.group()
+def archive():
+    """发布镜像归档"""
+    pass
+
+
+@archive.command('list')
+@click.option('--archive-dir', type=click.Path(), help='归档目录')
+@click.option('--git-head', help='按git HEAD（前缀）查询')
+@click.option('--version', 'release_version', help='按版本查询，如 V26.02.0.0.2')
+@click.option('--date', help='按日期查询（月日，如 0227）')
+@click.option('--limit', '-n', type=int, default=20, help='最多显示的条数（默认: 20）')
+@click.pass_context
+def archive_list(ctx, archive_dir, git_head, release_version, date, limit):
+    """查询已归档的发布（最新的在前）"""
+    import time
+    from .artifact_cache import format_size
+
+    release_archive = _load_release_archive(ctx, archive_dir)
+    records = release_archive.find(git_head=git_head, version=release_version,
+                                   date=date, limit=limit)
+    if not records:
+        click.echo("没有匹配的发布")
+        return
+    for record in records:
+        created = time.strftime('%Y-%m-%d %H:%M', time.localtime(record.created))
+        pinned = ' [固定]' if record.pinned else ''
+        click.echo(f"{record.name}  {format_size(record.size)}  "
+                   f"sha256 {record.sha256[:12]}  {created}{pinned}")
+
+
+@archive.command('gc')
+@click.option('--archive-dir', type=click.Path(), help='归档目录')
+@click.option('--keep-last', type=int, help='保留最新的N个发布')
+@click.option('--max-age-days', type=float, help='保留N天内归档的发布')
+@click.option('--dry-run', is_flag=True, help='只显示将删除的内容')
+@click.pass_context
+def archive_gc(ctx, archive_dir, keep_last, max_age_days, dry_run):
+    """按保留策略删除发布，回收不再被引用的内容"""
+    from .artifact_cache import format_size
+
+    release_archive = _load_release_archive(ctx, archive_dir)
+    result = release_archive.gc(keep_last=keep_last, max_age_days=max_age_days,
+                                dry_run=dry_run)
+    for name in result['releases']:
+        click.echo(f"  {'将删除' if dry_run else '删除'}: {name}")
+    prefix = '[INFO] 将' if dry_run else '[OK] '
+    click.echo(f"{prefix}删除 {len(result['releases'])} 个发布，回收 {result['objects']} 个内容文件"
+               f"（{format_size(result['bytes'])}）")
+
+
+def _pin_release(ctx, archive_dir, names, pinned):
+    """固定或取消固定发布，任一名称不存在时以非零状态退出"""
+    from .release_archive import ArchiveError
+
+    release_archive = _load_release_archive(ctx, archive_dir)
+    failed = False
+    for name in names:
+        try:
+            release_archive.pin(name, pinned=pinned)
+            click.echo(f"[OK] 已{'固定' if pinned else '取消固定'} {name}")
+        except ArchiveError as e:
+            click.echo(f"[ERROR] {e}")
+            failed = True
+    if failed:
+        ctx.exit(1)
+
+
+@archive.command('pin')
+@click.option('--archive-dir', type=click.Path(), help='归档目录')
+@click.argument('names', nargs=-1, required=True)
+@click.pass_context
+def archive_pin(ctx, archive_dir, names):
+    """固定发布（回收时始终保留）"""
+    _pin_release(ctx, archive_dir, names, True)
+
+
+@archive.command('unpin')
+@click.option('--archive-dir', type=click.Path(), help='归档目录')
+@click.argument('names', nargs=-1, required=True)
+@click.pass_context
+def archive_unpin(ctx, archive_dir, names):
+    """取消固定发布（回收时按保留策略处理）"""
+    _pin_release(ctx, archive_dir, names, False)
+
+
 # debug命令组
 @cli.group()
 def debug():
@@ -1260,7 +2065,86 @@ def info(ctx):
 def status(ctx, level):
     """显示系统状态"""
     click.echo(f"系统状态检查 - 级别: {level}")
-    click.echo("状态检查功能开发中...")
+    show_tool_cache_status(level)
+    show_admission_status(level)
+    show_stage_fingerprints(ctx.obj['config_manager'], level)
+
+
+@debug.command()
+@click.option('--refresh', is_flag=True, help='重新扫描安装目录（仅列举发生变化的目录）')
+@click.option('--force', is_flag=True, help='忽略缓存，完整重新扫描')
+@click.option('--root', 'roots', multiple=True, type=click.Path(), help='安装根目录（可多次指定）')
+@click.pass_context
+def tools(ctx, refresh, force, roots):
+    """显示已安装的多版本工具链清单"""
+    from datetime import datetime
+    from .tool_inventory import ToolInventory
+
+    if roots:
+        inventory = ToolInventory(roots=[Path(r) for r in roots])
+    else:
+        config_manager = ctx.obj['config_manager']
+        config_file = config_manager.find_config_file(Path.cwd())
+        config = {}
+        if config_file:
+            try:
+                config = config_manager.load_config(config_file)
+            except Exception as e:
+                click.echo(f"[WARN] 加载配置文件失败，使用默认安装根目录: {e}")
+        inventory = ToolInventory.from_config(config)
+
+    if refresh or force:
+        stats = inventory.refresh(force=force)
+        click.echo(f"[OK] 扫描完成: 列举 {stats['scanned']} 个目录, 复用 {stats['reused']} 个目录")
+
+    installs = inventory.installs()
+    click.echo(f"安装根目录: {', '.join(str(r) for r in inventory.roots)}")
+    if inventory.scanned_at:
+        scanned_at = datetime.fromtimestamp(inventory.scanned_at)
+        scanned_at = scanned_at.strftime('%Y-%m-%d %H:%M:%S')
+        click.echo(f"清单时间: {scanned_at} ({inventory.path})")
+    if not installs:
+        click.echo("[WARN] 未找到任何工具安装")
+        return
+    for install in installs:
+        click.echo(f"  {install.tool:<12} {install.version:<8} {install.executable}")
+        if install.settings_script:
+            click.echo(f"  {'':<12} {'':<8} settings: {install.settings_script}")
+
+
+@debug.command()
+@click.option('--worker', 'workers', multiple=True,
+              help='构建节点地址（默认使用配置中的 build.remote.workers）')
+@click.pass_context
+def workers(ctx, workers):
+    """显示分布式构建节点的状态"""
+    from .async_process import run_sync
+    from .distributed import RemoteDispatcher
+
+    if not workers:
+        config_manager = ctx.obj['config_manager']
+        config_file = config_manager.find_config_file(Path.cwd())
+        if config_file:
+            try:
+                config = config_manager.load_config(config_file)
+                workers = config.get('build', {}).get('remote', {}).get('workers', [])
+            except Exception as e:
+                click.echo(f"[ERROR] 加载配置文件失败: {e}")
+                return
+    if not workers:
+        click.echo("[WARN] 未配置构建节点（build.remote.workers）")
+        return
+
+    dispatcher = RemoteDispatcher(list(workers))
+    for address in dispatcher.workers:
+        try:
+            info = run_sync(dispatcher.query(address))
+        except Exception as e:
+            click.echo(f"[ERROR] {address}: {e}")
+            continue
+        versions = ', '.join(info.tools.get('vivado', [])) or '无'
+        click.echo(f"[OK] {address} ({info.name}): 运行 {info.running}/{info.slots}, "
+                   f"排队 {info.queued}, 负载 {info.load:.2f}, Vivado: {versions}")
 
 
 @debug.command()
@@ -1301,6 +2185,112 @@ def create_project_structure(path, name):
     click.echo(f"工程结构已创建: {base_path}")
 
 
+def show_tool_cache_status(level):
+    """显示工具检测缓存"""
+    from datetime import datetime
+    from .tool_cache import ToolCache, cache_enabled
+
+    cache = ToolCache()
+    snapshot = cache.snapshot()
+
+    click.echo("\n工具检测缓存:")
+    click.echo(f"  缓存文件: {snapshot['path']}")
+    if not cache_enabled():
+        click.echo("  [WARN] 已通过 FPGABUILDER_TOOL_CACHE 禁用")
+    if not snapshot['executables']:
+        click.echo("  (空)")
+    for exe_path, entry in sorted(snapshot['executables'].items()):
+        state = "有效" if entry['fresh'] else "已失效(文件已变化)"
+        valid = "" if entry.get('valid') else ", 验证失败"
+        click.echo(f"    - {exe_path}: {entry.get('version') or 'unknown'} "
+                   f"[{state}{valid}]")
+        if level != 'basic':
+            probed_at = datetime.fromtimestamp(entry.get('probed_at', 0))
+            probed_at = probed_at.strftime('%Y-%m-%d %H:%M:%S')
+            click.echo(f"      大小: {entry.get('size')} 字节, 探测时间: {probed_at}")
+
+    if level != 'basic' and snapshot['locations']:
+        click.echo("  搜索位置:")
+        for name, entry in sorted(snapshot['locations'].items()):
+            click.echo(f"    - {name}: {entry['path']}")
+
+
+def show_admission_status(level):
+    """显示主机级内存准入状态"""
+    from .admission import AdmissionController, format_bytes
+
+    controller = AdmissionController()
+    try:
+        state = controller.snapshot()
+    except OSError as e:
+        click.echo(f"[WARN] 无法读取准入状态: {e}")
+        return
+
+    click.echo("\n内存准入:")
+    click.echo(f"  可用内存: {format_bytes(state['available'])}")
+    click.echo(f"  运行中Vivado任务: {len(state['running'])}")
+    for entry in state['running'].values():
+        click.echo(f"    - {entry['key']} (PID {entry['pid']}, "
+                   f"预留 {format_bytes(entry.get('reserved'))}, "
+                   f"已用 {format_bytes(entry.get('rss', 0))})")
+    click.echo(f"  排队任务: {len(state['waiting'])}")
+    for entry in state['waiting'].values():
+        click.echo(f"    - {entry['key']} (PID {entry['pid']}): "
+                   f"{entry.get('reason', '等待中')}")
+
+    if level != 'basic' and state['history']:
+        click.echo("  峰值内存历史:")
+        for key, peaks in sorted(state['history'].items()):
+            click.echo(f"    - {key}: 最近 {format_bytes(peaks[-1])}, "
+                       f"最大 {format_bytes(max(peaks))}")
+
+
+def show_stage_fingerprints(config_manager, level):
+    """显示各构建阶段的有效配置指纹与上次构建的差异"""
+    import json
+
+    config_file = config_manager.find_config_file(Path.cwd())
+    if not config_file:
+        return
+    try:
+        # 只比较指纹：缓存未命中时不做模式校验
+        config = config_manager.load_config(config_file, validate=False)
+    except Exception as e:
+        click.echo(f"[WARN] 加载配置文件失败，无法比较阶段配置指纹: {e}")
+        return
+
+    # 各阶段读取的配置键取自模板声明（不导入插件本身）
+    try:
+        from plugins.vivado.stage_keys import stage_config_keys
+    except ImportError:
+        return
+    config_manager.register_stage_keys(stage_config_keys())
+    project_dir = config_file.parent / config.get('project_dir', './build')
+    state_file = project_dir / '.fpgab' / 'graph_state.json'
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            nodes = json.load(f).get('nodes', {})
+    except (OSError, ValueError, AttributeError):
+        nodes = {}
+
+    click.echo("\n阶段配置指纹:")
+    for stage in sorted(config_manager.stage_keys()):
+        current = config_manager.stage_config_hashes(stage, config)
+        fingerprint = config_manager.stage_fingerprint(stage, config)[:12]
+        previous = nodes.get(stage, {}).get('config')
+        if previous is None:
+            click.echo(f"  {stage}: {fingerprint} (未构建)")
+            continue
+        changed = sorted(key for key in set(current) | set(previous)
+                         if current.get(key) != previous.get(key))
+        if not changed:
+            click.echo(f"  {stage}: {fingerprint} (未变化)")
+        else:
+            click.echo(f"  {stage}: {fingerprint} [WARN] 配置已变化: {', '.join(changed)}")
+        if level != 'basic':
+            click.echo(f"    配置键: {', '.join(current)}")
+
+
 def create_ip_core(name, ip_type, interface):
     """创建IP核"""
     # 实现IP核创建逻辑
@@ -6,13 +6,58 @@
 """
 
 import os
+import hashlib
 import yaml
 import json
 from pathlib import Path
-from typing import Dict, Any, Optional, Union
-import jsonschema
+from typing import Any, ClassVar, Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass, field
-from pydantic import BaseModel, ValidationError
+
+# 有libyaml时使用C实现的加载器
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# 解析后配置的JSON缓存（<配置文件目录>/build/.cache），格式变化时递增版本
+CONFIG_CACHE_VERSION = 2
+CONFIG_CACHE_DIR = Path('build') / '.cache'
+
+# 按模式对象缓存编译好的校验器和模式指纹（每个进程只编译一次）。
+# jsonschema导入较慢，只在真正校验时（配置缓存未命中）才导入
+_VALIDATORS: Dict[int, Tuple[Dict[str, Any], Any]] = {}
+_SCHEMA_DIGESTS: Dict[int, Tuple[Dict[str, Any], str]] = {}
+# 进程内的解析结果缓存: 配置文件 -> (缓存标签, 依赖文件状态, JSON文本)
+_MEMORY_CACHE: Dict[str, Tuple[str, List[List[Any]], str]] = {}
+
+
+# 钩子列表中的一项：命令字符串，或声明了输入输出和依赖的钩子
+HOOK_ITEM_SCHEMA = {
+    "oneOf": [
+        {"type": "string"},
+        {
+            "type": "object",
+            "required": ["run"],
+            "properties": {
+                "name": {"type": "string"},
+                "run": {
+                    "oneOf": [
+                        {"type": "string"},
+                        {"type": "array", "items": {"type": "string"}}
+                    ],
+                    "description": "按顺序执行的命令"
+                },
+                "inputs": {"type": "array", "items": {"type": "string"},
+                           "description": "输入文件（可用通配符）"},
+                "outputs": {"type": "array", "items": {"type": "string"},
+                            "description": "输出文件，均比输入新时跳过该钩子"},
+                "depends_on": {"type": "array", "items": {"type": "string"},
+                               "description": "依赖的钩子名称"},
+                "timeout": {"type": "number", "minimum": 0, "description": "超时（秒）"},
+                "on_failure": {"type": "string", "enum": ["abort", "continue"]},
+                "cwd": {"type": "string"},
+                "env": {"type": "object"}
+            }
+        }
+    ]
+}
 
 
 class ConfigError(Exception):
@@ -25,6 +70,59 @@ class ConfigValidationError(ConfigError):
     pass
 
 
+def compiled_validator(schema: Dict[str, Any]):
+    """返回模式对应的Draft7Validator（按模式对象缓存）"""
+    entry = _VALIDATORS.get(id(schema))
+    if entry is None or entry[0] is not schema:
+        import jsonschema
+        jsonschema.Draft7Validator.check_schema(schema)
+        entry = (schema, jsonschema.Draft7Validator(schema))
+        _VALIDATORS[id(schema)] = entry
+    return entry[1]
+
+
+def schema_digest(schema: Dict[str, Any]) -> str:
+    """模式指纹（按模式对象缓存，不需要导入jsonschema）"""
+    entry = _SCHEMA_DIGESTS.get(id(schema))
+    if entry is None or entry[0] is not schema:
+        text = json.dumps(schema, sort_keys=True, default=str)
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        entry = (schema, digest)
+        _SCHEMA_DIGESTS[id(schema)] = entry
+    return entry[1]
+
+
+def config_cache_enabled() -> bool:
+    """环境变量 FPGABUILDER_CONFIG_CACHE=0 时禁用配置缓存"""
+    value = os.environ.get('FPGABUILDER_CONFIG_CACHE', '1')
+    return value not in ('0', 'false', 'no', 'off')
+
+
+def _file_digest(path: Union[str, Path]) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _file_state(paths: List[Path]) -> List[List[Any]]:
+    """依赖文件状态 [[路径, 修改时间, 大小, SHA256], ...]"""
+    state = []
+    for path in paths:
+        st = os.stat(path)
+        state.append([str(path), st.st_mtime_ns, st.st_size, _file_digest(path)])
+    return state
+
+
+def _state_valid(state: List[List[Any]]) -> bool:
+    """依赖文件是否未变化：修改时间和大小相同，或只有修改时间变化而内容哈希相同"""
+    for path, mtime_ns, size, digest in state:
+        st = os.stat(path)
+        if st.st_size != size:
+            return False
+        if st.st_mtime_ns != mtime_ns and _file_digest(path) != digest:
+            return False
+    return True
+
+
 @dataclass
 class ConfigManager:
     """配置管理器"""
@@ -32,6 +130,14 @@ class ConfigManager:
     config_path: Optional[Path] = None
     config_data: Dict[str, Any] = field(default_factory=dict)
     config_schema: Dict[str, Any] = field(default_factory=dict)
+    use_cache: bool = True
+    # 命令行 --set 覆盖（key=value），优先级最高
+    overrides: List[str] = field(default_factory=list)
+
+    # 默认模式在进程内只构建一次
+    _default_schema = None
+    # 各构建阶段读取的配置键（由插件按其模板注册）: 阶段 -> 点分路径列表
+    _stage_keys: ClassVar[Dict[str, List[str]]] = {}
 
     def __post_init__(self):
         """初始化配置管理器"""
@@ -42,7 +148,9 @@ class ConfigManager:
     def _load_schema(self):
         """加载配置模式"""
         # 这里可以加载内置的模式文件
-        self.config_schema = self._get_default_schema()
+        if ConfigManager._default_schema is None:
+            ConfigManager._default_schema = self._get_default_schema()
+        self.config_schema = ConfigManager._default_schema
 
     def _get_default_schema(self) -> Dict[str, Any]:
         """获取默认配置模式"""
@@ -57,7 +165,12 @@ class ConfigManager:
                         "version": {"type": "string"},
                         "description": {"type": "string"},
                         "author": {"type": "string"},
-                        "license": {"type": "string"}
+                        "license": {"type": "string"},
+                        "depends_on": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "依赖的其他工程（名称或相对路径），用于多工程构建排序"
+                        }
                     },
                     "required": ["name", "version"]
                 },
@@ -72,6 +185,10 @@ class ConfigManager:
                         "part": {"type": "string"},
                         "board": {"type": "string"},
                         "top_module": {"type": "string"},
+                        "defines": {
+                            "type": "object",
+                            "description": "Verilog宏定义（名称: 值，值为null时只定义名称）"
+                        },
                         "vivado_version": {
                             "type": "string",
                             "pattern": "^\\d{4}\\.\\d+$",
@@ -81,6 +198,11 @@ class ConfigManager:
                             "type": "string",
                             "description": "Vivado安装路径"
                         },
+                        "tool_roots": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "工具链安装根目录，如 /tools/Xilinx、C:/Xilinx"
+                        },
                         "vivado_settings": {
                             "type": "object",
                             "properties": {
@@ -256,13 +378,101 @@ class ConfigManager:
                             "type": "object",
                             "properties": {
                                 "strategy": {"type": "string"},
-                                "options": {"type": "object"}
+                                "options": {"type": "object"},
+                                "preflight": {
+                                    "description": ("综合前运行RTL展开预检（synth_design -rtl），"
+                                                    "有错误时停止构建"),
+                                    "oneOf": [
+                                        {"type": "boolean"},
+                                        {
+                                            "type": "object",
+                                            "properties": {
+                                                "enabled": {
+                                                    "type": "boolean",
+                                                    "default": True
+                                                },
+                                                "cache": {
+                                                    "type": "boolean",
+                                                    "default": True,
+                                                    "description": "按源文件指纹缓存预检结果"
+                                                }
+                                            }
+                                        }
+                                    ]
+                                }
                             }
                         },
                         "implementation": {
                             "type": "object",
                             "properties": {
-                                "options": {"type": "object"}
+                                "options": {"type": "object"},
+                                "sweep": {
+                                    "type": "object",
+                                    "description": "从同一综合检查点并行探索多个实现策略/指令组合",
+                                    "properties": {
+                                        "enabled": {"type": "boolean", "default": True},
+                                        "jobs": {
+                                            "type": "integer",
+                                            "minimum": 1,
+                                            "description": "同时运行的实现分支数"
+                                        },
+                                        "stop_on_pass": {
+                                            "type": "boolean",
+                                            "description": "有分支满足时序后取消其余分支"
+                                        },
+                                        "strategies": {
+                                            "type": "array",
+                                            "items": {"type": "string"},
+                                            "description": ("实现策略名称"
+                                                            "（如 Performance_Explore）")
+                                        },
+                                        "directives": {
+                                            "type": "object",
+                                            "description": "各步骤的指令列表，按笛卡尔积展开",
+                                            "properties": {
+                                                "opt": {
+                                                    "type": "array",
+                                                    "items": {"type": "string"}
+                                                },
+                                                "place": {
+                                                    "type": "array",
+                                                    "items": {"type": "string"}
+                                                },
+                                                "phys_opt": {
+                                                    "type": "array",
+                                                    "items": {"type": "string"}
+                                                },
+                                                "route": {
+                                                    "type": "array",
+                                                    "items": {"type": "string"}
+                                                }
+                                            }
+                                        },
+                                        "runs": {
+                                            "type": "array",
+                                            "description": "显式列出的实现分支",
+                                            "items": {
+                                                "type": "object",
+                                                "properties": {
+                                                    "name": {"type": "string"},
+                                                    "strategy": {"type": "string"},
+                                                    "opt": {"type": "string"},
+                                                    "place": {"type": "string"},
+                                                    "phys_opt": {"type": "string"},
+                                                    "route": {"type": "string"},
+                                                    "post_route_phys_opt": {
+                                                        "type": "boolean"
+                                                    }
+                                                }
+                                            }
+                                        },
+                                        "work_dir": {
+                                            "type": "string",
+                                            "description": ("分支工作目录，默认 "
+                                                            "<project_dir>/sweep")
+                                        }
+                                    }
+                                }
                             }
                         },
                         "bitstream": {
@@ -271,51 +481,144 @@ class ConfigManager:
                                 "options": {"type": "object"}
                             }
                         },
+                        "cache": {
+                            "type": "object",
+                            "description": "内容寻址的产物缓存（DCP、比特流、报告），可指向共享NFS目录",
+                            "properties": {
+                                "enabled": {"type": "boolean", "default": True},
+                                "path": {
+                                    "type": "string",
+                                    "description": ("缓存目录，默认 ~/.fpga_builder/cache "
+                                                    "或 FPGABUILDER_CACHE_DIR")
+                                },
+                                "max_size": {
+                                    "type": ["string", "integer"],
+                                    "description": "容量上限，如 50G，超出时按最近使用时间淘汰"
+                                }
+                            }
+                        },
+                        "remote": {
+                            "type": "object",
+                            "description": "分布式构建：把构建阶段发送到运行 fpgab worker 的构建节点",
+                            "properties": {
+                                "enabled": {"type": "boolean", "default": True},
+                                "workers": {
+                                    "type": "array",
+                                    "items": {"type": "string"},
+                                    "description": "构建节点地址 host:port"
+                                },
+                                "stages": {
+                                    "type": "array",
+                                    "items": {"type": "string"},
+                                    "description": ("远程运行的阶段，默认 synthesize, "
+                                                    "implement, generate_bitstream")
+                                },
+                                "timeout": {"type": "number", "default": 10},
+                                "fallback_local": {
+                                    "type": "boolean",
+                                    "default": True,
+                                    "description": "没有可用节点时在本机运行"
+                                },
+                                "token_file": {
+                                    "type": "string",
+                                    "description": ("与构建节点共享的令牌文件，"
+                                                    "默认读取 FPGABUILDER_WORKER_TOKEN")
+                                }
+                            }
+                        },
+                        "admission": {
+                            "type": "object",
+                            "description": "主机级内存准入控制，避免并发Vivado运行被OOM终止",
+                            "properties": {
+                                "enabled": {"type": "boolean", "default": True},
+                                "memory_margin": {
+                                    "type": "number",
+                                    "minimum": 0,
+                                    "description": "在历史峰值内存基础上预留的余量比例"
+                                },
+                                "poll_interval": {
+                                    "type": "number",
+                                    "minimum": 0,
+                                    "description": "等待内存时的轮询间隔（秒）"
+                                },
+                                "timeout": {
+                                    "type": "number",
+                                    "minimum": 0,
+                                    "description": "最长等待时间（秒），不设置则一直等待"
+                                },
+                                "state_dir": {
+                                    "type": "string",
+                                    "description": "共享状态目录，默认 ~/.fpga_builder/admission"
+                                }
+                            }
+                        },
                         "hooks": {
                             "type": "object",
                             "properties": {
                                 "pre_build": {
                                     "oneOf": [
                                         {"type": "string", "description": "构建前脚本路径或命令"},
-                                        {"type": "array", "items": {"type": "string"}, "description": "构建前命令列表"}
+                                        {"type": "array", "items": HOOK_ITEM_SCHEMA,
+                                         "description": "构建前命令或钩子列表"}
                                     ],
                                     "description": "构建前脚本路径或命令（可多行）"
                                 },
                                 "pre_synth": {
                                     "oneOf": [
                                         {"type": "string", "description": "综合前脚本路径或命令"},
-                                        {"type": "array", "items": {"type": "string"}, "description": "综合前命令列表"}
+                                        {"type": "array", "items": HOOK_ITEM_SCHEMA,
+                                         "description": "综合前命令或钩子列表"}
                                     ],
                                     "description": "综合前脚本路径或命令（可多行）"
                                 },
                                 "post_synth": {
                                     "oneOf": [
                                         {"type": "string", "description": "综合后脚本路径或命令"},
-                                        {"type": "array", "items": {"type": "string"}, "description": "综合后命令列表"}
+                                        {"type": "array", "items": HOOK_ITEM_SCHEMA,
+                                         "description": "综合后命令或钩子列表"}
                                     ],
                                     "description": "综合后脚本路径或命令（可多行）"
                                 },
                                 "pre_impl": {
                                     "oneOf": [
                                         {"type": "string", "description": "实现前脚本路径或命令"},
-                                        {"type": "array", "items": {"type": "string"}, "description": "实现前命令列表"}
+                                        {"type": "array", "items": HOOK_ITEM_SCHEMA,
+                                         "description": "实现前命令或钩子列表"}
                                     ],
                                     "description": "实现前脚本路径或命令（可多行）"
                                 },
                                 "post_impl": {
                                     "oneOf": [
                                         {"type": "string", "description": "实现后脚本路径或命令"},
-                                        {"type": "array", "items": {"type": "string"}, "description": "实现后命令列表"}
+                                        {"type": "array", "items": HOOK_ITEM_SCHEMA,
+                                         "description": "实现后命令或钩子列表"}
                                     ],
                                     "description": "实现后脚本路径或命令（可多行）"
                                 },
                                 "post_bitstream": {
                                     "oneOf": [
                                         {"type": "string", "description": "比特流生成后脚本路径或命令"},
-                                        {"type": "array", "items": {"type": "string"}, "description": "比特流生成后命令列表"}
+                                        {"type": "array", "items": HOOK_ITEM_SCHEMA,
+                                         "description": "比特流生成后命令或钩子列表"}
                                     ],
                                     "description": "比特流生成后脚本路径或命令（可多行）"
                                 },
+                                "on_failure": {
+                                    "type": "string",
+                                    "enum": ["abort", "continue"],
+                                    "default": "abort",
+                                    "description": "钩子失败时停止构建（abort）或记录警告后继续（continue）"
+                                },
+                                "timeout": {
+                                    "type": "number",
+                                    "minimum": 0,
+                                    "description": "钩子默认超时（秒）"
+                                },
+                                "jobs": {
+                                    "type": "integer",
+                                    "minimum": 1,
+                                    "description": "同时运行的钩子数上限"
+                                },
                                 "bin_merge_script": {
                                     "type": "string",
                                     "description": "二进制合并脚本路径"
@@ -328,6 +631,37 @@ class ConfigManager:
                         }
                     }
                 },
+                "matrix": {
+                    "type": "object",
+                    "description": "构建矩阵：按器件、板卡、顶层模块和宏定义展开为多个变体",
+                    "properties": {
+                        "part": {"type": "array", "items": {"type": "string"}},
+                        "board": {"type": "array", "items": {"type": "string"}},
+                        "top_module": {"type": "array", "items": {"type": "string"}},
+                        "defines": {
+                            "oneOf": [
+                                {"type": "array", "items": {"type": "object"}},
+                                {"type": "object",
+                                 "additionalProperties": {"type": "object"}}
+                            ],
+                            "description": "宏定义组列表，或 名称: 宏定义组"
+                        },
+                        "include": {
+                            "type": "array",
+                            "items": {"type": "object"},
+                            "description": "额外的变体"
+                        },
+                        "exclude": {
+                            "type": "array",
+                            "items": {"type": "object"},
+                            "description": "排除的组合（部分匹配）"
+                        },
+                        "overrides": {
+                            "type": "object",
+                            "description": "按维度取值覆盖配置，如 board: {revA: {source: ...}}"
+                        }
+                    }
+                },
                 "documentation": {
                     "type": "object",
                     "properties": {
@@ -341,26 +675,48 @@ class ConfigManager:
             "required": ["project", "fpga"]
         }
 
-    def load_config(self, config_path: Union[str, Path]) -> Dict[str, Any]:
-        """加载配置文件"""
+    def load_config(self, config_path: Union[str, Path],
+                    validate: bool = True) -> Dict[str, Any]:
+        """加载配置文件
+
+        按 extends/include、环境变量 FPGABUILDER_SET 和 --set 覆盖分层解析
+        （见 config_layers）。解析并验证后的配置以JSON缓存在 <配置目录>/build/.cache，
+        按所有相关文件的修改时间和内容哈希判断有效性，文件未变化时直接读取缓存
+        （use_cache=False 或 FPGABUILDER_CONFIG_CACHE=0 时禁用）。
+
+        validate=False 时缓存未命中也不做模式校验（不导入jsonschema），
+        结果不写入缓存，用于只读取配置的状态显示。
+        """
+        from .config_layers import copy_tree, env_overrides
+
         config_path = Path(config_path)
         self.config_path = config_path
 
         if not config_path.exists():
             raise ConfigError(f"配置文件不存在: {config_path}")
 
+        overrides = env_overrides() + list(self.overrides)
+        use_cache = self.use_cache and config_cache_enabled()
+        if use_cache:
+            cached = self._load_cached(config_path, overrides)
+            if cached is not None:
+                self.config_data = cached
+                return self.config_data
+
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                if config_path.suffix in ['.yaml', '.yml']:
-                    self.config_data = yaml.safe_load(f)
-                elif config_path.suffix == '.json':
-                    self.config_data = json.load(f)
-                else:
-                    raise ConfigError(f"不支持的配置文件格式: {config_path.suffix}")
+            resolved = self.resolve(config_path)
+            # 合并结果与进程内的层缓存共享子树，复制后才能交给调用方修改
+            self.config_data = copy_tree(resolved.to_dict())
+
+            if not validate:
+                return self.config_data
 
             # 验证配置
             self.validate_config()
 
+            if use_cache:
+                self._store_cached(config_path, self.config_data,
+                                   [Path(f) for f in resolved.files], overrides)
             return self.config_data
 
         except yaml.YAMLError as e:
@@ -370,6 +726,82 @@ class ConfigManager:
         except Exception as e:
             raise ConfigError(f"加载配置文件失败: {e}")
 
+    def resolve(self, config_path: Union[str, Path]):
+        """分层解析配置文件，返回只读的 LayeredConfig 视图（不验证、不复制）
+
+        同一进程内继承同一基础配置的多个文件共享基础层的解析结果。
+        """
+        from .config_layers import resolve_config
+        return resolve_config(Path(config_path), self.overrides)
+
+    @staticmethod
+    def _parse_file(config_path: Path) -> Dict[str, Any]:
+        """解析YAML/JSON配置文件"""
+        from .config_layers import parse_config_file
+        return parse_config_file(config_path)
+
+    def _cache_file(self, config_path: Path) -> Path:
+        resolved = config_path.resolve()
+        digest = hashlib.sha256(str(resolved).encode('utf-8')).hexdigest()[:16]
+        return resolved.parent / CONFIG_CACHE_DIR / f'config-{digest}.json'
+
+    def _cache_tag(self, overrides: List[str]) -> str:
+        digest = ''
+        if overrides:
+            text = '\n'.join(overrides)
+            digest = hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+        return f'{CONFIG_CACHE_VERSION}:{schema_digest(self.config_schema)}:{digest}'
+
+    def _load_cached(self, config_path: Path,
+                     overrides: List[str]) -> Optional[Dict[str, Any]]:
+        """读取仍然有效的缓存（依赖文件的修改时间和大小未变化，或内容哈希未变化）"""
+        key = str(config_path.resolve())
+        tag = self._cache_tag(overrides)
+        memo = _MEMORY_CACHE.get(key)
+        if memo is not None:
+            memo_tag, state, text = memo
+            try:
+                if memo_tag == tag and _state_valid(state):
+                    return json.loads(text)
+            except (OSError, ValueError):
+                pass
+
+        try:
+            with open(self._cache_file(config_path), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            state, text = entry['deps'], entry['config']
+            if entry.get('tag') != tag or not _state_valid(state):
+                return None
+            config_data = json.loads(text)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        _MEMORY_CACHE[key] = (tag, state, text)
+        return config_data
+
+    def _store_cached(self, config_path: Path, config_data: Dict[str, Any],
+                      deps: List[Path], overrides: List[str]) -> None:
+        """写入缓存（缓存目录不可写，或配置中有JSON无法原样表示的值时忽略）"""
+        try:
+            state = _file_state([Path(d).resolve() for d in deps])
+            text = json.dumps(config_data, ensure_ascii=False)
+            # 日期、非字符串键等无法原样往返的配置不缓存
+            if json.loads(text) != config_data:
+                return
+        except (OSError, TypeError, ValueError):
+            return
+        tag = self._cache_tag(overrides)
+        _MEMORY_CACHE[str(config_path.resolve())] = (tag, state, text)
+        cache_file = self._cache_file(config_path)
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cache_file.with_name(f'{cache_file.name}.{os.getpid()}.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'tag': tag, 'deps': state, 'config': text}, f,
+                          ensure_ascii=False)
+            os.replace(tmp, cache_file)
+        except OSError:
+            pass
+
     def save_config(self, config_data: Dict[str, Any],
                    config_path: Optional[Union[str, Path]] = None) -> None:
         """保存配置文件"""
@@ -381,10 +813,7 @@ class ConfigManager:
             config_path = Path(config_path)
 
         # 验证配置
-        try:
-            jsonschema.validate(config_data, self.config_schema)
-        except jsonschema.ValidationError as e:
-            raise ConfigValidationError(f"配置验证失败: {e}")
+        self.validate_config(config_data)
 
         try:
             with open(config_path, 'w', encoding='utf-8') as f:
@@ -409,11 +838,56 @@ class ConfigManager:
         if config_data is None:
             config_data = self.config_data
 
-        try:
-            jsonschema.validate(config_data, self.config_schema)
-            return True
-        except jsonschema.ValidationError as e:
-            raise ConfigValidationError(f"配置验证失败: {e}")
+        from jsonschema.exceptions import best_match
+
+        # 与jsonschema.validate相同：报告最相关的一个错误
+        validator = compiled_validator(self.config_schema)
+        error = best_match(validator.iter_errors(config_data))
+        if error is not None:
+            raise ConfigValidationError(f"配置验证失败: {error}")
+        return True
+
+    @classmethod
+    def register_stage_keys(cls, stage_keys: Dict[str, List[str]]) -> None:
+        """注册各阶段读取的配置键（同一阶段多次注册时取并集）"""
+        for stage, keys in stage_keys.items():
+            known = set(cls._stage_keys.get(stage, []))
+            cls._stage_keys[stage] = sorted(known | set(keys))
+
+    @classmethod
+    def stage_keys(cls) -> Dict[str, List[str]]:
+        """已注册的阶段及其配置键"""
+        return {stage: list(keys) for stage, keys in cls._stage_keys.items()}
+
+    def _keys_for(self, stage: Union[str, List[str]]) -> List[str]:
+        if isinstance(stage, str):
+            if stage not in self._stage_keys:
+                raise ConfigError(f"未注册的构建阶段: {stage}")
+            return self._stage_keys[stage]
+        return list(stage)
+
+    def stage_config_hashes(self, stage: Union[str, List[str]],
+                            config_data: Optional[Dict[str, Any]] = None
+                            ) -> Dict[str, str]:
+        """阶段读取的每个配置子树的哈希"""
+        from .config_hash import config_hashes
+        data = self.config_data if config_data is None else config_data
+        return config_hashes(data, self._keys_for(stage))
+
+    def stage_fingerprint(self, stage: Union[str, List[str]],
+                          config_data: Optional[Dict[str, Any]] = None) -> str:
+        """阶段的有效配置指纹
+
+        只覆盖该阶段实际读取的配置子树，与键顺序无关；修改其他阶段的配置
+        （如 documentation.* 或 build.bitstream.options）不改变综合的指纹。
+
+        Args:
+            stage: 已注册的阶段名，或配置键列表
+            config_data: 配置（默认为当前加载的配置）
+        """
+        from .config_hash import config_fingerprint
+        data = self.config_data if config_data is None else config_data
+        return config_fingerprint(data, self._keys_for(stage))
 
     def get(self, key: str, default: Any = None) -> Any:
         """获取配置值"""
@@ -429,27 +903,33 @@ class ConfigManager:
         return value
 
     def set(self, key: str, value: Any) -> None:
-        """设置配置值"""
+        """设置配置值
+
+        沿路径复制字典后修改（写时复制），不影响与其他配置共享的子树。
+        """
         keys = key.split('.')
-        data = self.config_data
+        root = dict(self.config_data)
+        data = root
 
-        for i, k in enumerate(keys[:-1]):
-            if k not in data:
-                data[k] = {}
+        for k in keys[:-1]:
+            child = data.get(k)
+            data[k] = dict(child) if isinstance(child, dict) else {}
             data = data[k]
 
         data[keys[-1]] = value
+        self.config_data = root
 
     def merge(self, other_config: Dict[str, Any], overwrite: bool = True) -> None:
-        """合并配置"""
-        def merge_dicts(dict1, dict2, overwrite_flag):
-            for key, value in dict2.items():
-                if key in dict1 and isinstance(dict1[key], dict) and isinstance(value, dict):
-                    merge_dicts(dict1[key], value, overwrite_flag)
-                elif overwrite_flag or key not in dict1:
-                    dict1[key] = value
+        """合并配置
 
-        merge_dicts(self.config_data, other_config, overwrite)
+        不修改任何一方：只为两边都有的字典创建新字典，其余子树共享。
+        """
+        from .config_layers import merge_shared
+
+        if overwrite:
+            self.config_data = merge_shared(self.config_data, other_config)
+        else:
+            self.config_data = merge_shared(other_config, self.config_data)
 
     def create_default_config(self, project_name: str, vendor: str,
                              part: str, template: str = 'basic') -> Dict[str, Any]:
@@ -535,40 +1015,12 @@ class ConfigManager:
             self.load_config(self.config_path)
 
 
-class ProjectConfig(BaseModel):
-    """项目配置模型（使用Pydantic）"""
-
-    class Config:
-        extra = 'forbid'  # 禁止额外字段
-
-    name: str
-    version: str
-    description: Optional[str] = ""
-    author: Optional[str] = "YiHok"
-    license: Optional[str] = "Creative Commons Attribution-NonCommercial-ShareAlike 4.0 International"
-
-
-class FPGAConfig(BaseModel):
-    """FPGA配置模型"""
-
-    vendor: str
-    part: str
-    family: Optional[str] = ""
-    board: Optional[str] = ""
-    top_module: Optional[str] = ""
-
-
-class SourceFileConfig(BaseModel):
-    """源文件配置模型"""
-
-    path: str
-    language: Optional[str] = "verilog"
-    include_dirs: Optional[list] = []
-
+# Pydantic模型在 config_models 中定义，按需导入（pydantic导入较慢）
+_PYDANTIC_MODELS = ('ProjectConfig', 'FPGAConfig', 'SourceFileConfig', 'BuildConfig')
 
-class BuildConfig(BaseModel):
-    """构建配置模型"""
 
-    synthesis: Optional[dict] = {}
-    implementation: Optional[dict] = {}
-    bitstream: Optional[dict] = {}
\ No newline at end of file
+def __getattr__(name: str) -> Any:
+    if name in _PYDANTIC_MODELS:
+        from . import config_models
+        return getattr(config_models, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+配置子树哈希
+
+构建图按阶段读取的配置子树计算有效配置指纹。这些函数单独放在本模块，
+debug status 等只比较指纹的命令不需要导入构建图（及asyncio）。
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List
+
+
+def get_config_value(config: Dict[str, Any], dotted_key: str) -> Any:
+    """按点分路径获取配置值，不存在时返回None"""
+    value: Any = config
+    for part in dotted_key.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def hash_value(value: Any) -> str:
+    """计算任意JSON可序列化值的稳定哈希"""
+    data = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def normalize_config_keys(keys: Iterable[str]) -> List[str]:
+    """去重排序，并去掉已被上级键覆盖的键（'build' 覆盖 'build.synthesis'）"""
+    unique = sorted(set(keys))
+    return [key for key in unique
+            if not any(key.startswith(other + '.') for other in unique)]
+
+
+def config_hashes(config: Dict[str, Any], keys: Iterable[str]) -> Dict[str, str]:
+    """每个配置子树的哈希（与键的声明顺序和字典键顺序无关）"""
+    return {key: hash_value(get_config_value(config, key))
+            for key in normalize_config_keys(keys)}
+
+
+def config_fingerprint(config: Dict[str, Any], keys: Iterable[str]) -> str:
+    """一组配置子树的有效配置指纹"""
+    return hash_value(config_hashes(config, keys))
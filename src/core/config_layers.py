@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+分层配置解析
+
+配置文件可以用 extends 继承基础配置、用 include 引入配置片段：
+
+    extends: ../common/base.yaml        # 或列表，靠后的优先
+    include: [boards/revB.yaml]
+    project:
+      name: product_revB
+
+解析顺序（后面的层覆盖前面的层）：extends 的配置 → include 的片段 →
+文件自身内容 → 环境变量 FPGABUILDER_SET → 命令行 --set。字典逐键合并，
+其他值（包括列表）整体替换。
+
+每个文件只在内容变化时重新解析：解析结果和每个文件解析后的层列表都按
+文件修改时间和大小缓存在进程内，数百个继承同一基础配置的变体共享同一份
+基础层（合并时未修改的子树直接共享，不复制）。
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import yaml
+
+from .config import YAML_LOADER, ConfigError
+
+INHERIT_KEYS = ('extends', 'include')
+ENV_OVERRIDES = 'FPGABUILDER_SET'
+
+_MISSING = object()
+
+# 进程内缓存: 路径 -> ((mtime_ns, size), 解析结果)
+_PARSED: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+# 路径 -> (依赖文件状态, LayeredConfig)
+_RESOLVED: Dict[str, Tuple[Tuple[Tuple[str, int, int], ...], 'LayeredConfig']] = {}
+
+
+@dataclass(frozen=True)
+class Layer:
+    """一层配置：来源（文件路径或 env/--set）和该层的数据（只读）"""
+    source: str
+    data: Dict[str, Any]
+
+
+def parse_config_file(config_path: Path) -> Dict[str, Any]:
+    """解析YAML/JSON配置文件"""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        if config_path.suffix in ['.yaml', '.yml']:
+            return yaml.load(f, Loader=YAML_LOADER)
+        elif config_path.suffix == '.json':
+            return json.load(f)
+        else:
+            raise ConfigError(f"不支持的配置文件格式: {config_path.suffix}")
+
+
+def _stat(path: Path) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def load_layer(path: Path) -> Dict[str, Any]:
+    """解析单个配置文件（文件未变化时复用上次的解析结果）"""
+    key = str(path)
+    state = _stat(path)
+    cached = _PARSED.get(key)
+    if cached is not None and cached[0] == state:
+        return cached[1]
+    data = parse_config_file(path)
+    if data is None:
+        data = {}
+    if not isinstance(data, dict):
+        raise ConfigError(f"配置文件顶层必须是字典: {path}")
+    _PARSED[key] = (state, data)
+    return data
+
+
+def merge_shared(base: Any, overlay: Any) -> Any:
+    """合并两层配置，不修改输入
+
+    只有两层都是字典的键才创建新字典，其余子树直接引用原对象（结构共享）。
+    """
+    if not isinstance(base, dict) or not isinstance(overlay, dict):
+        return overlay
+    if not base:
+        return overlay
+    if not overlay:
+        return base
+    merged = dict(base)
+    for key, value in overlay.items():
+        merged[key] = merge_shared(base[key], value) if key in base else value
+    return merged
+
+
+def copy_tree(value: Any) -> Any:
+    """复制字典和列表（标量直接引用），把共享的合并结果变为调用方可以修改的配置"""
+    if isinstance(value, dict):
+        return {key: copy_tree(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [copy_tree(item) for item in value]
+    return value
+
+
+class LayeredConfig(Mapping):
+    """按层组织的只读配置视图
+
+    键按需解析：get('build.synthesis') 只合并各层中该子树，不展开整个配置。
+    """
+
+    def __init__(self, layers: Sequence[Layer], files: Sequence[str] = ()):
+        self.layers: Tuple[Layer, ...] = tuple(layers)
+        self.files: Tuple[str, ...] = tuple(files)
+        self._merged: Optional[Dict[str, Any]] = None
+
+    def _lookup(self, keys: List[str]) -> Any:
+        found = []
+        for layer in reversed(self.layers):
+            value = layer.data
+            for key in keys:
+                if not isinstance(value, dict) or key not in value:
+                    value = _MISSING
+                    break
+                value = value[key]
+            if value is _MISSING:
+                continue
+            found.append(value)
+            if not isinstance(value, dict):
+                break
+        if not found:
+            return _MISSING
+        result = found[-1]
+        for value in reversed(found[:-1]):
+            result = merge_shared(result, value)
+        return result
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """按点分隔的路径取值，如 'fpga.part'"""
+        value = self._lookup(key.split('.'))
+        return default if value is _MISSING else value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._lookup([key])
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        seen = {}
+        for layer in self.layers:
+            for key in layer.data:
+                seen.setdefault(key, None)
+        return iter(seen)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """合并后的配置（与各层共享未修改的子树，调用方不应修改）"""
+        if self._merged is None:
+            merged: Dict[str, Any] = {}
+            for layer in self.layers:
+                merged = merge_shared(merged, layer.data)
+            self._merged = merged
+        return self._merged
+
+    def with_overrides(self, overrides: Sequence[Tuple[str, Any]],
+                       source: str = '--set') -> 'LayeredConfig':
+        """在顶部加一层覆盖值，返回新视图（原视图不变）"""
+        if not overrides:
+            return self
+        data: Dict[str, Any] = {}
+        for key, value in overrides:
+            data = merge_shared(data, _nest(key, value))
+        return LayeredConfig(self.layers + (Layer(source, data),), self.files)
+
+
+def _nest(key: str, value: Any) -> Dict[str, Any]:
+    for part in reversed(key.split('.')):
+        value = {part: value}
+    return value
+
+
+def _as_paths(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(v) for v in value]
+    return [str(value)]
+
+
+def resolve_file(config_path: Path, _stack: Tuple[str, ...] = ()) -> LayeredConfig:
+    """解析配置文件及其 extends/include 链（按所有依赖文件的状态缓存）"""
+    path = Path(config_path).resolve()
+    key = str(path)
+    if key in _stack:
+        chain = ' -> '.join(list(_stack) + [key])
+        raise ConfigError(f"配置继承存在循环: {chain}")
+
+    cached = _RESOLVED.get(key)
+    if cached is not None:
+        try:
+            if all(_stat(Path(f)) == (mtime, size) for f, mtime, size in cached[0]):
+                return cached[1]
+        except OSError:
+            pass
+
+    if not path.exists():
+        raise ConfigError(f"配置文件不存在: {path}")
+    raw = load_layer(path)
+    layers: List[Layer] = []
+    files: List[str] = [key]
+    for name in INHERIT_KEYS:
+        for ref in _as_paths(raw.get(name)):
+            parent = resolve_file(path.parent / ref, _stack + (key,))
+            sources = {layer.source for layer in layers}
+            # 菱形继承时共同的基础层只保留第一次出现
+            layers.extend(layer for layer in parent.layers
+                          if layer.source not in sources)
+            files.extend(f for f in parent.files if f not in files)
+    own = raw
+    if any(k in raw for k in INHERIT_KEYS):
+        own = {k: v for k, v in raw.items() if k not in INHERIT_KEYS}
+    layers.append(Layer(key, own))
+
+    resolved = LayeredConfig(layers, files)
+    state = tuple((f, *_stat(Path(f))) for f in files)
+    _RESOLVED[key] = (state, resolved)
+    return resolved
+
+
+def parse_override(text: str) -> Tuple[str, Any]:
+    """解析 key=value 覆盖（值按YAML标量解析，如 8、true、[a, b]）"""
+    if '=' not in text:
+        raise ConfigError(f"覆盖值格式应为 key=value: {text}")
+    key, value = text.split('=', 1)
+    key = key.strip()
+    if not key:
+        raise ConfigError(f"覆盖值缺少键名: {text}")
+    try:
+        parsed = yaml.load(value, Loader=YAML_LOADER) if value.strip() else ''
+    except yaml.YAMLError:
+        parsed = value
+    return key, parsed
+
+
+def env_overrides() -> List[str]:
+    """环境变量 FPGABUILDER_SET 中的覆盖（每行一个 key=value）
+
+    只按换行分隔：值中可以包含分号（如宏定义或TCL片段）。
+    """
+    text = os.environ.get(ENV_OVERRIDES, '')
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def resolve_config(config_path: Path, overrides: Sequence[str] = ()) -> LayeredConfig:
+    """解析配置文件，依次叠加环境变量层和命令行 --set 层"""
+    resolved = resolve_file(config_path)
+    resolved = resolved.with_overrides([parse_override(o) for o in env_overrides()],
+                                       source=ENV_OVERRIDES)
+    return resolved.with_overrides([parse_override(o) for o in overrides],
+                                   source='--set')
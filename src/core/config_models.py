@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+配置数据模型（Pydantic）
+
+通过 core.config 按需导入，避免导入配置管理模块时加载pydantic。
+"""
+
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class ProjectConfig(BaseModel):
+    """项目配置模型（使用Pydantic）"""
+
+    class Config:
+        extra = 'forbid'  # 禁止额外字段
+
+    name: str
+    version: str
+    description: Optional[str] = ""
+    author: Optional[str] = "YiHok"
+    license: Optional[str] = ("Creative Commons Attribution-NonCommercial-ShareAlike "
+                              "4.0 International")
+
+
+class FPGAConfig(BaseModel):
+    """FPGA配置模型"""
+
+    vendor: str
+    part: str
+    family: Optional[str] = ""
+    board: Optional[str] = ""
+    top_module: Optional[str] = ""
+
+
+class SourceFileConfig(BaseModel):
+    """源文件配置模型"""
+
+    path: str
+    language: Optional[str] = "verilog"
+    include_dirs: Optional[list] = []
+
+
+class BuildConfig(BaseModel):
+    """构建配置模型"""
+
+    synthesis: Optional[dict] = {}
+    implementation: Optional[dict] = {}
+    bitstream: Optional[dict] = {}
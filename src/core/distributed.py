@@ -0,0 +1,621 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+分布式构建
+
+构建节点运行 `fpgab worker --listen`，调度端把构建阶段的输入（TCL脚本、
+源文件、检查点）发送给负载最低且安装了所需Vivado版本的节点，实时接收日志，
+运行结束后取回新生成或修改的文件。
+
+协议基于TCP，每帧为4字节大端长度加UTF-8 JSON头；文件帧的头中包含size，
+随后紧跟size字节的文件内容。一次连接处理一个请求:
+    hello  -> info
+    job, file*N -> started, output*, result, file*M
+调度端在任务运行期间发送cancel或断开连接时，节点终止进程树。
+
+节点默认只监听本机地址；任务帧必须携带与节点相同的共享令牌，命令只能是
+`<vivado> -mode batch -source <任务目录内的脚本>`，进程使用节点自身的环境变量。
+"""
+
+import asyncio
+import fnmatch
+import hmac
+import json
+import logging
+import os
+import shutil
+import socket
+import struct
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from .async_process import OutputCallback, run_process
+
+logger = logging.getLogger(__name__)
+
+PROTOCOL_VERSION = 2
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 7601
+
+# 共享令牌的环境变量
+TOKEN_ENV = 'FPGABUILDER_WORKER_TOKEN'
+
+# 命令中的工具占位符，由节点替换为所需版本的可执行文件
+TOOL_PLACEHOLDER = '{tool}'
+
+MAX_HEADER_SIZE = 16 * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+
+# 运行后不取回的文件
+RESULT_EXCLUDE = ('.Xil/*', '*/.Xil/*', '.fpgab_remote/*')
+
+_HEADER = struct.Struct('!I')
+
+
+class RemoteError(Exception):
+    """分布式构建错误"""
+    pass
+
+
+class NoWorkerError(RemoteError):
+    """没有可用的构建节点"""
+    pass
+
+
+# ---------------------------------------------------------------- 协议
+
+
+def write_frame(writer: asyncio.StreamWriter, header: Dict[str, Any]) -> None:
+    """写入一帧（调用方负责drain）"""
+    data = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    writer.write(_HEADER.pack(len(data)) + data)
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Dict[str, Any]:
+    """读取一帧，连接关闭时抛出ConnectionError"""
+    try:
+        size = _HEADER.unpack(await reader.readexactly(_HEADER.size))[0]
+        if size > MAX_HEADER_SIZE:
+            raise RemoteError(f"消息头过大: {size} 字节")
+        return json.loads((await reader.readexactly(size)).decode('utf-8'))
+    except asyncio.IncompleteReadError as e:
+        raise ConnectionError("连接已关闭") from e
+
+
+def _safe_join(base: Path, rel_path: str) -> Path:
+    """拼接相对路径，拒绝绝对路径和跳出基准目录的路径"""
+    rel = Path(rel_path)
+    if rel.is_absolute() or rel.drive or '..' in rel.parts:
+        raise RemoteError(f"非法的文件路径: {rel_path}")
+    return base / rel
+
+
+async def send_file(writer: asyncio.StreamWriter, path: Path, rel_path: str) -> None:
+    """发送文件帧（分块读取，避免大检查点整体读入内存）"""
+    st = os.stat(path)
+    write_frame(writer, {'type': 'file', 'path': rel_path, 'size': st.st_size,
+                         'mode': st.st_mode & 0o777})
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            writer.write(chunk)
+            await writer.drain()
+
+
+async def send_bytes(writer: asyncio.StreamWriter, data: bytes, rel_path: str) -> None:
+    """以文件帧发送内存中的数据"""
+    write_frame(writer, {'type': 'file', 'path': rel_path, 'size': len(data),
+                         'mode': 0o644})
+    writer.write(data)
+    await writer.drain()
+
+
+async def receive_file(reader: asyncio.StreamReader, header: Dict[str, Any],
+                       base_dir: Path) -> str:
+    """接收文件帧的内容，原子写入base_dir下"""
+    if header.get('type') != 'file':
+        raise RemoteError(f"期望文件帧，收到: {header.get('type')}")
+    dest = _safe_join(base_dir, header['path'])
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = dest.with_name(f".{dest.name}.{uuid.uuid4().hex[:8]}.part")
+    remaining = int(header['size'])
+    try:
+        with open(tmp_path, 'wb') as f:
+            while remaining:
+                chunk = await reader.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    raise ConnectionError("接收文件时连接已关闭")
+                f.write(chunk)
+                remaining -= len(chunk)
+        if header.get('mode'):
+            os.chmod(tmp_path, header['mode'])
+        os.replace(tmp_path, dest)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return header['path']
+
+
+def load_token(token_file: Optional[Union[str, Path]] = None) -> Optional[str]:
+    """读取共享令牌：优先令牌文件，其次环境变量FPGABUILDER_WORKER_TOKEN"""
+    if token_file:
+        try:
+            token = Path(token_file).expanduser().read_text(encoding='utf-8').strip()
+        except OSError as e:
+            raise RemoteError(f"无法读取令牌文件 {token_file}: {e}") from e
+    else:
+        token = os.environ.get(TOKEN_ENV, '').strip()
+    return token or None
+
+
+def token_matches(expected: Optional[str], token: Any) -> bool:
+    """检查请求帧中的令牌（常量时间比较），未配置令牌时拒绝"""
+    if not expected or not isinstance(token, str):
+        return False
+    return hmac.compare_digest(token.encode('utf-8'), expected.encode('utf-8'))
+
+
+def job_script(command: Any, job_dir: Path) -> Path:
+    """检查任务命令，返回要运行的TCL脚本
+
+    只接受 [TOOL_PLACEHOLDER, '-mode', 'batch', '-source', <脚本>]，脚本必须是
+    调度端发送到任务目录中的.tcl文件。
+    """
+    if (not isinstance(command, list) or len(command) != 5
+            or not all(isinstance(p, str) for p in command)
+            or command[:4] != [TOOL_PLACEHOLDER, '-mode', 'batch', '-source']):
+        raise RemoteError(f"不允许的命令: {command}")
+    script = _safe_join(job_dir, command[4])
+    if script.suffix.lower() != '.tcl' or not script.is_file():
+        raise RemoteError(f"脚本不是任务目录中的TCL文件: {command[4]}")
+    return script
+
+
+def _snapshot(root: Path) -> Dict[str, Tuple[int, int]]:
+    """记录目录下所有文件的(大小, 修改时间)"""
+    snapshot = {}
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = Path(dirpath) / filename
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            snapshot[path.relative_to(root).as_posix()] = (st.st_size, st.st_mtime_ns)
+    return snapshot
+
+
+def _matches(rel_path: str, patterns: Iterable[str]) -> bool:
+    return any(fnmatch.fnmatch(rel_path, pattern) for pattern in patterns)
+
+
+# ---------------------------------------------------------------- 构建节点
+
+
+def _detect_tools() -> Dict[str, Dict[str, str]]:
+    """从工具链清单获取已安装的工具 {工具: {版本: 可执行文件}}"""
+    from .tool_inventory import ToolInventory
+
+    tools: Dict[str, Dict[str, str]] = {}
+    for install in ToolInventory().installs():
+        tools.setdefault(install.tool, {})[install.version] = install.executable
+    return tools
+
+
+def _version_key(version: str):
+    parts = version.replace('-', '.').split('.')
+    return tuple(int(p) if p.isdigit() else 0 for p in parts)
+
+
+class BuildWorker:
+    """构建节点：接收任务、运行命令、回传日志和产物"""
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 slots: Optional[int] = None, work_root: Optional[Path] = None,
+                 name: Optional[str] = None,
+                 tools: Optional[Dict[str, Dict[str, str]]] = None,
+                 keep_jobs: bool = False, token: Optional[str] = None):
+        """
+        Args:
+            host: 监听地址（默认只监听本机）
+            port: 监听端口（0表示自动分配）
+            slots: 同时运行的任务数（默认CPU核数的一半）
+            work_root: 任务工作目录的根目录
+            name: 节点名称（默认主机名）
+            tools: 已安装的工具，为None时从工具链清单检测
+            keep_jobs: 任务结束后保留工作目录（调试用）
+            token: 共享令牌，任务帧中的令牌不一致时拒绝；为None时拒绝所有任务
+        """
+        self.host = host
+        self.port = port
+        self.slots = slots or max(1, (os.cpu_count() or 2) // 2)
+        if work_root is None:
+            work_root = Path(tempfile.gettempdir()) / 'fpgab_worker'
+        self.work_root = Path(work_root)
+        self.name = name or socket.gethostname()
+        self._tools = tools
+        self.keep_jobs = keep_jobs
+        self.token = token
+        self.running = 0
+        self.queued = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def tools(self) -> Dict[str, Dict[str, str]]:
+        if self._tools is None:
+            self._tools = _detect_tools()
+        return self._tools
+
+    def info(self) -> Dict[str, Any]:
+        """节点状态"""
+        try:
+            load = os.getloadavg()[0] / (os.cpu_count() or 1)
+        except (AttributeError, OSError):
+            load = 0.0
+        return {
+            'type': 'info',
+            'protocol': PROTOCOL_VERSION,
+            'name': self.name,
+            'slots': self.slots,
+            'running': self.running,
+            'queued': self.queued,
+            'load': load,
+            'tools': {tool: sorted(versions, key=_version_key)
+                      for tool, versions in self.tools.items()},
+        }
+
+    def resolve_tool(self, tool: str, version: Optional[str]) -> Optional[str]:
+        """获取工具可执行文件，未指定版本时使用最新版本"""
+        versions = self.tools.get(tool, {})
+        if version:
+            return versions.get(version)
+        if not versions:
+            return None
+        return versions[max(versions, key=_version_key)]
+
+    async def start(self) -> asyncio.AbstractServer:
+        """开始监听，port为0时更新为实际端口"""
+        self._semaphore = asyncio.Semaphore(self.slots)
+        self.work_root.mkdir(parents=True, exist_ok=True)
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"构建节点 {self.name} 监听 {self.host}:{self.port}, {self.slots} 个任务槽")
+        return self._server
+
+    async def serve_forever(self) -> None:
+        """持续提供服务"""
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader,
+                      writer: asyncio.StreamWriter) -> None:
+        try:
+            header = await read_frame(reader)
+            if header.get('type') == 'hello':
+                write_frame(writer, self.info())
+            elif header.get('type') == 'job':
+                if self._authorized(header):
+                    await self._run_job(header, reader, writer)
+                else:
+                    logger.warning(f"拒绝未认证的任务: {writer.get_extra_info('peername')}")
+                    write_frame(writer, {'type': 'error',
+                                         'message': f"节点 {self.name} 拒绝任务: 令牌无效"})
+            else:
+                write_frame(writer, {'type': 'error',
+                                     'message': f"未知请求: {header.get('type')}"})
+            await writer.drain()
+        except (ConnectionError, RemoteError) as e:
+            logger.warning(f"连接异常: {e}")
+        except Exception:
+            logger.exception("处理请求时发生异常")
+        finally:
+            writer.close()
+
+    def _authorized(self, header: Dict[str, Any]) -> bool:
+        return token_matches(self.token, header.get('token'))
+
+    async def _run_job(self, header: Dict[str, Any], reader: asyncio.StreamReader,
+                       writer: asyncio.StreamWriter) -> None:
+        job_id = header.get('job_id') or uuid.uuid4().hex[:8]
+        job_dir = self.work_root / f"{job_id}-{uuid.uuid4().hex[:8]}"
+        job_dir.mkdir(parents=True)
+        try:
+            for _ in range(int(header.get('files', 0))):
+                await receive_file(reader, await read_frame(reader), job_dir)
+
+            try:
+                job_script(header.get('command'), job_dir)
+            except RemoteError as e:
+                write_frame(writer, {'type': 'error',
+                                     'message': f"节点 {self.name} 拒绝任务: {e}"})
+                return
+            tool, version = header.get('tool', 'vivado'), header.get('tool_version')
+            executable = self.resolve_tool(tool, version)
+            if executable is None:
+                message = f"节点 {self.name} 未安装 {tool} {version or ''}".strip()
+                write_frame(writer, {'type': 'error', 'message': message})
+                return
+            command = [executable] + list(header['command'][1:])
+
+            before = _snapshot(job_dir)
+
+            self.queued += 1
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self.queued -= 1
+            self.running += 1
+            try:
+                write_frame(writer, {'type': 'started', 'worker': self.name})
+                await writer.drain()
+
+                def on_output(stream: str, line: str):
+                    write_frame(writer, {'type': 'output', 'stream': stream,
+                                         'line': line})
+
+                start = time.monotonic()
+                run_task = asyncio.ensure_future(
+                    run_process(command, cwd=job_dir, on_output=on_output))
+                watch_task = asyncio.ensure_future(read_frame(reader))
+                done, _ = await asyncio.wait({run_task, watch_task},
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if run_task not in done:
+                    # 调度端取消或断开连接：终止进程树
+                    logger.info(f"任务 {job_id} 被取消")
+                    run_task.cancel()
+                    try:
+                        await run_task
+                    except (asyncio.CancelledError, Exception):
+                        pass
+                    return
+                watch_task.cancel()
+                result = run_task.result()
+                duration = time.monotonic() - start
+            finally:
+                self.running -= 1
+                self._semaphore.release()
+
+            after = _snapshot(job_dir)
+            patterns = header.get('artifacts') or []
+            changed = sorted(
+                path for path, stat in after.items()
+                if before.get(path) != stat and not _matches(path, RESULT_EXCLUDE)
+                and (not patterns or _matches(path, patterns))
+            )
+            write_frame(writer, {'type': 'result', 'returncode': result.returncode,
+                                 'duration': duration, 'worker': self.name,
+                                 'files': len(changed)})
+            for path in changed:
+                await send_file(writer, job_dir / path, path)
+            await writer.drain()
+        finally:
+            if not self.keep_jobs:
+                shutil.rmtree(job_dir, ignore_errors=True)
+
+
+# ---------------------------------------------------------------- 调度端
+
+
+@dataclass
+class WorkerInfo:
+    """构建节点状态"""
+    address: str
+    name: str
+    slots: int
+    running: int
+    load: float
+    tools: Dict[str, List[str]] = field(default_factory=dict)
+    queued: int = 0
+
+    def supports(self, tool: str, version: Optional[str] = None) -> bool:
+        versions = self.tools.get(tool, [])
+        return version in versions if version else bool(versions)
+
+
+@dataclass
+class RemoteJob:
+    """远程任务"""
+    # [TOOL_PLACEHOLDER, '-mode', 'batch', '-source', 脚本]
+    command: List[str]
+    base_dir: Path                                          # 输入和产物的基准目录
+    files: List[str] = field(default_factory=list)          # 发送的文件（相对base_dir）
+    # 直接发送的数据 {相对路径: 内容}
+    inline_files: Dict[str, bytes] = field(default_factory=dict)
+    # 取回的文件（glob，默认为所有变化的文件）
+    artifacts: List[str] = field(default_factory=list)
+    tool: str = 'vivado'
+    tool_version: Optional[str] = None
+    job_id: str = ''
+
+
+@dataclass
+class RemoteResult:
+    """远程任务结果"""
+    worker: str
+    returncode: int
+    stdout: str
+    stderr: str
+    files: List[str] = field(default_factory=list)          # 取回的文件
+    duration: float = 0.0
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    """解析 host:port，省略端口时使用默认端口"""
+    host, sep, port = str(address).rpartition(':')
+    if not sep:
+        return str(address), DEFAULT_PORT
+    if not port.isdigit():
+        raise RemoteError(f"无效的节点地址: {address}")
+    return host or '127.0.0.1', int(port)
+
+
+def select_worker(workers: List[WorkerInfo], tool: str, version: Optional[str] = None,
+                  assigned: Optional[Dict[str, int]] = None) -> Optional[WorkerInfo]:
+    """选择安装了所需版本、占用率最低的节点
+
+    占用率为(运行中+排队+本调度端已分配)/任务槽数，相同时按系统负载选择。
+    """
+    assigned = assigned or {}
+    candidates = [w for w in workers if w.supports(tool, version)]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda w: (
+        (w.running + w.queued + assigned.get(w.address, 0)) / max(1, w.slots),
+        w.load, w.address))
+
+
+class RemoteDispatcher:
+    """分布式任务调度"""
+
+    DEFAULT_STAGES = ('synthesize', 'implement', 'generate_bitstream')
+
+    def __init__(self, workers: List[str], timeout: float = 10.0,
+                 stages: Optional[Iterable[str]] = None, fallback_local: bool = True,
+                 token: Optional[str] = None):
+        """
+        Args:
+            workers: 节点地址列表（host:port）
+            timeout: 连接超时（秒）
+            stages: 远程运行的阶段（TCL脚本名称）
+            fallback_local: 没有可用节点时在本机运行
+            token: 与构建节点共享的令牌
+        """
+        self.workers = list(workers)
+        self.token = token
+        self.timeout = timeout
+        self.stages = set(stages) if stages is not None else set(self.DEFAULT_STAGES)
+        self.fallback_local = fallback_local
+        self._assigned: Dict[str, int] = {}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional['RemoteDispatcher']:
+        """根据 build.remote 配置创建调度端，未配置节点时返回None"""
+        settings = config.get('build', {}).get('remote') or {}
+        if not settings.get('workers') or not settings.get('enabled', True):
+            return None
+        token = load_token(settings.get('token_file'))
+        if token is None:
+            logger.warning(f"未配置构建节点共享令牌（build.remote.token_file 或 "
+                           f"{TOKEN_ENV}），节点将拒绝任务")
+        return cls(
+            workers=settings['workers'],
+            timeout=settings.get('timeout', 10.0),
+            stages=settings.get('stages'),
+            fallback_local=settings.get('fallback_local', True),
+            token=token,
+        )
+
+    async def _connect(self, address: str):
+        host, port = parse_address(address)
+        return await asyncio.wait_for(asyncio.open_connection(host, port), self.timeout)
+
+    async def query(self, address: str) -> WorkerInfo:
+        """查询节点状态"""
+        reader, writer = await self._connect(address)
+        try:
+            write_frame(writer, {'type': 'hello', 'protocol': PROTOCOL_VERSION})
+            await writer.drain()
+            info = await asyncio.wait_for(read_frame(reader), self.timeout)
+        finally:
+            writer.close()
+        if info.get('type') != 'info':
+            raise RemoteError(f"节点 {address} 响应异常: {info}")
+        if info.get('protocol') != PROTOCOL_VERSION:
+            raise RemoteError(f"节点 {address} 协议版本不兼容: {info.get('protocol')}")
+        return WorkerInfo(address=address, name=info.get('name', address),
+                          slots=info.get('slots', 1),
+                          running=info.get('running', 0), load=info.get('load', 0.0),
+                          tools=info.get('tools', {}), queued=info.get('queued', 0))
+
+    async def probe(self) -> List[WorkerInfo]:
+        """查询所有节点，跳过不可达的节点"""
+        results = await asyncio.gather(*(self.query(a) for a in self.workers),
+                                       return_exceptions=True)
+        infos = []
+        for address, result in zip(self.workers, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"构建节点 {address} 不可用: {result}")
+            else:
+                infos.append(result)
+        return infos
+
+    async def run_job(self, job: RemoteJob,
+                      on_output: Optional[OutputCallback] = None) -> RemoteResult:
+        """选择节点并运行任务，产物写回job.base_dir"""
+        worker = select_worker(await self.probe(), job.tool, job.tool_version,
+                               self._assigned)
+        if worker is None:
+            message = f"没有可用的构建节点安装了 {job.tool} {job.tool_version or ''}"
+            raise NoWorkerError(message.strip())
+        self._assigned[worker.address] = self._assigned.get(worker.address, 0) + 1
+        try:
+            return await self._execute(worker, job, on_output)
+        finally:
+            self._assigned[worker.address] -= 1
+
+    async def _execute(self, worker: WorkerInfo, job: RemoteJob,
+                       on_output: Optional[OutputCallback]) -> RemoteResult:
+        base_dir = Path(job.base_dir)
+        reader, writer = await self._connect(worker.address)
+        stdout: List[str] = []
+        stderr: List[str] = []
+        try:
+            write_frame(writer, {
+                'type': 'job', 'job_id': job.job_id, 'command': job.command,
+                'tool': job.tool, 'tool_version': job.tool_version,
+                'token': self.token, 'artifacts': job.artifacts,
+                'files': len(job.files) + len(job.inline_files),
+            })
+            for rel_path in job.files:
+                await send_file(writer, base_dir / rel_path, Path(rel_path).as_posix())
+            for rel_path, data in job.inline_files.items():
+                await send_bytes(writer, data, rel_path)
+            await writer.drain()
+
+            while True:
+                header = await read_frame(reader)
+                kind = header.get('type')
+                if kind == 'output':
+                    line = header.get('line', '')
+                    target = stderr if header.get('stream') == 'stderr' else stdout
+                    target.append(line + '\n')
+                    if on_output is not None:
+                        on_output(header.get('stream', 'stdout'), line)
+                elif kind == 'started':
+                    logger.info(f"任务 {job.job_id} 在节点 {header.get('worker')} 上开始运行")
+                elif kind == 'error':
+                    raise RemoteError(header.get('message', '远程任务失败'))
+                elif kind == 'result':
+                    files = [await receive_file(reader, await read_frame(reader),
+                                                base_dir)
+                             for _ in range(int(header.get('files', 0)))]
+                    return RemoteResult(worker=header.get('worker', worker.name),
+                                        returncode=header['returncode'],
+                                        stdout=''.join(stdout),
+                                        stderr=''.join(stderr), files=files,
+                                        duration=header.get('duration', 0.0))
+        except asyncio.CancelledError:
+            try:
+                write_frame(writer, {'type': 'cancel'})
+            except Exception:
+                pass
+            raise
+        except ConnectionError as e:
+            raise RemoteError(f"与节点 {worker.address} 的连接中断: {e}") from e
+        finally:
+            writer.close()
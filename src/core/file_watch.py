@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+文件监视
+
+优先使用watchdog（Linux上为inotify）监视文件所在目录，watchdog不可用时
+回退为按修改时间轮询。连续的修改（编辑器保存时的多次写入、git checkout）
+在防抖时间内合并为一批变化。
+"""
+
+import asyncio
+import logging
+import os
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterable, Optional, Set, Tuple
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog为可选依赖
+    FileSystemEventHandler = object
+    Observer = None
+
+logger = logging.getLogger(__name__)
+
+
+class _EventHandler(FileSystemEventHandler):
+    """把watchdog线程中的事件转发到事件循环"""
+
+    def __init__(self, watcher: 'FileWatcher'):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if getattr(event, 'is_directory', False):
+            return
+        for attr in ('src_path', 'dest_path'):
+            path = getattr(event, attr, None)
+            if path:
+                self.watcher._notify_threadsafe(Path(path))
+
+
+class FileWatcher:
+    """监视一组文件及其所在目录中的同类新文件"""
+
+    def __init__(self, files: Iterable[Path], debounce: float = 0.3,
+                 poll_interval: float = 0.5, use_polling: Optional[bool] = None,
+                 suffixes: Optional[Iterable[str]] = None):
+        """
+        Args:
+            files: 监视的文件
+            debounce: 防抖时间（秒），在此时间内没有新的变化才产生一批变化
+            poll_interval: 轮询间隔（秒）
+            use_polling: 强制使用轮询（None表示watchdog不可用时轮询）
+            suffixes: 所在目录中新建文件也视为变化的扩展名（默认为监视文件的扩展名）
+        """
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_polling = Observer is None if use_polling is None else use_polling
+        self._suffixes = {s.lower() for s in suffixes} if suffixes is not None else None
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._observer = None
+        self._poller: Optional[asyncio.Task] = None
+        self.files: Set[Path] = set()
+        self.dirs: Set[Path] = set()
+        self.suffixes: Set[str] = set()
+        self.update(files)
+
+    @property
+    def backend(self) -> str:
+        return 'polling' if self.use_polling else 'watchdog'
+
+    def update(self, files: Iterable[Path]) -> None:
+        """更新监视的文件（重新扫描源文件后调用）"""
+        self.files = {Path(f).absolute() for f in files}
+        old_dirs = self.dirs
+        self.dirs = {f.parent for f in self.files}
+        if self._suffixes is not None:
+            self.suffixes = self._suffixes
+        else:
+            self.suffixes = {f.suffix.lower() for f in self.files}
+        if self._observer is not None and self.dirs != old_dirs:
+            self._observer.unschedule_all()
+            self._schedule()
+
+    def relevant(self, path: Path) -> bool:
+        """变化是否与监视的文件相关"""
+        path = Path(path).absolute()
+        return path in self.files or (path.parent in self.dirs
+                                      and path.suffix.lower() in self.suffixes)
+
+    def _notify_threadsafe(self, path: Path) -> None:
+        if self._loop is not None and self._queue is not None:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, path)
+
+    def _schedule(self) -> None:
+        handler = _EventHandler(self)
+        for directory in self.dirs:
+            if directory.is_dir():
+                self._observer.schedule(handler, str(directory), recursive=False)
+
+    def _snapshot(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot = {}
+        candidates = set(self.files)
+        for directory in self.dirs:
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if Path(entry.name).suffix.lower() in self.suffixes:
+                            candidates.add(Path(entry.path).absolute())
+            except OSError:
+                continue
+        for path in candidates:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    async def _poll(self) -> None:
+        loop = asyncio.get_event_loop()
+        previous = await loop.run_in_executor(None, self._snapshot)
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            current = await loop.run_in_executor(None, self._snapshot)
+            for path in set(previous) | set(current):
+                if previous.get(path) != current.get(path):
+                    self._queue.put_nowait(path)
+            previous = current
+
+    def start(self) -> None:
+        """开始监视（需在事件循环中调用）"""
+        if self._queue is not None:
+            return
+        self._loop = asyncio.get_event_loop()
+        self._queue = asyncio.Queue()
+        if self.use_polling:
+            self._poller = self._loop.create_task(self._poll())
+        else:
+            self._observer = Observer()
+            self._schedule()
+            self._observer.start()
+        logger.info(f"监视 {len(self.files)} 个文件（{self.backend}）")
+
+    def close(self) -> None:
+        """停止监视"""
+        if self._poller is not None:
+            self._poller.cancel()
+            self._poller = None
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=2)
+            self._observer = None
+        self._queue = None
+
+    async def next_batch(self) -> Set[Path]:
+        """等待下一批变化（防抖后）"""
+        self.start()
+        batch: Set[Path] = set()
+        while not batch:
+            path = await self._queue.get()
+            if self.relevant(path):
+                batch.add(Path(path).absolute())
+        while True:
+            try:
+                path = await asyncio.wait_for(self._queue.get(), self.debounce)
+            except asyncio.TimeoutError:
+                return batch
+            if self.relevant(path):
+                batch.add(Path(path).absolute())
+
+    async def changes(self) -> AsyncIterator[Set[Path]]:
+        """持续产生变化批次"""
+        try:
+            while True:
+                yield await self.next_batch()
+        finally:
+            self.close()
@@ -0,0 +1,471 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+构建钩子引擎
+
+钩子配置（build.hooks.<阶段>）可以是多行字符串、命令列表，或钩子字典列表：
+
+    post_bitstream:
+      - name: checksum
+        run: python scripts/checksum.py build/top.bit
+        inputs: [build/bitstreams/*.bit]
+        outputs: [build/bitstreams/*.sha256]
+      - name: upload
+        run: scripts/upload.sh
+        depends_on: [checksum]
+        timeout: 300
+        on_failure: continue
+
+连续的字符串命令组成一个按顺序执行的钩子（与以前的行为一致）；没有依赖
+关系的钩子并行运行。声明了outputs且输出比所有输入都新（命令未变化）的钩子
+跳过。输出逐行实时转发。失败时按 on_failure 策略（abort/continue）处理，
+不再交互式询问；post_bitstream 等构建后钩子默认 continue。
+"""
+
+import asyncio
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from .async_process import OutputCallback, run_process
+
+FAILURE_POLICIES = ('abort', 'continue')
+# 构建产物已经生成之后运行的钩子，失败默认只给出警告
+POST_BUILD_STAGES = ('post_bitstream', 'bin_merge_script')
+STATE_FILE = 'hooks.json'
+
+
+class HookError(Exception):
+    """钩子配置错误"""
+    pass
+
+
+@dataclass
+class Hook:
+    """一个钩子：按顺序执行的一组命令"""
+    name: str
+    commands: List[str]
+    inputs: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+    depends_on: List[str] = field(default_factory=list)
+    timeout: Optional[float] = None
+    on_failure: str = 'abort'
+    cwd: Optional[str] = None
+    env: Dict[str, str] = field(default_factory=dict)
+
+    def signature(self) -> str:
+        """命令和输入输出声明的指纹（修改命令后不再跳过）"""
+        data = json.dumps([self.commands, sorted(self.inputs), sorted(self.outputs),
+                           self.cwd, self.env], sort_keys=True)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+@dataclass
+class HookResult:
+    """钩子执行结果"""
+    name: str
+    # ok / failed / timeout / skipped / blocked / cancelled
+    status: str
+    returncode: Optional[int] = None
+    duration: float = 0.0
+    error: str = ''
+    on_failure: str = 'abort'
+
+    @property
+    def ok(self) -> bool:
+        return self.status in ('ok', 'skipped')
+
+
+@dataclass
+class HookRunResult:
+    """一组钩子的执行结果"""
+    stage: str
+    results: Dict[str, HookResult] = field(default_factory=dict)
+
+    @property
+    def failed(self) -> List[HookResult]:
+        return [r for r in self.results.values() if not r.ok]
+
+    @property
+    def success(self) -> bool:
+        """没有按abort策略失败的钩子"""
+        return all(r.ok or r.on_failure == 'continue' for r in self.results.values())
+
+    @property
+    def errors(self) -> List[str]:
+        return [f"{self.stage} 钩子 {r.name} {r.status}: {r.error}".rstrip(': ')
+                for r in self.failed]
+
+
+def _as_list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(v) for v in value]
+    return [str(value)]
+
+
+def _split_commands(value: Any) -> List[str]:
+    """字符串按行拆分为命令，列表原样使用"""
+    if isinstance(value, (list, tuple)):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [line.strip() for line in str(value or '').split('\n') if line.strip()]
+
+
+def parse_hooks(hook_config: Any, stage: str, on_failure: str = 'abort',
+                timeout: Optional[float] = None) -> List[Hook]:
+    """把一个阶段的钩子配置解析为钩子列表
+
+    Args:
+        hook_config: 字符串、命令列表或钩子字典列表
+        stage: 阶段名（用于生成默认钩子名）
+        on_failure: 默认失败策略
+        timeout: 默认超时（秒）
+    """
+    if on_failure not in FAILURE_POLICIES:
+        raise HookError(f"未知的钩子失败策略: {on_failure}（可选: {', '.join(FAILURE_POLICIES)}）")
+    if not hook_config:
+        return []
+    items = hook_config if isinstance(hook_config, (list, tuple)) else [hook_config]
+
+    hooks: List[Hook] = []
+    pending: List[str] = []
+
+    def flush():
+        if pending:
+            hooks.append(Hook(
+                name=f'{stage}' if not hooks else f'{stage}-{len(hooks) + 1}',
+                commands=list(pending),
+                on_failure=on_failure,
+                timeout=timeout,
+                depends_on=[hooks[-1].name] if hooks else [],
+            ))
+            pending.clear()
+
+    for item in items:
+        if isinstance(item, dict):
+            flush()
+            commands = _split_commands(item.get('run', item.get('command')))
+            if not commands:
+                raise HookError(f"{stage} 钩子缺少 run: {item}")
+            policy = item.get('on_failure', on_failure)
+            if policy not in FAILURE_POLICIES:
+                raise HookError(f"未知的钩子失败策略: {policy}"
+                                f"（可选: {', '.join(FAILURE_POLICIES)}）")
+            hooks.append(Hook(
+                name=str(item.get('name') or f'{stage}-{len(hooks) + 1}'),
+                commands=commands,
+                inputs=_as_list(item.get('inputs')),
+                outputs=_as_list(item.get('outputs')),
+                depends_on=_as_list(item.get('depends_on')),
+                timeout=item.get('timeout', timeout),
+                on_failure=policy,
+                cwd=item.get('cwd'),
+                env={str(k): str(v) for k, v in (item.get('env') or {}).items()},
+            ))
+        else:
+            pending.extend(_split_commands(item))
+    flush()
+
+    names = [hook.name for hook in hooks]
+    duplicates = {name for name in names if names.count(name) > 1}
+    if duplicates:
+        raise HookError(f"{stage} 钩子名称重复: {', '.join(sorted(duplicates))}")
+    for hook in hooks:
+        unknown = [dep for dep in hook.depends_on if dep not in names]
+        if unknown:
+            raise HookError(f"{stage} 钩子 {hook.name} 依赖不存在的钩子: {', '.join(unknown)}")
+    _check_cycles(hooks)
+    return hooks
+
+
+def _check_cycles(hooks: List[Hook]) -> None:
+    deps = {hook.name: hook.depends_on for hook in hooks}
+    visiting, done = set(), set()
+
+    def visit(name: str, path: List[str]):
+        if name in done:
+            return
+        if name in visiting:
+            raise HookError(f"钩子存在循环依赖: {' -> '.join(path + [name])}")
+        visiting.add(name)
+        for dep in deps[name]:
+            visit(dep, path + [name])
+        visiting.discard(name)
+        done.add(name)
+
+    for name in deps:
+        visit(name, [])
+
+
+def failure_policy(config: Dict[str, Any], stage: Optional[str] = None,
+                   override: Optional[str] = None) -> str:
+    """钩子失败策略
+
+    优先级：override（如 fpgab build --hook-failure）> 环境变量 FPGABUILDER_HOOK_FAILURE >
+    build.hooks.on_failure > 默认值。构建产物生成之后运行的钩子（POST_BUILD_STAGES）
+    默认continue，只给出警告；其余钩子默认abort。
+    """
+    if override:
+        return override
+    hooks_config = config.get('build', {}).get('hooks', {}) or {}
+    policy = (os.environ.get('FPGABUILDER_HOOK_FAILURE')
+              or hooks_config.get('on_failure'))
+    if policy:
+        return policy
+    if stage is not None and stage.replace('-', '_') in POST_BUILD_STAGES:
+        return 'continue'
+    return 'abort'
+
+
+def stage_hooks(config: Dict[str, Any], stage: str,
+                on_failure: Optional[str] = None) -> List[Hook]:
+    """读取配置中某个阶段的钩子（build.hooks.<stage>）
+
+    默认失败策略和超时取自 build.hooks.on_failure / build.hooks.timeout，
+    on_failure给出时覆盖配置。
+    """
+    hooks_config = config.get('build', {}).get('hooks', {}) or {}
+    return parse_hooks(hooks_config.get(stage), stage,
+                       on_failure=failure_policy(config, stage, on_failure),
+                       timeout=hooks_config.get('timeout'))
+
+
+def command_line(command: str, base_dir: Path) -> Optional[List[str]]:
+    """把钩子命令转换为进程参数，TCL脚本返回None（应在Vivado中执行）"""
+    path = Path(command)
+    if not path.is_absolute():
+        path = base_dir / path
+    if path.is_file():
+        suffix = path.suffix.lower()
+        if suffix in ('.py', '.pyw'):
+            return [sys.executable, str(path)]
+        if suffix in ('.sh', '.bash'):
+            return ['bash', str(path)]
+        if suffix == '.tcl':
+            return None
+        if suffix in ('.bat', '.cmd'):
+            return ['cmd', '/c', str(path)]
+        return [str(path)]
+    if sys.platform == 'win32':
+        return ['cmd', '/c', command]
+    return ['/bin/sh', '-c', command]
+
+
+def _expand(patterns: List[str], base_dir: Path) -> List[Path]:
+    paths = []
+    for pattern in patterns:
+        full = pattern if Path(pattern).is_absolute() else str(base_dir / pattern)
+        if glob.has_magic(pattern):
+            paths += [Path(p) for p in glob.glob(full, recursive=True)]
+        else:
+            paths.append(Path(full))
+    return paths
+
+
+def outputs_up_to_date(hook: Hook, base_dir: Path) -> bool:
+    """声明的输出都存在且不早于任何输入"""
+    if not hook.outputs:
+        return False
+    outputs = _expand(hook.outputs, base_dir)
+    if not outputs or not all(path.exists() for path in outputs):
+        return False
+    inputs = _expand(hook.inputs, base_dir)
+    if any(not path.exists() for path in inputs):
+        return False
+    if not inputs:
+        return True
+    oldest_output = min(path.stat().st_mtime_ns for path in outputs)
+    newest_input = max(path.stat().st_mtime_ns for path in inputs)
+    return oldest_output >= newest_input
+
+
+class HookEngine:
+    """按依赖顺序并行执行钩子"""
+
+    def __init__(self, base_dir: Optional[Path] = None, jobs: Optional[int] = None,
+                 state_dir: Optional[Path] = None,
+                 on_output: Optional[OutputCallback] = None,
+                 reporter: Callable[[str], None] = print):
+        """
+        Args:
+            base_dir: 工作目录（相对路径的基准）
+            jobs: 同时运行的钩子数（默认不限制）
+            state_dir: 记录钩子命令指纹的目录（None表示只按时间戳判断是否跳过）
+            on_output: 输出回调（默认按 "[钩子名] 行" 报告）
+            reporter: 状态消息输出函数
+        """
+        self.base_dir = Path(base_dir) if base_dir else Path.cwd()
+        self.jobs = jobs
+        self.state_file = Path(state_dir) / STATE_FILE if state_dir else None
+        self.on_output = on_output
+        self.reporter = reporter
+
+    def _load_state(self) -> Dict[str, str]:
+        if self.state_file is None:
+            return {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, state: Dict[str, str]) -> None:
+        if self.state_file is None:
+            return
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.state_file.with_suffix('.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(state, f, indent=2)
+            os.replace(tmp, self.state_file)
+        except OSError:
+            pass
+
+    def _output_callback(self, hook: Hook) -> OutputCallback:
+        if self.on_output is not None:
+            return self.on_output
+        return lambda stream, line: self.reporter(f"  [{hook.name}] {line}")
+
+    async def _run_commands(self, hook: Hook) -> HookResult:
+        cwd = self.base_dir / hook.cwd if hook.cwd else self.base_dir
+        env = dict(os.environ, **hook.env) if hook.env else None
+        on_output = self._output_callback(hook)
+        for command in hook.commands:
+            args = command_line(command, cwd)
+            if args is None:
+                self.reporter(f"  [WARN] {hook.name}: TCL脚本应在Vivado中执行，跳过: {command}")
+                continue
+            self.reporter(f"  [{hook.name}] $ {command}")
+            try:
+                result = await run_process(args, cwd=cwd, env=env, on_output=on_output)
+            except OSError as e:
+                return HookResult(hook.name, 'failed', error=f"无法执行 {command}: {e}")
+            if result.returncode != 0:
+                return HookResult(hook.name, 'failed', returncode=result.returncode,
+                                  error=f"{command} 退出码 {result.returncode}")
+        return HookResult(hook.name, 'ok', returncode=0)
+
+    async def _run_hook(self, hook: Hook, state: Dict[str, str],
+                        stage: str) -> HookResult:
+        key = f'{stage}:{hook.name}'
+        unchanged = state.get(key) == hook.signature()
+        if unchanged or (self.state_file is None and hook.outputs):
+            if outputs_up_to_date(hook, self.base_dir):
+                self.reporter(f"  [{hook.name}] 输出已是最新，跳过")
+                return HookResult(hook.name, 'skipped', on_failure=hook.on_failure)
+
+        start = time.monotonic()
+        try:
+            if hook.timeout:
+                result = await asyncio.wait_for(self._run_commands(hook), hook.timeout)
+            else:
+                result = await self._run_commands(hook)
+        except asyncio.TimeoutError:
+            result = HookResult(hook.name, 'timeout',
+                                error=f"超过 {hook.timeout}s 超时，已终止")
+        result.duration = time.monotonic() - start
+        result.on_failure = hook.on_failure
+        if result.status == 'ok' and hook.outputs:
+            state[key] = hook.signature()
+        return result
+
+    async def run_async(self, hooks: List[Hook], stage: str = 'hooks') -> HookRunResult:
+        """执行一组钩子
+
+        依赖全部成功（或跳过）的钩子才会启动；按abort策略失败时不再启动新钩子，
+        并取消仍在运行的钩子。
+        """
+        run = HookRunResult(stage)
+        if not hooks:
+            return run
+        self.reporter(f"执行 {stage} 钩子（{len(hooks)} 个）...")
+        state = self._load_state()
+        by_name = {hook.name: hook for hook in hooks}
+        semaphore = asyncio.Semaphore(self.jobs) if self.jobs else None
+        running: Dict[asyncio.Future, str] = {}
+        aborted = False
+
+        async def guarded(hook: Hook) -> HookResult:
+            if semaphore is None:
+                return await self._run_hook(hook, state, stage)
+            async with semaphore:
+                return await self._run_hook(hook, state, stage)
+
+        while len(run.results) < len(hooks):
+            if not aborted:
+                for hook in hooks:
+                    if hook.name in run.results or hook.name in running.values():
+                        continue
+                    deps = [run.results.get(dep) for dep in hook.depends_on]
+                    if any(dep is not None and not dep.ok for dep in deps):
+                        run.results[hook.name] = HookResult(
+                            hook.name, 'blocked', error='依赖的钩子失败',
+                            on_failure=hook.on_failure)
+                    elif all(dep is not None for dep in deps):
+                        running[asyncio.ensure_future(guarded(hook))] = hook.name
+            if not running:
+                for hook in hooks:
+                    if hook.name not in run.results:
+                        blocked = any(dep in run.results and not run.results[dep].ok
+                                      for dep in hook.depends_on)
+                        run.results[hook.name] = HookResult(
+                            hook.name, 'blocked' if blocked else 'cancelled',
+                            error='依赖的钩子失败' if blocked else '构建已中止',
+                            on_failure=hook.on_failure)
+                break
+            done, _ = await asyncio.wait(list(running),
+                                         return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                if future.cancelled():
+                    result = HookResult(name, 'cancelled',
+                                        on_failure=by_name[name].on_failure)
+                else:
+                    result = future.result()
+                run.results[name] = result
+                if not result.ok:
+                    self.reporter(f"  [ERROR] {name} {result.status}: {result.error}")
+                    if result.on_failure == 'abort' and not aborted:
+                        aborted = True
+                        for other in running:
+                            other.cancel()
+
+        self._save_state(state)
+        ran = sum(1 for r in run.results.values() if r.status == 'ok')
+        skipped = sum(1 for r in run.results.values() if r.status == 'skipped')
+        prefix = '[OK]' if not run.failed else ('[WARN]' if run.success else '[ERROR]')
+        self.reporter(f"{prefix} {stage} 钩子: 运行 {ran} 个, 跳过 {skipped} 个, "
+                      f"失败 {len(run.failed)} 个")
+        return run
+
+
+async def run_stage_hooks_async(config: Dict[str, Any], stage: str,
+                                base_dir: Optional[Path] = None,
+                                state_dir: Optional[Path] = None,
+                                on_output: Optional[OutputCallback] = None,
+                                reporter: Callable[[str], None] = print,
+                                hooks: Optional[List[Union[Hook, Any]]] = None,
+                                on_failure: Optional[str] = None) -> HookRunResult:
+    """执行配置中某个阶段的钩子
+
+    hooks给出时使用该钩子配置代替build.hooks.<stage>；on_failure覆盖配置中的失败策略。
+    """
+    hooks_config = config.get('build', {}).get('hooks', {}) or {}
+    if hooks is None:
+        parsed = stage_hooks(config, stage, on_failure)
+    else:
+        parsed = parse_hooks(hooks, stage,
+                             on_failure=failure_policy(config, stage, on_failure),
+                             timeout=hooks_config.get('timeout'))
+    engine = HookEngine(base_dir, jobs=hooks_config.get('jobs'), state_dir=state_dir,
+                        on_output=on_output, reporter=reporter)
+    return await engine.run_async(parsed, stage)
@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+多工程构建
+
+在一个仓库中发现所有工程配置文件，按共享IP依赖进行拓扑排序，并让所有工程
+的构建阶段通过同一个全局资源池调度（CPU核数、内存、许可证数），避免多个
+独立的fpgab进程超额占用主机。
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .admission import get_available_memory
+from .async_process import run_blocking, run_sync
+from .build_graph import BuildGraph, GraphResult, ResourcePool, run_build_async
+
+logger = logging.getLogger(__name__)
+
+CONFIG_FILE_NAMES = ('fpga_project.yaml', 'fpga_project.yml', 'fpga_project.json',
+                     '.fpga_project.yaml')
+
+# 发现工程时不进入的目录
+SKIP_DIR_NAMES = {'.git', '.svn', '.hg', 'node_modules', '__pycache__', '.Xil'}
+
+
+class MultiProjectError(Exception):
+    """多工程构建错误"""
+    pass
+
+
+@dataclass
+class ProjectEntry:
+    """仓库中的一个工程"""
+    name: str                               # 工程名称（唯一）
+    root: Path                              # 工程根目录
+    config_file: Path                       # 配置文件
+    config: Dict[str, Any]                  # 工程配置
+    depends_on: List[str] = field(default_factory=list)    # 依赖的工程名称
+
+
+@dataclass
+class ProjectSummary:
+    """单个工程的构建汇总"""
+    name: str
+    success: bool
+    duration: float = 0.0
+    ran: List[str] = field(default_factory=list)
+    restored: List[str] = field(default_factory=list)
+    up_to_date: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def discover_projects(root: Path, load_config: Callable[[Path], Dict[str, Any]]
+                      ) -> List[ProjectEntry]:
+    """发现根目录下的所有工程配置
+
+    Args:
+        root: 仓库根目录
+        load_config: 加载并验证配置文件的函数，返回None表示跳过该工程
+
+    不进入隐藏目录以及已发现工程的构建输出目录。
+    """
+    root = Path(root).resolve()
+    entries: List[ProjectEntry] = []
+    names: Dict[str, Path] = {}
+
+    for dirpath, dirnames, filenames in os.walk(root):
+        current = Path(dirpath)
+        config_name = next((name for name in CONFIG_FILE_NAMES if name in filenames),
+                           None)
+        pruned = set()
+        if config_name:
+            config_file = current / config_name
+            config = load_config(config_file)
+            if config is not None:
+                name = config.get('project', {}).get('name') or current.name
+                if name in names:
+                    # 同名工程使用相对路径区分
+                    name = str(current.relative_to(root)).replace(os.sep, '/')
+                names[name] = current
+                entries.append(ProjectEntry(name=name, root=current,
+                                            config_file=config_file, config=config))
+            project_dir = (config or {}).get('project_dir', './build')
+            build_dir = (current / project_dir).resolve()
+            pruned = {d for d in dirnames if (current / d).resolve() == build_dir}
+
+        dirnames[:] = sorted(
+            d for d in dirnames
+            if d not in pruned and d not in SKIP_DIR_NAMES and not d.startswith('.')
+        )
+
+    _resolve_dependencies(entries)
+    return entries
+
+
+def _resolve_dependencies(entries: List[ProjectEntry]) -> None:
+    """确定工程之间的依赖关系
+
+    显式声明：project.depends_on 列出依赖工程的名称或相对路径；
+    隐式推断：source.ip_repo_paths 指向其他工程目录时依赖该工程。
+    """
+    by_root = {entry.root: entry for entry in entries}
+    by_name = {entry.name: entry for entry in entries}
+
+    def owner_of(path: Path) -> Optional[ProjectEntry]:
+        for candidate in [path, *path.parents]:
+            if candidate in by_root:
+                return by_root[candidate]
+        return None
+
+    for entry in entries:
+        deps: List[str] = []
+        for item in entry.config.get('project', {}).get('depends_on', []) or []:
+            target = by_name.get(item) or owner_of((entry.root / item).resolve())
+            if target is None:
+                raise MultiProjectError(f"工程 {entry.name} 依赖未知工程: {item}")
+            deps.append(target.name)
+
+        for repo_path in entry.config.get('source', {}).get('ip_repo_paths', []) or []:
+            owner = owner_of((entry.root / repo_path).resolve())
+            if owner is not None and owner is not entry:
+                deps.append(owner.name)
+
+        entry.depends_on = [d for i, d in enumerate(deps)
+                            if d != entry.name and d not in deps[:i]]
+
+
+def order_projects(entries: List[ProjectEntry]) -> List[ProjectEntry]:
+    """按依赖关系拓扑排序，存在循环依赖时抛出异常"""
+    by_name = {entry.name: entry for entry in entries}
+    order: List[ProjectEntry] = []
+    marks: Dict[str, int] = {}
+
+    def visit(name: str, path: List[str]):
+        mark = marks.get(name)
+        if mark == 2:
+            return
+        if mark == 1:
+            cycle = ' -> '.join(path[path.index(name):] + [name])
+            raise MultiProjectError(f"工程之间存在循环依赖: {cycle}")
+        marks[name] = 1
+        for dep in by_name[name].depends_on:
+            visit(dep, path + [name])
+        marks[name] = 2
+        order.append(by_name[name])
+
+    for entry in entries:
+        visit(entry.name, [])
+    return order
+
+
+class MultiProjectBuilder:
+    """多工程构建器
+
+    每个工程有独立的构建图和状态，所有节点共享一个全局资源池。
+    下游工程在其依赖的工程全部构建成功后才开始。
+    """
+
+    def __init__(self, entries: List[ProjectEntry],
+                 graph_factory: Callable[[ProjectEntry, Callable[[str], None]],
+                                         BuildGraph],
+                 targets_for: Callable[[BuildGraph], List[str]],
+                 jobs: Optional[int] = None, memory: Optional[int] = None,
+                 licenses: Optional[int] = None,
+                 reporter: Callable[[str], None] = print,
+                 hook_failure: Optional[str] = None):
+        """
+        Args:
+            entries: 工程列表
+            graph_factory: 为工程创建构建图的函数
+            targets_for: 获取构建图中需要构建的目标
+            jobs: 同时运行的节点数上限（默认CPU核数）
+            memory: 内存上限（字节，默认为当前可用内存）
+            licenses: 同时使用的工具许可证数上限（默认不限制）
+            hook_failure: 钩子失败策略（覆盖各工程的 build.hooks.on_failure）
+        """
+        self.entries = order_projects(entries)
+        self.graph_factory = graph_factory
+        self.targets_for = targets_for
+        self.reporter = reporter
+        self.hook_failure = hook_failure
+        if memory is None:
+            memory = get_available_memory()
+        self.capacities = {
+            'cpu': jobs or os.cpu_count() or 1,
+            'memory': memory,
+            'license': licenses,
+        }
+
+    async def run_async(self, force: bool = False, explain: bool = False,
+                        dry_run: bool = False) -> List[ProjectSummary]:
+        """构建所有工程，返回按拓扑顺序排列的汇总"""
+        pool = ResourcePool(self.capacities)
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def build_project(entry: ProjectEntry) -> ProjectSummary:
+            for dep in entry.depends_on:
+                dep_summary = await tasks[dep]
+                if not dep_summary.success:
+                    return ProjectSummary(name=entry.name, success=False,
+                                          error=f"依赖工程 {dep} 构建失败")
+
+            def report(message: str):
+                self.reporter(f"[{entry.name}] {message}")
+
+            start = time.monotonic()
+            try:
+                # 构建图的创建涉及文件扫描和工具检测，放到线程池中执行
+                graph = await run_blocking(self.graph_factory, entry, report)
+                # 与单工程构建相同，每个工程执行自己的pre_build/post_bitstream钩子
+                result: GraphResult = await run_build_async(
+                    graph, self.targets_for(graph), force=force, explain=explain,
+                    dry_run=dry_run, pool=pool, hook_failure=self.hook_failure
+                )
+            except Exception as e:
+                logger.exception(f"工程 {entry.name} 构建异常")
+                return ProjectSummary(name=entry.name, success=False,
+                                      duration=time.monotonic() - start, error=str(e))
+
+            error = None
+            if result.blocked and not result.failed:
+                error = f"{len(result.blocked)} 个节点因依赖失败未运行"
+            return ProjectSummary(
+                name=entry.name,
+                success=result.success,
+                duration=time.monotonic() - start,
+                ran=list(result.ran),
+                restored=list(result.restored),
+                up_to_date=list(result.up_to_date),
+                failed=list(result.failed),
+                error=error,
+            )
+
+        loop = asyncio.get_event_loop()
+        for entry in self.entries:
+            tasks[entry.name] = loop.create_task(build_project(entry))
+        return list(await asyncio.gather(*tasks.values()))
+
+    def run(self, force: bool = False, explain: bool = False,
+            dry_run: bool = False) -> List[ProjectSummary]:
+        """同步构建所有工程"""
+        return run_sync(self.run_async(force=force, explain=explain, dry_run=dry_run))
+
+
+def format_summary(summaries: List[ProjectSummary], total_duration: float) -> List[str]:
+    """生成汇总表"""
+    width = max([len(s.name) for s in summaries] + [4])
+    lines = [f"{'工程':<{width}}  状态    耗时(s)  运行/缓存/最新", '-' * (width + 34)]
+    for summary in summaries:
+        status = '[OK]   ' if summary.success else '[ERROR]'
+        line = (f"{summary.name:<{width}}  {status} {summary.duration:8.1f}  "
+                f"{len(summary.ran)}/{len(summary.restored)}/{len(summary.up_to_date)}")
+        if summary.failed:
+            line += f"  失败: {', '.join(summary.failed)}"
+        if summary.error:
+            line += f"  {summary.error}"
+        lines.append(line)
+    succeeded = sum(1 for s in summaries if s.success)
+    lines.append('-' * (width + 34))
+    lines.append(f"共 {len(summaries)} 个工程, 成功 {succeeded}, "
+                 f"失败 {len(summaries) - succeeded}, 总耗时 {total_duration:.1f}s")
+    return lines
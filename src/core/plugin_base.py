@@ -15,6 +15,9 @@ import subprocess
 import sys
 import logging
 
+from .async_process import OutputCallback, ProcessResult, run_blocking, run_process
+from .tool_cache import get_tool_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -54,6 +57,7 @@ class ToolInfo:
     path: Path
     installed: bool = True
     version_range: Optional[VersionRange] = None
+    settings_script: Optional[Path] = None     # settings64.sh/.bat
 
     def is_compatible(self) -> bool:
         """检查工具版本是否兼容"""
@@ -209,6 +213,12 @@ class BasePlugin(ABC):
         """验证配置"""
         return True, []
 
+    async def run_command_async(self, cmd: List[str], cwd: Optional[Path] = None,
+                                on_output: Optional[OutputCallback] = None
+                                ) -> ProcessResult:
+        """异步运行外部工具命令，取消时终止整个进程树"""
+        return await run_process(cmd, cwd=cwd, on_output=on_output)
+
 
 class FPGAVendorPlugin(BasePlugin):
     """FPGA厂商插件基类"""
@@ -254,6 +264,32 @@ class FPGAVendorPlugin(BasePlugin):
         """烧录设备"""
         pass
 
+    # 异步接口：默认在线程池中调用同步实现（不支持流式输出和取消），
+    # 子类可重写为原生异步实现
+    async def create_project_async(self, config: Dict[str, Any],
+                                   on_output: Optional[OutputCallback] = None
+                                   ) -> BuildResult:
+        """异步创建工程"""
+        return await run_blocking(self.create_project, config)
+
+    async def synthesize_async(self, config: Dict[str, Any],
+                               on_output: Optional[OutputCallback] = None
+                               ) -> BuildResult:
+        """异步综合"""
+        return await run_blocking(self.synthesize, config)
+
+    async def implement_async(self, config: Dict[str, Any],
+                              on_output: Optional[OutputCallback] = None
+                              ) -> BuildResult:
+        """异步实现（布局布线）"""
+        return await run_blocking(self.implement, config)
+
+    async def generate_bitstream_async(self, config: Dict[str, Any],
+                                       on_output: Optional[OutputCallback] = None
+                                       ) -> BuildResult:
+        """异步生成比特流"""
+        return await run_blocking(self.generate_bitstream, config)
+
     def generate_tcl_script(self, config: Dict[str, Any]) -> str:
         """生成TCL脚本"""
         return ""
@@ -447,19 +483,38 @@ class ToolDetector:
                 Path("C:/Altera"),
                 Path("C:/lscc"),
             ]
+            # 递归搜索代价很高，优先使用上次搜索到的位置
+            cache = get_tool_cache()
+            if cache is not None:
+                cached = cache.get_location(executable_name)
+                if cached is not None:
+                    return cached
+
             for base_path in common_paths:
                 if base_path.exists():
                     # 递归查找可执行文件
-                    for exe_path in base_path.rglob(f"{executable_name}.exe"):
-                        return exe_path
-                    for exe_path in base_path.rglob(f"{executable_name}.bat"):
-                        return exe_path
+                    for pattern in (f"{executable_name}.exe", f"{executable_name}.bat"):
+                        for exe_path in base_path.rglob(pattern):
+                            if cache is not None:
+                                cache.put_location(executable_name, exe_path)
+                            return exe_path
 
         return None
 
     @staticmethod
-    def get_version_from_executable(executable_path: Path, version_arg: str = "--version") -> Optional[str]:
-        """从可执行文件获取版本"""
+    def _probe_executable(executable_path: Path,
+                          version_arg: str = "--version") -> Dict[str, Any]:
+        """运行一次版本命令，返回版本号和可执行文件是否有效
+
+        结果按路径、大小和修改时间缓存在 ~/.fpga_builder/tools.json 中。
+        """
+        cache = get_tool_cache() if version_arg == "--version" else None
+        if cache is not None:
+            entry = cache.get(executable_path)
+            if entry is not None:
+                return {'version': entry.get('version'),
+                        'valid': entry.get('valid', False)}
+
         try:
             result = subprocess.run(
                 [str(executable_path), version_arg],
@@ -467,23 +522,37 @@ class ToolDetector:
                 text=True,
                 timeout=5
             )
-            if result.returncode == 0:
-                # 尝试从输出中提取版本号
-                output = result.stdout + result.stderr
-                # 查找类似 "Version 2023.1" 或 "v2023.1" 的版本
-                version_patterns = [
-                    r'Version\s+([\d.]+)',
-                    r'v([\d.]+)',
-                    r'([\d]{4}\.[\d]+)',
-                    r'([\d]+\.[\d]+\.[\d]+)'
-                ]
-                for pattern in version_patterns:
-                    match = re.search(pattern, output)
-                    if match:
-                        return match.group(1)
-        except (subprocess.SubprocessError, FileNotFoundError, TimeoutError):
-            pass
-        return None
+        except (subprocess.SubprocessError, FileNotFoundError, TimeoutError, OSError):
+            # 超时等可能是暂时性错误，不写入缓存
+            return {'version': None, 'valid': False}
+
+        version = None
+        if result.returncode == 0:
+            # 尝试从输出中提取版本号
+            output = result.stdout + result.stderr
+            # 查找类似 "Version 2023.1" 或 "v2023.1" 的版本
+            version_patterns = [
+                r'Version\s+([\d.]+)',
+                r'v([\d.]+)',
+                r'([\d]{4}\.[\d]+)',
+                r'([\d]+\.[\d]+\.[\d]+)'
+            ]
+            for pattern in version_patterns:
+                match = re.search(pattern, output)
+                if match:
+                    version = match.group(1)
+                    break
+
+        # 如果返回0或者有输出，认为有效
+        valid = result.returncode == 0 or len(result.stdout) > 0
+        if cache is not None:
+            cache.put(executable_path, version, valid)
+        return {'version': version, 'valid': valid}
+
+    @staticmethod
+    def get_version_from_executable(executable_path: Path, version_arg: str = "--version") -> Optional[str]:
+        """从可执行文件获取版本"""
+        return ToolDetector._probe_executable(executable_path, version_arg)['version']
 
     @staticmethod
     def detect_vivado() -> Optional[ToolInfo]:
@@ -534,6 +603,22 @@ class ToolDetector:
             path=vitis_hls_exe
         )
 
+    @staticmethod
+    def _search_in_directory(directory: Path, file_name: str) -> Optional[Path]:
+        """在目录中递归查找可执行文件，结果记录在工具缓存中"""
+        cache = get_tool_cache()
+        cache_key = f"{file_name}@{directory.absolute()}"
+        if cache is not None:
+            cached = cache.get_location(cache_key)
+            if cached is not None:
+                return cached
+
+        for exe in directory.rglob(file_name):
+            if cache is not None:
+                cache.put_location(cache_key, exe)
+            return exe
+        return None
+
     @staticmethod
     def detect_vivado_with_config(config: Dict[str, Any]) -> Optional[ToolInfo]:
         """根据配置检测Vivado安装"""
@@ -561,22 +646,16 @@ class ToolDetector:
                             vivado_exe = exe_path
                         else:
                             # 递归查找
-                            for exe in path.rglob("vivado.bat"):
-                                vivado_exe = exe
-                                break
-                            else:
-                                vivado_exe = None
+                            vivado_exe = ToolDetector._search_in_directory(
+                                path, "vivado.bat")
                     else:
                         # Linux: 查找vivado
                         exe_path = path / "vivado"
                         if exe_path.exists():
                             vivado_exe = exe_path
                         else:
-                            for exe in path.rglob("vivado"):
-                                vivado_exe = exe
-                                break
-                            else:
-                                vivado_exe = None
+                            vivado_exe = ToolDetector._search_in_directory(
+                                path, "vivado")
 
                 if vivado_exe and vivado_exe.exists():
                     # 获取版本
@@ -621,28 +700,44 @@ class ToolDetector:
             else:
                 logger.warning(f"配置的Vivado路径不存在: {vivado_path}")
 
+        # 指定了版本时从工具链清单中选择对应安装
+        if vivado_version:
+            tool_info = ToolDetector.detect_from_inventory('vivado', vivado_version,
+                                                           config)
+            if tool_info:
+                return tool_info
+            logger.warning(f"工具链清单中未找到Vivado {vivado_version}，回退到自动检测")
+
         # 如果没有提供路径或路径无效，回退到自动检测
         return ToolDetector.detect_vivado()
 
+    @staticmethod
+    def detect_from_inventory(tool_name: str, version: Optional[str] = None,
+                              config: Optional[Dict[str, Any]] = None
+                              ) -> Optional[ToolInfo]:
+        """从多版本工具链清单中选择工具安装"""
+        from .tool_inventory import ToolInventory
+
+        inventory = ToolInventory.from_config(config or {})
+        install = inventory.select(tool_name, version)
+        if install is None:
+            return None
+        return ToolInfo(
+            name=tool_name,
+            version=install.version,
+            path=install.path,
+            settings_script=(Path(install.settings_script)
+                             if install.settings_script else None)
+        )
+
     @staticmethod
     def _validate_vivado_executable(executable_path: Path) -> bool:
         """验证Vivado可执行文件"""
-        try:
-            # 检查文件权限
-            if not executable_path.is_file():
-                return False
-
-            # 尝试执行简单的版本检查
-            result = subprocess.run(
-                [str(executable_path), "--version"],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            # 如果返回0或者有输出，认为有效
-            return result.returncode == 0 or len(result.stdout) > 0
-        except (subprocess.SubprocessError, FileNotFoundError, TimeoutError):
+        # 检查文件权限
+        if not executable_path.is_file():
             return False
+        # 与版本检测共用一次探测结果
+        return ToolDetector._probe_executable(executable_path)['valid']
 
 
 # 版本适配器基类
@@ -3,11 +3,28 @@
 
 """
 插件管理器
+
+插件通过清单声明名称、类型、厂商和入口点，发现阶段只读取清单，不导入任何
+插件模块；插件在第一次使用时才导入、实例化并初始化。清单来源：
+
+- 插件目录（内置 src/plugins 和 ~/.fpga_builder/plugins）中每个插件包的
+  plugin.json::
+
+      {"name": "vivado", "type": "vendor", "vendor": "xilinx",
+       "entry_point": ".plugin:VivadoPlugin"}
+
+  以 "." 开头的入口点相对于插件包（plugins.<包名>）。
+- 已安装发行包的 fpgabuilder.plugins 入口点组（名称为插件名，值为
+  "模块:类"）。入口点不声明类型和厂商，按类型或厂商查询时才导入。
+
+没有清单的旧插件包在需要完整插件列表时才导入扫描。
 """
 
 import importlib
+import json
 import pkgutil
 import sys
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, List, Optional, Type, Any, Set, Tuple
 import logging
@@ -17,6 +34,9 @@ from .plugin_base import (
     DocumentationPlugin, DeploymentPlugin, ToolPlugin, PluginType
 )
 
+MANIFEST_FILE = 'plugin.json'
+ENTRY_POINT_GROUP = 'fpgabuilder.plugins'
+
 
 class PluginManagerError(Exception):
     """插件管理器错误"""
@@ -28,11 +48,90 @@ class PluginNotFoundError(PluginManagerError):
     pass
 
 
+@dataclass
+class PluginManifest:
+    """插件清单"""
+    name: str
+    entry_point: str                          # 模块:类
+    plugin_type: Optional[PluginType] = None  # None表示导入后才能确定（入口点插件）
+    vendor: str = ''
+    version: str = ''
+    description: str = ''
+    source: str = ''                          # 清单文件或发行包名
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], source: str = '',
+                  package: str = '') -> 'PluginManifest':
+        """从清单内容创建
+
+        Args:
+            data: 清单内容
+            source: 清单来源（用于错误信息）
+            package: 插件包的模块名，用于解析以 "." 开头的相对入口点
+        """
+        if not isinstance(data, dict):
+            raise PluginManagerError(f"插件清单格式错误: {source}")
+        missing = [key for key in ('name', 'type', 'entry_point') if not data.get(key)]
+        if missing:
+            raise PluginManagerError(f"插件清单缺少字段 {', '.join(missing)}: {source}")
+        try:
+            plugin_type = PluginType(data['type'])
+        except ValueError:
+            raise PluginManagerError(f"未知插件类型 {data['type']}: {source}")
+        entry_point = str(data['entry_point'])
+        if ':' not in entry_point:
+            raise PluginManagerError(f"入口点格式应为 模块:类: {entry_point} ({source})")
+        if entry_point.startswith('.'):
+            if not package:
+                raise PluginManagerError(f"相对入口点只能用于插件目录中的清单: {source}")
+            entry_point = package + entry_point
+        return cls(name=str(data['name']), entry_point=entry_point,
+                   plugin_type=plugin_type, vendor=str(data.get('vendor', '')),
+                   version=str(data.get('version', '')),
+                   description=str(data.get('description', '')), source=source)
+
+
+def read_manifest(manifest_path: Path, package: str = '') -> PluginManifest:
+    """读取插件目录中的清单文件"""
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise PluginManagerError(f"读取插件清单失败: {manifest_path}: {e}")
+    return PluginManifest.from_dict(data, str(manifest_path), package)
+
+
+def entry_point_manifests(group: str = ENTRY_POINT_GROUP) -> List[PluginManifest]:
+    """已安装发行包通过入口点声明的插件（不导入插件模块）"""
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        return []
+    try:
+        eps = entry_points()
+        if hasattr(eps, 'select'):
+            selected = eps.select(group=group)
+        else:
+            selected = eps.get(group, [])
+    except Exception:
+        return []
+    manifests = []
+    for ep in selected:
+        dist = getattr(ep, 'dist', None)
+        manifests.append(PluginManifest(
+            name=ep.name, entry_point=ep.value,
+            source=f"{dist.metadata['Name']} ({group})" if dist is not None else group,
+        ))
+    return manifests
+
+
 class PluginManager:
     """插件管理器"""
 
-    def __init__(self, plugin_dirs: Optional[List[Path]] = None):
+    def __init__(self, plugin_dirs: Optional[List[Path]] = None,
+                 use_entry_points: bool = True):
         self.plugin_dirs = plugin_dirs or []
+        self.use_entry_points = use_entry_points
         self._plugins: Dict[str, BasePlugin] = {}
         self._vendor_plugins: Dict[str, FPGAVendorPlugin] = {}
         self._ip_plugins: Dict[str, IPCorePlugin] = {}
@@ -40,6 +139,13 @@ class PluginManager:
         self._doc_plugins: Dict[str, DocumentationPlugin] = {}
         self._deployment_plugins: Dict[str, DeploymentPlugin] = {}
         self._tool_plugins: Dict[str, ToolPlugin] = {}
+        # 清单注册表（发现阶段建立，不导入插件）
+        self._manifests: Dict[str, PluginManifest] = {}
+        # 没有清单的旧插件包: 模块名 -> 插件目录
+        self._legacy_packages: Dict[str, Path] = {}
+        # 加载失败的插件（不重复尝试）
+        self._failed: Set[str] = set()
+        self._plugin_dirs_by_name: Dict[str, Path] = {}
 
         self.logger = logging.getLogger(__name__)
 
@@ -57,11 +163,7 @@ class PluginManager:
         user_plugin_dir = Path.home() / '.fpga_builder' / 'plugins'
         self.plugin_dirs.append(user_plugin_dir)
 
-    def discover_plugins(self) -> None:
-        """发现所有插件"""
-        self.logger.info("开始发现插件...")
-
-        # 清空现有插件
+    def _clear(self) -> None:
         self._plugins.clear()
         self._vendor_plugins.clear()
         self._ip_plugins.clear()
@@ -69,6 +171,16 @@ class PluginManager:
         self._doc_plugins.clear()
         self._deployment_plugins.clear()
         self._tool_plugins.clear()
+        self._failed.clear()
+
+    def discover_plugins(self) -> None:
+        """发现所有插件（只读取清单，不导入插件模块）"""
+        self.logger.info("开始发现插件...")
+
+        # 清空现有插件
+        self._clear()
+        self._manifests.clear()
+        self._legacy_packages.clear()
 
         # 遍历所有插件目录
         for plugin_dir in self.plugin_dirs:
@@ -78,24 +190,115 @@ class PluginManager:
 
             self.logger.info(f"扫描插件目录: {plugin_dir}")
 
-            # 添加插件目录到Python路径
-            if str(plugin_dir.parent) not in sys.path:
-                sys.path.insert(0, str(plugin_dir.parent))
-
-            # 查找插件模块
+            # 查找插件包
             for finder, module_name, is_pkg in pkgutil.iter_modules([str(plugin_dir)]):
                 if not is_pkg:
                     continue
-
+                package = f"plugins.{module_name}"
+                manifest_path = plugin_dir / module_name / MANIFEST_FILE
+                if not manifest_path.exists():
+                    self._legacy_packages.setdefault(package, plugin_dir)
+                    continue
                 try:
-                    plugin_module = importlib.import_module(f"plugins.{module_name}")
-                    self._register_plugin_module(plugin_module)
-                except ImportError as e:
-                    self.logger.error(f"导入插件模块失败: {module_name}, 错误: {e}")
-                except Exception as e:
-                    self.logger.error(f"注册插件失败: {module_name}, 错误: {e}")
+                    self._add_manifest(read_manifest(manifest_path, package),
+                                       plugin_dir)
+                except PluginManagerError as e:
+                    self.logger.error(str(e))
+
+        if self.use_entry_points:
+            for manifest in entry_point_manifests():
+                self._add_manifest(manifest)
+
+        self.logger.info(f"插件发现完成，共发现 {len(self._manifests)} 个插件")
+
+    def _add_manifest(self, manifest: PluginManifest,
+                      plugin_dir: Optional[Path] = None) -> None:
+        if manifest.name in self._manifests:
+            self.logger.warning(f"插件已存在，跳过: {manifest.name} ({manifest.source})")
+            return
+        self._manifests[manifest.name] = manifest
+        if plugin_dir is not None:
+            self._plugin_dirs_by_name[manifest.name] = plugin_dir
+
+    def _ensure_sys_path(self, plugin_dir: Path) -> None:
+        """插件包以 plugins.<包名> 导入：把插件目录加入 plugins 包的搜索路径"""
+        if str(plugin_dir.parent) not in sys.path:
+            sys.path.insert(0, str(plugin_dir.parent))
+        try:
+            plugins_package = importlib.import_module('plugins')
+        except ImportError:
+            return
+        # 内置插件包已导入时，用户插件目录中的包也要能以 plugins.<包名> 找到
+        search_path = getattr(plugins_package, '__path__', None)
+        if search_path is not None and str(plugin_dir) not in list(search_path):
+            search_path.append(str(plugin_dir))
 
-        self.logger.info(f"插件发现完成，共发现 {len(self._plugins)} 个插件")
+    def load_plugin(self, plugin_name: str) -> Optional[BasePlugin]:
+        """导入、实例化并初始化插件（每个插件只加载一次）"""
+        if plugin_name in self._plugins:
+            return self._plugins[plugin_name]
+        manifest = self._manifests.get(plugin_name)
+        if manifest is None or plugin_name in self._failed:
+            return None
+        self._failed.add(plugin_name)
+
+        plugin_dir = self._plugin_dirs_by_name.get(plugin_name)
+        if plugin_dir is not None:
+            self._ensure_sys_path(plugin_dir)
+        module_name, _, class_name = manifest.entry_point.partition(':')
+        try:
+            module = importlib.import_module(module_name)
+            plugin_class = getattr(module, class_name)
+        except (ImportError, AttributeError) as e:
+            self.logger.error(f"导入插件失败: {plugin_name} ({manifest.entry_point}), "
+                              f"错误: {e}")
+            return None
+        try:
+            plugin_instance = plugin_class()
+        except Exception as e:
+            self.logger.error(f"实例化插件失败: {plugin_name}, 错误: {e}")
+            return None
+        if plugin_instance.name != plugin_name:
+            self.logger.warning(f"插件名称与清单不一致: {plugin_instance.name} != {plugin_name}")
+
+        self._register_plugin_instance(plugin_instance, plugin_name)
+        if plugin_name in self._plugins:
+            self._failed.discard(plugin_name)
+        return self._plugins.get(plugin_name)
+
+    def _load_legacy_packages(self) -> None:
+        """导入没有清单的旧插件包并注册其中的插件类"""
+        packages, self._legacy_packages = self._legacy_packages, {}
+        for package, plugin_dir in packages.items():
+            self._ensure_sys_path(plugin_dir)
+            try:
+                plugin_module = importlib.import_module(package)
+                self._register_plugin_module(plugin_module)
+            except ImportError as e:
+                self.logger.error(f"导入插件模块失败: {package}, 错误: {e}")
+            except Exception as e:
+                self.logger.error(f"注册插件失败: {package}, 错误: {e}")
+
+    def _load_matching(self, plugin_type: Optional[PluginType] = None,
+                       vendor: Optional[str] = None) -> None:
+        """加载类型/厂商匹配的插件（清单未声明类型的插件也需加载才能判断）"""
+        for name, manifest in list(self._manifests.items()):
+            if (plugin_type is not None
+                    and manifest.plugin_type not in (None, plugin_type)):
+                continue
+            if vendor is not None and manifest.plugin_type is not None and \
+                    manifest.vendor.lower() != vendor.lower():
+                continue
+            self.load_plugin(name)
+        self._load_legacy_packages()
+
+    def load_all_plugins(self) -> None:
+        """加载所有已发现的插件"""
+        self._load_matching()
+
+    def get_manifests(self) -> Dict[str, PluginManifest]:
+        """已发现插件的清单（不导入插件）"""
+        return self._manifests.copy()
 
     def _register_plugin_module(self, plugin_module) -> None:
         """注册插件模块"""
@@ -115,9 +318,10 @@ class PluginManager:
                 except Exception as e:
                     self.logger.error(f"实例化插件失败: {attr_name}, 错误: {e}")
 
-    def _register_plugin_instance(self, plugin_instance: BasePlugin) -> None:
-        """注册插件实例"""
-        plugin_name = plugin_instance.name
+    def _register_plugin_instance(self, plugin_instance: BasePlugin,
+                                  plugin_name: Optional[str] = None) -> None:
+        """注册并初始化插件实例"""
+        plugin_name = plugin_name or plugin_instance.name
 
         # 检查插件是否已注册
         if plugin_name in self._plugins:
@@ -161,11 +365,16 @@ class PluginManager:
         self._plugins[plugin_name] = plugin_instance
 
     def get_plugin(self, plugin_name: str) -> Optional[BasePlugin]:
-        """获取插件"""
+        """获取插件（首次使用时加载）"""
+        if plugin_name not in self._plugins:
+            if plugin_name in self._manifests:
+                return self.load_plugin(plugin_name)
+            self._load_legacy_packages()
         return self._plugins.get(plugin_name)
 
     def get_vendor_plugin(self, vendor_name: str) -> Optional[FPGAVendorPlugin]:
-        """获取指定厂商的插件"""
+        """获取指定厂商的插件（只加载清单中该厂商的插件）"""
+        self._load_matching(PluginType.VENDOR, vendor_name)
         for plugin in self._vendor_plugins.values():
             if plugin.vendor.lower() == vendor_name.lower():
                 return plugin
@@ -173,62 +382,81 @@ class PluginManager:
 
     def get_vendor_plugin_by_name(self, plugin_name: str) -> Optional[FPGAVendorPlugin]:
         """通过插件名称获取厂商插件"""
+        self.get_plugin(plugin_name)
         return self._vendor_plugins.get(plugin_name)
 
     def get_ip_plugin(self, plugin_name: str) -> Optional[IPCorePlugin]:
         """获取IP核插件"""
+        self.get_plugin(plugin_name)
         return self._ip_plugins.get(plugin_name)
 
     def get_hls_plugin(self, plugin_name: str) -> Optional[HLSPlugin]:
         """获取HLS插件"""
+        self.get_plugin(plugin_name)
         return self._hls_plugins.get(plugin_name)
 
     def get_documentation_plugin(self, plugin_name: str) -> Optional[DocumentationPlugin]:
         """获取文档插件"""
+        self.get_plugin(plugin_name)
         return self._doc_plugins.get(plugin_name)
 
     def get_deployment_plugin(self, plugin_name: str) -> Optional[DeploymentPlugin]:
         """获取部署插件"""
+        self.get_plugin(plugin_name)
         return self._deployment_plugins.get(plugin_name)
 
     def get_tool_plugin(self, plugin_name: str) -> Optional[ToolPlugin]:
         """获取工具插件"""
+        self.get_plugin(plugin_name)
         return self._tool_plugins.get(plugin_name)
 
     def get_all_plugins(self) -> Dict[str, BasePlugin]:
-        """获取所有插件"""
+        """获取所有插件（加载全部插件）"""
+        self.load_all_plugins()
         return self._plugins.copy()
 
     def get_all_vendor_plugins(self) -> Dict[str, FPGAVendorPlugin]:
         """获取所有厂商插件"""
+        self._load_matching(PluginType.VENDOR)
         return self._vendor_plugins.copy()
 
     def get_all_vendors(self) -> List[str]:
-        """获取所有支持的厂商"""
-        return [plugin.vendor for plugin in self._vendor_plugins.values()]
+        """获取所有支持的厂商（取自清单，不加载插件）"""
+        vendors = [m.vendor for m in self._manifests.values()
+                   if m.plugin_type == PluginType.VENDOR and m.vendor]
+        for plugin in self._vendor_plugins.values():
+            if plugin.vendor not in vendors:
+                vendors.append(plugin.vendor)
+        return vendors
 
     def get_all_ip_plugins(self) -> Dict[str, IPCorePlugin]:
         """获取所有IP核插件"""
+        self._load_matching(PluginType.IP_CORE)
         return self._ip_plugins.copy()
 
     def get_all_hls_plugins(self) -> Dict[str, HLSPlugin]:
         """获取所有HLS插件"""
+        self._load_matching(PluginType.HLS)
         return self._hls_plugins.copy()
 
     def get_all_documentation_plugins(self) -> Dict[str, DocumentationPlugin]:
         """获取所有文档插件"""
+        self._load_matching(PluginType.DOCUMENTATION)
         return self._doc_plugins.copy()
 
     def get_all_deployment_plugins(self) -> Dict[str, DeploymentPlugin]:
         """获取所有部署插件"""
+        self._load_matching(PluginType.DEPLOYMENT)
         return self._deployment_plugins.copy()
 
     def get_all_tool_plugins(self) -> Dict[str, ToolPlugin]:
         """获取所有工具插件"""
+        self._load_matching(PluginType.TOOL)
         return self._tool_plugins.copy()
 
     def get_plugins_by_type(self, plugin_type: PluginType) -> Dict[str, BasePlugin]:
         """根据类型获取插件"""
+        self._load_matching(plugin_type)
         plugins = {}
 
         for name, plugin in self._plugins.items():
@@ -238,8 +466,8 @@ class PluginManager:
         return plugins
 
     def has_plugin(self, plugin_name: str) -> bool:
-        """检查插件是否存在"""
-        return plugin_name in self._plugins
+        """检查插件是否存在（已发现即可，不加载）"""
+        return plugin_name in self._plugins or plugin_name in self._manifests
 
     def has_vendor(self, vendor_name: str) -> bool:
         """检查厂商插件是否存在"""
@@ -293,7 +521,7 @@ class PluginManager:
         self.discover_plugins()
 
         # 检查插件是否重新加载成功
-        return plugin_name in self._plugins
+        return self.get_plugin(plugin_name) is not None
 
     def reload_all_plugins(self) -> bool:
         """重新加载所有插件"""
@@ -302,20 +530,12 @@ class PluginManager:
         # 获取当前所有插件名称
         plugin_names = list(self._plugins.keys())
 
-        # 清空插件字典
-        self._plugins.clear()
-        self._vendor_plugins.clear()
-        self._ip_plugins.clear()
-        self._hls_plugins.clear()
-        self._doc_plugins.clear()
-        self._deployment_plugins.clear()
-        self._tool_plugins.clear()
-
-        # 重新发现插件
+        # 重新发现插件（同时清空插件字典）
         self.discover_plugins()
 
         # 检查是否所有插件都重新加载成功
-        missing_plugins = [name for name in plugin_names if name not in self._plugins]
+        missing_plugins = [name for name in plugin_names
+                           if self.get_plugin(name) is None]
 
         if missing_plugins:
             self.logger.warning(f"以下插件未能重新加载: {missing_plugins}")
@@ -374,6 +594,7 @@ class PluginManager:
         """检查所有插件的工具兼容性"""
         compatibility_report = {}
 
+        self.load_all_plugins()
         for plugin_name, plugin in self._plugins.items():
             try:
                 # 检查插件兼容性
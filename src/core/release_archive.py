@@ -0,0 +1,359 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+内容寻址的发布镜像归档
+
+pack_fpga.py 每次打包都会生成 <版本>_<日期>_<githead>_<md5>.bin 和对应的
+.ltx，发布目录里大量文件内容相同。归档按SHA256只保存一份内容，发布名称
+只是索引中的一条记录（可选在 releases/ 下建立指向内容文件的硬链接）。
+
+目录结构:
+    objects/<前2位>/<sha256>     文件内容（只读，按内容去重）
+    releases/<名称>.bin|.ltx     指向内容文件的硬链接（不支持硬链接时复制）
+    index.sqlite                 发布记录索引（按git HEAD、版本、日期查询）
+
+回收时按保留策略（保留最近N个、保留N天内、固定的发布）删除记录，再删除
+不被任何记录引用的内容文件。
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import sqlite3
+import stat
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from .admission import FileLock
+
+ARCHIVE_FORMAT_VERSION = 1
+
+# pack_fpga.py 的输出文件名：<版本>_<月日>_<githead>_<md5前6位>
+RELEASE_NAME_PATTERN = re.compile(
+    r'^(?P<version>V[\d.]+)_(?P<date>\d{4})_'
+    r'(?P<git_head>[0-9a-fA-F]{7,40})_(?P<md5>[0-9a-fA-F]{6,32})$')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS releases (
+    name TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    md5 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    version TEXT,
+    date TEXT,
+    git_head TEXT,
+    ltx_sha256 TEXT,
+    created REAL NOT NULL,
+    pinned INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS releases_git_head ON releases (git_head);
+CREATE INDEX IF NOT EXISTS releases_version ON releases (version);
+CREATE INDEX IF NOT EXISTS releases_date ON releases (date);
+CREATE INDEX IF NOT EXISTS releases_sha256 ON releases (sha256);
+CREATE INDEX IF NOT EXISTS releases_created ON releases (created);
+"""
+
+
+class ArchiveError(Exception):
+    """归档操作错误"""
+    pass
+
+
+@dataclass
+class ReleaseRecord:
+    """一个已归档的发布"""
+    name: str
+    sha256: str
+    md5: str
+    size: int
+    version: Optional[str] = None
+    date: Optional[str] = None
+    git_head: Optional[str] = None
+    ltx_sha256: Optional[str] = None
+    created: float = 0.0
+    pinned: bool = False
+
+
+def default_archive_dir() -> Path:
+    """获取默认归档目录（环境变量 FPGABUILDER_ARCHIVE_DIR 优先）"""
+    env_dir = os.environ.get('FPGABUILDER_ARCHIVE_DIR')
+    if env_dir:
+        return Path(env_dir).expanduser()
+    return Path.home() / '.fpga_builder' / 'archive'
+
+
+def parse_release_name(name: str) -> Dict[str, str]:
+    """从 pack_fpga.py 的输出文件名解析版本、日期和git HEAD，不匹配时返回空字典"""
+    match = RELEASE_NAME_PATTERN.match(name)
+    return match.groupdict() if match else {}
+
+
+class ReleaseArchive:
+    """内容寻址的发布镜像归档"""
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root).expanduser() if root else default_archive_dir()
+        self.objects_dir = self.root / 'objects'
+        self.releases_dir = self.root / 'releases'
+        self.index_path = self.root / 'index.sqlite'
+        self.lock_path = self.root / 'archive.lock'
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'ReleaseArchive':
+        """根据 build.archive.path 配置创建归档（未配置时使用默认目录）"""
+        path = config.get('build', {}).get('archive', {}).get('path')
+        return cls(Path(path).expanduser() if path else None)
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """打开索引（退出时提交并关闭）"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(str(self.index_path), timeout=30)
+        try:
+            connection.row_factory = sqlite3.Row
+            connection.executescript(_SCHEMA)
+            connection.execute(f"PRAGMA user_version = {ARCHIVE_FORMAT_VERSION}")
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _record(row: sqlite3.Row) -> ReleaseRecord:
+        values = {field.name: row[field.name] for field in fields(ReleaseRecord)}
+        values['pinned'] = bool(values['pinned'])
+        return ReleaseRecord(**values)
+
+    def _store_blob(self, path: Path) -> Tuple[str, str, int]:
+        """保存文件内容，已存在相同内容时只计算摘要不写入
+
+        Returns:
+            (sha256, md5, 大小)
+        """
+        sha256, md5 = hashlib.sha256(), hashlib.md5()
+        size = 0
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha256.update(chunk)
+                md5.update(chunk)
+                size += len(chunk)
+        digest = sha256.hexdigest()
+        blob = self._object_path(digest)
+        if not blob.exists():
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = blob.with_name(f".{digest}.{uuid.uuid4().hex[:8]}.tmp")
+            try:
+                shutil.copyfile(path, tmp_path)
+                # 内容文件被多个发布名称硬链接引用，设为只读防止原地修改
+                os.chmod(tmp_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+                os.replace(tmp_path, blob)
+            except BaseException:
+                if tmp_path.exists():
+                    tmp_path.unlink()
+                raise
+        return digest, md5.hexdigest(), size
+
+    def _link(self, digest: str, dest: Path) -> None:
+        """在releases目录下建立指向内容文件的硬链接（失败时复制）"""
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = dest.with_name(f".{dest.name}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            os.link(self._object_path(digest), tmp_path)
+        except OSError:
+            shutil.copyfile(self._object_path(digest), tmp_path)
+        os.replace(tmp_path, dest)
+
+    def add(self, bin_path: Union[str, Path], name: Optional[str] = None,
+            ltx_path: Optional[Union[str, Path]] = None, link: bool = True,
+            **metadata: Optional[str]) -> ReleaseRecord:
+        """归档一个发布镜像
+
+        Args:
+            bin_path: 镜像文件
+            name: 发布名称（默认取文件名去掉扩展名）
+            ltx_path: 对应的调试探针文件（可选）
+            link: 是否在 releases/ 下建立硬链接
+            metadata: version、date、git_head，未给出时从名称解析
+
+        Returns:
+            发布记录（名称已存在时覆盖）
+        """
+        bin_path = Path(bin_path)
+        if not bin_path.is_file():
+            raise ArchiveError(f"文件不存在: {bin_path}")
+        name = name or bin_path.stem
+        parsed = parse_release_name(name)
+        unknown = set(metadata) - {'version', 'date', 'git_head'}
+        if unknown:
+            raise ArchiveError(f"未知的发布信息: {', '.join(sorted(unknown))}")
+
+        with FileLock(self.lock_path):
+            sha256, md5, size = self._store_blob(bin_path)
+            ltx_sha256 = self._store_blob(Path(ltx_path))[0] if ltx_path else None
+            record = ReleaseRecord(
+                name=name, sha256=sha256, md5=md5, size=size,
+                version=metadata.get('version') or parsed.get('version'),
+                date=metadata.get('date') or parsed.get('date'),
+                git_head=(metadata.get('git_head') or parsed.get('git_head')
+                          or '').lower() or None,
+                ltx_sha256=ltx_sha256, created=time.time(),
+            )
+            with self._connect() as connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO releases (name, sha256, md5, size, "
+                    "version, date, git_head, ltx_sha256, created, pinned) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, "
+                    "COALESCE((SELECT pinned FROM releases WHERE name = ?), 0))",
+                    (record.name, record.sha256, record.md5, record.size,
+                     record.version, record.date, record.git_head,
+                     record.ltx_sha256, record.created, record.name))
+            if link:
+                self._link(sha256, self.releases_dir / f"{name}.bin")
+                if ltx_sha256:
+                    self._link(ltx_sha256, self.releases_dir / f"{name}.ltx")
+            # 覆盖同名发布时删除不再对应的旧链接，避免留下过期的.ltx（或不建链接时的旧.bin）
+            stale = [] if link else ['.bin']
+            if not (link and ltx_sha256):
+                stale.append('.ltx')
+            for suffix in stale:
+                try:
+                    (self.releases_dir / f"{name}{suffix}").unlink()
+                except OSError:
+                    pass
+        return record
+
+    def find(self, git_head: Optional[str] = None, version: Optional[str] = None,
+             date: Optional[str] = None, sha256: Optional[str] = None,
+             limit: Optional[int] = None) -> List[ReleaseRecord]:
+        """按条件查询发布记录（git HEAD和SHA256支持前缀），最新的在前"""
+        clauses, params = [], []
+        for column, value, prefix in (('git_head', git_head, True),
+                                      ('version', version, False),
+                                      ('date', date, False),
+                                      ('sha256', sha256, True)):
+            if value:
+                if prefix:
+                    # 前缀查询写成范围条件，可以使用索引
+                    clauses.append(f"{column} >= ? AND {column} < ?")
+                    params.extend([value.lower(), value.lower() + '￿'])
+                else:
+                    clauses.append(f"{column} = ?")
+                    params.append(value)
+        query = "SELECT * FROM releases"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY created DESC"
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        with self._connect() as connection:
+            return [self._record(row) for row in connection.execute(query, params)]
+
+    def get(self, name: str) -> Optional[ReleaseRecord]:
+        """按名称获取发布记录"""
+        with self._connect() as connection:
+            row = connection.execute("SELECT * FROM releases WHERE name = ?",
+                                     (name,)).fetchone()
+        return self._record(row) if row else None
+
+    def path(self, name: str) -> Path:
+        """发布镜像的内容文件路径"""
+        record = self.get(name)
+        if record is None:
+            raise ArchiveError(f"发布不存在: {name}")
+        return self._object_path(record.sha256)
+
+    def pin(self, name: str, pinned: bool = True) -> None:
+        """固定发布（回收时始终保留），pinned为False时取消固定"""
+        with self._connect() as connection:
+            if connection.execute("UPDATE releases SET pinned = ? WHERE name = ?",
+                                  (int(pinned), name)).rowcount == 0:
+                raise ArchiveError(f"发布不存在: {name}")
+
+    def gc(self, keep_last: Optional[int] = None, max_age_days: Optional[float] = None,
+           dry_run: bool = False) -> Dict[str, Any]:
+        """按保留策略删除发布记录，并回收不再被引用的内容文件
+
+        固定的发布、最新的keep_last个发布和max_age_days天内的发布会保留；
+        两个条件都未给出时只回收未被引用的内容文件。
+
+        Returns:
+            {'releases': 删除的发布名称, 'objects': 删除的内容文件数, 'bytes': 释放的字节数}
+        """
+        removed: List[str] = []
+        freed_objects = freed_bytes = 0
+        with FileLock(self.lock_path):
+            with self._connect() as connection:
+                if keep_last is not None or max_age_days is not None:
+                    cutoff = None
+                    if max_age_days is not None:
+                        cutoff = time.time() - max_age_days * 86400
+                    rows = connection.execute(
+                        "SELECT name, created, pinned FROM releases "
+                        "ORDER BY created DESC").fetchall()
+                    for position, row in enumerate(rows):
+                        if row['pinned']:
+                            continue
+                        if keep_last is not None and position < keep_last:
+                            continue
+                        if cutoff is not None and row['created'] >= cutoff:
+                            continue
+                        removed.append(row['name'])
+                    if not dry_run:
+                        connection.executemany("DELETE FROM releases WHERE name = ?",
+                                               [(name,) for name in removed])
+                # 预览时记录没有删除，按删除后的结果统计引用，与实际回收的数量一致
+                dropped = set(removed) if dry_run else set()
+                referenced = set()
+                rows = connection.execute(
+                    "SELECT name, sha256, ltx_sha256 FROM releases")
+                for row in rows:
+                    if row['name'] not in dropped:
+                        digests = (row['sha256'], row['ltx_sha256'])
+                        referenced.update(digest for digest in digests if digest)
+
+            if not dry_run:
+                for name in removed:
+                    for suffix in ('.bin', '.ltx'):
+                        try:
+                            (self.releases_dir / f"{name}{suffix}").unlink()
+                        except OSError:
+                            pass
+            if self.objects_dir.is_dir():
+                for blob in self.objects_dir.glob('*/*'):
+                    if blob.name in referenced or blob.name.startswith('.'):
+                        continue
+                    freed_objects += 1
+                    freed_bytes += blob.stat().st_size
+                    if not dry_run:
+                        os.chmod(blob, stat.S_IWUSR | stat.S_IRUSR)
+                        blob.unlink()
+        return {'releases': removed, 'objects': freed_objects, 'bytes': freed_bytes}
+
+    def stats(self) -> Dict[str, Any]:
+        """归档统计：发布数、内容文件数、逻辑大小和实际占用"""
+        with self._connect() as connection:
+            releases, logical = connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM releases").fetchone()
+        objects = stored = 0
+        if self.objects_dir.is_dir():
+            for blob in self.objects_dir.glob('*/*'):
+                if not blob.name.startswith('.'):
+                    objects += 1
+                    stored += blob.stat().st_size
+        return {
+            'path': str(self.root),
+            'releases': releases,
+            'objects': objects,
+            'logical_size': logical,
+            'stored_size': stored,
+            'dedup_ratio': logical / stored if stored else 1.0,
+        }
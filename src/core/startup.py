@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+启动阶段计时
+
+打包的可执行文件从运行时钩子开始记录各启动阶段（路径设置、导入CLI、
+导入厂商插件……）的时间点。设置 FPGABUILDER_DEBUG=1 时在进程退出前把
+各阶段耗时输出到标准错误，用于定位冷启动变慢的原因。本模块只依赖标准库，
+导入开销可以忽略。
+"""
+
+import atexit
+import os
+import sys
+import time
+from typing import List, Optional, TextIO, Tuple
+
+# 兼容早期版本使用的 FPGABuilder_DEBUG
+DEBUG_VARIABLES = ('FPGABUILDER_DEBUG', 'FPGABuilder_DEBUG')
+
+_START = time.perf_counter()
+_PHASES: List[Tuple[str, float]] = []
+_REPORT_REGISTERED = False
+
+
+def debug_enabled() -> bool:
+    """是否启用了启动调试输出"""
+    return any(os.environ.get(name, '').lower() in ('1', 'true', 'yes', 'on')
+               for name in DEBUG_VARIABLES)
+
+
+def mark(phase: str) -> None:
+    """记录一个启动阶段结束的时间点（首次记录时注册退出时的报告）"""
+    global _REPORT_REGISTERED
+    _PHASES.append((phase, time.perf_counter()))
+    if not _REPORT_REGISTERED and debug_enabled():
+        _REPORT_REGISTERED = True
+        atexit.register(report)
+
+
+def phases() -> List[Tuple[str, float]]:
+    """各阶段的耗时（秒），按记录顺序"""
+    result = []
+    previous = _START
+    for phase, timestamp in _PHASES:
+        result.append((phase, timestamp - previous))
+        previous = timestamp
+    return result
+
+
+def report(stream: Optional[TextIO] = None) -> None:
+    """输出各启动阶段的耗时"""
+    stream = stream or sys.stderr
+    if not _PHASES:
+        return
+    frozen = '打包' if getattr(sys, 'frozen', False) else '源码'
+    stream.write(f"[DEBUG] 启动阶段耗时（{frozen}模式）:\n")
+    for phase, elapsed in phases():
+        stream.write(f"[DEBUG]   {elapsed * 1000:8.1f} ms  {phase}\n")
+    total = _PHASES[-1][1] - _START
+    stream.write(f"[DEBUG]   {total * 1000:8.1f} ms  合计\n")
+    stream.flush()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+工具检测结果持久化缓存
+
+`vivado --version` 每次需要数秒，而插件的每个方法都会重新检测工具。
+检测结果保存在 ~/.fpga_builder/tools.json 中，以可执行文件路径、大小和
+修改时间为键，只有可执行文件发生变化时才重新探测。
+"""
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 1
+
+
+def default_cache_path() -> Path:
+    """获取默认缓存文件路径"""
+    return Path.home() / '.fpga_builder' / 'tools.json'
+
+
+def cache_enabled() -> bool:
+    """是否启用工具检测缓存（FPGABUILDER_TOOL_CACHE=0 可禁用）"""
+    value = os.environ.get('FPGABUILDER_TOOL_CACHE', '1').strip().lower()
+    return value not in ('0', 'false', 'no', 'off')
+
+
+def _stat_key(path: Path) -> Optional[Dict[str, int]]:
+    """获取文件的大小和修改时间"""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+class ToolCache:
+    """工具检测缓存"""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else default_cache_path()
+        self._data: Optional[Dict[str, Any]] = None
+        self._loaded_mtime: Optional[int] = None
+
+    def _empty(self) -> Dict[str, Any]:
+        return {'format': CACHE_FORMAT_VERSION, 'executables': {}, 'locations': {}}
+
+    def _load(self) -> Dict[str, Any]:
+        """加载缓存，文件未变化时复用内存中的数据"""
+        stat = _stat_key(self.path)
+        mtime = stat['mtime_ns'] if stat else None
+        if self._data is not None and mtime == self._loaded_mtime:
+            return self._data
+
+        data = self._empty()
+        if stat is not None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    loaded = json.load(f)
+                if (isinstance(loaded, dict)
+                        and loaded.get('format') == CACHE_FORMAT_VERSION):
+                    data.update(loaded)
+            except (OSError, ValueError) as e:
+                logger.warning(f"工具缓存文件损坏，已忽略: {self.path} ({e})")
+
+        self._data = data
+        self._loaded_mtime = mtime
+        return data
+
+    def _save(self) -> None:
+        """原子写入缓存文件"""
+        data = self._load() if self._data is None else self._data
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            stat = _stat_key(self.path)
+            self._loaded_mtime = stat['mtime_ns'] if stat else None
+        except OSError as e:
+            logger.warning(f"无法写入工具缓存: {self.path} ({e})")
+
+    @staticmethod
+    def _key(path: Path) -> str:
+        return str(Path(path).absolute())
+
+    def get(self, executable: Path) -> Optional[Dict[str, Any]]:
+        """获取可执行文件的探测结果，文件变化后返回None"""
+        stat = _stat_key(Path(executable))
+        if stat is None:
+            return None
+        entry = self._load()['executables'].get(self._key(executable))
+        if not entry:
+            return None
+        if (entry.get('size') != stat['size']
+                or entry.get('mtime_ns') != stat['mtime_ns']):
+            return None
+        return entry
+
+    def put(self, executable: Path, version: Optional[str], valid: bool) -> None:
+        """记录可执行文件的探测结果"""
+        stat = _stat_key(Path(executable))
+        if stat is None:
+            return
+        data = self._load()
+        data['executables'][self._key(executable)] = {
+            'size': stat['size'],
+            'mtime_ns': stat['mtime_ns'],
+            'version': version,
+            'valid': valid,
+            'probed_at': time.time(),
+        }
+        self._save()
+
+    def get_location(self, name: str) -> Optional[Path]:
+        """获取之前搜索到的可执行文件位置（文件仍存在时有效）"""
+        entry = self._load()['locations'].get(name)
+        if not entry:
+            return None
+        path = Path(entry['path'])
+        return path if path.is_file() else None
+
+    def put_location(self, name: str, path: Path) -> None:
+        """记录搜索到的可执行文件位置"""
+        data = self._load()
+        data['locations'][name] = {'path': self._key(path), 'found_at': time.time()}
+        self._save()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """获取缓存内容及每个条目的有效性"""
+        data = self._load()
+        executables = {}
+        for key, entry in data['executables'].items():
+            item = dict(entry)
+            item['fresh'] = self.get(Path(key)) is not None
+            executables[key] = item
+        return {
+            'path': str(self.path),
+            'executables': executables,
+            'locations': dict(data['locations']),
+        }
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self._data = self._empty()
+        self._save()
+
+
+_default_cache: Optional[ToolCache] = None
+
+
+def get_tool_cache() -> Optional[ToolCache]:
+    """获取进程内共享的缓存实例，禁用时返回None"""
+    global _default_cache
+    if not cache_enabled():
+        return None
+    if _default_cache is None or _default_cache.path != default_cache_path():
+        _default_cache = ToolCache()
+    return _default_cache
@@ -0,0 +1,357 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+多版本工具链清单
+
+并发扫描配置的安装根目录（如 /tools/Xilinx、C:/Xilinx），记录每个工具
+（vivado、vitis_hls、bootgen等）的所有已安装版本及其settings脚本，
+并持久化到 ~/.fpga_builder/inventory.json。再次扫描时只重新列举修改时间
+发生变化的目录；按版本选择安装为字典查找。
+"""
+
+import json
+import logging
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+INVENTORY_FORMAT_VERSION = 1
+
+# 需要记录的工具
+KNOWN_TOOLS = ('vivado', 'vitis_hls', 'vivado_hls', 'bootgen', 'vitis', 'xsct')
+
+# 扫描时不进入的数据目录（安装目录中文件数量巨大）
+SKIP_DIRS = {
+    'data', 'lib', 'lib64', 'ids_lite', 'tps', 'doc', 'docs', 'examples',
+    'include', 'scripts', 'msys64', 'gnu', 'common', 'installer', 'xic',
+    'docnav', 'downloads', 'patches', 'src', 'cli', 'llvm-clang', 'aietools',
+    '.xinstall', '.settings64', 'uninstall', 'xilinx_vivado_hls', 'platforms',
+}
+
+# 默认最大扫描深度（根目录下 Vivado/2023.2/bin/vivado 为第2层安装目录）
+DEFAULT_MAX_DEPTH = 4
+
+VERSION_PATTERN = re.compile(r'(\d{4}\.\d+)')
+
+
+def default_inventory_path() -> Path:
+    """获取默认清单文件路径"""
+    return Path.home() / '.fpga_builder' / 'inventory.json'
+
+
+def default_install_roots() -> List[Path]:
+    """获取默认安装根目录
+
+    环境变量 FPGABUILDER_TOOL_ROOTS（以os.pathsep分隔）优先。
+    """
+    env_roots = os.environ.get('FPGABUILDER_TOOL_ROOTS')
+    if env_roots:
+        return [Path(p) for p in env_roots.split(os.pathsep) if p]
+    if sys.platform == 'win32':
+        return [Path('C:/Xilinx'), Path('D:/Xilinx')]
+    return [Path('/tools/Xilinx'), Path('/opt/Xilinx'), Path.home() / 'Xilinx']
+
+
+def _executable_names(tool: str) -> List[str]:
+    """获取工具在当前平台上的可执行文件名"""
+    if sys.platform == 'win32':
+        return [f"{tool}.bat", f"{tool}.exe"]
+    return [tool]
+
+
+def _settings_script_names() -> List[str]:
+    if sys.platform == 'win32':
+        return ['settings64.bat']
+    return ['settings64.sh']
+
+
+@dataclass
+class ToolInstall:
+    """工具安装记录"""
+    tool: str                   # 工具名称
+    version: str                # 版本号（如 2023.2）
+    executable: str             # 可执行文件路径
+    install_dir: str            # 安装目录
+    settings_script: Optional[str] = None   # settings64.sh/.bat路径
+
+    @property
+    def path(self) -> Path:
+        return Path(self.executable)
+
+
+def _detect_installs(directory: Path, entries: Dict[str, bool]) -> List[ToolInstall]:
+    """判断目录是否为工具安装目录，返回其中的工具记录
+
+    Args:
+        directory: 目录路径
+        entries: 目录内容 {名称: 是否为目录}
+    """
+    if not entries.get('bin'):
+        return []
+
+    # 版本号来自安装目录或其父目录名称（Vivado/2023.2 或 2025.1/Vivado）
+    version = None
+    for part in (directory.name, directory.parent.name):
+        match = VERSION_PATTERN.search(part)
+        if match:
+            version = match.group(1)
+            break
+    if version is None:
+        return []
+
+    settings_script = None
+    for name in _settings_script_names():
+        if name in entries and not entries[name]:
+            settings_script = str(directory / name)
+            break
+
+    installs = []
+    bin_dir = directory / 'bin'
+    for tool in KNOWN_TOOLS:
+        for exe_name in _executable_names(tool):
+            exe_path = bin_dir / exe_name
+            if exe_path.is_file():
+                installs.append(ToolInstall(
+                    tool=tool,
+                    version=version,
+                    executable=str(exe_path),
+                    install_dir=str(directory),
+                    settings_script=settings_script
+                ))
+                break
+    return installs
+
+
+class ToolInventory:
+    """工具链清单"""
+
+    def __init__(self, path: Optional[Path] = None,
+                 roots: Optional[Iterable[Path]] = None,
+                 max_depth: int = DEFAULT_MAX_DEPTH, max_workers: int = 8):
+        self.path = Path(path) if path else default_inventory_path()
+        if roots is None:
+            roots = default_install_roots()
+        self.roots = [Path(r) for r in roots]
+        self.max_depth = max_depth
+        self.max_workers = max_workers
+        # {工具: {版本: ToolInstall}}，按根目录顺序保留第一个安装
+        self._index: Dict[str, Dict[str, ToolInstall]] = {}
+        # 目录扫描缓存 {目录: {'mtime_ns', 'children', 'installs'}}
+        self._dirs: Dict[str, Dict[str, Any]] = {}
+        self._scanned_at: Optional[float] = None
+        self._loaded = False
+        # 本实例是否已扫描过（未命中时最多重新扫描一次）
+        self._refreshed = False
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], **kwargs) -> 'ToolInventory':
+        """根据配置创建清单（fpga.tool_roots 指定安装根目录）"""
+        roots = config.get('fpga', {}).get('tool_roots')
+        if roots:
+            kwargs.setdefault('roots', [Path(r) for r in roots])
+        return cls(**kwargs)
+
+    def load(self) -> bool:
+        """加载持久化清单"""
+        self._loaded = True
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if not isinstance(data, dict) or data.get('format') != INVENTORY_FORMAT_VERSION:
+            return False
+        if data.get('roots') != [str(r) for r in self.roots]:
+            # 根目录变化时目录缓存仍可复用，但清单需要重新扫描
+            self._dirs = data.get('dirs', {})
+            return False
+
+        self._dirs = data.get('dirs', {})
+        self._scanned_at = data.get('scanned_at')
+        self._build_index()
+        return True
+
+    def save(self) -> None:
+        """原子写入清单文件"""
+        data = {
+            'format': INVENTORY_FORMAT_VERSION,
+            'roots': [str(r) for r in self.roots],
+            'scanned_at': self._scanned_at,
+            'dirs': self._dirs,
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"无法写入工具清单: {self.path} ({e})")
+
+    def _scan_dir(self, directory: str, depth: int) -> Dict[str, Any]:
+        """扫描单个目录，修改时间未变化时复用上次结果"""
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            return {'children': [], 'installs': [], 'depth': depth, 'missing': True}
+
+        cached = self._dirs.get(directory)
+        if cached is not None and cached.get('mtime_ns') == mtime_ns:
+            # 安装记录中的可执行文件必须仍然存在
+            if all(os.path.isfile(i['executable']) for i in cached['installs']):
+                return dict(cached, depth=depth, reused=True)
+
+        entries: Dict[str, bool] = {}
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        entries[entry.name] = entry.is_dir()
+                    except OSError:
+                        continue
+        except OSError:
+            return {'children': [], 'installs': [], 'depth': depth, 'missing': True}
+
+        installs = _detect_installs(Path(directory), entries)
+        if installs:
+            # 安装目录内部不再递归
+            children = []
+        else:
+            children = sorted(
+                str(Path(directory) / name) for name, is_dir in entries.items()
+                if is_dir and name.lower() not in SKIP_DIRS and not name.startswith('.')
+            )
+        return {
+            'mtime_ns': mtime_ns,
+            'children': children,
+            'installs': [asdict(i) for i in installs],
+            'depth': depth,
+        }
+
+    def refresh(self, force: bool = False) -> Dict[str, int]:
+        """并发扫描所有根目录并更新清单
+
+        Args:
+            force: 忽略目录缓存，重新列举所有目录
+
+        Returns:
+            扫描统计 {'scanned': 重新列举的目录数, 'reused': 复用的目录数}
+        """
+        if not self._loaded:
+            self.load()
+        if force:
+            self._dirs = {}
+
+        new_dirs: Dict[str, Dict[str, Any]] = {}
+        stats = {'scanned': 0, 'reused': 0}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            visited = {str(root) for root in self.roots if root.is_dir()}
+            pending = {
+                executor.submit(self._scan_dir, directory, 0): directory
+                for directory in visited
+            }
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    directory = pending.pop(future)
+                    result = future.result()
+                    if result.pop('missing', False):
+                        continue
+                    depth = result.pop('depth')
+                    stats['reused' if result.pop('reused', False) else 'scanned'] += 1
+                    new_dirs[directory] = result
+                    if depth < self.max_depth:
+                        for child in result['children']:
+                            if child not in visited:
+                                visited.add(child)
+                                future = executor.submit(self._scan_dir, child,
+                                                         depth + 1)
+                                pending[future] = child
+
+        self._dirs = new_dirs
+        self._scanned_at = time.time()
+        self._refreshed = True
+        self._build_index()
+        self.save()
+        return stats
+
+    def _build_index(self) -> None:
+        """根据目录缓存构建 {工具: {版本: 安装}} 索引
+
+        按根目录顺序遍历，同一工具版本保留第一个找到的安装。
+        """
+        index: Dict[str, Dict[str, ToolInstall]] = {}
+        for root in self.roots:
+            queue = [str(root)]
+            while queue:
+                entry = self._dirs.get(queue.pop(0))
+                if entry is None:
+                    continue
+                for item in entry.get('installs', []):
+                    install = ToolInstall(**item)
+                    versions = index.setdefault(install.tool, {})
+                    versions.setdefault(install.version, install)
+                queue.extend(entry.get('children', []))
+        self._index = index
+
+    def ensure_loaded(self) -> None:
+        """确保清单可用：有持久化结果时直接使用，否则扫描"""
+        if self._loaded and self._index:
+            return
+        if not self.load():
+            self.refresh()
+
+    def select(self, tool: str, version: Optional[str] = None) -> Optional[ToolInstall]:
+        """按版本选择工具安装，未指定版本时返回最新版本
+
+        持久化清单中没有所需版本（如新安装了Vivado）时先增量扫描一次
+        （只重新列举修改时间变化的目录），仍找不到才返回None。
+        """
+        self.ensure_loaded()
+        install = self._lookup(tool, version)
+        if install is None and not self._refreshed:
+            self.refresh()
+            install = self._lookup(tool, version)
+        return install
+
+    def _lookup(self, tool: str, version: Optional[str]) -> Optional[ToolInstall]:
+        versions = self._index.get(tool)
+        if not versions:
+            return None
+        if version:
+            install = versions.get(version)
+            if install is None or not install.path.is_file():
+                return None
+            return install
+        return versions[max(versions, key=_version_tuple)]
+
+    def versions(self, tool: str) -> List[str]:
+        """获取工具的所有已安装版本（从旧到新）"""
+        self.ensure_loaded()
+        return sorted(self._index.get(tool, {}), key=_version_tuple)
+
+    def installs(self) -> List[ToolInstall]:
+        """获取所有安装记录"""
+        self.ensure_loaded()
+        return [
+            self._index[tool][version]
+            for tool in sorted(self._index)
+            for version in sorted(self._index[tool], key=_version_tuple)
+        ]
+
+    @property
+    def scanned_at(self) -> Optional[float]:
+        return self._scanned_at
+
+
+def _version_tuple(version: str):
+    return tuple(int(p) if p.isdigit() else 0 for p in version.split('.'))
@@ -4,10 +4,26 @@ Xilinx Vivado插件
 支持Vivado设计套件的自动化构建。
 """
 
-from .plugin import VivadoPlugin, Vivado2023Adapter, Vivado2024Adapter
-from .file_scanner import FileScanner
-from .tcl_templates import TCLScriptGenerator
-from .packbin_templates import PackBinTemplate, MCSGenerationTemplate
+# 子模块按需导入：导入 plugins.vivado.stage_keys 等轻量模块时不加载插件本身
+_EXPORTS = {
+    "VivadoPlugin": ".plugin",
+    "Vivado2023Adapter": ".plugin",
+    "Vivado2024Adapter": ".plugin",
+    "FileScanner": ".file_scanner",
+    "TCLScriptGenerator": ".tcl_templates",
+    "PackBinTemplate": ".packbin_templates",
+    "MCSGenerationTemplate": ".packbin_templates",
+}
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        import importlib
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "VivadoPlugin",
@@ -17,4 +33,4 @@ __all__ = [
     "TCLScriptGenerator",
     "PackBinTemplate",
     "MCSGenerationTemplate"
-]
\ No newline at end of file
+]
@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Xilinx .bit 文件解析
+
+.bit 文件头由若干TLV字段组成：长度为9的魔数字段之后依次是 'a'（设计名，
+Vivado还会附加 UserID 和工具版本）、'b'（器件）、'c'（日期）、'd'（时间），
+最后是 'e'（4字节长度）后跟配置数据。配置数据通过 mmap 映射，以
+memoryview 返回，不复制文件内容。
+
+bit_to_bin 把配置数据写成 .bin 文件（与 write_bitstream -bin_file 相同），
+SelectMAP/BPI 需要的按位反转通过256项的转换表完成。
+"""
+
+import mmap
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+HEADER_MAGIC = bytes.fromhex('0FF00FF00FF00FF000')
+
+# 字节按位反转（SelectMAP/BPI 的数据位顺序）
+BITSWAP_TABLE = bytes(int(f'{value:08b}'[::-1], 2) for value in range(256))
+
+# 写 .bin 文件时每次转换和写入的块大小
+CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class BitfileError(Exception):
+    """.bit 文件格式错误"""
+    pass
+
+
+@dataclass
+class BitHeader:
+    """.bit 文件头字段"""
+    design_name: str
+    part: str
+    date: str
+    time: str
+    data_offset: int
+    data_length: int
+    time_offset: int = 0
+    user_id: Optional[str] = None
+    tool_version: Optional[str] = None
+
+    @property
+    def timestamp(self) -> bytes:
+        """生成时间（HH:MM:SS，ASCII字节）"""
+        return self.time.encode('ascii')
+
+
+def _string_field(buffer, offset: int, key: str) -> Tuple[str, int]:
+    """读取一个2字节长度、以NUL结尾的字符串字段，返回(值, 下一个字段的偏移)"""
+    if buffer[offset:offset + 1] != key.encode('ascii'):
+        raise BitfileError(f"偏移 {offset} 处应为字段 '{key}'")
+    length = int.from_bytes(buffer[offset + 1:offset + 3], 'big')
+    end = offset + 3 + length
+    if end > len(buffer):
+        raise BitfileError(f"字段 '{key}' 被截断")
+    value = bytes(buffer[offset + 3:end]).rstrip(b'\0')
+    value = value.decode('ascii', errors='replace')
+    return value, end
+
+
+def parse_header(buffer, size: Optional[int] = None) -> BitHeader:
+    """解析 .bit 文件头
+
+    Args:
+        buffer: 文件内容（bytes、memoryview 或 mmap），可以只包含文件开头
+        size: 文件总大小，buffer 只包含文件开头时用于检查配置数据是否完整
+    """
+    if (len(buffer) < 13 or bytes(buffer[0:2]) != b'\x00\x09'
+            or bytes(buffer[2:11]) != HEADER_MAGIC):
+        raise BitfileError("不是Xilinx .bit文件（文件头魔数不匹配）")
+    if bytes(buffer[11:13]) != b'\x00\x01':
+        raise BitfileError("不是Xilinx .bit文件（缺少字段标记）")
+
+    fields: Dict[str, str] = {}
+    offset = 13
+    for key in 'abcd':
+        if key == 'd':
+            time_offset = offset + 3
+        fields[key], offset = _string_field(buffer, offset, key)
+
+    if buffer[offset:offset + 1] != b'e':
+        raise BitfileError(f"偏移 {offset} 处应为配置数据字段 'e'")
+    data_length = int.from_bytes(buffer[offset + 1:offset + 5], 'big')
+    data_offset = offset + 5
+    size = len(buffer) if size is None else size
+    if data_offset + data_length > size:
+        raise BitfileError(f"配置数据被截断：声明 {data_length} 字节，"
+                           f"实际 {size - data_offset} 字节")
+
+    # Vivado 的设计名字段形如 top;UserID=0XFFFFFFFF;Version=2023.2
+    design_name, *attributes = fields['a'].split(';')
+    extra = dict(item.split('=', 1) for item in attributes if '=' in item)
+    return BitHeader(
+        design_name=design_name,
+        part=fields['b'],
+        date=fields['c'],
+        time=fields['d'],
+        data_offset=data_offset,
+        data_length=data_length,
+        time_offset=time_offset,
+        user_id=extra.get('UserID'),
+        tool_version=extra.get('Version'),
+    )
+
+
+class Bitfile:
+    """以 mmap 打开的 .bit 文件
+
+    用法::
+
+        with Bitfile('top.bit') as bit:
+            print(bit.header.part, bit.header.time)
+            digest = hashlib.sha256(bit.payload).hexdigest()
+
+    payload 在关闭后失效。
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        try:
+            if os.fstat(self._file.fileno()).st_size == 0:
+                raise BitfileError(f"文件为空: {self.path}")
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self._file.close()
+            raise
+        self._view = memoryview(self._mmap)
+        try:
+            self.header = parse_header(self._view)
+        except BaseException:
+            self.close()
+            raise
+        start = self.header.data_offset
+        self.payload = self._view[start:start + self.header.data_length]
+
+    def close(self):
+        """释放映射和文件句柄"""
+        for view in (getattr(self, 'payload', None), self._view):
+            if view is not None:
+                view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass  # 调用方还持有payload的切片，映射在切片释放后回收
+        self._file.close()
+
+    def __enter__(self) -> 'Bitfile':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_header(path: Union[str, Path]) -> BitHeader:
+    """只读取 .bit 文件头"""
+    with Bitfile(path) as bit:
+        return bit.header
+
+
+def bit_to_bin(bit_path: Union[str, Path], bin_path: Union[str, Path],
+               bitswap: bool = False) -> BitHeader:
+    """把 .bit 文件的配置数据写成 .bin 文件，先写临时文件再替换
+
+    Args:
+        bit_path: 输入 .bit 文件
+        bin_path: 输出 .bin 文件
+        bitswap: 是否按位反转每个字节（SelectMAP/BPI 配置时使用）
+
+    Returns:
+        输入文件的文件头
+    """
+    bin_path = Path(bin_path)
+    bin_path.parent.mkdir(parents=True, exist_ok=True)
+    temp = bin_path.with_name(bin_path.name + '.tmp')
+    with Bitfile(bit_path) as bit, open(temp, 'wb') as out:
+        payload = bit.payload
+        for start in range(0, len(payload), CHUNK_SIZE):
+            with payload[start:start + CHUNK_SIZE] as chunk:
+                if bitswap:
+                    out.write(chunk.tobytes().translate(BITSWAP_TABLE))
+                else:
+                    out.write(chunk)
+        header = bit.header
+    os.replace(temp, bin_path)
+    return header
@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+配置存储器（Flash）镜像生成
+
+不启动Vivado，直接把 .bit/.bin 文件按加载地址转换为 MCS（Intel HEX）
+文件和 PRM 说明文件，记录格式与 write_cfgmem 相同：每个64KB段以扩展线性
+地址记录（类型04）开头，数据记录每行16字节，以 :00000001FF 结束。
+SPI 接口按原始字节顺序写入，BPI（SelectMAP）接口把每个字节按位反转。
+
+按64KB段整体转换：每段只做一次 bytes.hex()，各行从结果中切片拼接。
+"""
+
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+try:
+    from .bitfile import BITSWAP_TABLE, Bitfile, BitfileError
+except ImportError:
+    from bitfile import BITSWAP_TABLE, Bitfile, BitfileError
+
+RECORD_SIZE = 16
+SEGMENT_SIZE = 0x10000
+
+# 支持的接口及每次访问的字节数；SPIx8（双Flash）等需要拆分文件的接口交给Vivado
+INTERFACES: Dict[str, int] = {
+    'SPIX1': 1,
+    'SPIX2': 1,
+    'SPIX4': 1,
+    'BPIX8': 1,
+    'BPIX16': 2,
+}
+
+
+class CfgmemError(Exception):
+    """配置存储器镜像生成错误"""
+    pass
+
+
+@dataclass
+class CfgmemLoad:
+    """一个加载到Flash中的文件"""
+    path: Path
+    address: int
+    data: bytes = field(repr=False, default=b'')
+
+    @property
+    def end(self) -> int:
+        """最后一个字节的地址"""
+        return self.address + len(self.data) - 1
+
+    @property
+    def checksum(self) -> int:
+        """数据字节和（32位）"""
+        return sum(self.data) & 0xFFFFFFFF
+
+
+def parse_address(value: Union[int, str]) -> int:
+    """解析加载地址（整数或 0x 开头的十六进制字符串）"""
+    if isinstance(value, int):
+        return value
+    try:
+        return int(str(value), 0)
+    except ValueError:
+        raise CfgmemError(f"无效的加载地址: {value}")
+
+
+def read_config_data(path: Union[str, Path]) -> bytes:
+    """读取 .bit（去掉文件头）或 .bin 文件的配置数据"""
+    path = Path(path)
+    try:
+        if path.suffix.lower() == '.bit':
+            with Bitfile(path) as bit:
+                return bit.payload.tobytes()
+        return path.read_bytes()
+    except BitfileError as e:
+        raise CfgmemError(f"{path}: {e}")
+    except OSError as e:
+        raise CfgmemError(f"无法读取 {path}: {e}")
+
+
+def intel_hex_records(address: int, data: bytes) -> Iterator[str]:
+    """把从address开始的数据逐段转换为Intel HEX记录（不含文件结束记录）"""
+    view = memoryview(data)
+    position = 0
+    segment = None
+    while position < len(view):
+        current = address + position
+        if current >> 16 != segment:
+            segment = current >> 16
+            if segment > 0xFFFF:
+                raise CfgmemError(f"地址超出32位范围: 0x{current:X}")
+            upper = segment.to_bytes(2, 'big')
+            yield f":02000004{segment:04X}{(-(6 + upper[0] + upper[1])) & 0xFF:02X}\n"
+        # 当前段内剩余的数据整体转换
+        count = min(len(view) - position, SEGMENT_SIZE - (current & 0xFFFF))
+        yield _data_records(current & 0xFFFF, view[position:position + count])
+        position += count
+
+
+def _data_records(offset: int, block: memoryview) -> str:
+    """一个段内的数据记录：整块转十六进制后按16字节切片"""
+    text = block.hex().upper()
+    lines = []
+    for start in range(0, len(block), RECORD_SIZE):
+        record = block[start:start + RECORD_SIZE]
+        length = len(record)
+        address = offset + start
+        checksum = (-(length + (address >> 8) + (address & 0xFF) + sum(record))) & 0xFF
+        data = text[2 * start:2 * (start + length)]
+        lines.append(f":{length:02X}{address:04X}00{data}{checksum:02X}\n")
+    return ''.join(lines)
+
+
+class CfgmemImage:
+    """Flash编程镜像（MCS + PRM）"""
+
+    def __init__(self, interface: str = 'SPIx4',
+                 size: Optional[Union[int, str]] = None):
+        """
+        Args:
+            interface: Flash接口（SPIx1/SPIx2/SPIx4/BPIx8/BPIx16）
+            size: Flash容量（MB），为None时不检查
+        """
+        self.interface = interface
+        key = interface.upper()
+        if key not in INTERFACES:
+            raise CfgmemError(f"原生MCS生成不支持接口 {interface}，"
+                              f"支持: {', '.join(sorted(INTERFACES))}")
+        self.width = INTERFACES[key]
+        self.bitswap = key.startswith('BPI')
+        self.size_bytes = int(size) * 1024 * 1024 if size not in (None, '') else None
+        self.loads: List[CfgmemLoad] = []
+
+    def add_file(self, path: Union[str, Path],
+                 address: Union[int, str] = 0) -> CfgmemLoad:
+        """添加一个 .bit 或 .bin 文件，从address开始向上加载"""
+        address = parse_address(address)
+        if address % self.width:
+            raise CfgmemError(f"{self.interface} 的加载地址必须按{self.width}字节对齐: "
+                              f"0x{address:X}")
+        data = read_config_data(path)
+        if self.bitswap:
+            data = data.translate(BITSWAP_TABLE)
+        load = CfgmemLoad(Path(path), address, data)
+        self.loads.append(load)
+        return load
+
+    def ranges(self) -> List[CfgmemLoad]:
+        """按地址排序的加载区间，检查重叠和Flash容量"""
+        ordered = sorted(self.loads, key=lambda load: load.address)
+        for previous, current in zip(ordered, ordered[1:]):
+            if previous.end >= current.address:
+                raise CfgmemError(f"{previous.path.name} 与 {current.path.name} 的地址区间重叠")
+        if (ordered and self.size_bytes is not None
+                and ordered[-1].end >= self.size_bytes):
+            raise CfgmemError(f"镜像结束地址 0x{ordered[-1].end:08X} 超出Flash容量 "
+                              f"{self.size_bytes // (1024 * 1024)}MB")
+        return ordered
+
+    def mcs_chunks(self) -> Iterator[str]:
+        """逐段生成MCS文件内容"""
+        for load in self.ranges():
+            yield from intel_hex_records(load.address, load.data)
+        yield ":00000001FF\n"
+
+    def mcs_text(self) -> str:
+        """MCS文件内容"""
+        return ''.join(self.mcs_chunks())
+
+    def prm_text(self) -> str:
+        """PRM文件内容（各加载区间的地址范围和校验和）"""
+        size = '-'
+        if self.size_bytes is not None:
+            size = f"{self.size_bytes // (1024 * 1024)}"
+        lines = [
+            '#',
+            '# Flash编程镜像说明 - 由FPGABuilder生成',
+            '#',
+            f'Interface: {self.interface.upper()}',
+            f'Size: {size} MB',
+            '',
+            'Start Address    End Address      Direction  Checksum     File',
+        ]
+        for load in self.ranges():
+            lines.append(f'0x{load.address:08X}       0x{load.end:08X}       '
+                         f'UP         0x{load.checksum:08X}   {load.path.name}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, mcs_path: Union[str, Path],
+              prm_path: Optional[Union[str, Path]] = None) -> Tuple[Path, Path]:
+        """写入MCS和PRM文件（PRM默认与MCS同名），先写临时文件再替换"""
+        mcs_path = Path(mcs_path)
+        prm_path = Path(prm_path) if prm_path else mcs_path.with_suffix('.prm')
+        for path, chunks in ((mcs_path, self.mcs_chunks()),
+                             (prm_path, [self.prm_text()])):
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp = path.with_name(path.name + '.tmp')
+            with open(temp, 'w', encoding='utf-8', newline='\n') as f:
+                f.writelines(chunks)
+            os.replace(temp, path)
+        return mcs_path, prm_path
+
+
+def generate_cfgmem(files: Sequence[Tuple[Union[str, Path], Union[int, str]]],
+                    output_path: Union[str, Path], interface: str = 'SPIx4',
+                    size: Optional[Union[int, str]] = None) -> Tuple[Path, Path]:
+    """把 (文件, 加载地址) 列表写成MCS和PRM文件，返回两个文件的路径"""
+    image = CfgmemImage(interface, size)
+    for path, address in files:
+        image.add_file(path, address)
+    return image.write(output_path)
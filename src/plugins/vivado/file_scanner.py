@@ -9,8 +9,10 @@ Vivado文件扫描器
 import os
 import re
 import glob
+import json
+import threading
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple, Set
+from typing import Callable, Dict, List, Any, Optional, Tuple, Set
 import fnmatch
 
 
@@ -51,6 +53,13 @@ class FileScanner:
         """
         self.base_path = base_path or Path.cwd()
 
+    def _resolve_path(self, path: str) -> Path:
+        """将配置中的相对路径解析为基于base_path的路径"""
+        path_obj = Path(path)
+        if not path_obj.is_absolute():
+            path_obj = self.base_path / path_obj
+        return path_obj
+
     def scan_files(self, config: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
         """
         扫描配置文件中的文件
@@ -111,7 +120,7 @@ class FileScanner:
                 return files
 
             # 检查path是文件还是目录模式
-            path_obj = Path(path)
+            path_obj = self._resolve_path(path)
             if self._is_pattern(path):
                 matched_files = self._expand_pattern(path, hdl_config.get('exclude', []))
             else:
@@ -157,7 +166,7 @@ class FileScanner:
             matched_files = self._expand_pattern(path, constraint_config.get('exclude', []))
         else:
             # 单个文件
-            path_obj = Path(path)
+            path_obj = self._resolve_path(path)
             matched_files = [path_obj] if path_obj.exists() else []
 
         for file_path in matched_files:
@@ -183,7 +192,7 @@ class FileScanner:
         if not path:
             return files
 
-        path_obj = Path(path)
+        path_obj = self._resolve_path(path)
         if not path_obj.exists():
             return files
 
@@ -243,7 +252,7 @@ class FileScanner:
         # 检查bd_file
         bd_file = bd_config.get('bd_file')
         if bd_file:
-            bd_path = Path(bd_file)
+            bd_path = self._resolve_path(bd_file)
             if bd_path.exists():
                 file_info = {
                     'type': 'bd',
@@ -259,7 +268,7 @@ class FileScanner:
         # 检查tcl_script
         tcl_script = bd_config.get('tcl_script')
         if tcl_script:
-            tcl_path = Path(tcl_script)
+            tcl_path = self._resolve_path(tcl_script)
             if tcl_path.exists():
                 file_info = {
                     'type': 'tcl',
@@ -560,4 +569,33 @@ class FileScanner:
                 cmd = f'add_files {{{file_info["path"]}}}'
                 commands['bd_commands'].append(cmd)
 
-        return commands
\ No newline at end of file
+        return commands
+
+
+class ScanCache:
+    """扫描结果缓存
+
+    扫描和依赖分析只取决于基础路径和source配置，与器件无关。构建矩阵的
+    多个变体共享一个缓存实例，相同的源文件配置只扫描一次。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(base_path: Optional[Path], config: Dict[str, Any]) -> str:
+        source = json.dumps(config.get('source', {}), sort_keys=True, default=str)
+        return f"{Path(base_path or Path.cwd()).resolve()}|{source}"
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """获取缓存结果，不存在时计算（同一键只计算一次）"""
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+            else:
+                self.misses += 1
+                self._entries[key] = compute()
+            return self._entries[key]
@@ -0,0 +1,430 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+实现策略探索
+
+从同一个综合检查点派生多个非工程模式的实现分支（不同的 opt/place/
+phys_opt/route 指令组合），在 --jobs 限制内并行运行，按 WNS/TNS/THS
+对结果排序，并从最佳分支生成比特流。
+"""
+
+import asyncio
+import itertools
+import json
+import re
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from core.async_process import OutputCallback
+
+try:
+    from .tcl_templates import ImplementationBranchTemplate
+except ImportError:
+    from tcl_templates import ImplementationBranchTemplate
+
+IMPL_STEPS = ('opt', 'place', 'phys_opt', 'route')
+
+# 常用实现策略对应的各步骤指令
+STRATEGY_DIRECTIVES: Dict[str, Dict[str, Any]] = {
+    'Vivado Implementation Defaults': {},
+    'Performance_Explore': {
+        'opt': 'Explore', 'place': 'Explore', 'phys_opt': 'Explore', 'route': 'Explore',
+    },
+    'Performance_ExplorePostRoutePhysOpt': {
+        'opt': 'Explore', 'place': 'Explore', 'phys_opt': 'Explore', 'route': 'Explore',
+        'post_route_phys_opt': True,
+    },
+    'Performance_ExtraTimingOpt': {
+        'place': 'ExtraTimingOpt', 'phys_opt': 'Explore', 'route': 'NoTimingRelaxation',
+    },
+    'Performance_NetDelay_high': {
+        'place': 'ExtraNetDelay_high', 'phys_opt': 'AggressiveExplore',
+        'route': 'AggressiveExplore',
+    },
+    'Performance_NetDelay_low': {
+        'place': 'ExtraNetDelay_low', 'phys_opt': 'Explore',
+        'route': 'NoTimingRelaxation',
+    },
+    'Performance_Retiming': {
+        'place': 'ExtraTimingOpt', 'phys_opt': 'AlternateFlowWithRetiming',
+        'route': 'NoTimingRelaxation',
+    },
+    'Congestion_SpreadLogic_high': {
+        'place': 'AltSpreadLogic_high', 'phys_opt': 'AggressiveExplore',
+        'route': 'AlternateCLBRouting',
+    },
+    'Congestion_SpreadLogic_medium': {
+        'place': 'AltSpreadLogic_medium', 'phys_opt': 'Explore',
+        'route': 'AlternateCLBRouting',
+    },
+    'Area_Explore': {
+        'opt': 'ExploreArea',
+    },
+}
+
+# 未配置任何分支时使用的策略
+DEFAULT_STRATEGIES = (
+    'Vivado Implementation Defaults',
+    'Performance_Explore',
+    'Performance_ExtraTimingOpt',
+    'Performance_NetDelay_high',
+)
+
+RESULTS_FILE = 'sweep_results.json'
+
+
+class SweepError(Exception):
+    """实现探索配置错误"""
+    pass
+
+
+@dataclass
+class SweepVariant:
+    """一个实现分支"""
+    name: str
+    opt: str = 'Default'
+    place: str = 'Default'
+    phys_opt: str = 'Default'
+    route: str = 'Default'
+    post_route_phys_opt: bool = False
+
+    @property
+    def directives(self) -> Dict[str, str]:
+        return {step: getattr(self, step) for step in IMPL_STEPS}
+
+    def describe(self) -> str:
+        text = '/'.join(getattr(self, step) for step in IMPL_STEPS)
+        return text + ('+postroute' if self.post_route_phys_opt else '')
+
+
+@dataclass
+class TimingSummary:
+    """时序汇总（单位ns，无约束路径时为None）"""
+    wns: Optional[float] = None
+    tns: Optional[float] = None
+    whs: Optional[float] = None
+    ths: Optional[float] = None
+
+    @property
+    def met(self) -> bool:
+        """建立和保持时间是否均满足"""
+        return ((self.wns is None or self.wns >= 0)
+                and (self.whs is None or self.whs >= 0))
+
+
+@dataclass
+class SweepResult:
+    """实现分支结果"""
+    variant: SweepVariant
+    work_dir: str
+    success: bool = False
+    cancelled: bool = False
+    timing: Optional[TimingSummary] = None
+    duration: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def checkpoint(self) -> Path:
+        return Path(self.work_dir) / 'routed.dcp'
+
+    @property
+    def met(self) -> bool:
+        return self.success and self.timing is not None and self.timing.met
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data['met'] = self.met
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SweepResult':
+        timing = data.get('timing')
+        return cls(
+            variant=SweepVariant(**data['variant']),
+            work_dir=data['work_dir'],
+            success=data.get('success', False),
+            cancelled=data.get('cancelled', False),
+            timing=TimingSummary(**timing) if timing else None,
+            duration=data.get('duration', 0.0),
+            error=data.get('error'),
+        )
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('_') or 'run'
+
+
+def _variant_from_strategy(name: str, strategy: str,
+                           overrides: Dict[str, Any]) -> SweepVariant:
+    if strategy not in STRATEGY_DIRECTIVES:
+        raise SweepError(f"未知的实现策略: {strategy}（可选: {', '.join(STRATEGY_DIRECTIVES)}）")
+    values = dict(STRATEGY_DIRECTIVES[strategy])
+    values.update({k: v for k, v in overrides.items()
+                   if k in IMPL_STEPS or k == 'post_route_phys_opt'})
+    return SweepVariant(name=name, **values)
+
+
+def expand_sweep(sweep_config: Optional[Dict[str, Any]]) -> List[SweepVariant]:
+    """将 build.implementation.sweep 配置展开为实现分支列表
+
+    strategies: 策略名称列表；directives: 各步骤指令列表（笛卡尔积展开）；
+    runs: 显式分支。三者可以组合，均未配置时使用默认策略。
+    """
+    sweep_config = sweep_config or {}
+    variants: List[SweepVariant] = []
+
+    for strategy in sweep_config.get('strategies', []) or []:
+        variants.append(_variant_from_strategy(strategy, strategy, {}))
+
+    directives = sweep_config.get('directives') or {}
+    if directives:
+        unknown = set(directives) - set(IMPL_STEPS)
+        if unknown:
+            raise SweepError(f"未知的实现步骤: {', '.join(sorted(unknown))}")
+        steps = [step for step in IMPL_STEPS if directives.get(step)]
+        for combo in itertools.product(*(directives[step] for step in steps)):
+            values = dict(zip(steps, combo))
+            name = '_'.join(values[step] for step in steps)
+            variants.append(SweepVariant(name=name, **values))
+
+    for index, run in enumerate(sweep_config.get('runs', []) or []):
+        name = run.get('name') or run.get('strategy') or f'run_{index + 1}'
+        strategy = run.get('strategy', 'Vivado Implementation Defaults')
+        variants.append(_variant_from_strategy(name, strategy, run))
+
+    if not variants:
+        variants = [_variant_from_strategy(s, s, {}) for s in DEFAULT_STRATEGIES]
+
+    # 名称用作目录名，需唯一
+    seen: Dict[str, int] = {}
+    for variant in variants:
+        base = _safe_name(variant.name)
+        seen[base] = seen.get(base, 0) + 1
+        variant.name = base if seen[base] == 1 else f'{base}_{seen[base]}'
+    return variants
+
+
+def _to_float(text: str) -> Optional[float]:
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def parse_timing_summary(text: str) -> Optional[TimingSummary]:
+    """解析 report_timing_summary 报告中的 Design Timing Summary 表"""
+    lines = text.splitlines()
+    for index, line in enumerate(lines):
+        if 'WNS(ns)' not in line or 'TNS(ns)' not in line:
+            continue
+        columns = re.split(r'\s{2,}', line.strip())
+        for value_line in lines[index + 1:]:
+            stripped = value_line.strip()
+            if not stripped or set(stripped) <= {'-', ' '}:
+                continue
+            values = stripped.split()
+            if len(values) < len(columns):
+                break
+            row = dict(zip(columns, values))
+            return TimingSummary(
+                wns=_to_float(row.get('WNS(ns)', 'NA')),
+                tns=_to_float(row.get('TNS(ns)', 'NA')),
+                whs=_to_float(row.get('WHS(ns)', 'NA')),
+                ths=_to_float(row.get('THS(ns)', 'NA')),
+            )
+    return None
+
+
+def rank_results(results: List[SweepResult]) -> List[SweepResult]:
+    """按 WNS、TNS、THS 从好到差排序，失败或取消的分支排在最后"""
+    def key(result: SweepResult):
+        if not result.success or result.timing is None:
+            return (1, 0.0, 0.0, 0.0)
+        timing = result.timing
+        return (0, -(timing.wns or 0.0), -(timing.tns or 0.0), -(timing.ths or 0.0))
+    return sorted(results, key=key)
+
+
+def load_results(work_dir: Path) -> List[SweepResult]:
+    """读取上次探索的结果（已排序）
+
+    分支目录按当前工作目录重新定位，结果文件从产物缓存恢复到其他位置后仍然可用。
+    """
+    with open(Path(work_dir) / RESULTS_FILE, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    results = [SweepResult.from_dict(item) for item in data.get('results', [])]
+    for result in results:
+        result.work_dir = str(Path(work_dir) / result.variant.name)
+    return results
+
+
+class ImplementationSweep:
+    """实现策略探索器"""
+
+    def __init__(self, plugin, config: Dict[str, Any], synth_checkpoint: Path,
+                 work_dir: Path, variants: List[SweepVariant], jobs: int = 2,
+                 stop_on_pass: bool = False,
+                 reporter: Callable[[str], None] = print,
+                 on_output: Optional[OutputCallback] = None):
+        """
+        Args:
+            plugin: VivadoPlugin实例（用于运行Vivado）
+            config: 项目配置
+            synth_checkpoint: 综合检查点
+            work_dir: 探索工作目录，每个分支使用其中的一个子目录
+            variants: 实现分支
+            jobs: 同时运行的分支数
+            stop_on_pass: 有分支满足时序后取消其余分支
+        """
+        self.plugin = plugin
+        self.config = config
+        self.synth_checkpoint = Path(synth_checkpoint)
+        self.work_dir = Path(work_dir)
+        self.variants = variants
+        self.jobs = max(1, jobs)
+        self.stop_on_pass = stop_on_pass
+        self.reporter = reporter
+        self.on_output = on_output
+        self._passed = False
+
+    async def _run_branch(self, variant: SweepVariant,
+                          slots: asyncio.Semaphore) -> SweepResult:
+        branch_dir = self.work_dir / variant.name
+        result = SweepResult(variant=variant, work_dir=str(branch_dir))
+        async with slots:
+            if self._passed:
+                # 等待期间已有分支满足时序
+                result.cancelled = True
+                result.error = '已取消'
+                return result
+
+            self.reporter(f"[{variant.name}] 开始实现: {variant.describe()}")
+            start = time.monotonic()
+            branch_dir.mkdir(parents=True, exist_ok=True)
+            timing_report = branch_dir / 'timing_summary.rpt'
+            if timing_report.exists():
+                timing_report.unlink()
+
+            tcl_script = ImplementationBranchTemplate(
+                self.config, self.synth_checkpoint.as_posix(), branch_dir.as_posix(),
+                variant.directives, variant.post_route_phys_opt
+            ).render()
+            (branch_dir / 'implement.tcl').write_text(tcl_script, encoding='utf-8')
+
+            try:
+                build_result = await self.plugin._run_vivado_tcl_async(
+                    tcl_script, 'implement.tcl', self.config, self.on_output)
+            except asyncio.CancelledError:
+                self.reporter(f"[{variant.name}] 已取消")
+                raise
+            result.duration = time.monotonic() - start
+
+            if not build_result.success:
+                result.error = '; '.join(build_result.errors) or '实现失败'
+                self.reporter(f"[{variant.name}] [ERROR] {result.error}")
+                return result
+
+            if timing_report.exists():
+                report = timing_report.read_text(encoding='utf-8', errors='ignore')
+                result.timing = parse_timing_summary(report)
+            if result.timing is None:
+                result.error = '未找到时序报告'
+                self.reporter(f"[{variant.name}] [ERROR] {result.error}")
+                return result
+
+            result.success = True
+            if result.met and self.stop_on_pass:
+                # 释放槽位前标记，排队中的分支不再启动
+                self._passed = True
+
+        status = '满足时序' if result.timing.met else '时序未满足'
+        self.reporter(f"[{variant.name}] [OK] {status}, WNS={result.timing.wns} "
+                      f"TNS={result.timing.tns} THS={result.timing.ths} "
+                      f"({result.duration:.1f}s)")
+        return result
+
+    async def run_async(self) -> List[SweepResult]:
+        """并行运行所有分支，返回排序后的结果并写入 sweep_results.json"""
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        self._passed = False
+        slots = asyncio.Semaphore(self.jobs)
+        tasks = {
+            asyncio.ensure_future(self._run_branch(variant, slots)): variant
+            for variant in self.variants
+        }
+        results: Dict[str, SweepResult] = {}
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending,
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                winner = None
+                for task in done:
+                    variant = tasks[task]
+                    if task.cancelled():
+                        continue
+                    result = task.result()
+                    results[variant.name] = result
+                    if result.met and winner is None:
+                        winner = result
+                if winner is not None and self.stop_on_pass and pending:
+                    self.reporter(f"分支 {winner.variant.name} 已满足时序，"
+                                  f"取消其余 {len(pending)} 个分支")
+                    for task in pending:
+                        task.cancel()
+                    await asyncio.gather(*pending, return_exceptions=True)
+                    pending = set()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        for variant in self.variants:
+            if variant.name not in results:
+                results[variant.name] = SweepResult(
+                    variant=variant, work_dir=str(self.work_dir / variant.name),
+                    cancelled=True, error='已取消'
+                )
+
+        ranked = rank_results(list(results.values()))
+        self.save(ranked)
+        return ranked
+
+    def save(self, ranked: List[SweepResult]) -> None:
+        """保存排序后的结果"""
+        best = ranked[0] if ranked and ranked[0].success else None
+        data = {
+            'synth_checkpoint': str(self.synth_checkpoint),
+            'best': best.variant.name if best else None,
+            'results': [result.to_dict() for result in ranked],
+        }
+        with open(self.work_dir / RESULTS_FILE, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def format_results(ranked: List[SweepResult]) -> List[str]:
+    """生成结果排名表"""
+    def fmt(value: Optional[float]) -> str:
+        return 'NA' if value is None else f'{value:.3f}'
+
+    width = max([len(r.variant.name) for r in ranked] + [4])
+    lines = [f"{'#':>2}  {'分支':<{width}}  "
+             f"{'WNS':>8} {'TNS':>10} {'WHS':>8} {'THS':>10}  状态",
+             '-' * (width + 56)]
+    for index, result in enumerate(ranked, 1):
+        if result.success and result.timing is not None:
+            timing = result.timing
+            status = '[OK] 满足时序' if timing.met else '[WARN] 时序未满足'
+            lines.append(f"{index:>2}  {result.variant.name:<{width}}  "
+                         f"{fmt(timing.wns):>8} {fmt(timing.tns):>10} "
+                         f"{fmt(timing.whs):>8} {fmt(timing.ths):>10}  {status}")
+        else:
+            if result.cancelled:
+                status = '[SKIP] 已取消'
+            else:
+                status = f'[ERROR] {result.error or "失败"}'
+            lines.append(f"{index:>2}  {result.variant.name:<{width}}  "
+                         f"{'-':>8} {'-':>10} {'-':>8} {'-':>10}  {status}")
+    return lines
@@ -13,6 +13,12 @@ import os
 class PackBinTemplate:
     """二进制文件合并模板"""
 
+    # 模板读取的配置键，按构建阶段声明（用于阶段有效配置指纹）
+    stage_config_keys: Dict[str, List[str]] = {
+        'packbin': ['project.name', 'project_dir', 'build.bin_merge',
+                    'build.hooks.bin_merge_script'],
+    }
+
     def __init__(self, config: Dict[str, Any], bin_files_config: Optional[Dict[str, Any]] = None):
         """
         Args:
@@ -160,6 +166,8 @@ class PackBinTemplate:
 class MCSGenerationTemplate:
     """MCS文件生成模板（用于Flash编程）"""
 
+    stage_config_keys: Dict[str, List[str]] = {'mcs': ['project.name', 'build.flash']}
+
     def __init__(self, config: Dict[str, Any], flash_config: Optional[Dict[str, Any]] = None):
         self.config = config
         self.flash_config = flash_config or {}
@@ -5,15 +5,25 @@
 Xilinx Vivado插件实现
 """
 
+import asyncio
+import copy
 import os
 import re
 import shlex
 import subprocess
 import sys
 import tempfile
+import time
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple
-
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+from core.admission import AdmissionController, AdmissionError
+from core.async_process import OutputCallback, run_blocking, run_process, run_sync
+from core.build_graph import BuildNode
+from core.config import ConfigManager
+from core.hooks import HookError, HookResult, HookRunResult, run_stage_hooks_async
+from core.distributed import (NoWorkerError, RemoteDispatcher, RemoteError, RemoteJob,
+                              TOOL_PLACEHOLDER)
 from core.plugin_base import (
     FPGAVendorPlugin,
     register_plugin,
@@ -29,18 +39,41 @@ from core.plugin_base import (
 
 # 导入本地模块
 try:
-    from .file_scanner import FileScanner
+    from .file_scanner import FileScanner, ScanCache
     from .tcl_templates import TCLScriptGenerator
     from .packbin_templates import PackBinTemplate, MCSGenerationTemplate
+    from .tcl_templates import ImplementationBranchTemplate, SweepPromotionTemplate
+    from .impl_sweep import (ImplementationSweep, RESULTS_FILE, SweepError,
+                             expand_sweep, load_results)
+    from .cfgmem import CfgmemError, CfgmemImage
+    from .stage_keys import stage_config_keys
+    from .preflight import (CACHE_FILE as PREFLIGHT_CACHE_FILE,
+                            STUB_FILE as PREFLIGHT_STUB_FILE,
+                            PreflightCache, PreflightResult, SharedElaboration,
+                            black_box_sources, classify_output, part_family,
+                            preflight_script, preflight_settings, source_fingerprint)
 except ImportError:
     # 用于测试或开发环境
-    from file_scanner import FileScanner
-    from tcl_templates import TCLScriptGenerator
+    from file_scanner import FileScanner, ScanCache
+    from tcl_templates import (TCLScriptGenerator, ImplementationBranchTemplate,
+                               SweepPromotionTemplate)
+    from impl_sweep import (ImplementationSweep, RESULTS_FILE, SweepError, expand_sweep,
+                            load_results)
+    from cfgmem import CfgmemError, CfgmemImage
+    from stage_keys import stage_config_keys
+    from preflight import (CACHE_FILE as PREFLIGHT_CACHE_FILE,
+                           STUB_FILE as PREFLIGHT_STUB_FILE,
+                           PreflightCache, PreflightResult, SharedElaboration,
+                           black_box_sources, classify_output, part_family,
+                           preflight_script, preflight_settings, source_fingerprint)
     # 注意：packbin_templates可能不存在于测试环境
     PackBinTemplate = None
     MCSGenerationTemplate = None
 
 
+ConfigManager.register_stage_keys(stage_config_keys())
+
+
 @plugin_info(name="vivado", plugin_type=PluginType.VENDOR, version="1.0.0")
 @register_plugin
 class VivadoPlugin(FPGAVendorPlugin):
@@ -51,6 +84,15 @@ class VivadoPlugin(FPGAVendorPlugin):
         self._tool_info: Optional[ToolInfo] = None
         self._adapter: Optional[VersionAdapter] = None
         self._initialized = False
+        self._config: Dict[str, Any] = {}
+        # 工程根目录（配置中的相对路径基于此目录），None表示当前目录
+        self.working_dir: Optional[Path] = None
+        # 共享的扫描结果缓存（构建矩阵的变体之间共享），None表示不缓存
+        self.scan_cache: Optional[ScanCache] = None
+        # 共享的RTL预检展开（构建矩阵的变体之间共享），None表示不共享
+        self.elaboration_share: Optional[SharedElaboration] = None
+        # 钩子失败策略（abort/continue），None表示按配置和阶段默认值
+        self.hook_failure: Optional[str] = None
 
     @property
     def name(self) -> str:
@@ -107,6 +149,9 @@ class VivadoPlugin(FPGAVendorPlugin):
         if self._initialized and config is None:
             return True
 
+        if config is not None:
+            self._config = config
+
         # 如果有配置，使用配置驱动的检测
         if config:
             self._tool_info = ToolDetector.detect_vivado_with_config(config)
@@ -153,10 +198,55 @@ class VivadoPlugin(FPGAVendorPlugin):
 
     def _run_vivado_tcl(self, tcl_script: str, script_name: str = "build.tcl") -> BuildResult:
         """运行Vivado TCL脚本"""
-        import subprocess
-        import tempfile
-        import os
-        from pathlib import Path
+        return run_sync(self._run_vivado_tcl_async(tcl_script, script_name))
+
+    def _resolve_vivado_executable(self) -> Path:
+        """获取Vivado可执行文件路径"""
+        vivado_path = self._tool_info.path
+        # 如果路径是目录，则追加可执行文件名
+        if vivado_path.is_dir():
+            vivado_path = vivado_path / 'vivado'
+            if os.name == 'nt':  # Windows
+                vivado_path = vivado_path.with_suffix('.bat')
+        # 如果路径是文件但扩展名不对，尝试修正
+        elif vivado_path.is_file():
+            # 已经是文件，直接使用
+            pass
+        else:
+            # 路径不存在，尝试猜测
+            if os.name == 'nt':
+                vivado_path = vivado_path / 'vivado.bat'
+            else:
+                vivado_path = vivado_path / 'vivado'
+        return vivado_path
+
+    async def _run_vivado_tcl_async(self, tcl_script: str,
+                                    script_name: str = "build.tcl",
+                                    config: Optional[Dict[str, Any]] = None,
+                                    on_output: Optional[OutputCallback] = None
+                                    ) -> BuildResult:
+        """异步运行Vivado TCL脚本
+
+        Vivado输出逐行传给 on_output；任务被取消时终止Vivado进程树。
+        配置了 build.remote 时，对应阶段发送到构建节点运行。
+        """
+        if config is None:
+            config = self._config
+
+        try:
+            dispatcher = RemoteDispatcher.from_config(config or {})
+        except RemoteError as e:
+            return BuildResult(success=False, artifacts={}, logs={}, metrics={},
+                               errors=[f"远程构建配置错误: {e}"])
+        if dispatcher is not None and Path(script_name).stem in dispatcher.stages:
+            try:
+                return await self._run_vivado_remote_async(
+                    dispatcher, tcl_script, script_name, config, on_output)
+            except NoWorkerError as e:
+                if not dispatcher.fallback_local:
+                    return BuildResult(success=False, artifacts={}, logs={}, metrics={},
+                                       errors=[f"远程构建失败: {e}"])
+                print(f"[WARN] {e}，在本机运行")
 
         if not self._tool_info or not self._tool_info.installed:
             return BuildResult(
@@ -173,34 +263,47 @@ class VivadoPlugin(FPGAVendorPlugin):
             tcl_file = f.name
 
         try:
-            # 处理Vivado可执行文件路径
-            vivado_path = self._tool_info.path
-            # 如果路径是目录，则追加可执行文件名
-            if vivado_path.is_dir():
-                vivado_path = vivado_path / 'vivado'
-                if os.name == 'nt':  # Windows
-                    vivado_path = vivado_path.with_suffix('.bat')
-            # 如果路径是文件但扩展名不对，尝试修正
-            elif vivado_path.is_file():
-                # 已经是文件，直接使用
-                pass
+            vivado_path = self._resolve_vivado_executable()
+            cmd = [str(vivado_path), '-mode', 'batch', '-source', tcl_file]
+
+            # 主机级内存准入：内存不足时等待其他Vivado运行结束
+            controller = AdmissionController.from_config(config)
+            if controller is not None:
+                stage = Path(script_name).stem
+                part = config.get('fpga', {}).get('part', '')
+                project = config.get('project', {}).get('name', '')
+                pending = asyncio.ensure_future(
+                    run_blocking(controller.acquire, part, project, stage))
+                try:
+                    ticket = await asyncio.shield(pending)
+                except asyncio.CancelledError:
+                    # 等待准入期间被取消：准入完成后立即释放
+                    def _release_late(fut):
+                        if not fut.cancelled() and fut.exception() is None:
+                            controller.release(fut.result())
+                    pending.add_done_callback(_release_late)
+                    raise
             else:
-                # 路径不存在，尝试猜测
-                if os.name == 'nt':
-                    vivado_path = vivado_path / 'vivado.bat'
-                else:
-                    vivado_path = vivado_path / 'vivado'
+                ticket = None
 
-            cmd = [str(vivado_path), '-mode', 'batch', '-source', tcl_file]
             print(f"执行Vivado命令: {' '.join(cmd)}")
 
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='ignore'
-            )
+            try:
+                result = await run_process(
+                    cmd,
+                    cwd=self.working_dir,
+                    on_output=on_output,
+                    on_start=ticket.track if ticket is not None else None
+                )
+                if ticket is not None:
+                    ticket.failed = result.returncode != 0
+            except asyncio.CancelledError:
+                if ticket is not None:
+                    ticket.failed = True
+                raise
+            finally:
+                if ticket is not None:
+                    controller.release(ticket)
 
             # 收集输出
             logs = {
@@ -217,7 +320,8 @@ class VivadoPlugin(FPGAVendorPlugin):
             else:
                 print(f"Vivado TCL脚本执行失败，返回码: {result.returncode}")
                 # 保存TCL脚本用于调试
-                debug_tcl_path = Path.cwd() / f"debug_{script_name}"
+                debug_tcl_path = ((self.working_dir or Path.cwd())
+                                  / f"debug_{script_name}")
                 with open(debug_tcl_path, 'w', encoding='utf-8') as f:
                     f.write(tcl_script)
                 print(f"调试: TCL脚本已保存到 {debug_tcl_path}")
@@ -235,6 +339,14 @@ class VivadoPlugin(FPGAVendorPlugin):
                 errors=[] if success else [f"Vivado返回非零退出码: {result.returncode}"]
             )
 
+        except AdmissionError as e:
+            return BuildResult(
+                success=False,
+                artifacts={},
+                logs={'exception': str(e)},
+                metrics={},
+                errors=[f"Vivado运行未获准入: {e}"]
+            )
         except Exception as e:
             return BuildResult(
                 success=False,
@@ -250,6 +362,89 @@ class VivadoPlugin(FPGAVendorPlugin):
             except:
                 pass
 
+    def _remote_inputs(self, config: Dict[str, Any], base_dir: Path) -> List[str]:
+        """远程运行需要发送的文件：扫描到的源文件和工程目录（相对base_dir）"""
+        files = set()
+
+        def add(path: Path):
+            try:
+                rel = path.resolve().relative_to(base_dir.resolve())
+            except ValueError:
+                print(f"[WARN] 文件不在工作目录下，无法发送到构建节点: {path}")
+                return
+            files.add(rel.as_posix())
+
+        for items in self._scan_files(config).values():
+            for item in items:
+                path = base_dir / item['path']
+                if path.is_file():
+                    add(path)
+
+        directories = [base_dir / config.get('project_dir', './build')]
+        sweep_config = config.get('build', {}).get('implementation', {}).get('sweep')
+        if sweep_config:
+            directories.append(self._sweep_work_dir(config))
+        for directory in directories:
+            if not directory.is_dir():
+                continue
+            for dirpath, dirnames, filenames in os.walk(directory):
+                dirnames[:] = [d for d in dirnames if d not in ('.Xil', '.fpgab')]
+                for filename in filenames:
+                    if not filename.endswith(('.jou', '.log')):
+                        add(Path(dirpath) / filename)
+        return sorted(files)
+
+    async def _run_vivado_remote_async(self, dispatcher: RemoteDispatcher,
+                                       tcl_script: str, script_name: str,
+                                       config: Dict[str, Any],
+                                       on_output: Optional[OutputCallback] = None
+                                       ) -> BuildResult:
+        """在构建节点上运行Vivado TCL脚本，产物写回工作目录"""
+        base_dir = Path(self.working_dir or Path.cwd())
+        # 脚本中的工作目录绝对路径改为相对路径，在节点的任务目录中同样有效
+        script = tcl_script.replace(base_dir.resolve().as_posix() + '/', '')
+        script_path = f'.fpgab_remote/{script_name}'
+
+        version = config.get('fpga', {}).get('vivado_version')
+        tool_info = self._tool_info
+        if (not version and tool_info and tool_info.installed
+                and tool_info.version != 'unknown'):
+            version = self._tool_info.version
+
+        project_name = config.get('project', {}).get('name', 'fpga_project')
+        job = RemoteJob(
+            command=[TOOL_PLACEHOLDER, '-mode', 'batch', '-source', script_path],
+            base_dir=base_dir,
+            files=await run_blocking(self._remote_inputs, config, base_dir),
+            inline_files={script_path: script.encode('utf-8')},
+            tool='vivado',
+            tool_version=version,
+            job_id=f"{project_name}-{Path(script_name).stem}",
+        )
+        print(f"发送到构建节点: {script_name}（{len(job.files)} 个文件，"
+              f"Vivado {version or '任意版本'}）")
+        try:
+            result = await dispatcher.run_job(job, on_output)
+        except NoWorkerError:
+            raise
+        except (RemoteError, OSError, asyncio.TimeoutError) as e:
+            return BuildResult(success=False, artifacts={}, logs={'exception': str(e)},
+                               metrics={}, errors=[f"远程构建失败: {e}"])
+
+        success = result.returncode == 0
+        print(f"构建节点 {result.worker} 完成: 返回码 {result.returncode}, "
+              f"取回 {len(result.files)} 个文件 ({result.duration:.1f}s)")
+        return BuildResult(
+            success=success,
+            artifacts={'remote_worker': result.worker, 'remote_files': result.files},
+            logs={'stdout': result.stdout, 'stderr': result.stderr,
+                  'returncode': str(result.returncode)},
+            metrics={'execution_time': result.duration},
+            warnings=[] if success else ["TCL脚本执行失败"],
+            errors=[] if success else [f"Vivado返回非零退出码: {result.returncode}"
+                                       f"（节点 {result.worker}）"]
+        )
+
     def synthesize(self, config: Dict[str, Any]) -> BuildResult:
         """综合"""
         if not self.initialize(config):
@@ -337,7 +532,7 @@ class VivadoPlugin(FPGAVendorPlugin):
         generator = TCLScriptGenerator(config)
 
         # 扫描文件（简化版本）
-        scanner = FileScanner()
+        scanner = FileScanner(self.working_dir)
         scanned_files = scanner.scan_files(config)
 
         # 生成完整构建脚本
@@ -357,12 +552,27 @@ class VivadoPlugin(FPGAVendorPlugin):
 
         return report
 
+    def _scan_files(self, config: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+        """扫描源文件（有共享缓存时复用结果）"""
+        if self.scan_cache is None:
+            return FileScanner(self.working_dir).scan_files(config)
+        key = 'scan|' + ScanCache.key(self.working_dir, config)
+        return copy.deepcopy(self.scan_cache.get_or_compute(
+            key, lambda: FileScanner(self.working_dir).scan_files(config)))
+
     def scan_and_import_files(self, config: Dict[str, Any]) -> Dict[str, Any]:
         """扫描并导入源文件"""
+        if self.scan_cache is None:
+            return self._scan_and_import_files(config)
+        key = 'import|' + ScanCache.key(self.working_dir, config)
+        return copy.deepcopy(self.scan_cache.get_or_compute(
+            key, lambda: self._scan_and_import_files(config)))
+
+    def _scan_and_import_files(self, config: Dict[str, Any]) -> Dict[str, Any]:
         print("扫描源文件...")
 
         # 创建文件扫描器
-        scanner = FileScanner()
+        scanner = FileScanner(self.working_dir)
         scanned_files = scanner.scan_files(config)
 
         # 生成Vivado命令
@@ -569,9 +779,15 @@ class VivadoPlugin(FPGAVendorPlugin):
 
     def prepare_project_only(self, config: Dict[str, Any]) -> BuildResult:
         """仅准备工程（创建工程、导入文件、恢复BD，但不打开GUI）"""
+        return run_sync(self.prepare_project_only_async(config))
+
+    async def prepare_project_only_async(self, config: Dict[str, Any],
+                                         on_output: Optional[OutputCallback] = None
+                                         ) -> BuildResult:
+        """异步准备工程（创建工程、导入文件、恢复BD，但不打开GUI）"""
         print("准备Vivado工程（仅创建工程，不打开GUI）...")
 
-        if not self.initialize(config):
+        if not await run_blocking(self.initialize, config):
             return BuildResult(
                 success=False,
                 artifacts={},
@@ -581,7 +797,7 @@ class VivadoPlugin(FPGAVendorPlugin):
             )
 
         # 扫描文件
-        scan_result = self.scan_and_import_files(config)
+        scan_result = await run_blocking(self.scan_and_import_files, config)
 
         # 生成工程准备脚本（不含GUI命令）
         from .tcl_templates import TCLScriptGenerator
@@ -589,7 +805,8 @@ class VivadoPlugin(FPGAVendorPlugin):
         tcl_script = generator.generate_preparation_script_without_gui(scan_result['scanned_files'])
 
         # 执行TCL脚本（批处理模式创建工程）
-        result = self._run_vivado_tcl(tcl_script, "prepare_project.tcl")
+        result = await self._run_vivado_tcl_async(tcl_script, "prepare_project.tcl",
+                                                  config, on_output)
 
         if result.success:
             result.artifacts.update({
@@ -633,51 +850,37 @@ class VivadoPlugin(FPGAVendorPlugin):
 
         return result
 
-    def _execute_hook_commands(self, hook_name: str, commands: List[str]) -> Tuple[bool, List[str]]:
-        """执行钩子命令列表，返回(是否全部成功, 错误消息列表)"""
+    def _execute_hook_commands(self, hook_name: str,
+                               commands: List[Any]) -> Tuple[bool, List[str]]:
+        """执行钩子命令列表，返回(是否继续构建, 错误消息列表)"""
+        run = run_sync(self._run_hooks_async(self._config, hook_name, commands))
+        return run.success, run.errors
+
+    async def _run_hooks_async(self, config: Dict[str, Any], hook_name: str,
+                               commands: List[Any],
+                               on_output: Optional[OutputCallback] = None
+                               ) -> HookRunResult:
+        """用钩子引擎执行非TCL钩子命令（依赖有序、并行、按输出时间戳跳过）"""
         if not commands:
-            return True, []
-
-        errors = []
-        all_success = True
-
-        for cmd in commands:
-            print(f"执行 {hook_name} 钩子命令: {cmd}")
-            try:
-                # 使用subprocess执行命令
-                import subprocess
-                import shlex
-                # 分割命令参数，支持带空格的参数
-                if sys.platform == 'win32':
-                    # Windows下不分割，使用shell执行
-                    result = subprocess.run(cmd, shell=True, capture_output=True, text=True, encoding='utf-8', errors='ignore')
-                else:
-                    args = shlex.split(cmd)
-                    result = subprocess.run(args, capture_output=True, text=True, encoding='utf-8', errors='ignore')
-
-                if result.returncode != 0:
-                    error_msg = f"钩子命令执行失败: {cmd} (返回码: {result.returncode})"
-                    if result.stderr:
-                        error_msg += f"\n错误输出: {result.stderr[:500]}"
-                    errors.append(error_msg)
-                    all_success = False
-                    print(f"警告: {error_msg}")
-                else:
-                    print(f"钩子命令执行成功: {cmd}")
-                    if result.stdout:
-                        print(f"输出: {result.stdout[:500]}")
-
-            except Exception as e:
-                error_msg = f"执行钩子命令时发生异常: {cmd} -> {e}"
-                errors.append(error_msg)
-                all_success = False
-                print(f"错误: {error_msg}")
-
-        return all_success, errors
-
-    def create_project(self, config: Dict[str, Any]) -> BuildResult:
+            return HookRunResult(hook_name)
+        project_dir = Path(config.get('project_dir', './build'))
+        base_dir = self.working_dir or Path.cwd()
+        try:
+            state_dir = base_dir / project_dir / '.fpgab'
+            return await run_stage_hooks_async(config, hook_name, base_dir=base_dir,
+                                               state_dir=state_dir,
+                                               on_output=on_output, hooks=commands,
+                                               on_failure=self.hook_failure)
+        except HookError as e:
+            print(f"[ERROR] {e}")
+            failed = HookResult(hook_name, 'failed', error=str(e))
+            return HookRunResult(hook_name, {hook_name: failed})
+
+    async def create_project_async(self, config: Dict[str, Any],
+                                   on_output: Optional[OutputCallback] = None
+                                   ) -> BuildResult:
         """创建Vivado工程"""
-        if not self.initialize(config):
+        if not await run_blocking(self.initialize, config):
             return BuildResult(
                 success=False,
                 artifacts={},
@@ -694,7 +897,7 @@ class VivadoPlugin(FPGAVendorPlugin):
         print(f"创建Vivado工程: {config.get('project', {}).get('name', '未命名')}")
 
         # 扫描文件
-        scan_result = self.scan_and_import_files(adapted_config)
+        scan_result = await run_blocking(self.scan_and_import_files, adapted_config)
 
         # 生成完整构建脚本
         generator = TCLScriptGenerator(adapted_config)
@@ -703,36 +906,33 @@ class VivadoPlugin(FPGAVendorPlugin):
         # 获取非TCL钩子命令
         non_tcl_hooks = getattr(generator, 'non_tcl_hooks', {})
 
-        # 执行pre_build钩子（非TCL命令）
-        pre_build_commands = non_tcl_hooks.get('pre_build', [])
-        if pre_build_commands:
-            print("执行pre_build非TCL钩子命令...")
-            success, errors = self._execute_hook_commands('pre_build', pre_build_commands)
-            if not success:
-                # 记录错误但不中止构建，让用户决定
-                result.warnings = getattr(result, 'warnings', []) + errors
-                print("警告: pre_build钩子命令执行失败，但继续构建流程")
+        # 执行pre_build钩子（非TCL命令），按失败策略决定是否继续
+        hook_warnings: List[str] = []
+        hooks = await self._run_hooks_async(config, 'pre_build',
+                                            non_tcl_hooks.get('pre_build', []),
+                                            on_output)
+        if not hooks.success:
+            return BuildResult(success=False, artifacts={}, logs={}, metrics={},
+                               errors=hooks.errors)
+        hook_warnings += hooks.errors
 
         # 执行TCL脚本
-        result = self._run_vivado_tcl(tcl_script, "create_project.tcl")
-
-        # 执行post_bitstream钩子（非TCL命令）
-        post_bitstream_commands = non_tcl_hooks.get('post_bitstream', [])
-        if post_bitstream_commands:
-            print("执行post_bitstream非TCL钩子命令...")
-            success, errors = self._execute_hook_commands('post_bitstream', post_bitstream_commands)
-            if not success:
-                result.warnings = getattr(result, 'warnings', []) + errors
-                print("警告: post_bitstream钩子命令执行失败")
-
-        # 执行bin_merge_script钩子（非TCL命令）
-        bin_merge_commands = non_tcl_hooks.get('bin_merge_script', [])
-        if bin_merge_commands:
-            print("执行bin_merge_script非TCL钩子命令...")
-            success, errors = self._execute_hook_commands('bin_merge_script', bin_merge_commands)
-            if not success:
-                result.warnings = getattr(result, 'warnings', []) + errors
-                print("警告: bin_merge_script钩子命令执行失败")
+        result = await self._run_vivado_tcl_async(tcl_script, "create_project.tcl",
+                                                  config, on_output)
+
+        # 执行post_bitstream和bin_merge_script钩子（非TCL命令）
+        for hook_name in ('post_bitstream', 'bin_merge_script'):
+            if not result.success:
+                break
+            hooks = await self._run_hooks_async(config, hook_name,
+                                                non_tcl_hooks.get(hook_name, []),
+                                                on_output)
+            if not hooks.success:
+                result.success = False
+                result.errors = list(result.errors) + hooks.errors
+            else:
+                hook_warnings += hooks.errors
+        result.warnings = list(result.warnings) + hook_warnings
 
         # 如果成功，添加额外的工件信息
         if result.success:
@@ -747,9 +947,11 @@ class VivadoPlugin(FPGAVendorPlugin):
 
         return result
 
-    def synthesize(self, config: Dict[str, Any]) -> BuildResult:
+    async def synthesize_async(self, config: Dict[str, Any],
+                               on_output: Optional[OutputCallback] = None
+                               ) -> BuildResult:
         """综合"""
-        if not self.initialize(config):
+        if not await run_blocking(self.initialize, config):
             return BuildResult(
                 success=False,
                 artifacts={},
@@ -758,17 +960,23 @@ class VivadoPlugin(FPGAVendorPlugin):
                 errors=["Vivado未检测到，无法运行综合"]
             )
 
+        if preflight_settings(config) is not None:
+            preflight = await self.preflight_async(config, on_output)
+            if not preflight.success:
+                return preflight
+
         print("运行Vivado综合...")
 
         # 扫描文件
-        scan_result = self.scan_and_import_files(config)
+        scan_result = await run_blocking(self.scan_and_import_files, config)
 
         # 生成仅综合脚本
         generator = TCLScriptGenerator(config)
         tcl_script = generator.generate_synthesis_only_script(scan_result['scanned_files'])
 
         # 执行TCL脚本
-        result = self._run_vivado_tcl(tcl_script, "synthesize.tcl")
+        result = await self._run_vivado_tcl_async(tcl_script, "synthesize.tcl", config,
+                                                  on_output)
 
         # 如果成功，添加综合特定的工件
         if result.success:
@@ -779,9 +987,11 @@ class VivadoPlugin(FPGAVendorPlugin):
 
         return result
 
-    def implement(self, config: Dict[str, Any]) -> BuildResult:
+    async def implement_async(self, config: Dict[str, Any],
+                              on_output: Optional[OutputCallback] = None
+                              ) -> BuildResult:
         """实现（布局布线）"""
-        if not self.initialize(config):
+        if not await run_blocking(self.initialize, config):
             return BuildResult(
                 success=False,
                 artifacts={},
@@ -819,10 +1029,12 @@ class VivadoPlugin(FPGAVendorPlugin):
         # 使用正斜杠构建路径，避免转义问题，添加.xpr扩展名
         project_path = f'{project_dir}/{project_name}.xpr'.replace('\\', '/')
         open_cmd = f'open_project "{project_path}"'
-        impl_tcl = f'{open_cmd}\n{impl_tcl}'
+        # 在已有工程上重新实现时需要先复位运行
+        impl_tcl = f'{open_cmd}\ncatch {{reset_run impl_1}}\n{impl_tcl}'
 
         # 执行TCL脚本
-        result = self._run_vivado_tcl(impl_tcl, "implement.tcl")
+        result = await self._run_vivado_tcl_async(impl_tcl, "implement.tcl", config,
+                                                  on_output)
 
         if result.success:
             result.artifacts['implementation'] = '实现完成'
@@ -832,9 +1044,11 @@ class VivadoPlugin(FPGAVendorPlugin):
 
         return result
 
-    def generate_bitstream(self, config: Dict[str, Any]) -> BuildResult:
+    async def generate_bitstream_async(self, config: Dict[str, Any],
+                                       on_output: Optional[OutputCallback] = None
+                                       ) -> BuildResult:
         """生成比特流"""
-        if not self.initialize(config):
+        if not await run_blocking(self.initialize, config):
             return BuildResult(
                 success=False,
                 artifacts={},
@@ -875,16 +1089,691 @@ class VivadoPlugin(FPGAVendorPlugin):
         bitstream_tcl = f'{open_cmd}\n{bitstream_tcl}'
 
         # 执行TCL脚本
-        result = self._run_vivado_tcl(bitstream_tcl, "generate_bitstream.tcl")
+        result = await self._run_vivado_tcl_async(bitstream_tcl,
+                                                  "generate_bitstream.tcl", config,
+                                                  on_output)
+
+        if result.success:
+            result.artifacts['bitstream'] = '比特流生成完成'
+            print("比特流生成完成")
+        else:
+            print("比特流生成失败")
+
+        return result
+
+    def create_project(self, config: Dict[str, Any]) -> BuildResult:
+        """创建Vivado工程"""
+        return run_sync(self.create_project_async(config))
+
+    def synthesize(self, config: Dict[str, Any]) -> BuildResult:
+        """综合"""
+        return run_sync(self.synthesize_async(config))
+
+    def implement(self, config: Dict[str, Any]) -> BuildResult:
+        """实现（布局布线）"""
+        return run_sync(self.implement_async(config))
+
+    def generate_bitstream(self, config: Dict[str, Any]) -> BuildResult:
+        """生成比特流"""
+        return run_sync(self.generate_bitstream_async(config))
+
+    def _open_project_command(self, config: Dict[str, Any]) -> str:
+        """生成打开已有工程的TCL命令"""
+        project_name = config.get('project', {}).get('name', 'fpga_project')
+        project_dir = config.get('project_dir', './build')
+        # 使用正斜杠构建路径，避免转义问题，添加.xpr扩展名
+        project_path = f'{project_dir}/{project_name}.xpr'.replace('\\', '/')
+        return f'open_project "{project_path}"'
+
+    async def generate_ip_targets_async(self, config: Dict[str, Any],
+                                        on_output: Optional[OutputCallback] = None
+                                        ) -> BuildResult:
+        """在已有工程中生成IP核输出产品"""
+        if not await run_blocking(self.initialize, config):
+            return BuildResult(
+                success=False,
+                artifacts={},
+                logs={},
+                metrics={},
+                errors=["Vivado未检测到，无法生成IP核"]
+            )
+
+        print("生成IP核输出产品...")
+        tcl_lines = [
+            self._open_project_command(config),
+            'set ips [get_ips -quiet]',
+            'if {[llength $ips] > 0} {',
+            '    generate_target all $ips',
+            '    puts "已生成 [llength $ips] 个IP核的输出产品"',
+            '}',
+        ]
+        result = await self._run_vivado_tcl_async('\n'.join(tcl_lines),
+                                                  "generate_ip.tcl", config, on_output)
+        print("IP核生成完成" if result.success else "IP核生成失败")
+        return result
+
+    async def generate_bd_targets_async(self, config: Dict[str, Any],
+                                        on_output: Optional[OutputCallback] = None
+                                        ) -> BuildResult:
+        """在已有工程中生成Block Design输出产品"""
+        if not await run_blocking(self.initialize, config):
+            return BuildResult(
+                success=False,
+                artifacts={},
+                logs={},
+                metrics={},
+                errors=["Vivado未检测到，无法生成Block Design"]
+            )
+
+        print("生成Block Design输出产品...")
+        tcl_lines = [
+            self._open_project_command(config),
+            'foreach bd_file [get_files -quiet *.bd] {',
+            '    generate_target all $bd_file',
+            '    puts "已生成Block Design: $bd_file"',
+            '}',
+        ]
+        result = await self._run_vivado_tcl_async('\n'.join(tcl_lines),
+                                                  "generate_bd.tcl", config, on_output)
+        print("Block Design生成完成" if result.success else "Block Design生成失败")
+        return result
+
+    async def synthesize_project_async(self, config: Dict[str, Any],
+                                       on_output: Optional[OutputCallback] = None,
+                                       skip_preflight: bool = False) -> BuildResult:
+        """在已有工程上运行综合（不重新创建工程）
+
+        启用了 build.synthesis.preflight 时先运行RTL展开预检，预检失败则不启动综合。
+        skip_preflight 用于构建图中预检已作为独立节点运行的情况。
+        """
+        if not await run_blocking(self.initialize, config):
+            return BuildResult(
+                success=False,
+                artifacts={},
+                logs={},
+                metrics={},
+                errors=["Vivado未检测到，无法运行综合"]
+            )
+
+        if not skip_preflight and preflight_settings(config) is not None:
+            preflight = await self.preflight_async(config, on_output)
+            if not preflight.success:
+                return preflight
 
+        print("运行Vivado综合...")
+        generator = TCLScriptGenerator(config)
+        tcl_script = '\n'.join([
+            self._open_project_command(config),
+            'catch {reset_run synth_1}',
+            generator._generate_synthesis_part(),
+        ])
+        result = await self._run_vivado_tcl_async(tcl_script, "synthesize.tcl", config,
+                                                  on_output)
+        print("Vivado综合完成" if result.success else "Vivado综合失败")
+        return result
+
+    def _preflight_cache(self, config: Dict[str, Any]) -> PreflightCache:
+        project_dir = Path(config.get('project_dir', './build'))
+        state_dir = (self.working_dir or Path.cwd()) / project_dir / '.fpgab'
+        return PreflightCache(state_dir / PREFLIGHT_CACHE_FILE)
+
+    async def preflight_async(self, config: Dict[str, Any],
+                              on_output: Optional[OutputCallback] = None
+                              ) -> BuildResult:
+        """综合前的RTL展开预检（synth_design -rtl）
+
+        非工程模式读入HDL源文件并展开顶层，有错误时返回失败。结果按源文件
+        指纹缓存：设计未变化时直接复用上次的通过/失败结果。
+        """
+        settings = preflight_settings(config) or {'cache': True}
+        scanned = await run_blocking(self._scan_files, config)
+        fpga = config.get('fpga', {})
+        part, top = fpga.get('part', ''), fpga.get('top_module', '')
+        defines = fpga.get('defines') or {}
+        hdl_files = scanned.get('hdl', [])
+        project_dir = Path(config.get('project_dir', './build'))
+        project_name = config.get('project', {}).get('name', 'fpga_project')
+        base_dir = self.working_dir or Path.cwd()
+        # IP核/Block Design模块用Vivado桩文件或生成的黑盒桩模块代替
+        stub_path = base_dir / project_dir / '.fpgab' / PREFLIGHT_STUB_FILE
+        black_boxes, stub_files = await run_blocking(
+            black_box_sources, scanned, stub_path, project_dir, project_name, base_dir)
+        stub_paths = [info['path'] for info in stub_files]
+
+        if not await run_blocking(self.initialize, config):
+            return BuildResult(success=False, artifacts={}, logs={}, metrics={},
+                               errors=["Vivado未检测到，无法运行RTL预检"])
+        tool_version = self._tool_info.version if self._tool_info else ''
+
+        cache = self._preflight_cache(config) if settings.get('cache', True) else None
+        key = await run_blocking(source_fingerprint, hdl_files, part, top, defines,
+                                 tool_version, black_boxes, self.working_dir,
+                                 stub_paths)
+        preflight = cache.get(key) if cache is not None else None
+
+        if preflight is not None:
+            print(f"RTL预检: 源文件未变化，复用上次结果（{'通过' if preflight.success else '失败'}）")
+        else:
+            async def elaborate():
+                print(f"运行RTL预检（synth_design -rtl -top {top}）...")
+                lines: List[str] = []
+
+                def collect(stream: str, line: str) -> None:
+                    lines.append(line)
+                    if on_output is not None:
+                        on_output(stream, line)
+
+                start = time.monotonic()
+                script = preflight_script(part, top, hdl_files + stub_files, defines)
+                result = await self._run_vivado_tcl_async(script, "preflight.tcl",
+                                                          config, collect)
+                errors, warnings, demoted = classify_output(lines, black_boxes)
+                if not result.success and not errors:
+                    # Vivado本身运行失败（而不是设计错误）
+                    return result
+                return PreflightResult(success=not errors, errors=errors,
+                                       warnings=warnings,
+                                       duration=time.monotonic() - start,
+                                       demoted=demoted)
+
+            if self.elaboration_share is not None:
+                # 构建矩阵：只有器件型号不同的变体共享同一次展开
+                shared_key = await run_blocking(
+                    source_fingerprint, hdl_files, part_family(part), top, defines,
+                    tool_version, black_boxes, self.working_dir, stub_paths)
+                outcome, shared = await self.elaboration_share.run(shared_key,
+                                                                   elaborate)
+                if shared:
+                    print(f"RTL预检: 复用同系列器件（{part_family(part)}）变体的展开结果")
+            else:
+                outcome = await elaborate()
+            if isinstance(outcome, BuildResult):
+                # Vivado运行失败：不缓存
+                return outcome
+            preflight = outcome
+            # 有错误被降为警告时结果不可靠，不缓存
+            if cache is not None and not preflight.demoted:
+                await run_blocking(cache.put, key, preflight)
+
+        if preflight.success:
+            print("[OK] RTL预检通过")
+        else:
+            print(f"[ERROR] RTL预检失败（{len(preflight.errors)} 个错误），停止构建")
+            for error in preflight.errors[:20]:
+                print(f"  {error}")
+        return BuildResult(
+            success=preflight.success,
+            artifacts={},
+            logs={'preflight': 'cached' if preflight.cached else 'executed'},
+            metrics={'preflight_time': preflight.duration},
+            warnings=preflight.warnings,
+            errors=[f"RTL预检失败: {e}" for e in preflight.errors],
+        )
+
+    def _sweep_work_dir(self, config: Dict[str, Any]) -> Path:
+        """实现探索工作目录"""
+        implementation = config.get('build', {}).get('implementation', {})
+        sweep_config = implementation.get('sweep') or {}
+        project_dir = config.get('project_dir', './build')
+        work_dir = Path(sweep_config.get('work_dir') or f'{project_dir}/sweep')
+        if work_dir.is_absolute():
+            return work_dir
+        return (self.working_dir or Path.cwd()) / work_dir
+
+    def _find_synth_checkpoint(self, config: Dict[str, Any]) -> Optional[Path]:
+        """查找synth_1运行的综合检查点"""
+        project_name = config.get('project', {}).get('name', 'fpga_project')
+        project_dir = Path(config.get('project_dir', './build'))
+        if not project_dir.is_absolute():
+            project_dir = (self.working_dir or Path.cwd()) / project_dir
+        run_dir = project_dir / f'{project_name}.runs' / 'synth_1'
+        candidates = list(run_dir.glob('*.dcp'))
+        if not candidates:
+            return None
+        top_module = config.get('fpga', {}).get('top_module', '')
+        for candidate in candidates:
+            if candidate.stem == top_module:
+                return candidate
+        return max(candidates, key=lambda p: p.stat().st_mtime)
+
+    def _find_routed_checkpoint(self, config: Dict[str, Any]) -> Optional[Path]:
+        """查找impl_1运行的布线后检查点"""
+        project_name = config.get('project', {}).get('name', 'fpga_project')
+        project_dir = Path(config.get('project_dir', './build'))
+        if not project_dir.is_absolute():
+            project_dir = (self.working_dir or Path.cwd()) / project_dir
+        run_dir = project_dir / f'{project_name}.runs' / 'impl_1'
+        candidates = list(run_dir.glob('*_routed.dcp'))
+        return max(candidates, key=lambda p: p.stat().st_mtime) if candidates else None
+
+    @staticmethod
+    def _impl_directives(config: Dict[str, Any]) -> Dict[str, str]:
+        """从 build.implementation.options 中取各步骤指令（STEPS.<步骤>.ARGS.DIRECTIVE）"""
+        implementation = config.get('build', {}).get('implementation', {})
+        options = {str(key).upper(): value for key, value in
+                   implementation.get('options', {}).items()}
+        steps = {'opt': 'OPT_DESIGN', 'place': 'PLACE_DESIGN',
+                 'phys_opt': 'PHYS_OPT_DESIGN', 'route': 'ROUTE_DESIGN'}
+        return {step: str(options.get(f'STEPS.{name}.ARGS.DIRECTIVE', 'Default'))
+                for step, name in steps.items()}
+
+    async def implement_from_checkpoint_async(self, config: Dict[str, Any],
+                                              on_output: Optional[OutputCallback] = None
+                                              ) -> BuildResult:
+        """从综合检查点以非工程模式运行实现
+
+        综合检查点从产物缓存恢复时，Vivado工程中的synth_1并未完成，按工程流程
+        launch_runs impl_1 会重新综合。此时改为 open_checkpoint 后依次运行
+        opt/place/phys_opt/route，布线后检查点写到impl_1运行目录。
+        """
+        if not await run_blocking(self.initialize, config):
+            return BuildResult(success=False, artifacts={}, logs={}, metrics={},
+                               errors=["Vivado未检测到，无法运行实现"])
+        checkpoint = await run_blocking(self._find_synth_checkpoint, config)
+        if checkpoint is None:
+            return BuildResult(success=False, artifacts={}, logs={}, metrics={},
+                               errors=["未找到综合检查点（synth_1/*.dcp）"])
+
+        print(f"从综合检查点运行Vivado实现: {checkpoint.name}")
+        top = config.get('fpga', {}).get('top_module') or checkpoint.stem
+        run_dir = checkpoint.parent.parent / 'impl_1'
+        template = ImplementationBranchTemplate(config, checkpoint.as_posix(),
+                                                run_dir.as_posix(),
+                                                self._impl_directives(config),
+                                                checkpoint_name=f'{top}_routed.dcp')
+        result = await self._run_vivado_tcl_async(template.render(), "implement.tcl",
+                                                  config, on_output)
+        if result.success:
+            result.artifacts['implementation'] = '实现完成（非工程模式）'
+            print("Vivado实现完成")
+        else:
+            print("Vivado实现失败")
+        return result
+
+    async def generate_bitstream_from_checkpoint_async(
+            self, config: Dict[str, Any],
+            on_output: Optional[OutputCallback] = None) -> BuildResult:
+        """从布线后检查点以非工程模式生成比特流（上游检查点从产物缓存恢复时使用）"""
+        if not await run_blocking(self.initialize, config):
+            return BuildResult(success=False, artifacts={}, logs={}, metrics={},
+                               errors=["Vivado未检测到，无法生成比特流"])
+        checkpoint = await run_blocking(self._find_routed_checkpoint, config)
+        if checkpoint is None:
+            return BuildResult(success=False, artifacts={}, logs={}, metrics={},
+                               errors=["未找到布线后检查点（impl_1/*_routed.dcp）"])
+
+        print(f"从布线后检查点生成比特流: {checkpoint.name}")
+        template = SweepPromotionTemplate(config, checkpoint.as_posix())
+        result = await self._run_vivado_tcl_async(template.render(),
+                                                  "generate_bitstream.tcl", config,
+                                                  on_output)
         if result.success:
             result.artifacts['bitstream'] = '比特流生成完成'
             print("比特流生成完成")
         else:
             print("比特流生成失败")
+        return result
+
+    async def explore_implementation_async(self, config: Dict[str, Any],
+                                           jobs: Optional[int] = None,
+                                           stop_on_pass: Optional[bool] = None,
+                                           promote: bool = True,
+                                           strategies: Optional[List[str]] = None,
+                                           on_output: Optional[OutputCallback] = None,
+                                           reporter: Callable[[str], None] = print
+                                           ) -> BuildResult:
+        """从综合检查点并行探索多个实现策略
+
+        Args:
+            config: 项目配置（build.implementation.sweep）
+            jobs: 同时运行的分支数
+            stop_on_pass: 有分支满足时序后取消其余分支
+            promote: 是否从最佳分支生成比特流
+            strategies: 覆盖配置中的分支，只运行指定策略
+        """
+        if not await run_blocking(self.initialize, config):
+            return BuildResult(
+                success=False,
+                artifacts={},
+                logs={},
+                metrics={},
+                errors=["Vivado未检测到，无法运行实现探索"]
+            )
+
+        implementation = config.get('build', {}).get('implementation', {})
+        sweep_config = dict(implementation.get('sweep') or {})
+        if strategies:
+            sweep_config = {'strategies': list(strategies)}
+        try:
+            variants = expand_sweep(sweep_config)
+        except SweepError as e:
+            return BuildResult(success=False, artifacts={}, logs={}, metrics={},
+                               errors=[f"实现探索配置错误: {e}"])
+
+        synth_checkpoint = self._find_synth_checkpoint(config)
+        if synth_checkpoint is None:
+            return BuildResult(
+                success=False,
+                artifacts={},
+                logs={},
+                metrics={},
+                errors=["未找到综合检查点，请先运行综合（fpgab build --target synth）"]
+            )
+
+        if jobs is None:
+            jobs = sweep_config.get('jobs') or 4
+        if stop_on_pass is None:
+            stop_on_pass = bool(sweep_config.get('stop_on_pass', False))
+
+        work_dir = self._sweep_work_dir(config)
+        reporter(f"实现探索: {len(variants)} 个分支, 并行 {jobs}, 综合检查点 {synth_checkpoint}")
+        sweep = ImplementationSweep(self, config, synth_checkpoint, work_dir, variants,
+                                    jobs=jobs, stop_on_pass=stop_on_pass,
+                                    reporter=reporter, on_output=on_output)
+        ranked = await sweep.run_async()
+
+        best = ranked[0] if ranked and ranked[0].success else None
+        result = BuildResult(
+            success=best is not None,
+            artifacts={'sweep_results': str(work_dir / RESULTS_FILE)},
+            logs={},
+            metrics={'sweep': [r.to_dict() for r in ranked]},
+            errors=[] if best is not None else ["所有实现分支均失败"]
+        )
+        if best is None:
+            return result
+
+        result.artifacts['best_checkpoint'] = str(best.checkpoint)
+        if not best.timing.met:
+            result.warnings.append(f"最佳分支 {best.variant.name} 未满足时序")
+        if promote:
+            promoted = await self.promote_sweep_result_async(config, on_output)
+            result.success = promoted.success
+            result.errors.extend(promoted.errors)
+            result.artifacts.update(promoted.artifacts)
+        return result
+
+    def explore_implementation(self, config: Dict[str, Any], **kwargs) -> BuildResult:
+        """从综合检查点并行探索多个实现策略"""
+        return run_sync(self.explore_implementation_async(config, **kwargs))
 
+    async def promote_sweep_result_async(self, config: Dict[str, Any],
+                                         on_output: Optional[OutputCallback] = None
+                                         ) -> BuildResult:
+        """从实现探索的最佳分支生成比特流"""
+        if not await run_blocking(self.initialize, config):
+            return BuildResult(
+                success=False,
+                artifacts={},
+                logs={},
+                metrics={},
+                errors=["Vivado未检测到，无法生成比特流"]
+            )
+
+        work_dir = self._sweep_work_dir(config)
+        try:
+            ranked = load_results(work_dir)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            return BuildResult(success=False, artifacts={}, logs={}, metrics={},
+                               errors=[f"无法读取实现探索结果: {e}"])
+        if not ranked or not ranked[0].success or not ranked[0].checkpoint.is_file():
+            return BuildResult(success=False, artifacts={}, logs={}, metrics={},
+                               errors=["实现探索没有可用的布线检查点"])
+
+        best = ranked[0]
+        print(f"从最佳分支生成比特流: {best.variant.name}")
+        template = SweepPromotionTemplate(config, best.checkpoint.as_posix())
+        # 非TCL的post_bitstream钩子与普通比特流节点一样，由 run_build_async 在构建图之后执行一次
+        result = await self._run_vivado_tcl_async(template.render(),
+                                                  "generate_bitstream.tcl", config,
+                                                  on_output)
+
+        if result.success:
+            result.artifacts['bitstream'] = f"比特流生成完成（分支 {best.variant.name}）"
+            result.artifacts['sweep_winner'] = best.variant.name
+            print("比特流生成完成")
+        else:
+            print("比特流生成失败")
         return result
 
+    def build_graph_nodes(self, config: Dict[str, Any],
+                          on_output: Optional[OutputCallback] = None
+                          ) -> List[BuildNode]:
+        """生成构建图节点
+
+        节点：create_project → ip_generate → bd_generate → synth → impl →
+        bitstream → packbin/mcs；启用RTL预检时preflight与工程创建、IP核生成
+        并行运行，synth依赖其结果。工程通过add_files引用源文件，因此源文件内容
+        变化只影响综合，文件集合变化才需要重新创建工程。
+        """
+        self.initialize(config)
+        tool_version = ''
+        if self._tool_info and self._tool_info.installed:
+            tool_version = self._tool_info.version
+
+        scanned = self._scan_files(config)
+        base_dir = self.working_dir or Path.cwd()
+
+        def existing(kind: str, file_type: Optional[str] = None) -> List[Path]:
+            return [
+                Path(item['path']) for item in scanned.get(kind, [])
+                if (file_type is None or item.get('type') == file_type)
+                and (base_dir / item['path']).is_file()
+            ]
+
+        hdl_files = existing('hdl')
+        constraint_files = existing('constraints')
+        ip_files = existing('ip_cores')
+        bd_files = existing('block_designs', 'bd')
+        bd_scripts = existing('block_designs', 'tcl')
+
+        def relative(path: Any) -> str:
+            # 文件集合按工作区相对路径参与指纹，不同工作区可以共享产物缓存
+            try:
+                return Path(path).relative_to(base_dir).as_posix()
+            except ValueError:
+                return str(path)
+
+        file_set = sorted(relative(item['path'])
+                          for items in scanned.values() for item in items)
+
+        project_name = config.get('project', {}).get('name', 'fpga_project')
+        project_dir = config.get('project_dir', './build')
+        build_config = config.get('build', {})
+        # 每个节点的配置键取自对应模板的声明
+        stage_keys = stage_config_keys()
+
+        # 每个Vivado运行占用一个许可证，内存按准入控制的历史峰值估算
+        controller = AdmissionController.from_config(config)
+        try:
+            admission_state = controller.snapshot() if controller is not None else None
+        except OSError:
+            admission_state = None
+        part = config.get('fpga', {}).get('part', '')
+
+        def resources(stage: str) -> Dict[str, float]:
+            request = {'cpu': 1, 'license': 1}
+            if admission_state is not None:
+                request['memory'] = controller.estimate(part, project_name, stage,
+                                                        admission_state)
+            return request
+
+        nodes = [
+            BuildNode(
+                name='create_project',
+                description='创建Vivado工程',
+                action=lambda: self.prepare_project_only_async(config, on_output),
+                inputs=bd_scripts,
+                outputs=[f'{project_dir}/{project_name}.xpr'],
+                config_keys=stage_keys['create_project'],
+                values={'file_set': file_set},
+                tool_version=tool_version,
+                resources=resources('prepare_project'),
+            )
+        ]
+        synth_deps = ['create_project']
+
+        if ip_files:
+            nodes.append(BuildNode(
+                name='ip_generate',
+                description='生成IP核',
+                action=lambda: self.generate_ip_targets_async(config, on_output),
+                deps=['create_project'],
+                inputs=ip_files,
+                config_keys=stage_keys['ip_generate'],
+                tool_version=tool_version,
+                resources=resources('generate_ip'),
+            ))
+            synth_deps.append('ip_generate')
+
+        if bd_files or bd_scripts:
+            nodes.append(BuildNode(
+                name='bd_generate',
+                description='生成Block Design',
+                action=lambda: self.generate_bd_targets_async(config, on_output),
+                # IP核与Block Design生成都打开同一个.xpr并写入.srcs/.gen，不能并行
+                deps=['ip_generate'] if ip_files else ['create_project'],
+                inputs=bd_files + bd_scripts,
+                config_keys=stage_keys['bd_generate'],
+                tool_version=tool_version,
+                resources=resources('generate_bd'),
+            ))
+            synth_deps.append('bd_generate')
+
+        # RTL预检只读入HDL源文件，与IP核/Block Design生成并行运行
+        preflight = preflight_settings(config)
+        if preflight is not None and hdl_files:
+            nodes.append(BuildNode(
+                name='preflight',
+                description='RTL展开预检',
+                action=lambda: self.preflight_async(config, on_output),
+                inputs=hdl_files,
+                config_keys=stage_keys['preflight'],
+                values={'file_set': file_set},
+                tool_version=tool_version,
+                resources=resources('preflight'),
+            ))
+            synth_deps.append('preflight')
+
+        nodes.append(BuildNode(
+            name='synth',
+            description='运行综合',
+            action=lambda: self.synthesize_project_async(config, on_output,
+                                                         skip_preflight=True),
+            deps=synth_deps,
+            inputs=hdl_files + constraint_files,
+            outputs=[f'{project_dir}/{project_name}.runs/synth_1/*.dcp'],
+            config_keys=stage_keys['synth'],
+            tool_version=tool_version,
+            resources=resources('synthesize'),
+            cacheable=True,
+            artifacts=[f'{project_dir}/{project_name}.runs/synth_1/*.dcp',
+                       f'{project_dir}/{project_name}.runs/synth_1/*.rpt'],
+        ))
+        # 配置了实现探索时，impl运行所有分支，bitstream从最佳分支生成
+        sweep_config = build_config.get('implementation', {}).get('sweep')
+        sweep_enabled = bool(sweep_config) and sweep_config.get('enabled', True)
+        if sweep_enabled:
+            work_dir = sweep_config.get('work_dir') or f'{project_dir}/sweep'
+            # 探索器同时运行min(jobs, 分支数)个Vivado实现，按该数量预留资源
+            branches = sweep_config.get('jobs') or 4
+            try:
+                branches = min(branches, len(expand_sweep(sweep_config)))
+            except SweepError:
+                pass
+            impl_resources = {key: amount * max(1, branches)
+                              for key, amount in resources('implement').items()}
+            nodes.append(BuildNode(
+                name='impl',
+                description='实现策略探索',
+                action=lambda: self.explore_implementation_async(config, promote=False,
+                                                                 on_output=on_output),
+                deps=['synth'],
+                outputs=[f'{work_dir}/{RESULTS_FILE}'],
+                config_keys=stage_keys['impl'],
+                tool_version=tool_version,
+                resources=impl_resources,
+                cacheable=True,
+                artifacts=[f'{work_dir}/{RESULTS_FILE}', f'{work_dir}/*/routed.dcp',
+                           f'{work_dir}/*/*.rpt'],
+            ))
+        else:
+            nodes.append(BuildNode(
+                name='impl',
+                description='运行实现',
+                action=lambda: self.implement_async(config, on_output),
+                # 综合检查点从缓存恢复时synth_1未完成，从检查点以非工程模式实现
+                detached_action=lambda: self.implement_from_checkpoint_async(
+                    config, on_output),
+                deps=['synth'],
+                outputs=[f'{project_dir}/{project_name}.runs/impl_1/*_routed.dcp'],
+                config_keys=stage_keys['impl'],
+                tool_version=tool_version,
+                resources=resources('implement'),
+                cacheable=True,
+                artifacts=[f'{project_dir}/{project_name}.runs/impl_1/*_routed.dcp',
+                           f'{project_dir}/{project_name}.runs/impl_1/*.rpt'],
+            ))
+
+        bitstream_dir = build_config.get('bitstream', {}).get('output_dir',
+                                                              'build/bitstreams')
+        promote = self.promote_sweep_result_async
+        from_checkpoint = self.generate_bitstream_from_checkpoint_async
+        nodes.append(BuildNode(
+            name='bitstream',
+            description='生成比特流',
+            action=(lambda: promote(config, on_output)) if sweep_enabled
+            else (lambda: self.generate_bitstream_async(config, on_output)),
+            # 实现探索本身就从检查点运行；普通实现的检查点从缓存恢复时从检查点生成比特流
+            detached_action=None if sweep_enabled
+            else (lambda: from_checkpoint(config, on_output)),
+            deps=['impl'],
+            outputs=[f'{bitstream_dir}/*.bit'],
+            config_keys=stage_keys['bitstream'],
+            tool_version=tool_version,
+            resources=resources('generate_bitstream'),
+            cacheable=True,
+            artifacts=[f'{bitstream_dir}/*.bit', f'{bitstream_dir}/*.ltx',
+                       f'{bitstream_dir}/*.bin'],
+        ))
+
+        bin_config = build_config.get('bin_merge', {})
+        if bin_config or build_config.get('hooks', {}).get('bin_merge_script'):
+            bin_inputs = [
+                Path(bin_config[key]) for key in ('fsbl_path', 'uboot_path', 'atf_path')
+                if bin_config.get(key) and (base_dir / bin_config[key]).is_file()
+            ]
+            bin_outputs = []
+            if bin_config:
+                bin_outputs = [bin_config.get('output_path', f'{project_dir}/boot.bin')]
+            nodes.append(BuildNode(
+                name='packbin',
+                description='生成二进制合并文件',
+                action=lambda: self.packbin(config),
+                deps=['bitstream'],
+                inputs=bin_inputs,
+                outputs=bin_outputs,
+                config_keys=stage_keys.get('packbin', ['build.bin_merge',
+                                                       'build.hooks.bin_merge_script']),
+                tool_version=tool_version,
+                resources=resources('packbin'),
+            ))
+
+        flash_config = build_config.get('flash', {})
+        if flash_config:
+            nodes.append(BuildNode(
+                name='mcs',
+                description='生成MCS文件',
+                action=lambda: self.generate_mcs_file(config),
+                deps=['bitstream'],
+                outputs=[flash_config.get('output_path', f'{project_name}.mcs')],
+                config_keys=stage_keys.get('mcs', ['build.flash']),
+                tool_version=tool_version,
+                resources=resources('generate_mcs'),
+            ))
+
+        return nodes
+
     def packbin(self, config: Dict[str, Any]) -> BuildResult:
         """生成二进制合并文件（boot.bin）"""
         if not self.initialize(config):
@@ -954,7 +1843,18 @@ class VivadoPlugin(FPGAVendorPlugin):
         return result
 
     def generate_mcs_file(self, config: Dict[str, Any], flash_config: Optional[Dict[str, Any]] = None) -> BuildResult:
-        """生成MCS文件（用于Flash编程）"""
+        """生成MCS文件（用于Flash编程）
+
+        默认直接用Python生成MCS/PRM。build.flash.native: false、接口不支持，或显式
+        配置了 load_bitstream: true（需要连接硬件）时启动Vivado运行 write_cfgmem。
+        """
+        if not flash_config:
+            flash_config = config.get('build', {}).get('flash', {})
+        if flash_config.get('native', True):
+            result = self._generate_mcs_native(config, flash_config)
+            if result is not None:
+                return result
+
         if not self.initialize(config):
             return BuildResult(
                 success=False,
@@ -976,10 +1876,6 @@ class VivadoPlugin(FPGAVendorPlugin):
                 errors=["MCSGenerationTemplate不可用，Flash编程功能无法使用"]
             )
 
-        # 获取Flash配置
-        if not flash_config:
-            flash_config = config.get('build', {}).get('flash', {})
-
         # 生成TCL脚本
         try:
             mcs_template = MCSGenerationTemplate(config, flash_config)
@@ -1004,6 +1900,67 @@ class VivadoPlugin(FPGAVendorPlugin):
 
         return result
 
+    def _generate_mcs_native(self, config: Dict[str, Any],
+                             flash_config: Dict[str, Any]) -> Optional[BuildResult]:
+        """不启动Vivado生成MCS/PRM文件；接口不支持、找不到比特流或需要加载比特流时返回None（改用Vivado）
+
+        原生生成不连接硬件：未配置 load_bitstream 时只生成文件，显式配置为true时
+        交给Vivado模板执行硬件管理器中的加载步骤。
+        """
+        if flash_config.get('load_bitstream'):
+            print("build.flash.load_bitstream 需要连接硬件，改用Vivado生成")
+            return None
+        # 相对路径按工程目录解析（与Vivado回退时的cwd一致），不依赖进程的当前目录
+        base_dir = Path(self.working_dir or Path.cwd())
+
+        def resolve(path):
+            path = Path(path)
+            return path if path.is_absolute() else base_dir / path
+
+        project_name = config.get('project', {}).get('name', 'fpga_project')
+        bitstream_path = flash_config.get('bitstream_path', '')
+        if bitstream_path:
+            bitstream_path = resolve(bitstream_path)
+        else:
+            bitstream_dir = resolve(config.get('build', {}).get('bitstream', {})
+                                    .get('output_dir', 'build/bitstreams'))
+            candidates = sorted(bitstream_dir.glob('*.bit'),
+                                key=lambda path: path.stat().st_mtime)
+            if not candidates:
+                return None
+            bitstream_path = candidates[-1]
+
+        output_path = resolve(flash_config.get('output_path', f'{project_name}.mcs'))
+        try:
+            image = CfgmemImage(flash_config.get('interface', 'SPIx4'),
+                                flash_config.get('flash_size', '128'))
+        except CfgmemError as e:
+            print(f"{e}，改用Vivado生成")
+            return None
+
+        print("生成MCS文件（原生）...")
+        try:
+            image.add_file(bitstream_path, flash_config.get('bitstream_offset', 0))
+            for item in flash_config.get('data_files', []):
+                image.add_file(resolve(item['path']), item.get('offset', 0))
+            mcs_file, prm_file = image.write(output_path)
+        except (CfgmemError, KeyError) as e:
+            return BuildResult(
+                success=False,
+                artifacts={},
+                logs={'exception': str(e)},
+                metrics={},
+                errors=[f"生成MCS文件失败: {e}"]
+            )
+
+        print(f"MCS文件生成完成: {mcs_file}")
+        return BuildResult(
+            success=True,
+            artifacts={'mcs_file': str(mcs_file), 'prm_file': str(prm_file)},
+            logs={'mcs': f'原生生成，接口 {image.interface}'},
+            metrics={'mcs_bytes': sum(len(load.data) for load in image.loads)}
+        )
+
     def program_device(self, config: Dict[str, Any], flash_mode: bool = False) -> BuildResult:
         """烧录设备（支持Flash模式）"""
         if not self.initialize(config):
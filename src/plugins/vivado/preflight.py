@@ -0,0 +1,409 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+综合前的RTL展开预检
+
+在完整综合（工程模式下 launch_runs synth_1 往往要十几分钟）之前，用非工程
+模式读入HDL源文件并运行 synth_design -rtl，语法错误、缺失模块、端口不匹配
+等问题在一两分钟内暴露并终止构建。
+
+预检只读入RTL源文件、不读入IP核和Block Design，因此可以与IP核输出产品生成
+同时运行。IP核和Block Design对应的模块按黑盒处理：优先读入Vivado生成的
+<模块>_stub.v，没有时根据Verilog源文件中的实例化语句生成空的黑盒桩模块。
+通过/失败结果按源文件指纹缓存，设计未变化时跳过预检；构建矩阵中只有器件
+型号不同的变体共享同一次展开（SharedElaboration）。
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    from .watch import HEADER_SUFFIXES, HDL_SUFFIXES, elaboration_script
+except ImportError:
+    from watch import HEADER_SUFFIXES, HDL_SUFFIXES, elaboration_script
+
+CACHE_FILE = 'preflight.json'
+# 生成的黑盒桩模块文件（位于 <project_dir>/.fpgab 下）
+STUB_FILE = 'preflight_stubs.v'
+# 缓存保留的指纹数（切换分支时不必重新预检）
+MAX_ENTRIES = 32
+
+_MISSING_MODULE = re.compile(r"module '([^']+)' not found")
+# 缺失模块导致的连锁错误：上层模块展开失败和synth_design本身失败
+_CONSEQUENTIAL_ERRORS = ('[Synth 8-6156]', '[Common 17-69]', '[FPGAB preflight]')
+
+_VERILOG_COMMENT = re.compile(r'//[^\n]*|/\*.*?\*/', re.DOTALL)
+_VERILOG_MODULE = re.compile(r'^\s*(?:macro)?module\s+(\w+)', re.MULTILINE)
+_VHDL_ENTITY = re.compile(r'^\s*entity\s+(\w+)\s+is', re.MULTILINE | re.IGNORECASE)
+_NAMED_CONNECTION = re.compile(r'\.\s*(\w+)\s*\(')
+_INSTANCE = re.compile(r'\s*(\\\S+|\w+)\s*(\[[^\]]*\]\s*)?\(')
+
+
+@dataclass
+class PreflightResult:
+    """预检结果"""
+    success: bool
+    errors: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    cached: bool = False
+    duration: float = 0.0
+    demoted: int = 0                # 无法生成桩模块、按黑盒降为警告的错误行数
+
+
+def preflight_settings(config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """读取 build.synthesis.preflight，未启用时返回None
+
+    可以写为布尔值，或 {enabled, cache} 字典。
+    """
+    settings = config.get('build', {}).get('synthesis', {}).get('preflight')
+    if isinstance(settings, bool):
+        settings = {'enabled': settings}
+    if not settings or not settings.get('enabled', True):
+        return None
+    return {'enabled': True, 'cache': settings.get('cache', True)}
+
+
+def black_box_modules(scanned: Dict[str, List[Dict[str, Any]]]) -> Set[str]:
+    """预检中按黑盒处理的模块：IP核和Block Design（及其wrapper）"""
+    modules = {Path(item['path']).stem for item in scanned.get('ip_cores', [])}
+    for item in scanned.get('block_designs', []):
+        stem = Path(item['path']).stem
+        modules |= {stem, f'{stem}_wrapper'}
+    return modules
+
+
+def _include_dirs(hdl_files: List[Dict[str, Any]]) -> List[str]:
+    return sorted({d for info in hdl_files for d in info.get('include_dirs', [])})
+
+
+def _headers(include_dirs: Iterable[str], base_dir: Path) -> List[Path]:
+    headers = []
+    for directory in include_dirs:
+        directory = base_dir / directory
+        if directory.is_dir():
+            headers += [path for path in directory.iterdir()
+                        if path.suffix.lower() in HEADER_SUFFIXES and path.is_file()]
+    return sorted(headers)
+
+
+def source_fingerprint(hdl_files: List[Dict[str, Any]], part: str, top: str,
+                       defines: Optional[Dict[str, Any]] = None, tool_version: str = '',
+                       black_boxes: Iterable[str] = (), base_dir: Optional[Path] = None,
+                       stub_files: Iterable[Path] = ()) -> str:
+    """源文件内容、包含目录中的头文件、黑盒桩文件和展开参数的指纹"""
+    base_dir = Path(base_dir) if base_dir else Path.cwd()
+    digest = hashlib.sha256()
+    include_dirs = _include_dirs(hdl_files)
+    digest.update(json.dumps({
+        'part': part, 'top': top, 'tool_version': tool_version,
+        'defines': {str(k): str(v) for k, v in (defines or {}).items()},
+        'include_dirs': include_dirs, 'black_boxes': sorted(black_boxes),
+    }, sort_keys=True).encode('utf-8'))
+    paths = [base_dir / (info.get('absolute_path') or info['path'])
+             for info in hdl_files]
+    for path in sorted(set(paths) | set(_headers(include_dirs, base_dir))):
+        digest.update(path.as_posix().encode('utf-8') + b'\0')
+        try:
+            digest.update(hashlib.sha256(path.read_bytes()).digest())
+        except OSError:
+            digest.update(b'<missing>')
+    # 生成的桩文件位于各变体自己的工作目录，只按内容计入指纹
+    for path in sorted(Path(p) for p in stub_files):
+        try:
+            digest.update(hashlib.sha256(path.read_bytes()).digest())
+        except OSError:
+            digest.update(b'<missing>')
+    return digest.hexdigest()
+
+
+def part_family(part: str) -> str:
+    """器件系列（如 xc7a35tcsg324-1 → xc7a、xczu9eg-ffvb1156-2-e → xczu）
+
+    RTL展开只与器件系列的原语库有关，同一系列的不同型号展开结果相同。
+    """
+    match = re.match(r'(xc\d?[a-z]+)', part.lower())
+    return match.group(1) if match else part.lower()
+
+
+def _read_source(info: Dict[str, Any], base_dir: Path) -> str:
+    try:
+        path = base_dir / (info.get('absolute_path') or info['path'])
+        return path.read_text(encoding='utf-8', errors='ignore')
+    except OSError:
+        return ''
+
+
+def defined_modules(hdl_files: List[Dict[str, Any]],
+                    base_dir: Optional[Path] = None) -> Set[str]:
+    """HDL源文件中定义的模块和实体"""
+    base_dir = Path(base_dir) if base_dir else Path.cwd()
+    modules: Set[str] = set()
+    for info in hdl_files:
+        text = _read_source(info, base_dir)
+        if info.get('language') == 'vhdl':
+            modules |= {name.lower() for name in _VHDL_ENTITY.findall(text)}
+        else:
+            modules |= set(_VERILOG_MODULE.findall(_VERILOG_COMMENT.sub('', text)))
+    return modules
+
+
+def find_stub_files(scanned: Dict[str, List[Dict[str, Any]]], project_dir: Path,
+                    project_name: str,
+                    base_dir: Optional[Path] = None) -> Dict[str, Path]:
+    """查找Vivado为IP核生成的黑盒桩文件（<IP>_stub.v），按模块名返回"""
+    base_dir = Path(base_dir) if base_dir else Path.cwd()
+    project_dir = base_dir / project_dir
+    stubs: Dict[str, Path] = {}
+    for item in scanned.get('ip_cores', []):
+        path = base_dir / (item.get('absolute_path') or item['path'])
+        name = path.stem if path.suffix else path.name
+        candidates = [path.parent / f'{name}_stub.v']
+        for srcs in ('gen', 'srcs'):
+            ip_dir = project_dir / f'{project_name}.{srcs}' / 'sources_1' / 'ip' / name
+            candidates.append(ip_dir / f'{name}_stub.v')
+        stub = next((candidate for candidate in candidates if candidate.is_file()),
+                    None)
+        if stub is not None:
+            stubs[name] = stub
+    return stubs
+
+
+def _balanced(text: str, start: int) -> Optional[int]:
+    """text[start]为'('时返回匹配的')'之后的位置"""
+    depth = 0
+    for index in range(start, len(text)):
+        char = text[index]
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                return index + 1
+    return None
+
+
+def _split_top_level(text: str) -> List[str]:
+    """按不在括号内的逗号拆分"""
+    items, depth, current = [], 0, []
+    for char in text:
+        if char in '([{':
+            depth += 1
+        elif char in ')]}':
+            depth -= 1
+        if char == ',' and depth == 0:
+            items.append(''.join(current))
+            current = []
+        else:
+            current.append(char)
+    items.append(''.join(current))
+    return [item.strip() for item in items if item.strip()]
+
+
+def _instantiations(text: str, module: str):
+    """Verilog中某个模块的所有实例化，逐个返回(参数名列表, 端口列表)
+
+    按位置连接的端口命名为p0、p1……
+    """
+    pattern = re.compile(r'(?<![\w$.`])' + re.escape(module) + r'\s*(#\s*)?(?=[(\w\\])')
+    for match in pattern.finditer(text):
+        position = match.end()
+        parameters: List[str] = []
+        if match.group(1):
+            end = _balanced(text, position)
+            if end is None:
+                continue
+            parameters = _NAMED_CONNECTION.findall(text[position:end])
+            position = end
+        instance = _INSTANCE.match(text, position)
+        if not instance:
+            continue
+        end = _balanced(text, instance.end() - 1)
+        if end is None:
+            continue
+        body = text[instance.end():end - 1]
+        named = _NAMED_CONNECTION.findall(body)
+        if named or '.*' in body:
+            yield parameters, named
+        else:
+            yield parameters, [f'p{i}' for i in range(len(_split_top_level(body)))]
+
+
+def black_box_stubs(hdl_files: List[Dict[str, Any]], modules: Iterable[str],
+                    base_dir: Optional[Path] = None) -> str:
+    """根据Verilog源文件中的实例化语句生成黑盒桩模块
+
+    桩模块只声明实例化中用到的参数和端口；端口方向和位宽未知，统一声明为1位输入，
+    展开时位宽不一致只产生警告。VHDL源文件中的实例化不生成桩模块。
+    """
+    base_dir = Path(base_dir) if base_dir else Path.cwd()
+    texts = [_VERILOG_COMMENT.sub('', _read_source(info, base_dir))
+             for info in hdl_files if info.get('language', 'verilog') != 'vhdl']
+    stubs = []
+    for module in sorted(modules):
+        parameters: List[str] = []
+        ports: List[str] = []
+        found = False
+        for text in texts:
+            for params, names in _instantiations(text, module):
+                found = True
+                parameters += [p for p in params if p not in parameters]
+                ports += [p for p in names if p not in ports]
+        if not found:
+            continue
+        header = f'(* black_box *) module {module}'
+        if parameters:
+            header += ' #(' + ', '.join(f'parameter {p} = 0' for p in parameters) + ')'
+        header += '(' + ', '.join(ports) + ');'
+        lines = [header] + [f'  input {port};' for port in ports] + ['endmodule', '']
+        stubs.append('\n'.join(lines))
+    return '\n'.join(stubs)
+
+
+def black_box_sources(scanned: Dict[str, List[Dict[str, Any]]], stub_path: Path,
+                      project_dir: Path, project_name: str,
+                      base_dir: Optional[Path] = None
+                      ) -> Tuple[Set[str], List[Dict[str, Any]]]:
+    """准备预检的黑盒模块，返回(黑盒模块名, 需要额外读入的桩文件)
+
+    源文件中已定义的模块不按黑盒处理；有Vivado桩文件的IP核读入桩文件，
+    其余黑盒模块生成桩模块写入stub_path。
+    """
+    base_dir = Path(base_dir) if base_dir else Path.cwd()
+    hdl_files = scanned.get('hdl', [])
+    defined = defined_modules(hdl_files, base_dir)
+    black_boxes = {name for name in black_box_modules(scanned)
+                   if name not in defined and name.lower() not in defined}
+    stubs = find_stub_files(scanned, project_dir, project_name, base_dir)
+    files = [{'path': str(path), 'language': 'verilog'}
+             for name, path in sorted(stubs.items()) if name in black_boxes]
+    generated = black_box_stubs(hdl_files, black_boxes - set(stubs), base_dir)
+    if generated:
+        stub_path = Path(stub_path)
+        stub_path.parent.mkdir(parents=True, exist_ok=True)
+        stub_path.write_text(generated, encoding='utf-8')
+        files.append({'path': str(stub_path), 'language': 'verilog'})
+    return black_boxes, files
+
+
+def preflight_script(part: str, top: str, hdl_files: List[Dict[str, Any]],
+                     defines: Optional[Dict[str, Any]] = None) -> str:
+    """非工程模式的RTL展开脚本
+
+    展开失败时不以非零码退出：是否失败由输出中的错误（排除黑盒模块）决定。
+    """
+    files = [info for info in hdl_files
+             if Path(info['path']).suffix.lower() in HDL_SUFFIXES]
+    body = elaboration_script(part, top, files, defines, _include_dirs(hdl_files))
+    lines = [f'create_project -in_memory -part {part}']
+    for line in body.splitlines():
+        if line.startswith('synth_design '):
+            line = (f'if {{[catch {{{line}}} msg]}} '
+                    f'{{ puts "ERROR: \\[FPGAB preflight\\] $msg" }}')
+        lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+def classify_output(lines: List[str], black_boxes: Iterable[str] = ()):
+    """提取预检输出中的错误和警告，返回(错误, 警告, 降级的错误行数)
+
+    黑盒模块正常情况下已由桩模块提供。仍然报告"模块未找到"的黑盒模块（例如只在
+    VHDL中实例化）记为警告，并忽略由此引起的上层模块展开失败和synth_design失败；
+    调用方不应缓存有降级的结果。
+    """
+    black_boxes = set(black_boxes)
+    errors, warnings = [], []
+    demoted = 0
+    for line in lines:
+        line = line.rstrip()
+        if line.startswith('ERROR:'):
+            match = _MISSING_MODULE.search(line)
+            if match and match.group(1) in black_boxes:
+                warnings.append(line)
+                demoted += 1
+            else:
+                errors.append(line)
+        elif line.startswith(('CRITICAL WARNING:', 'WARNING:')):
+            warnings.append(line)
+    if demoted:
+        consequential = [line for line in errors
+                         if any(tag in line for tag in _CONSEQUENTIAL_ERRORS)]
+        if len(consequential) == len(errors):
+            warnings += consequential
+            demoted += len(consequential)
+            errors = []
+    return errors, warnings, demoted
+
+
+class SharedElaboration:
+    """构建矩阵变体之间共享的RTL展开
+
+    展开结果只取决于源文件、顶层、宏定义、黑盒和器件系列，与具体器件型号、
+    板卡和工作目录无关。同一进程中指纹相同的展开只运行一次，其他变体等待并
+    复用其结果。
+    """
+
+    def __init__(self):
+        self._runs: Dict[str, 'asyncio.Future'] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def run(self, key: str,
+                  elaborate: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """运行或复用展开，返回(结果, 是否复用)"""
+        future = self._runs.get(key)
+        shared = future is not None
+        if shared:
+            self.hits += 1
+        else:
+            self.misses += 1
+            future = asyncio.ensure_future(elaborate())
+            self._runs[key] = future
+        # 某个变体被取消时不影响其他等待同一展开的变体
+        return await asyncio.shield(future), shared
+
+
+class PreflightCache:
+    """按源文件指纹缓存预检的通过/失败结果"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, key: str) -> Optional[PreflightResult]:
+        entry = self._load().get(key)
+        if not entry:
+            return None
+        return PreflightResult(success=bool(entry.get('success')),
+                               errors=list(entry.get('errors', [])),
+                               warnings=list(entry.get('warnings', [])), cached=True)
+
+    def put(self, key: str, result: PreflightResult) -> None:
+        entries = self._load()
+        entry = asdict(result)
+        entry.pop('cached', None)
+        entry['time'] = time.time()
+        entries[key] = entry
+        if len(entries) > MAX_ENTRIES:
+            newest = sorted(entries.items(), key=lambda item: item[1].get('time', 0),
+                            reverse=True)
+            entries = dict(newest[:MAX_ENTRIES])
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.path)
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Vivado各构建阶段读取的配置键
+
+汇总各模板声明的配置键，用于计算阶段的有效配置指纹。本模块只依赖模板
+模块，debug status 比较指纹时不需要导入插件本身（及asyncio）。
+"""
+
+from typing import Dict, List
+
+try:
+    from .tcl_templates import (BasicProjectTemplate, BDRecoveryTemplate,
+                                BuildFlowTemplate, ImplementationBranchTemplate,
+                                SweepPromotionTemplate)
+    from .packbin_templates import PackBinTemplate, MCSGenerationTemplate
+except ImportError:
+    # 用于测试或开发环境
+    from tcl_templates import (BasicProjectTemplate, BDRecoveryTemplate,
+                               BuildFlowTemplate, ImplementationBranchTemplate,
+                               SweepPromotionTemplate)
+    # 注意：packbin_templates可能不存在于测试环境
+    PackBinTemplate = None
+    MCSGenerationTemplate = None
+
+# 预检读取的配置键
+PREFLIGHT_CONFIG_KEYS = ['fpga.part', 'fpga.top_module', 'fpga.defines', 'source.hdl',
+                         'build.synthesis.preflight']
+
+
+def stage_config_keys() -> Dict[str, List[str]]:
+    """各构建阶段读取的配置键（汇总各模板的声明）"""
+    templates = [BasicProjectTemplate, BDRecoveryTemplate, BuildFlowTemplate,
+                 ImplementationBranchTemplate, SweepPromotionTemplate]
+    keys: Dict[str, set] = {'preflight': set(PREFLIGHT_CONFIG_KEYS)}
+    for template in templates:
+        for stage, stage_keys in template.config_keys().items():
+            keys.setdefault(stage, set()).update(stage_keys)
+    for template in (PackBinTemplate, MCSGenerationTemplate):
+        if template is not None:
+            for stage, stage_keys in template.stage_config_keys.items():
+                keys.setdefault(stage, set()).update(stage_keys)
+    return {stage: sorted(values) for stage, values in keys.items()}
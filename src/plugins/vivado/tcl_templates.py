@@ -14,6 +14,17 @@ import os
 class TCLTemplateBase:
     """TCL模板基类"""
 
+    # 模板读取的配置键（点分路径），按构建阶段声明，用于计算阶段的有效配置指纹。
+    # 基类读取的键并入每个阶段。
+    base_config_keys: List[str] = ['project.name', 'fpga.part', 'fpga.top_module']
+    stage_config_keys: Dict[str, List[str]] = {}
+
+    @classmethod
+    def config_keys(cls) -> Dict[str, List[str]]:
+        """模板各阶段读取的配置键（含基类读取的键）"""
+        return {stage: sorted(set(cls.base_config_keys) | set(keys))
+                for stage, keys in cls.stage_config_keys.items()}
+
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.project_name = config.get('project', {}).get('name', 'fpga_project')
@@ -96,6 +107,9 @@ class TCLTemplateBase:
             script_items = [line.strip() for line in str(hook_script).split('\n') if line.strip()]
 
         for item in script_items:
+            if isinstance(item, dict):
+                # 钩子字典（inputs/outputs/depends_on）由钩子引擎在Vivado之外执行
+                continue
             is_tcl, processed_cmd = self._is_tcl_command(item)
             if is_tcl:
                 commands.append(processed_cmd)
@@ -125,6 +139,9 @@ class TCLTemplateBase:
             script_items = [line.strip() for line in str(hook_script).split('\n') if line.strip()]
 
         for item in script_items:
+            if isinstance(item, dict):
+                non_tcl_commands.append(item)
+                continue
             is_tcl, processed_cmd = self._is_tcl_command(item)
             if is_tcl:
                 tcl_commands.append(processed_cmd)
@@ -145,6 +162,12 @@ class TCLTemplateBase:
 class BasicProjectTemplate(TCLTemplateBase):
     """基本工程创建模板"""
 
+    stage_config_keys = {
+        'create_project': ['project_dir', 'fpga.defines', 'source',
+                           'build.hooks.pre_build'],
+        'ip_generate': ['source.ip_cores', 'source.ip_repo_paths'],
+    }
+
     def __init__(self, config: Dict[str, Any], file_scanner_results: Optional[Dict[str, Any]] = None):
         super().__init__(config)
         self.file_scanner_results = file_scanner_results or {}
@@ -170,6 +193,16 @@ class BasicProjectTemplate(TCLTemplateBase):
         lines.append('set_property target_language Verilog [current_project]')
         lines.append('')
 
+        # 设置Verilog宏定义
+        defines = self.config.get('fpga', {}).get('defines') or {}
+        if defines:
+            items = ' '.join(name if value is None else f'{name}={value}'
+                             for name, value in defines.items())
+            lines.append('# 设置Verilog宏定义')
+            lines.append(f'set_property verilog_define {{{items}}} '
+                         f'[get_filesets sources_1]')
+            lines.append('')
+
         # 设置IP库路径
         lines.append('# 设置IP库路径')
         ip_repo_paths = self.config.get('source', {}).get('ip_repo_paths', ['ip_repo'])
@@ -187,6 +220,8 @@ class BasicProjectTemplate(TCLTemplateBase):
 class BDRecoveryTemplate(TCLTemplateBase):
     """BD恢复和包装生成模板"""
 
+    stage_config_keys = {'bd_generate': ['project_dir', 'source.block_design']}
+
     def __init__(self, config: Dict[str, Any], bd_config: Dict[str, Any]):
         super().__init__(config)
         self.bd_config = bd_config
@@ -425,6 +460,14 @@ class BDRecoveryTemplate(TCLTemplateBase):
 class BuildFlowTemplate(TCLTemplateBase):
     """完整构建流程模板（综合→实现→比特流）"""
 
+    stage_config_keys = {
+        'synth': ['build.synthesis', 'build.hooks.pre_synth', 'build.hooks.post_synth'],
+        'impl': ['build.implementation', 'build.hooks.pre_impl',
+                 'build.hooks.post_impl'],
+        'bitstream': ['build.bitstream', 'build.hooks.post_bitstream',
+                      'build.hooks.bin_merge_script'],
+    }
+
     def __init__(self, config: Dict[str, Any]):
         super().__init__(config)
         self.build_config = config.get('build', {})
@@ -775,6 +818,116 @@ class GUITemplate(TCLTemplateBase):
         return '\n'.join(lines)
 
 
+class ImplementationBranchTemplate(TCLTemplateBase):
+    """实现分支模板（非工程模式）
+
+    从综合检查点出发，按指定指令依次运行 opt/place/phys_opt/route，
+    写出布线后检查点和时序报告。多个分支可以同时从同一个综合检查点运行。
+    """
+
+    stage_config_keys = {'impl': ['build.implementation']}
+
+    def __init__(self, config: Dict[str, Any], synth_checkpoint: str, work_dir: str,
+                 directives: Dict[str, str], post_route_phys_opt: bool = False,
+                 checkpoint_name: str = 'routed.dcp'):
+        """
+        Args:
+            config: 项目配置
+            synth_checkpoint: 综合检查点路径
+            work_dir: 分支工作目录
+            directives: 各步骤指令 {'opt', 'place', 'phys_opt', 'route'}
+            post_route_phys_opt: 布线后是否再运行一次phys_opt_design
+            checkpoint_name: 布线后检查点文件名
+        """
+        super().__init__(config)
+        self.synth_checkpoint = str(synth_checkpoint).replace('\\', '/')
+        self.work_dir = str(work_dir).replace('\\', '/')
+        self.directives = directives
+        self.post_route_phys_opt = post_route_phys_opt
+        self.checkpoint_name = checkpoint_name
+
+    def render(self) -> str:
+        """渲染实现分支模板"""
+        lines = [
+            '# Vivado实现分支脚本（非工程模式）',
+            '',
+            f'file mkdir "{self.work_dir}"',
+            f'open_checkpoint "{self.synth_checkpoint}"',
+            '',
+        ]
+
+        # 实现前钩子
+        self._execute_hook('pre_impl', lines)
+
+        lines.append('# 运行实现')
+        for step in ('opt', 'place', 'phys_opt', 'route'):
+            directive = self.directives.get(step, 'Default')
+            lines.append(f'{step}_design -directive {directive}')
+        if self.post_route_phys_opt:
+            lines.append('phys_opt_design -directive AggressiveExplore')
+        lines.append('')
+
+        # 实现后钩子
+        self._execute_hook('post_impl', lines)
+
+        lines.append('# 写出检查点和报告')
+        lines.append(f'write_checkpoint -force '
+                     f'"{self.work_dir}/{self.checkpoint_name}"')
+        lines.append(f'report_timing_summary -max_paths 10 '
+                     f'-file "{self.work_dir}/timing_summary.rpt"')
+        lines.append(f'report_utilization -file "{self.work_dir}/utilization.rpt"')
+        lines.append('')
+        lines.append('puts "实现分支完成"')
+        return '\n'.join(lines)
+
+
+class SweepPromotionTemplate(TCLTemplateBase):
+    """从最佳实现分支的布线检查点生成比特流"""
+
+    stage_config_keys = {'bitstream': ['build.bitstream', 'build.hooks.post_bitstream']}
+
+    def __init__(self, config: Dict[str, Any], routed_checkpoint: str):
+        super().__init__(config)
+        self.routed_checkpoint = str(routed_checkpoint).replace('\\', '/')
+        self.bitstream_config = config.get('build', {}).get('bitstream', {})
+        # 非TCL钩子命令由Python层执行
+        self.non_tcl_hooks: Dict[str, List[str]] = {}
+
+    def render(self) -> str:
+        """渲染比特流生成模板"""
+        output_dir = self.bitstream_config.get('output_dir', 'build/bitstreams')
+        bit_name = self.top_module or self.project_name
+        options = self.bitstream_config.get('options', {})
+        bin_file = options.get('bin_file') in [True, 'true', 'True']
+        bin_flag = ' -bin_file' if bin_file else ''
+
+        lines = [
+            '# 从最佳实现分支生成比特流',
+            '',
+            f'file mkdir "{output_dir}"',
+            f'set bitstream_output_dir [file normalize "{output_dir}"]',
+            f'open_checkpoint "{self.routed_checkpoint}"',
+            # 降低未约束端口DRC错误的严重性，与工程模式保持一致
+            'set_property SEVERITY {Warning} [get_drc_checks UCIO-1]',
+            f'write_bitstream -force{bin_flag} "$bitstream_output_dir/{bit_name}.bit"',
+            'if {[llength [get_debug_cores -quiet]] > 0} {',
+            f'    write_debug_probes -force "$bitstream_output_dir/{bit_name}.ltx"',
+            '}',
+            '',
+        ]
+
+        # 比特流后钩子
+        tcl_commands, non_tcl_commands = self._analyze_hook_commands('post_bitstream')
+        if non_tcl_commands:
+            self.non_tcl_hooks['post_bitstream'] = non_tcl_commands
+        if tcl_commands:
+            lines.append('# post_bitstream 钩子脚本')
+            lines.extend(tcl_commands)
+
+        lines.append('puts "比特流生成完成"')
+        return '\n'.join(lines)
+
+
 class TCLScriptGenerator:
     """TCL脚本生成器"""
 
@@ -0,0 +1,515 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+监视模式
+
+在两次完整构建之间提供快速反馈：监视扫描到的源文件，每批修改根据模块
+依赖关系确定受影响的层次，在常驻的Vivado TCL会话中只做廉价检查：
+- HDL修改：对受影响层次的根模块运行 synth_design -rtl（只读入该层次的文件）；
+  模块端口变化时从父模块开始展开；
+- 约束修改：在顶层展开后的设计上读入XDC，报告无法解析的对象。
+Vivado只启动一次，检查结果通常在几秒内给出。
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from core.async_process import kill_process_tree
+
+try:
+    from .file_scanner import FileScanner
+except ImportError:
+    from file_scanner import FileScanner
+
+logger = logging.getLogger(__name__)
+
+HDL_SUFFIXES = ('.v', '.sv', '.vhd', '.vhdl')
+HEADER_SUFFIXES = ('.vh', '.svh', '.h')
+CONSTRAINT_SUFFIXES = ('.xdc', '.sdc')
+
+# 命令结束标记，后跟TCL catch的返回码
+SENTINEL = '@@FPGAB_DONE@@'
+# 会话输出的单行长度上限（Vivado会把长网表对象列表输出在一行中）
+STREAM_LIMIT = 16 * 1024 * 1024
+# 单次检查的默认超时（秒），超时后终止并重新启动会话
+DEFAULT_TIMEOUT = 600.0
+_PROMPT = re.compile(r'^(?:Vivado%\s*)+')
+_INCLUDE = re.compile(r'^\s*`include\s+"([^"]+)"', re.MULTILINE)
+
+
+def _tcl_list(items) -> str:
+    return '{' + ' '.join(f'{{{item}}}' for item in items) + '}'
+
+
+@dataclass
+class QuickCheck:
+    """一次快速检查"""
+    kind: str                       # 'rtl' 展开 / 'xdc' 约束解析
+    target: str                     # 模块名或约束文件
+    files: List[Dict[str, Any]] = field(default_factory=list)   # 需要读入的HDL文件
+    reason: str = ''
+
+    @property
+    def label(self) -> str:
+        if self.kind == 'rtl':
+            return f"展开 {self.target}"
+        return f"约束 {Path(self.target).name}"
+
+
+@dataclass
+class CheckResult:
+    """快速检查结果"""
+    check: QuickCheck
+    success: bool
+    errors: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    duration: float = 0.0
+
+
+class HdlDependencyGraph:
+    """HDL模块依赖图（模块定义、实例化和include关系）"""
+
+    def __init__(self, hdl_files: List[Dict[str, Any]],
+                 scanner: Optional[FileScanner] = None):
+        self.scanner = scanner or FileScanner()
+        self.files: Dict[Path, Dict[str, Any]] = {}
+        self.file_modules: Dict[Path, List[str]] = {}
+        self.file_refs: Dict[Path, List[str]] = {}
+        self.file_includes: Dict[Path, List[str]] = {}
+        self.headers: Dict[str, str] = {}
+        self.module_file: Dict[str, Path] = {}
+        for info in hdl_files:
+            path = Path(info['path']).absolute()
+            self.files[path] = info
+            self._parse(path)
+        self._link()
+
+    def _read(self, path: Path) -> str:
+        try:
+            return path.read_text(encoding='utf-8', errors='ignore')
+        except OSError:
+            return ''
+
+    def _parse(self, path: Path) -> None:
+        """解析文件中定义、引用的模块和include的头文件"""
+        language = self.files[path].get('language', 'verilog')
+        modules = self.scanner._extract_modules(path, language)
+        self.file_modules[path] = modules
+        self.file_refs[path] = self.scanner._extract_references(path, language)
+        content = self._read(path)
+        self.file_includes[path] = [Path(name).name
+                                    for name in _INCLUDE.findall(content)]
+        for module in modules:
+            self.headers[module] = self._interface_hash(content, module, language)
+
+    @staticmethod
+    def _interface_hash(content: str, module: str, language: str) -> str:
+        """模块接口（参数和端口声明）的哈希，无法定位时使用整个文件"""
+        if language == 'vhdl':
+            pattern = rf'\bentity\s+{re.escape(module)}\s+is[\s\S]*?\bend\b'
+        else:
+            pattern = (rf'\bmodule\s+{re.escape(module)}\b\s*'
+                       r'(?:#\s*\([\s\S]*?\)\s*)?(?:\([\s\S]*?\)\s*)?;')
+        match = re.search(pattern, content, re.IGNORECASE)
+        text = re.sub(r'\s+', ' ', match.group(0)) if match else content
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def _link(self) -> None:
+        self.module_file = {m: path for path, modules in self.file_modules.items()
+                            for m in modules}
+        self.children: Dict[str, Set[str]] = {m: set() for m in self.module_file}
+        self.parents: Dict[str, Set[str]] = {m: set() for m in self.module_file}
+        for path, modules in self.file_modules.items():
+            refs = {r for r in self.file_refs[path]
+                    if r in self.module_file and r not in modules}
+            for module in modules:
+                self.children[module] |= refs
+                for ref in refs:
+                    self.parents[ref].add(module)
+
+    def refresh(self, paths: Set[Path]) -> Set[str]:
+        """重新解析修改过的文件，返回接口发生变化的模块"""
+        before = dict(self.headers)
+        for path in paths:
+            if path in self.files:
+                for module in self.file_modules.get(path, []):
+                    self.headers.pop(module, None)
+                self._parse(path)
+        self._link()
+        return {m for path in paths if path in self.files
+                for m in self.file_modules[path]
+                if before.get(m) != self.headers.get(m)}
+
+    def modules_affected_by(self, paths: Set[Path]) -> Set[str]:
+        """修改的文件（含头文件）直接影响的模块"""
+        modules: Set[str] = set()
+        headers = {p.name for p in paths if p.suffix.lower() in HEADER_SUFFIXES}
+        for path, defined in self.file_modules.items():
+            if path in paths or headers & set(self.file_includes.get(path, [])):
+                modules.update(defined)
+        return modules
+
+    def ancestors(self, modules: Set[str]) -> Set[str]:
+        result: Set[str] = set()
+        stack = list(modules)
+        while stack:
+            for parent in self.parents.get(stack.pop(), ()):
+                if parent not in result:
+                    result.add(parent)
+                    stack.append(parent)
+        return result
+
+    def descendants(self, module: str) -> Set[str]:
+        result = {module}
+        stack = [module]
+        while stack:
+            for child in self.children.get(stack.pop(), ()):
+                if child not in result:
+                    result.add(child)
+                    stack.append(child)
+        return result
+
+    def check_roots(self, changed: Set[str], interface_changed: Set[str]) -> List[str]:
+        """需要展开的最小根模块集合
+
+        修改的模块自身需要展开；接口变化的模块还要从其父模块展开。
+        被其他根模块包含的根模块不再单独展开。
+        """
+        roots = set(changed)
+        for module in interface_changed:
+            roots |= self.parents.get(module, set())
+        roots = {m for m in roots if m in self.module_file}
+        return sorted(m for m in roots if not (self.ancestors({m}) & roots))
+
+    def hierarchy_files(self, module: str) -> List[Dict[str, Any]]:
+        """展开模块层次需要读入的文件（依赖在前）"""
+        paths = {self.module_file[m] for m in self.descendants(module)
+                 if m in self.module_file}
+        ordered = self.scanner.analyze_dependencies([self.files[p] for p in paths])
+        return ordered
+
+
+def elaboration_script(part: str, top: str, files: List[Dict[str, Any]],
+                       defines: Optional[Dict[str, Any]] = None,
+                       include_dirs: Optional[List[str]] = None) -> str:
+    """对模块层次运行RTL展开的TCL脚本"""
+    lines = ['close_design -quiet', 'remove_files -quiet [get_files -quiet]']
+    groups: Dict[str, List[str]] = {}
+    for info in files:
+        path = Path(info.get('absolute_path') or info['path']).as_posix()
+        language = info.get('language', 'verilog')
+        if language == 'vhdl':
+            command = 'read_vhdl'
+        elif language == 'systemverilog':
+            command = 'read_verilog -sv'
+        else:
+            command = 'read_verilog'
+        groups.setdefault(command, []).append(path)
+    for command, paths in groups.items():
+        lines.append(f'{command} {_tcl_list(paths)}')
+    options = f'-rtl -name rtl_1 -top {top} -part {part}'
+    if include_dirs:
+        dirs = _tcl_list(Path(d).as_posix() for d in include_dirs)
+        options += f' -include_dirs {dirs}'
+    if defines:
+        items = [str(k) if v is None or v is True else f'{k}={v}'
+                 for k, v in defines.items()]
+        options += f' -verilog_define {_tcl_list(items)}'
+    lines.append(f'synth_design {options}')
+    return '\n'.join(lines) + '\n'
+
+
+def constraint_script(xdc_file: str) -> str:
+    """在当前展开的设计上解析约束文件"""
+    return f'read_xdc {{{Path(xdc_file).as_posix()}}}\n'
+
+
+def classify_messages(lines: List[str]):
+    """从Vivado输出中提取错误和警告"""
+    errors = [line for line in lines
+              if line.startswith(('ERROR:', 'CRITICAL WARNING:'))]
+    warnings = [line for line in lines if line.startswith('WARNING:')]
+    return errors, warnings
+
+
+class SessionTimeout(RuntimeError):
+    """会话中的脚本超时（会话已被终止）"""
+    pass
+
+
+class VivadoSession:
+    """常驻的Vivado TCL会话（vivado -mode tcl）"""
+
+    def __init__(self, command: List[str], cwd: Optional[Path] = None,
+                 on_output: Optional[Callable[[str], None]] = None,
+                 timeout: Optional[float] = DEFAULT_TIMEOUT):
+        """
+        Args:
+            command: 启动命令
+            cwd: 工作目录
+            on_output: 逐行输出回调
+            timeout: 单个脚本的超时（秒），None表示不限
+        """
+        self.command = list(command)
+        self.cwd = cwd
+        self.on_output = on_output
+        self.timeout = timeout
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self, setup: str = '') -> None:
+        """启动会话并执行初始化脚本（如创建内存工程）"""
+        self._lock = asyncio.Lock()
+        kwargs = {} if os.name == 'nt' else {'start_new_session': True}
+        self.process = await asyncio.create_subprocess_exec(
+            *[str(c) for c in self.command], cwd=str(self.cwd) if self.cwd else None,
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT, limit=STREAM_LIMIT, **kwargs)
+        returncode, lines = await self.run(setup or 'set _fpgab_ready 1\n')
+        if returncode != 0:
+            errors = '; '.join(classify_messages(lines)[0])
+            raise RuntimeError(f"Vivado会话初始化失败: {errors or returncode}")
+
+    async def run(self, script: str):
+        """执行TCL脚本，返回(返回码, 输出行)
+
+        超过timeout时终止会话并抛出SessionTimeout，调用方需要重新start。
+        """
+        if not self.alive:
+            raise RuntimeError("Vivado会话未运行")
+        async with self._lock:
+            try:
+                return await asyncio.wait_for(self._run(script), self.timeout)
+            except asyncio.TimeoutError:
+                # 输出流停在命令中间，会话无法继续使用
+                await self.kill()
+                raise SessionTimeout(f"Vivado会话在 {self.timeout:.0f}s 内未完成检查，"
+                                     f"已终止") from None
+
+    async def _run(self, script: str):
+        with tempfile.NamedTemporaryFile('w', suffix='.tcl', delete=False,
+                                         encoding='utf-8') as f:
+            f.write(script)
+            script_file = Path(f.name).as_posix()
+        try:
+            command = (f'set _fpgab_rc [catch {{source -notrace {{{script_file}}}}} '
+                       f'_fpgab_msg]; '
+                       f'if {{$_fpgab_rc}} {{puts "ERROR: $_fpgab_msg"}}; '
+                       f'puts "{SENTINEL} $_fpgab_rc"; flush stdout\n')
+            self.process.stdin.write(command.encode('utf-8'))
+            await self.process.stdin.drain()
+            lines: List[str] = []
+            while True:
+                try:
+                    raw = await self.process.stdout.readline()
+                except ValueError:
+                    # 超过STREAM_LIMIT的行已被丢弃，会话仍可继续读取
+                    limit = STREAM_LIMIT // (1024 * 1024)
+                    raw = f'[输出行超过 {limit} MiB，已丢弃]\n'.encode('utf-8')
+                if not raw:
+                    raise RuntimeError("Vivado会话意外退出")
+                text = raw.decode('utf-8', errors='ignore').rstrip('\r\n')
+                line = _PROMPT.sub('', text)
+                if line.startswith(SENTINEL):
+                    return int(line[len(SENTINEL):].strip() or 1), lines
+                lines.append(line)
+                if self.on_output is not None:
+                    self.on_output(line)
+        finally:
+            try:
+                os.unlink(script_file)
+            except OSError:
+                pass
+
+    async def kill(self) -> None:
+        """立即终止会话进程树"""
+        if self.alive:
+            kill_process_tree(self.process.pid)
+            await self.process.wait()
+
+    async def close(self, timeout: float = 10.0) -> None:
+        if not self.alive:
+            return
+        try:
+            self.process.stdin.write(b'exit\n')
+            await self.process.stdin.drain()
+            await asyncio.wait_for(self.process.wait(), timeout)
+        except (asyncio.TimeoutError, ConnectionError, OSError):
+            kill_process_tree(self.process.pid)
+            await self.process.wait()
+
+
+class WatchSession:
+    """监视源文件并在常驻Vivado会话中运行快速检查"""
+
+    def __init__(self, config: Dict[str, Any],
+                 scan: Callable[[Dict[str, Any]], Dict[str, List[Dict[str, Any]]]],
+                 session: VivadoSession, watcher, config_file: Optional[Path] = None,
+                 reload_config: Optional[Callable[[], Dict[str, Any]]] = None,
+                 reporter: Callable[[str], None] = print):
+        """
+        Args:
+            config: 工程配置
+            scan: 按配置扫描源文件的函数（返回FileScanner.scan_files的结果）
+            session: Vivado会话（未启动）
+            watcher: FileWatcher
+            config_file: 工程配置文件（修改时重新加载并扫描）
+            reload_config: 重新加载配置的函数
+        """
+        self.config = config
+        self.scan = scan
+        self.session = session
+        self.watcher = watcher
+        self.config_file = Path(config_file).absolute() if config_file else None
+        self.reload_config = reload_config
+        self.reporter = reporter
+        self.graph: Optional[HdlDependencyGraph] = None
+        self.constraints: Set[Path] = set()
+        self.rescan()
+
+    def rescan(self) -> None:
+        """重新扫描源文件，更新依赖图和监视列表"""
+        fpga = self.config.get('fpga', {})
+        self.part = fpga.get('part', '')
+        self.top = fpga.get('top_module', '')
+        self.defines = fpga.get('defines') or {}
+
+        scanned = self.scan(self.config)
+        hdl = [info for info in scanned.get('hdl', [])
+               if Path(info['path']).suffix.lower() in HDL_SUFFIXES]
+        self.graph = HdlDependencyGraph(hdl)
+        self.constraints = {Path(info['path']).absolute()
+                            for info in scanned.get('constraints', [])
+                            if Path(info['path']).suffix.lower() in CONSTRAINT_SUFFIXES}
+        self.include_dirs = sorted({d for info in hdl
+                                    for d in info.get('include_dirs', [])})
+        headers = set()
+        for directory in self.include_dirs:
+            if Path(directory).is_dir():
+                headers |= {path.absolute() for path in Path(directory).iterdir()
+                            if path.suffix.lower() in HEADER_SUFFIXES
+                            and path.is_file()}
+        files = set(self.graph.files) | self.constraints | headers
+        if self.config_file:
+            files.add(self.config_file)
+        self.watcher.update(files)
+
+    def plan(self, changed: Set[Path]) -> List[QuickCheck]:
+        """根据一批修改确定需要运行的检查"""
+        changed = {Path(p).absolute() for p in changed}
+        known = set(self.graph.files) | self.constraints
+        suffixes = HDL_SUFFIXES + CONSTRAINT_SUFFIXES
+        config_changed = self.config_file in changed if self.config_file else False
+        structural = config_changed or any(
+            not p.exists() or (p not in known and p.suffix.lower() in suffixes)
+            for p in changed)
+
+        checks: List[QuickCheck] = []
+        if structural:
+            # 配置变化或文件增删：重新扫描后从顶层展开
+            if self.config_file in changed and self.reload_config is not None:
+                try:
+                    self.config = self.reload_config()
+                except Exception as e:
+                    self.reporter(f"[ERROR] 重新加载配置失败: {e}")
+            self.rescan()
+            if self.top in self.graph.module_file:
+                checks.append(QuickCheck('rtl', self.top,
+                                         self.graph.hierarchy_files(self.top),
+                                         '文件集合变化'))
+        else:
+            interface_changed = self.graph.refresh({p for p in changed
+                                                    if p in self.graph.files})
+            modules = self.graph.modules_affected_by(changed)
+            for root in self.graph.check_roots(modules, interface_changed):
+                reason = '接口变化' if root not in modules else '内容变化'
+                checks.append(QuickCheck('rtl', root, self.graph.hierarchy_files(root),
+                                         reason))
+
+        for path in sorted(p for p in changed if p in self.constraints):
+            checks.append(QuickCheck('xdc', str(path), reason='约束变化'))
+        return checks
+
+    async def run_check(self, check: QuickCheck) -> CheckResult:
+        start = time.monotonic()
+        if check.kind == 'rtl':
+            script = elaboration_script(self.part, check.target, check.files,
+                                        self.defines, self.include_dirs)
+        else:
+            # 约束需要在顶层展开后的设计上解析
+            script = elaboration_script(self.part, self.top,
+                                        self.graph.hierarchy_files(self.top),
+                                        self.defines, self.include_dirs)
+            script += constraint_script(check.target)
+        returncode, lines = await self.session.run(script)
+        errors, warnings = classify_messages(lines)
+        return CheckResult(check=check, success=returncode == 0 and not errors,
+                           errors=errors, warnings=warnings,
+                           duration=time.monotonic() - start)
+
+    def report(self, result: CheckResult) -> None:
+        status = '[OK]' if result.success else '[ERROR]'
+        extra = f", {len(result.warnings)} 个警告" if result.warnings else ""
+        self.reporter(f"{status} {result.check.label} ({result.check.reason}, "
+                      f"{result.duration:.1f}s{extra})")
+        for line in result.errors[:20]:
+            self.reporter(f"  {line}")
+        if len(result.errors) > 20:
+            self.reporter(f"  ... 共 {len(result.errors)} 个错误")
+
+    async def handle(self, changed: Set[Path]) -> List[CheckResult]:
+        """处理一批修改"""
+        names = ', '.join(sorted(p.name for p in changed))
+        self.reporter(f"检测到修改: {names}")
+        checks = self.plan(changed)
+        if not checks:
+            self.reporter("  无需检查")
+        results = []
+        for check in checks:
+            result = await self.run_check(check)
+            self.report(result)
+            results.append(result)
+        return results
+
+    async def _start_session(self) -> None:
+        """启动Vivado会话并创建内存工程"""
+        await self.session.start(f'create_project -in_memory -part {self.part}\n')
+
+    async def run(self, initial_check: bool = True) -> None:
+        """启动Vivado会话并持续监视"""
+        start = time.monotonic()
+        await self._start_session()
+        self.reporter(f"[OK] Vivado会话已就绪 ({time.monotonic() - start:.1f}s), "
+                      f"监视 {len(self.watcher.files)} 个文件（{self.watcher.backend}）")
+        try:
+            if initial_check and self.top in self.graph.module_file:
+                self.report(await self.run_check(
+                    QuickCheck('rtl', self.top, self.graph.hierarchy_files(self.top),
+                               '初始检查')))
+            async for changed in self.watcher.changes():
+                if not self.session.alive:
+                    self.reporter("[WARN] Vivado会话已退出，重新启动")
+                    await self._start_session()
+                try:
+                    await self.handle(changed)
+                except RuntimeError as e:
+                    self.reporter(f"[ERROR] {e}")
+                    if isinstance(e, SessionTimeout):
+                        self.reporter("重新启动Vivado会话...")
+                        await self._start_session()
+        finally:
+            self.watcher.close()
+            await self.session.close()
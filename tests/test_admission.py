@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+主机级内存准入控制测试
+"""
+
+import os
+import sys
+import tempfile
+import shutil
+from pathlib import Path
+import pytest
+
+# 添加src目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from core import admission
+from core.admission import AdmissionController, AdmissionTimeoutError, GiB
+
+
+class TestAdmission:
+    """准入控制测试类"""
+
+    def setup_method(self):
+        """测试前设置"""
+        self.temp_dir = tempfile.mkdtemp(prefix="fpga_admission_")
+        self.messages = []
+        self.controller = AdmissionController(
+            state_dir=Path(self.temp_dir),
+            poll_interval=0.01,
+            timeout=0.1,
+            reporter=self.messages.append
+        )
+
+    def teardown_method(self):
+        """测试后清理"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_default_estimate(self):
+        """无历史记录时使用阶段默认值"""
+        assert self.controller.estimate('xc7z045', 'demo', 'implement') == 12 * GiB
+        assert self.controller.estimate('xc7z045', 'demo', 'other') == \
+            admission.DEFAULT_ESTIMATE
+
+    def test_history_estimate(self):
+        """成功运行后记录峰值，并用于后续估算"""
+        ticket = self.controller.acquire('xc7z045', 'demo', 'implement')
+        ticket.sampler = admission.MemorySampler(os.getpid())
+        ticket.sampler.peak = 10 * GiB
+        self.controller.release(ticket)
+
+        expected = int(10 * GiB * 1.15)
+        assert self.controller.estimate('xc7z045', 'demo', 'implement') == expected
+        # 同一器件的其他工程也可以借用该记录
+        assert self.controller.estimate('xc7z045', 'other', 'implement') == expected
+
+    def test_failed_run_not_recorded(self):
+        """失败的运行不写入历史"""
+        ticket = self.controller.acquire('xc7z045', 'demo', 'synthesize')
+        ticket.sampler = admission.MemorySampler(os.getpid())
+        ticket.sampler.peak = 1 * GiB
+        ticket.failed = True
+        self.controller.release(ticket)
+        assert self.controller.snapshot()['history'] == {}
+
+    def test_waits_when_memory_insufficient(self, monkeypatch):
+        """内存不足时排队并报告原因"""
+        monkeypatch.setattr(admission, 'get_available_memory', lambda: 8 * GiB)
+
+        first = self.controller.acquire('xc7z045', 'demo', 'synthesize')
+        with pytest.raises(AdmissionTimeoutError):
+            self.controller.acquire('xc7z045', 'demo', 'implement')
+
+        assert self.messages and '需要约' in self.messages[0]
+        self.controller.release(first)
+
+        # 运行中的任务释放后可以立即获得准入
+        ticket = self.controller.acquire('xc7z045', 'demo', 'implement')
+        self.controller.release(ticket)
+        state = self.controller.snapshot()
+        assert state['running'] == {}
+        assert state['waiting'] == {}
+
+    def test_stale_entries_pruned(self, monkeypatch):
+        """已退出、PID被复用和停止轮询的条目不再阻塞准入"""
+        monkeypatch.setattr(admission, 'get_available_memory', lambda: 8 * GiB)
+        started = admission._process_start_time(os.getpid())
+        assert admission._pid_alive(os.getpid(), started)
+        if started is not None:
+            assert not admission._pid_alive(os.getpid(), started - 3600)
+
+        with admission.FileLock(self.controller.lock_path):
+            state = self.controller._load_state()
+            # PID被复用：进程存在但启动时间不同
+            state['running']['reused'] = {'pid': os.getpid(), 'pid_started': 1.0,
+                                          'key': 'k', 'stage': 'implement',
+                                          'reserved': 64 * GiB, 'rss': 0}
+            # 同一进程中已停止轮询的排队条目
+            state['waiting']['abandoned'] = {'pid': os.getpid(), 'key': 'k',
+                                             'stage': 'implement', 'since': 0.0,
+                                             'expires': 1.0}
+            self.controller._save_state(state)
+
+        state = self.controller.snapshot()
+        assert state['waiting'] == {}
+        if started is not None:
+            assert state['running'] == {}
+            ticket = self.controller.acquire('xc7z045', 'demo', 'implement')
+            entry = self.controller.snapshot()['running'][ticket.run_id]
+            assert entry['pid_started'] == started
+            self.controller.release(ticket)
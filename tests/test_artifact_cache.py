@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+产物缓存测试
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+import pytest
+
+# 添加src目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from core.artifact_cache import ArtifactCache, parse_size
+from core.build_graph import BuildGraph, BuildNode
+from core.plugin_base import BuildResult
+
+
+def _ok():
+    return BuildResult(success=True, artifacts={}, logs={}, metrics={}, errors=[])
+
+
+class TestArtifactCache:
+    """产物缓存测试类"""
+
+    def test_store_and_restore(self, tmp_path):
+        """产物按内容保存，恢复到另一个工作目录"""
+        cache = ArtifactCache(tmp_path / 'cache')
+        src = tmp_path / 'a'
+        (src / 'runs').mkdir(parents=True)
+        (src / 'runs' / 'top.dcp').write_bytes(b'checkpoint')
+        (src / 'runs' / 'top.rpt').write_text('report')
+
+        files = [src / 'runs' / 'top.dcp', src / 'runs' / 'top.rpt']
+        written = cache.store('k1', 'synth', files, src)
+        assert written == len(b'checkpoint') + len('report')
+        # 相同内容不重复写入
+        assert cache.store('k2', 'synth', [src / 'runs' / 'top.dcp'], src) == 0
+
+        dest = tmp_path / 'b'
+        restored = cache.restore('k1', dest)
+        assert sorted(restored) == ['runs/top.dcp', 'runs/top.rpt']
+        assert (dest / 'runs' / 'top.dcp').read_bytes() == b'checkpoint'
+        assert cache.restore('missing', dest) is None
+
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['entries'] == 2
+        assert stats['bytes_saved'] == written
+
+    def test_evict_least_recently_used(self, tmp_path):
+        """超过容量上限时淘汰最久未使用的条目"""
+        cache = ArtifactCache(tmp_path / 'cache', max_size=None)
+        work = tmp_path / 'work'
+        work.mkdir()
+        for index in range(3):
+            path = work / f'f{index}.bit'
+            path.write_bytes(bytes([index]) * 100)
+            cache.store(f'key{index}', 'bitstream', [path], work)
+            entry = cache._entry_path(f'key{index}')
+            os.utime(entry, (time.time() - 100 + index, time.time() - 100 + index))
+
+        # 最近使用key0
+        assert cache.restore('key0', tmp_path / 'out') is not None
+        assert cache.evict(max_size=200) == 1
+        assert cache.lookup('key1') is None
+        assert cache.lookup('key0') is not None
+        assert cache.lookup('key2') is not None
+        assert cache.stats()['size'] == 200
+
+    def test_parse_size(self):
+        """容量字符串解析"""
+        assert parse_size('50G') == 50 * 1024 ** 3
+        assert parse_size('512MiB') == 512 * 1024 ** 2
+        assert parse_size(1000) == 1000
+        with pytest.raises(ValueError):
+            parse_size('lots')
+
+    def test_from_config(self, tmp_path, monkeypatch):
+        """未配置build.cache时不启用缓存"""
+        monkeypatch.delenv('FPGABUILDER_CACHE_DIR', raising=False)
+        monkeypatch.delenv('FPGABUILDER_CACHE', raising=False)
+        assert ArtifactCache.from_config({}) is None
+        disabled = {'build': {'cache': {'enabled': False}}}
+        assert ArtifactCache.from_config(disabled) is None
+        settings = {'path': str(tmp_path), 'max_size': '1G'}
+        cache = ArtifactCache.from_config({'build': {'cache': settings}})
+        assert cache.root == tmp_path
+        assert cache.max_size == 1024 ** 3
+
+        monkeypatch.setenv('FPGABUILDER_CACHE_DIR', str(tmp_path / 'env'))
+        assert ArtifactCache.from_config({}).root == tmp_path / 'env'
+        monkeypatch.setenv('FPGABUILDER_CACHE', '0')
+        assert ArtifactCache.from_config({}) is None
+
+    def test_graph_restores_from_cache(self, tmp_path):
+        """第二个工作区命中缓存，不运行节点动作"""
+        cache = ArtifactCache(tmp_path / 'cache')
+        calls = []
+
+        def make_nodes(base):
+            source = base / 'top.v'
+
+            def synth():
+                calls.append(str(base))
+                (base / 'out').mkdir(exist_ok=True)
+                (base / 'out' / 'top.dcp').write_text(source.read_text().upper())
+                return _ok()
+
+            return [BuildNode(name='synth', action=synth, inputs=[Path('top.v')],
+                              outputs=['out/top.dcp'], cacheable=True)]
+
+        results = []
+        for name in ('ws1', 'ws2'):
+            base = tmp_path / name
+            base.mkdir()
+            (base / 'top.v').write_text('module top; endmodule')
+            graph = BuildGraph(make_nodes(base), {'fpga': {'part': 'xc7a35t'}},
+                               state_dir=base / '.fpgab', base_dir=base,
+                               reporter=lambda msg: None, cache=cache)
+            results.append(graph.run(['synth']))
+
+        assert results[0].ran == ['synth']
+        assert results[1].restored == ['synth']
+        assert results[1].ran == []
+        assert calls == [str(tmp_path / 'ws1')]
+        ws2 = tmp_path / 'ws2'
+        assert (ws2 / 'out' / 'top.dcp').read_text() == 'MODULE TOP; ENDMODULE'
+
+        # 恢复后的节点记录为成功，再次运行已是最新
+        graph = BuildGraph(make_nodes(ws2), {'fpga': {'part': 'xc7a35t'}},
+                           state_dir=ws2 / '.fpgab', base_dir=ws2,
+                           reporter=lambda msg: None, cache=cache)
+        assert graph.run(['synth']).up_to_date == ['synth']
+
+    def test_downstream_detached_after_restore(self, tmp_path):
+        """上游从缓存恢复时下游改用detached_action，之后的增量构建保持该状态"""
+        cache = ArtifactCache(tmp_path / 'cache')
+        calls = []
+
+        def make_nodes(base):
+            def synth():
+                calls.append('synth')
+                (base / 'top.dcp').write_text('netlist')
+                return _ok()
+
+            def step(name):
+                def action():
+                    calls.append(name)
+                    return _ok()
+                return action
+
+            return [
+                BuildNode(name='synth', action=synth, inputs=[Path('top.v')],
+                          outputs=['top.dcp'], cacheable=True),
+                BuildNode(name='impl', action=step('impl'),
+                          detached_action=step('impl_detached'), deps=['synth']),
+                BuildNode(name='bitstream', action=step('bitstream'),
+                          detached_action=step('bitstream_detached'),
+                          deps=['impl'], values={'options': 'a'}),
+            ]
+
+        def graph(base, nodes=None):
+            return BuildGraph(nodes or make_nodes(base), {'fpga': {'part': 'xc7a35t'}},
+                              state_dir=base / '.fpgab', base_dir=base,
+                              reporter=lambda msg: None, cache=cache)
+
+        for name in ('ws1', 'ws2'):
+            (tmp_path / name).mkdir()
+            (tmp_path / name / 'top.v').write_text('module top; endmodule')
+        assert graph(tmp_path / 'ws1').run(['synth']).ran == ['synth']
+
+        calls.clear()
+        result = graph(tmp_path / 'ws2').run(['bitstream'])
+        assert result.restored == ['synth']
+        assert calls == ['impl_detached', 'bitstream_detached']
+
+        # 只有比特流配置变化时，已实现的检查点同样不在工程中
+        calls.clear()
+        nodes = make_nodes(tmp_path / 'ws2')
+        nodes[2].values = {'options': 'b'}
+        assert graph(tmp_path / 'ws2', nodes).run(['bitstream']).ran == ['bitstream']
+        assert calls == ['bitstream_detached']
+
+    def test_no_resynthesis_after_synth_hit(self, tmp_path, monkeypatch):
+        """只命中综合缓存时，实现和比特流从恢复的检查点运行，不重新综合"""
+        from plugins.vivado.plugin import VivadoPlugin
+
+        cache = ArtifactCache(tmp_path / 'cache')
+        config = {
+            'project': {'name': 'demo'},
+            'project_dir': 'build',
+            'fpga': {'part': 'xc7a35tcsg324-1', 'top_module': 'top'},
+            'source': {'hdl': [{'path': 'top.v'}]},
+        }
+        scripts = []
+
+        async def fake_run(tcl_script, script_name, config=None, on_output=None):
+            scripts.append((script_name, tcl_script))
+            outputs = {'synthesize.tcl': 'build/demo.runs/synth_1/top.dcp',
+                       'implement.tcl': 'build/demo.runs/impl_1/top_routed.dcp'}
+            if script_name in outputs:
+                Path(outputs[script_name]).parent.mkdir(parents=True, exist_ok=True)
+                Path(outputs[script_name]).write_text('checkpoint')
+            return _ok()
+
+        def build(name, target):
+            base = tmp_path / name
+            base.mkdir()
+            (base / 'top.v').write_text('module top; endmodule')
+            monkeypatch.chdir(base)
+            plugin = VivadoPlugin()
+            plugin.working_dir = base
+            plugin.initialize = lambda config=None: True
+            plugin._run_vivado_tcl_async = fake_run
+            graph = BuildGraph(plugin.build_graph_nodes(config), config,
+                               state_dir=base / '.fpgab', base_dir=base,
+                               reporter=lambda msg: None, cache=cache)
+            return graph.run([target])
+
+        assert 'synth' in build('ws1', 'synth').ran
+        scripts.clear()
+        result = build('ws2', 'bitstream')
+        assert result.success and result.restored == ['synth']
+        assert result.ran == ['create_project', 'impl', 'bitstream']
+        names = [name for name, _ in scripts]
+        assert 'synthesize.tcl' not in names
+        assert names[-2:] == ['implement.tcl', 'generate_bitstream.tcl']
+        for _, script in scripts:
+            assert 'launch_runs' not in script and 'synth_design' not in script
+        implement, bitstream = scripts[-2][1], scripts[-1][1]
+        assert 'synth_1/top.dcp' in implement and 'impl_1/top_routed.dcp' in implement
+        assert 'open_checkpoint' in bitstream and 'impl_1/top_routed.dcp' in bitstream
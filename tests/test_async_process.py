@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+异步进程执行测试
+"""
+
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+import pytest
+
+# 添加src目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from core.async_process import run_process, run_sync
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    # 僵尸进程视为已退出
+    stat = Path(f'/proc/{pid}/stat')
+    if stat.exists():
+        return stat.read_text().split(')')[-1].split()[0] != 'Z'
+    return True
+
+
+class TestAsyncProcess:
+    """异步进程执行测试类"""
+
+    def test_streams_output(self):
+        """逐行流式转发输出"""
+        lines = []
+        code = "import sys; print('a'); print('b'); print('e', file=sys.stderr)"
+        result = run_sync(run_process(
+            [sys.executable, '-c', code],
+            on_output=lambda name, line: lines.append((name, line))))
+        assert result.returncode == 0
+        assert result.stdout.split() == ['a', 'b']
+        assert ('stdout', 'a') in lines and ('stderr', 'e') in lines
+
+    def test_concurrent_builds_on_one_loop(self):
+        """单个事件循环并发驱动多个进程"""
+        async def main():
+            cmd = [sys.executable, '-c', 'import time; time.sleep(0.5)']
+            return await asyncio.gather(*[run_process(cmd) for _ in range(4)])
+
+        start = time.monotonic()
+        results = run_sync(main())
+        assert all(r.returncode == 0 for r in results)
+        assert time.monotonic() - start < 1.8
+
+    @pytest.mark.skipif(sys.platform == 'win32', reason="依赖POSIX进程信息")
+    def test_cancel_kills_process_tree(self, tmp_path):
+        """取消任务时终止整个进程树"""
+        pid_file = tmp_path / 'child.pid'
+        code = (
+            "import subprocess, sys, time\n"
+            "p = subprocess.Popen([sys.executable, '-c',\n"
+            "                      'import time; time.sleep(60)'])\n"
+            f"open({str(pid_file)!r}, 'w').write(str(p.pid))\n"
+            "time.sleep(60)\n"
+        )
+
+        async def main():
+            task = asyncio.ensure_future(run_process([sys.executable, '-c', code]))
+            for _ in range(100):
+                if pid_file.exists() and pid_file.read_text():
+                    break
+                await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        run_sync(main())
+        child_pid = int(pid_file.read_text())
+        for _ in range(50):
+            if not _pid_alive(child_pid):
+                break
+            time.sleep(0.05)
+        assert not _pid_alive(child_pid)
+
+    def test_long_lines(self):
+        """超过64 KiB的单行输出不会中断执行"""
+        lines = []
+        code = "import sys; print('x' * 200000); print('tail', end='')"
+        result = run_sync(run_process([sys.executable, '-c', code],
+                                      on_output=lambda name, line: lines.append(line)))
+        assert result.returncode == 0
+        assert [len(line) for line in lines] == [200000, 4]
+        assert result.stdout == 'x' * 200000 + '\ntail'
+
+    @pytest.mark.skipif(sys.platform == 'win32', reason="依赖POSIX进程信息")
+    def test_callback_error_kills_process(self, tmp_path):
+        """输出回调抛出异常时同样终止进程"""
+        pid_file = tmp_path / 'pid'
+        code = ("import os, time\n"
+                f"open({str(pid_file)!r}, 'w').write(str(os.getpid()))\n"
+                "print('ready', flush=True); time.sleep(60)")
+
+        def on_output(name, line):
+            raise RuntimeError('boom')
+
+        with pytest.raises(RuntimeError):
+            run_sync(run_process([sys.executable, '-c', code], on_output=on_output))
+        pid = int(pid_file.read_text())
+        for _ in range(50):
+            if not _pid_alive(pid):
+                break
+            time.sleep(0.05)
+        assert not _pid_alive(pid)
+
+    def test_run_sync_inside_running_loop(self):
+        """在运行中的事件循环内调用同步接口"""
+        async def inner():
+            return 42
+
+        async def outer():
+            return run_sync(inner())
+
+        assert asyncio.run(outer()) == 42
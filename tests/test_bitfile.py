@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+.bit 文件解析和 bit→bin 转换测试
+"""
+
+import mmap
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+
+# 添加项目根目录和src目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / 'src'))
+
+from plugins.vivado.bitfile import (BITSWAP_TABLE, Bitfile, BitfileError, bit_to_bin,
+                                    parse_header)
+import pack_fpga
+
+BIT_FILE = Path(__file__).parent / 'data' / 'cfgmem' / 'demo.bit'
+
+
+class TestBitfile:
+    """.bit 文件测试类"""
+
+    def test_header_fields(self):
+        """解析文件头各字段，配置数据是mmap上的零拷贝视图"""
+        with Bitfile(BIT_FILE) as bit:
+            header = bit.header
+            assert (header.design_name, header.user_id, header.tool_version) == \
+                ('demo_top', '0XFFFFFFFF', '2023.2')
+            assert (header.part, header.date, header.time) == \
+                ('7a35tcsg324', '2026/10/19', '12:34:56')
+            assert isinstance(bit.payload.obj, mmap.mmap) and bit.payload.readonly
+            assert len(bit.payload) == header.data_length == 73
+            assert bit.payload[20:28] == bytes.fromhex('FFFFFFFFAA995566')
+
+        data = BIT_FILE.read_bytes()
+        assert data[header.time_offset:header.time_offset + 8] == b'12:34:56'
+        assert BIT_FILE.stat().st_size == header.data_offset + header.data_length
+
+    def test_invalid_files(self, tmp_path):
+        """魔数不匹配、数据截断或空文件时报错"""
+        data = BIT_FILE.read_bytes()
+        with pytest.raises(BitfileError, match='魔数'):
+            parse_header(b'\x00' * 64)
+        with pytest.raises(BitfileError, match='截断'):
+            parse_header(data[:-1])
+        # 只给出文件开头时按文件总大小检查
+        assert parse_header(data[:128], size=len(data)).time == '12:34:56'
+
+        empty = tmp_path / 'empty.bit'
+        empty.write_bytes(b'')
+        with pytest.raises(BitfileError):
+            Bitfile(empty)
+
+    @pytest.mark.parametrize('bitswap', [False, True])
+    def test_bit_to_bin(self, bitswap, tmp_path):
+        """bin文件内容为配置数据，可选按位反转"""
+        with Bitfile(BIT_FILE) as bit:
+            payload = bit.payload.tobytes()
+
+        output = tmp_path / 'out' / 'top.bin'
+        bit_to_bin(BIT_FILE, output, bitswap=bitswap)
+        expected = payload.translate(BITSWAP_TABLE) if bitswap else payload
+        assert output.read_bytes() == expected
+        assert not list(output.parent.glob('*.tmp'))
+
+    def test_pack_timestamp(self, tmp_path):
+        """按文件头字段提取和修复时间戳"""
+        assert pack_fpga.extract_timestamp_from_bit(BIT_FILE) == b'12:34:56'
+
+        # 保留了bit文件头的bin：按字段位置修改
+        stale = bytearray(BIT_FILE.read_bytes())
+        offset = parse_header(bytes(stale)).time_offset
+        stale[offset:offset + 8] = b'00:11:22'
+        bin_file = tmp_path / 'top.bin'
+        bin_file.write_bytes(bytes(stale))
+        assert pack_fpga.fix_bin_timestamp(bin_file, BIT_FILE)
+        assert bin_file.read_bytes() == BIT_FILE.read_bytes()
+
+    def test_pack_pure_fpga_without_bootgen(self, tmp_path):
+        """纯FPGA打包直接从bit文件生成bin，不调用bootgen"""
+        result = subprocess.run(
+            [sys.executable, str(project_root / 'pack_fpga.py'), '--pure-fpga',
+             '--bit', str(BIT_FILE), '--bootgen', str(tmp_path / 'missing-bootgen'),
+             '--output-dir', str(tmp_path / 'bin'),
+             '--version-file', str(tmp_path / 'none.yaml')],
+            cwd=tmp_path, capture_output=True, text=True, timeout=60)
+        assert result.returncode == 0, result.stdout + result.stderr
+
+        bins = list((tmp_path / 'bin').glob('V*.bin'))
+        assert len(bins) == 1
+        with Bitfile(BIT_FILE) as bit:
+            assert bins[0].read_bytes() == bit.payload.tobytes()
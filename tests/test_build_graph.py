@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+指纹构建图测试
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+import pytest
+
+# 添加src目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from core.build_graph import BuildGraph, BuildGraphError, BuildNode
+from core.plugin_base import BuildResult
+
+
+def _ok():
+    return BuildResult(success=True, artifacts={}, logs={}, metrics={})
+
+
+class TestBuildGraph:
+    """构建图测试类"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """创建临时工程"""
+        self.base = tmp_path
+        self.state_dir = tmp_path / 'build' / '.fpgab'
+        (tmp_path / 'top.v').write_text('module top; endmodule\n')
+        self.calls = []
+        self.messages = []
+        self.config = {'build': {'synthesis': {'strategy': 'A'}, 'implementation': {}}}
+
+    def _action(self, name, output=None, delay=0.0):
+        async def action():
+            self.calls.append(name)
+            if delay:
+                await asyncio.sleep(delay)
+            if output:
+                (self.base / output).write_text(name)
+            return _ok()
+        return action
+
+    def _graph(self):
+        nodes = [
+            BuildNode('create_project', self._action('create_project', 'p.xpr'),
+                      outputs=['p.xpr'], values={'file_set': ['top.v']}),
+            BuildNode('synth', self._action('synth', 'synth.dcp'),
+                      deps=['create_project'], inputs=[Path('top.v')],
+                      outputs=['*.dcp'], config_keys=['build.synthesis']),
+            BuildNode('impl', self._action('impl'), deps=['synth'],
+                      config_keys=['build.implementation']),
+        ]
+        return BuildGraph(nodes, self.config, self.state_dir, base_dir=self.base,
+                          reporter=self.messages.append)
+
+    def test_only_stale_nodes_run(self):
+        """未变化时不重新运行，输入变化只影响下游"""
+        assert self._graph().run(['impl']).success
+        assert self.calls == ['create_project', 'synth', 'impl']
+
+        self.calls.clear()
+        result = self._graph().run(['impl'])
+        assert result.success and self.calls == []
+        assert sorted(result.up_to_date) == ['create_project', 'impl', 'synth']
+
+        (self.base / 'top.v').write_text('module top(input a); endmodule\n')
+        self.calls.clear()
+        self._graph().run(['impl'])
+        assert self.calls == ['synth', 'impl']
+
+    def test_explain_reasons(self):
+        """--explain 说明重新运行的原因"""
+        self._graph().run(['impl'])
+        self.config['build']['synthesis']['strategy'] = 'B'
+        (self.base / 'p.xpr').unlink()
+        self.messages.clear()
+        self._graph().run(['impl'], explain=True, dry_run=True)
+        text = '\n'.join(self.messages)
+        assert '[RUN]  create_project: 输出缺失: p.xpr' in text
+        assert '配置变化: build.synthesis' in text
+        assert '依赖 create_project 将重新运行' in text
+
+    def test_independent_nodes_run_in_parallel(self):
+        """相互独立的节点并行运行"""
+        nodes = [
+            BuildNode('a', self._action('a', delay=0.3)),
+            BuildNode('b', self._action('b', delay=0.3)),
+            BuildNode('c', self._action('c'), deps=['a', 'b']),
+        ]
+        graph = BuildGraph(nodes, {}, self.state_dir, base_dir=self.base,
+                           reporter=self.messages.append)
+        start = time.monotonic()
+        assert graph.run(['c'], jobs=2).success
+        assert time.monotonic() - start < 0.55
+        assert self.calls[-1] == 'c'
+
+    def test_failure_blocks_dependents(self):
+        """失败节点的下游不运行，下次重新运行失败节点"""
+        def fail():
+            self.calls.append('a')
+            return BuildResult(success=False, artifacts={}, logs={}, metrics={},
+                               errors=['x'])
+
+        nodes = [BuildNode('a', fail), BuildNode('b', self._action('b'), deps=['a'])]
+        graph = BuildGraph(nodes, {}, self.state_dir, base_dir=self.base,
+                           reporter=self.messages.append)
+        result = graph.run(['b'])
+        assert not result.success
+        assert result.failed == ['a'] and result.blocked == ['b']
+        decisions = graph.plan(['b'])
+        assert '上次运行失败' in decisions['a'].reasons
+
+    def test_cycle_detected(self):
+        """循环依赖报错"""
+        nodes = [BuildNode('a', _ok, deps=['b']), BuildNode('b', _ok, deps=['a'])]
+        with pytest.raises(BuildGraphError):
+            BuildGraph(nodes, {}, self.state_dir, base_dir=self.base)
+
+    def test_vivado_project_nodes_serialized(self, monkeypatch):
+        """IP核和Block Design生成打开同一个工程，不能并行运行"""
+        from plugins.vivado.plugin import VivadoPlugin
+
+        monkeypatch.chdir(self.base)
+        (self.base / 'ip').mkdir()
+        (self.base / 'ip' / 'clk_wiz_0.xci').write_text('{}')
+        (self.base / 'bd').mkdir()
+        (self.base / 'bd' / 'system.bd').write_text('{}')
+        config = {
+            'project': {'name': 'demo'},
+            'fpga': {'part': 'xc7a35tcsg324-1', 'top_module': 'top'},
+            'source': {'hdl': [{'path': 'top.v'}],
+                       'ip_cores': [{'path': 'ip/clk_wiz_0.xci'}],
+                       'block_design': {'bd_file': 'bd/system.bd'}},
+        }
+        plugin = VivadoPlugin()
+        plugin.working_dir = self.base
+        plugin.initialize = lambda config=None: True
+        nodes = {node.name: node for node in plugin.build_graph_nodes(config)}
+        assert nodes['ip_generate'].deps == ['create_project']
+        assert nodes['bd_generate'].deps == ['ip_generate']
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+构建矩阵测试
+"""
+
+import sys
+from pathlib import Path
+import pytest
+
+# 添加src目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from core.build_matrix import (MatrixError, expand_matrix, expand_matrix_entries,
+                               select_variants)
+from core.multi_project import ProjectEntry
+from plugins.vivado.file_scanner import ScanCache
+from plugins.vivado.plugin import VivadoPlugin
+from plugins.vivado.tcl_templates import BasicProjectTemplate
+
+
+def _config(**matrix):
+    return {
+        'project': {'name': 'demo', 'version': '1.0'},
+        'fpga': {'vendor': 'xilinx', 'part': 'xc7a35tcsg324-1', 'top_module': 'top',
+                 'defines': {'COMMON': 1}},
+        'source': {'hdl': [{'path': 'top.v'}]},
+        'build': {'flash': {'output_path': 'out/demo.mcs'}},
+        'matrix': matrix,
+    }
+
+
+class TestBuildMatrix:
+    """构建矩阵测试类"""
+
+    def test_expand_axes(self):
+        """各维度取笛卡尔积，每个变体使用独立的工作目录"""
+        variants = expand_matrix(_config(
+            part=['xc7a35tcsg324-1', 'xc7a100tcsg324-1', 'xc7a200tfbg484-1'],
+            board=['revA', 'revB'],
+            exclude=[{'part': 'xc7a200tfbg484-1', 'board': 'revA'}],
+        ))
+        names = [v.name for v in variants]
+        assert len(variants) == 5
+        assert 'xc7a200tfbg484-1_revA' not in names
+
+        variant = variants[0]
+        assert variant.name == 'xc7a35tcsg324-1_revA'
+        assert variant.config['fpga']['board'] == 'revA'
+        assert variant.config['project_dir'] == './build/xc7a35tcsg324-1_revA'
+        build = variant.config['build']
+        assert build['bitstream']['output_dir'] == \
+            'build/bitstreams/xc7a35tcsg324-1_revA'
+        assert build['flash']['output_path'] == 'out/demo_xc7a35tcsg324-1_revA.mcs'
+        assert 'matrix' not in variant.config
+        assert len({v.config['project_dir'] for v in variants}) == 5
+
+    def test_defines_and_overrides(self):
+        """宏定义组与基础宏定义合并，按维度取值覆盖配置"""
+        variants = expand_matrix(_config(
+            board=['revA', 'revB'],
+            defines={'base': {}, 'debug': {'DEBUG': None, 'LEVEL': 2}},
+            overrides={
+                'board': {'revB': {'source': {'constraints': [{'path': 'revB.xdc'}]}}},
+            },
+            include=[{'name': 'special', 'top_module': 'top_special',
+                      'defines': {'SPECIAL': 1}}],
+        ))
+        by_name = {v.name: v for v in variants}
+        assert set(by_name) == {'revA_base', 'revA_debug', 'revB_base', 'revB_debug',
+                                'special'}
+        assert by_name['revA_debug'].config['fpga']['defines'] == \
+            {'COMMON': 1, 'DEBUG': None, 'LEVEL': 2}
+        assert by_name['revB_base'].config['source']['constraints'] == \
+            [{'path': 'revB.xdc'}]
+        assert 'constraints' not in by_name['revA_base'].config['source']
+        assert by_name['special'].config['fpga']['top_module'] == 'top_special'
+
+        script = BasicProjectTemplate(by_name['revA_debug'].config).render()
+        assert ('set_property verilog_define {COMMON=1 DEBUG LEVEL=2} '
+                '[get_filesets sources_1]') in script
+
+        assert [v.name for v in select_variants(variants, ['special'])] == ['special']
+        with pytest.raises(MatrixError):
+            select_variants(variants, ['missing'])
+
+    def test_invalid_matrix(self):
+        """未知维度和重复名称报错"""
+        with pytest.raises(MatrixError):
+            expand_matrix(_config(speed=['-1', '-2']))
+        with pytest.raises(MatrixError):
+            expand_matrix(_config(board=['revA'],
+                                  include=[{'name': 'revA', 'board': 'revA'}]))
+        assert expand_matrix({'project': {}}) == []
+
+    def test_expand_project_entries(self, tmp_path):
+        """多工程构建中的矩阵工程展开为变体条目，下游依赖所有变体"""
+        lib = ProjectEntry(name='lib', root=tmp_path / 'lib',
+                           config_file=tmp_path / 'lib' / 'f.yaml',
+                           config=_config(board=['revA', 'revB']))
+        app = ProjectEntry(name='app', root=tmp_path / 'app',
+                           config_file=tmp_path / 'app' / 'f.yaml',
+                           config={'project': {'name': 'app'}}, depends_on=['lib'])
+        entries = expand_matrix_entries([lib, app])
+        assert [e.name for e in entries] == ['lib:revA', 'lib:revB', 'app']
+        assert entries[-1].depends_on == ['lib:revA', 'lib:revB']
+
+    def test_shared_scan(self, tmp_path):
+        """变体之间共享源文件扫描结果"""
+        (tmp_path / 'top.v').write_text('module top; endmodule\n')
+        cache = ScanCache()
+        results = []
+        variants = expand_matrix(_config(part=['xc7a35tcsg324-1', 'xc7a100tcsg324-1']))
+        for variant in variants:
+            plugin = VivadoPlugin()
+            plugin.working_dir = tmp_path
+            plugin.scan_cache = cache
+            results.append(plugin.scan_and_import_files(variant.config))
+        assert cache.misses == 1 and cache.hits == 1
+        assert results[0] == results[1]
+        assert results[0] is not results[1]
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+构建服务测试
+"""
+
+import asyncio
+import os
+import stat
+import sys
+from pathlib import Path
+import pytest
+
+# 添加src目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from core import build_service
+from core.build_service import (BuildService, BuildServiceError, parse_endpoint,
+                                query_status, submit_request)
+
+
+class _FakeBuilds:
+    """记录执行顺序的模拟构建，release之前一直阻塞"""
+
+    def __init__(self):
+        self.order = []
+        self.release = None
+
+    async def execute(self, request, emit):
+        if self.release is None:
+            self.release = asyncio.Event()
+        self.order.append(request['name'])
+        emit(f"building {request['name']}")
+        await self.release.wait()
+        emit(f"done {request['name']}")
+        return {'success': request['name'] != 'bad'}
+
+    @staticmethod
+    def fingerprint(request):
+        return request['name']
+
+
+class TestBuildService:
+    """构建服务测试类"""
+
+    def test_priority_and_coalescing(self):
+        """交互式请求优先于夜间请求，相同指纹的请求合并执行"""
+        async def main():
+            builds = _FakeBuilds()
+            service = BuildService(builds.execute, builds.fingerprint)
+
+            first, _ = await service.submit({'name': 'a', 'priority': 'nightly'})
+            await asyncio.sleep(0.01)           # a开始运行
+            nightly, _ = await service.submit({'name': 'b', 'priority': 'nightly'})
+            request = {'name': 'c', 'priority': 'interactive'}
+            interactive, _ = await service.submit(request)
+            same, coalesced = await service.submit(dict(request))
+            assert coalesced and same is interactive
+            assert service.position(interactive) == 1
+            assert service.position(nightly) == 2
+
+            # 合并的交互式请求提升排队中的夜间任务
+            upgraded, coalesced = await service.submit({'name': 'b',
+                                                        'priority': 'interactive'})
+            assert coalesced and upgraded.priority == 'interactive'
+
+            builds.release.set()
+            results = await asyncio.gather(service.wait(first),
+                                           service.wait(interactive),
+                                           service.wait(nightly))
+            assert all(r['success'] for r in results)
+            assert results[1]['requests'] == 2
+            assert builds.order == ['a', 'c', 'b']
+            await service.close()
+
+        asyncio.run(asyncio.wait_for(main(), timeout=10))
+
+    def test_unknown_priority(self):
+        """未知优先级被拒绝"""
+        async def main():
+            builds = _FakeBuilds()
+            service = BuildService(builds.execute, builds.fingerprint)
+            with pytest.raises(BuildServiceError):
+                await service.submit({'name': 'a', 'priority': 'urgent'})
+            await service.close()
+
+        asyncio.run(main())
+
+    def test_parse_endpoint(self, tmp_path):
+        """host:port 为TCP，其他为Unix套接字"""
+        assert parse_endpoint('127.0.0.1:7600') == ('tcp', ('127.0.0.1', 7600))
+        socket_path = tmp_path / 'fpgab.sock'
+        assert parse_endpoint(str(socket_path)) == ('unix', socket_path)
+
+    @pytest.mark.skipif(sys.platform == 'win32', reason='Unix套接字')
+    def test_socket_clients_share_execution(self, tmp_path):
+        """两个客户端提交相同请求，共享一次执行和日志"""
+        socket_path = str(tmp_path / 'fpgab.sock')
+
+        async def main():
+            builds = _FakeBuilds()
+            service = BuildService(builds.execute, builds.fingerprint)
+            await service.start(socket_path)
+
+            logs = ([], [])
+            accepted = []
+            clients = [
+                asyncio.ensure_future(submit_request({'name': 'x'}, socket_path,
+                                                     on_output=logs[i].append,
+                                                     on_accepted=accepted.append))
+                for i in range(2)
+            ]
+            while len(accepted) < 2:
+                await asyncio.sleep(0.01)
+            status = await query_status(socket_path)
+            assert len(status['active']) == 1
+            assert status['active'][0]['requests'] == 2
+
+            builds.release.set()
+            results = await asyncio.gather(*clients)
+            assert [r['success'] for r in results] == [True, True]
+            assert builds.order == ['x']
+            assert sorted(a['coalesced'] for a in accepted) == [False, True]
+            assert 'done x' in logs[0] and 'done x' in logs[1]
+
+            # 提交后立即返回，任务在服务中继续执行
+            detached = await submit_request({'name': 'bad'}, socket_path, detach=True)
+            assert detached['type'] == 'accepted'
+            history = (await query_status(socket_path))['history']
+            while history[0]['id'] != detached['id']:
+                await asyncio.sleep(0.01)
+                history = (await query_status(socket_path))['history']
+            assert history[0]['success'] is False
+            await service.close()
+
+        asyncio.run(asyncio.wait_for(main(), timeout=10))
+
+    def test_tcp_requires_token(self, tmp_path):
+        """TCP端点必须配置令牌，令牌不一致的请求被拒绝且不会执行"""
+        async def main():
+            builds = _FakeBuilds()
+            with pytest.raises(BuildServiceError):
+                service = BuildService(builds.execute, builds.fingerprint)
+                await service.start('127.0.0.1:0')
+
+            service = BuildService(builds.execute, builds.fingerprint, token='secret')
+            server = await service.start('127.0.0.1:0')
+            endpoint = f"127.0.0.1:{server.sockets[0].getsockname()[1]}"
+            for token in (None, 'wrong'):
+                with pytest.raises(BuildServiceError, match='未授权'):
+                    await submit_request({'name': 'x'}, endpoint, token=token)
+                with pytest.raises(BuildServiceError, match='未授权'):
+                    await query_status(endpoint, token=token)
+            assert builds.order == []
+
+            builds.release = asyncio.Event()
+            builds.release.set()
+            result = await submit_request({'name': 'x'}, endpoint, token='secret')
+            assert result['success'] and builds.order == ['x']
+            assert (await query_status(endpoint, token='secret'))['history']
+            await service.close()
+
+        asyncio.run(asyncio.wait_for(main(), timeout=10))
+
+    @pytest.mark.skipif(sys.platform == 'win32', reason='Unix套接字')
+    def test_socket_private_from_creation(self, tmp_path, monkeypatch):
+        """套接字在umask下创建，创建时权限即为0600"""
+        modes = []
+        real_start = asyncio.start_unix_server
+
+        async def start_unix_server(handler, path):
+            server = await real_start(handler, path)
+            modes.append(stat.S_IMODE(os.stat(path).st_mode))
+            return server
+
+        async def main():
+            builds = _FakeBuilds()
+            service = BuildService(builds.execute, builds.fingerprint)
+            await service.start(str(tmp_path / 'fpgab.sock'))
+            await service.close()
+
+        monkeypatch.setattr(asyncio, 'start_unix_server', start_unix_server)
+        asyncio.run(main())
+        assert modes == [0o600]
+
+    def test_service_token_file(self, tmp_path, monkeypatch):
+        """未配置令牌时生成仅当前用户可读的令牌文件，客户端读取同一令牌"""
+        monkeypatch.delenv('FPGABUILDER_WORKER_TOKEN', raising=False)
+        monkeypatch.setattr(build_service, 'default_token_path',
+                            lambda: tmp_path / 'service.token')
+        assert build_service.service_token() is None
+        token = build_service.service_token(create=True)
+        assert token and build_service.service_token() == token
+        if sys.platform != 'win32':
+            assert stat.S_IMODE(os.stat(tmp_path / 'service.token').st_mode) == 0o600
+
+        (tmp_path / 'explicit').write_text('explicit\n')
+        assert build_service.service_token(str(tmp_path / 'explicit')) == 'explicit'
+        monkeypatch.setenv('FPGABUILDER_WORKER_TOKEN', 'from-env')
+        assert build_service.service_token(create=True) == 'from-env'
+
+    def test_executor_runs_build_hooks(self, tmp_path, monkeypatch):
+        """服务中的构建与 fpgab build 一样执行pre_build和post_bitstream钩子"""
+        import core.cli as cli_module
+        from core.build_graph import BuildGraph, BuildNode
+        from core.plugin_base import BuildResult
+
+        python = f'"{sys.executable}"'
+        config = {'build': {'hooks': {
+            'pre_build': f'{python} -c "open(\'pre.txt\', \'w\').write(\'x\')"',
+            'post_bitstream': f'{python} -c "print(\'post hook\')"',
+        }}}
+
+        def bitstream():
+            assert (tmp_path / 'pre.txt').exists()
+            return BuildResult(success=True, artifacts={}, logs={}, metrics={})
+
+        def request_graph(request, reporter, on_output=None):
+            graph = BuildGraph([BuildNode('bitstream', bitstream)], config,
+                               state_dir=tmp_path / '.fpgab', base_dir=tmp_path,
+                               reporter=reporter)
+            return config, graph, ['bitstream']
+
+        monkeypatch.setattr(cli_module, '_service_request_graph', request_graph)
+        lines = []
+        request = {'config_file': str(tmp_path / 'x.yaml')}
+        result = asyncio.run(cli_module._service_executor(request, lines.append))
+        assert result['success'] and result['ran'] == ['bitstream']
+        assert 'post hook' in lines
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+原生MCS/PRM生成测试
+"""
+
+import sys
+from pathlib import Path
+import pytest
+
+# 添加src目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from plugins.vivado.bitfile import Bitfile
+from plugins.vivado.cfgmem import BITSWAP_TABLE, CfgmemError, CfgmemImage
+from plugins.vivado.plugin import VivadoPlugin
+
+DATA_DIR = Path(__file__).parent / 'data' / 'cfgmem'
+BIT_FILE = DATA_DIR / 'demo.bit'
+
+
+def _decode_hex(text):
+    """独立解析Intel HEX文本，校验每条记录的校验和，返回 {地址: 字节}"""
+    memory, upper, ended = {}, 0, False
+    for line in text.splitlines():
+        assert line.startswith(':') and not ended
+        record = bytes.fromhex(line[1:])
+        assert sum(record) & 0xFF == 0, f"校验和错误: {line}"
+        length, kind, data = record[0], record[3], record[4:-1]
+        address = int.from_bytes(record[1:3], 'big')
+        assert len(data) == length and length <= 16
+        if kind == 0x04:
+            upper = int.from_bytes(data, 'big') << 16
+        elif kind == 0x00:
+            for index, value in enumerate(data):
+                memory[upper + address + index] = value
+        else:
+            assert kind == 0x01
+            ended = True
+    assert ended
+    return memory
+
+
+class TestCfgmem:
+    """原生MCS/PRM生成测试类"""
+
+    @pytest.mark.parametrize('interface, address, golden', [
+        ('SPIx4', 0xFFE0, 'demo_spix4'),
+        ('BPIx16', 0, 'demo_bpix16'),
+    ])
+    def test_golden_files(self, interface, address, golden, tmp_path):
+        """与已校对的MCS/PRM文件逐字节一致"""
+        image = CfgmemImage(interface, size=1)
+        image.add_file(BIT_FILE, address)
+        mcs_file, prm_file = image.write(tmp_path / f'{golden}.mcs')
+
+        assert mcs_file.read_bytes() == (DATA_DIR / f'{golden}.mcs').read_bytes()
+        assert prm_file.read_bytes() == (DATA_DIR / f'{golden}.prm').read_bytes()
+
+    def test_records_decode_to_payload(self):
+        """记录跨64KB段时插入扩展地址记录，解码后与配置数据一致"""
+        with Bitfile(BIT_FILE) as bit:
+            payload = bit.payload.tobytes()
+        assert payload[8:16] == bytes.fromhex('000000BB11220044')
+
+        image = CfgmemImage('SPIx1')
+        image.add_file(BIT_FILE, '0x1FFF8')
+        text = image.mcs_text()
+        assert ':020000040002F8' in text and text.endswith(':00000001FF\n')
+        memory = _decode_hex(text)
+        assert bytes(memory[0x1FFF8 + i] for i in range(len(payload))) == payload
+
+        swapped = CfgmemImage('BPIx8')
+        swapped.add_file(BIT_FILE)
+        assert bytes(_decode_hex(swapped.mcs_text()).values()) == \
+            payload.translate(BITSWAP_TABLE)
+        assert BITSWAP_TABLE[0xAA] == 0x55 and BITSWAP_TABLE[0x01] == 0x80
+
+    def test_invalid_layouts(self, tmp_path):
+        """接口不支持、地址未对齐、区间重叠或超出容量时报错"""
+        with pytest.raises(CfgmemError):
+            CfgmemImage('SPIx8')
+        with pytest.raises(CfgmemError):
+            CfgmemImage('BPIx16').add_file(BIT_FILE, 1)
+
+        data = tmp_path / 'data.bin'
+        data.write_bytes(b'\x00' * 16)
+        image = CfgmemImage('SPIx4', size=1)
+        image.add_file(BIT_FILE, 0)
+        image.add_file(data, 0x20)
+        with pytest.raises(CfgmemError, match='重叠'):
+            image.mcs_text()
+
+        image = CfgmemImage('SPIx4', size=1)
+        image.add_file(data, 0x100000 - 8)
+        with pytest.raises(CfgmemError, match='容量'):
+            image.mcs_text()
+
+    def test_plugin_generates_without_vivado(self, tmp_path):
+        """插件默认原生生成MCS，不检测也不启动Vivado"""
+        plugin = VivadoPlugin()
+        plugin.initialize = lambda config=None: pytest.fail("不应检测Vivado")
+        plugin._run_vivado_tcl = lambda *args, **kwargs: pytest.fail("不应启动Vivado")
+        config = {'project': {'name': 'demo'}}
+        flash = {'bitstream_path': str(BIT_FILE), 'interface': 'SPIx4', 'flash_size': 1,
+                 'output_path': str(tmp_path / 'demo.mcs')}
+
+        result = plugin.generate_mcs_file(config, flash)
+        assert result.success, result.errors
+        assert Path(result.artifacts['prm_file']).exists()
+        memory = _decode_hex((tmp_path / 'demo.mcs').read_text())
+        assert len(memory) == result.metrics['mcs_bytes']
+
+    def test_load_bitstream_uses_vivado(self, tmp_path):
+        """显式配置 load_bitstream 时不走原生生成（需要Vivado连接硬件）"""
+        plugin = VivadoPlugin()
+        flash = {'bitstream_path': str(BIT_FILE), 'interface': 'SPIx4', 'flash_size': 1,
+                 'output_path': str(tmp_path / 'demo.mcs'), 'load_bitstream': True}
+        assert plugin._generate_mcs_native({'project': {'name': 'demo'}}, flash) is None
+        assert not (tmp_path / 'demo.mcs').exists()
+
+        flash['load_bitstream'] = False
+        assert plugin._generate_mcs_native({'project': {'name': 'demo'}}, flash).success
+
+    def test_paths_relative_to_working_dir(self, tmp_path, monkeypatch):
+        """相对路径按工程目录解析，与进程当前目录无关"""
+        project = tmp_path / 'proj'
+        (project / 'build' / 'bitstreams').mkdir(parents=True)
+        bit_file = project / 'build' / 'bitstreams' / 'demo.bit'
+        bit_file.write_bytes(BIT_FILE.read_bytes())
+        (project / 'data.bin').write_bytes(b'\x00' * 16)
+        monkeypatch.chdir(tmp_path)
+
+        plugin = VivadoPlugin()
+        plugin.working_dir = project
+        config = {'project': {'name': 'demo'}}
+        flash = {'interface': 'SPIx4', 'flash_size': 1,
+                 'data_files': [{'path': 'data.bin', 'offset': '0x80000'}]}
+        result = plugin._generate_mcs_native(config, flash)
+        assert result.success
+        assert Path(result.artifacts['mcs_file']) == project / 'demo.mcs'
+        assert (project / 'demo.mcs').is_file() and not (tmp_path / 'demo.mcs').exists()
+
+        flash = {'bitstream_path': 'build/bitstreams/demo.bit', 'interface': 'SPIx4',
+                 'flash_size': 1, 'output_path': 'out/flash.mcs'}
+        assert plugin._generate_mcs_native(config, flash).success
+        assert (project / 'out' / 'flash.mcs').is_file()
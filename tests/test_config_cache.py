@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+配置加载缓存测试
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+import pytest
+
+# 添加src目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from core import config as config_module
+from core import config_layers
+from core.config import ConfigManager, ConfigValidationError, compiled_validator
+
+CONFIG = """
+project:
+  name: demo
+  version: 1.0.0
+fpga:
+  vendor: xilinx
+  part: xc7a35tcsg324-1
+  top_module: top
+"""
+
+
+def _no_parse(*args):
+    raise AssertionError("配置文件被重新解析")
+
+
+class TestConfigCache:
+    """配置加载缓存测试类"""
+
+    def test_cache_hit_and_invalidation(self, tmp_path, monkeypatch):
+        """文件未变化时不重新解析，修改后重新解析"""
+        config_file = tmp_path / 'fpga_project.yaml'
+        config_file.write_text(CONFIG)
+        first = ConfigManager().load_config(config_file)
+        assert first['fpga']['part'] == 'xc7a35tcsg324-1'
+        assert list((tmp_path / 'build' / '.cache').glob('config-*.json'))
+
+        # 进程内缓存和磁盘缓存都命中
+        monkeypatch.setattr(config_layers, 'parse_config_file', _no_parse)
+        second = ConfigManager().load_config(config_file)
+        assert second == first and second is not first
+        config_module._MEMORY_CACHE.clear()
+        assert ConfigManager().load_config(config_file) == first
+        monkeypatch.undo()
+
+        config_file.write_text(CONFIG.replace('xc7a35t', 'xc7a100t') + '\n')
+        config = ConfigManager().load_config(config_file)
+        assert config['fpga']['part'] == 'xc7a100tcsg324-1'
+
+    def test_json_cache_keyed_by_content(self, tmp_path, monkeypatch):
+        """缓存为JSON；只改变修改时间时仍然命中，无法用JSON原样表示的配置不缓存"""
+        config_file = tmp_path / 'fpga_project.yaml'
+        config_file.write_text(CONFIG)
+        first = ConfigManager().load_config(config_file)
+        cache_file = next((tmp_path / 'build' / '.cache').glob('config-*.json'))
+        assert json.loads(json.loads(cache_file.read_text())['config']) == first
+
+        st = config_file.stat()
+        os.utime(config_file, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+        config_module._MEMORY_CACHE.clear()
+        monkeypatch.setattr(config_layers, 'parse_config_file', _no_parse)
+        assert ConfigManager().load_config(config_file) == first
+        monkeypatch.undo()
+
+        cache_file.unlink()
+        config_module._MEMORY_CACHE.clear()
+        config_file.write_text(CONFIG + 'release_date: 2026-02-27\n')
+        loaded = ConfigManager().load_config(config_file)
+        assert str(loaded['release_date']) == '2026-02-27'
+        assert not cache_file.exists()
+
+    def test_cache_disabled(self, tmp_path, monkeypatch):
+        """use_cache=False 或环境变量禁用缓存"""
+        config_file = tmp_path / 'fpga_project.yaml'
+        config_file.write_text(CONFIG)
+        ConfigManager(use_cache=False).load_config(config_file)
+        monkeypatch.setenv('FPGABUILDER_CONFIG_CACHE', '0')
+        ConfigManager().load_config(config_file)
+        assert not (tmp_path / 'build' / '.cache').exists()
+
+    def test_validation_uses_compiled_validator(self, tmp_path):
+        """校验器每个进程只编译一次，校验错误照常报告"""
+        manager = ConfigManager()
+        assert compiled_validator(manager.config_schema) is \
+            compiled_validator(ConfigManager().config_schema)
+
+        config_file = tmp_path / 'fpga_project.yaml'
+        config_file.write_text("project:\n  name: demo\n")
+        with pytest.raises(Exception) as excinfo:
+            manager.load_config(config_file)
+        assert "'fpga' is a required property" in str(excinfo.value)
+        with pytest.raises(ConfigValidationError):
+            manager.validate_config({'project': {'name': 1}, 'fpga': {}})
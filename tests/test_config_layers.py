@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+分层配置解析测试
+"""
+
+import sys
+from pathlib import Path
+import pytest
+
+# 添加src目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from core import config_layers
+from core.config import ConfigError, ConfigManager
+from core.config_layers import (merge_shared, parse_override, resolve_config,
+                                resolve_file)
+
+BASE = """
+project:
+  name: base
+  version: 1.0.0
+fpga:
+  vendor: xilinx
+  part: xc7a35tcsg324-1
+  top_module: top
+source:
+  hdl:
+    - path: src/*.v
+build:
+  synthesis:
+    strategy: default
+    options: {flatten: rebuilt}
+"""
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return path
+
+
+class TestConfigLayers:
+    """分层配置解析测试类"""
+
+    def test_extends_and_include(self, tmp_path):
+        """extends → include → 自身内容，字典逐键合并，列表整体替换"""
+        _write(tmp_path / 'common' / 'base.yaml', BASE)
+        _write(tmp_path / 'boards' / 'revB.yaml',
+               "fpga:\n  part: xc7a100tcsg324-1\n"
+               "source:\n  hdl:\n    - path: revb/*.v\n")
+        derived = _write(tmp_path / 'product' / 'fpga_project.yaml',
+                         "extends: ../common/base.yaml\n"
+                         "include: [../boards/revB.yaml]\n"
+                         "project:\n  name: product\n"
+                         "build:\n  synthesis:\n    options: {flatten: none}\n")
+
+        config = resolve_file(derived).to_dict()
+        assert 'extends' not in config and 'include' not in config
+        assert config['project'] == {'name': 'product', 'version': '1.0.0'}
+        assert config['fpga']['part'] == 'xc7a100tcsg324-1'
+        assert config['fpga']['top_module'] == 'top'
+        assert config['source']['hdl'] == [{'path': 'revb/*.v'}]
+        assert config['build']['synthesis'] == \
+            {'strategy': 'default', 'options': {'flatten': 'none'}}
+
+    def test_shared_base_parsed_once(self, tmp_path, monkeypatch):
+        """多个变体共享基础配置：只解析一次，未修改的子树共享"""
+        base = _write(tmp_path / 'base.yaml', BASE)
+        variants = [_write(tmp_path / f'v{i}.yaml',
+                           f"extends: base.yaml\nproject:\n  name: v{i}\n")
+                    for i in range(50)]
+        parsed = []
+        original = config_layers.parse_config_file
+        monkeypatch.setattr(config_layers, 'parse_config_file',
+                            lambda path: parsed.append(path) or original(path))
+
+        configs = [resolve_file(v) for v in variants]
+        assert parsed.count(base.resolve()) == 1
+        assert configs[0].to_dict()['source'] is configs[1].to_dict()['source']
+        assert configs[7].get('project.name') == 'v7'
+        assert configs[7].get('build.synthesis.options.flatten') == 'rebuilt'
+        assert configs[7].get('build.missing', 'default') == 'default'
+
+        # 基础配置修改后重新解析
+        base.write_text(BASE.replace('xc7a35t', 'xc7k325t') + '\n')
+        assert resolve_file(variants[3]).get('fpga.part') == 'xc7k325tcsg324-1'
+
+    def test_overrides(self, tmp_path, monkeypatch):
+        """环境变量和 --set 覆盖，--set 优先"""
+        config_file = _write(tmp_path / 'fpga_project.yaml', BASE)
+        assert parse_override('build.jobs=8') == ('build.jobs', 8)
+        assert parse_override('fpga.defines.SIM=true') == ('fpga.defines.SIM', True)
+        with pytest.raises(ConfigError):
+            parse_override('fpga.part')
+
+        monkeypatch.setenv('FPGABUILDER_SET', 'fpga.part=xc7a50t\n'
+                                              'project.version=2.0.0\n'
+                                              'fpga.defines.PINS=a;b')
+        resolved = resolve_config(config_file, ['fpga.part=xc7a200t'])
+        assert resolved.get('fpga.part') == 'xc7a200t'
+        assert resolved.get('project.version') == '2.0.0'
+        # 分号是值的一部分，不是分隔符
+        assert resolved.get('fpga.defines.PINS') == 'a;b'
+        assert [layer.source for layer in resolved.layers][-2:] == \
+            ['FPGABUILDER_SET', '--set']
+
+        # 覆盖值不同的加载不共用缓存
+        manager = ConfigManager(overrides=['fpga.part=xc7a200t'])
+        assert manager.load_config(config_file)['fpga']['part'] == 'xc7a200t'
+        monkeypatch.delenv('FPGABUILDER_SET')
+        config = ConfigManager().load_config(config_file)
+        assert config['fpga']['part'] == 'xc7a35tcsg324-1'
+
+    def test_cache_tracks_base_file(self, tmp_path):
+        """解析缓存依赖继承链上的所有文件"""
+        base = _write(tmp_path / 'base.yaml', BASE)
+        derived = _write(tmp_path / 'fpga_project.yaml', "extends: base.yaml\n")
+        assert ConfigManager().load_config(derived)['fpga']['part'] == 'xc7a35tcsg324-1'
+        base.write_text(BASE.replace('xc7a35t', 'xc7a75t') + '\n')
+        assert ConfigManager().load_config(derived)['fpga']['part'] == 'xc7a75tcsg324-1'
+
+        # 加载结果可以修改，不影响进程内共享的基础层
+        loaded = ConfigManager(use_cache=False).load_config(derived)
+        loaded['fpga']['part'] = 'changed'
+        reloaded = ConfigManager(use_cache=False).load_config(derived)
+        assert reloaded['fpga']['part'] == 'xc7a75tcsg324-1'
+
+    def test_cycle_and_merge(self, tmp_path):
+        """循环继承报错，合并不修改输入"""
+        _write(tmp_path / 'a.yaml', "extends: b.yaml\n")
+        _write(tmp_path / 'b.yaml', "extends: a.yaml\n")
+        with pytest.raises(ConfigError):
+            resolve_file(tmp_path / 'a.yaml')
+
+        base = {'a': {'x': 1}, 'b': {'y': 2}}
+        merged = merge_shared(base, {'a': {'z': 3}})
+        assert merged == {'a': {'x': 1, 'z': 3}, 'b': {'y': 2}}
+        assert base == {'a': {'x': 1}, 'b': {'y': 2}}
+        assert merged['b'] is base['b']
+
+        manager = ConfigManager()
+        manager.config_data = base
+        manager.set('b.y', 5)
+        assert base['b']['y'] == 2 and manager.get('b.y') == 5
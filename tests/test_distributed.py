@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+分布式构建测试（本机两个构建节点）
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+import pytest
+
+# 添加src目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from core.distributed import (BuildWorker, NoWorkerError, RemoteDispatcher, RemoteError,
+                              RemoteJob, TOOL_PLACEHOLDER, WorkerInfo, parse_address,
+                              select_worker)
+
+# 模拟工具：读取输入文件，逐行输出并生成产物
+TOOL_SCRIPT = '''
+import pathlib, sys
+src = pathlib.Path('src/top.v').read_text()
+print('synthesizing', len(src))
+sys.stdout.flush()
+out = pathlib.Path('build/top.dcp')
+out.parent.mkdir(exist_ok=True)
+out.write_text(src.upper())
+sys.exit(int(pathlib.Path('rc').read_text()) if pathlib.Path('rc').exists() else 0)
+'''
+
+
+TOKEN = 'secret'
+
+
+def _fake_vivado(tmp_path):
+    """模拟Vivado可执行文件：以Python运行 -source 指定的脚本"""
+    path = tmp_path / 'fake_vivado'
+    if not path.exists():
+        path.write_text(f'#!{sys.executable}\nimport runpy, sys\n'
+                        f"runpy.run_path(sys.argv[sys.argv.index('-source') + 1], "
+                        f"run_name='__main__')\n")
+        path.chmod(0o755)
+    return str(path)
+
+
+def _worker(tmp_path, name, versions, slots=1):
+    tools = {'vivado': {version: _fake_vivado(tmp_path) for version in versions}}
+    return BuildWorker(host='127.0.0.1', port=0, slots=slots, name=name,
+                       work_root=tmp_path / f'work_{name}', tools=tools, token=TOKEN)
+
+
+def _job(base_dir, version=None, inline=None, command=None):
+    (base_dir / 'src').mkdir(parents=True, exist_ok=True)
+    (base_dir / 'src' / 'top.v').write_text('module top; endmodule')
+    files = {'.fpgab_remote/build.tcl': TOOL_SCRIPT.encode()}
+    files.update(inline or {})
+    command = command or [TOOL_PLACEHOLDER, '-mode', 'batch', '-source',
+                          '.fpgab_remote/build.tcl']
+    return RemoteJob(command=command, base_dir=base_dir, files=['src/top.v'],
+                     inline_files=files, tool='vivado', tool_version=version,
+                     job_id='t')
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='模拟Vivado依赖脚本的#!解释器行')
+class TestDistributed:
+    """分布式构建测试类"""
+
+    def test_select_worker(self):
+        """按版本过滤，按占用率和负载选择节点"""
+        workers = [
+            WorkerInfo('a:1', 'a', slots=4, running=3, load=0.1,
+                       tools={'vivado': ['2022.2', '2023.2']}),
+            WorkerInfo('b:1', 'b', slots=4, running=1, load=0.9,
+                       tools={'vivado': ['2023.2']}),
+            WorkerInfo('c:1', 'c', slots=2, running=0, load=0.0,
+                       tools={'vivado': ['2022.2']}),
+        ]
+        assert select_worker(workers, 'vivado', '2023.2').name == 'b'
+        assert select_worker(workers, 'vivado', '2022.2').name == 'c'
+        busy = select_worker(workers, 'vivado', '2023.2', assigned={'b:1': 3})
+        assert busy.name == 'a'
+        assert select_worker(workers, 'vivado', '2019.1') is None
+        assert select_worker(workers, 'vivado').name == 'c'
+
+    def test_parse_address(self):
+        """解析节点地址"""
+        assert parse_address('build1:9000') == ('build1', 9000)
+        assert parse_address('build1') == ('build1', 7601)
+        with pytest.raises(RemoteError):
+            parse_address('build1:http')
+
+    def test_run_job_on_localhost_workers(self, tmp_path):
+        """任务发送到安装了所需版本的节点，日志实时回传，产物取回到工作目录"""
+        async def main():
+            old = _worker(tmp_path, 'old', ['1'])
+            new = _worker(tmp_path, 'new', ['2'])
+            await old.start()
+            await new.start()
+            dispatcher = RemoteDispatcher([f'127.0.0.1:{old.port}',
+                                           f'127.0.0.1:{new.port}'], token=TOKEN)
+            try:
+                infos = await dispatcher.probe()
+                assert sorted(info.name for info in infos) == ['new', 'old']
+
+                lines = []
+                result = await dispatcher.run_job(
+                    _job(tmp_path / 'ws', '2'), lambda stream, line: lines.append(line))
+                assert result.worker == 'new'
+                assert result.returncode == 0
+                assert 'synthesizing 21' in lines
+                assert result.files == ['build/top.dcp']
+                dcp = tmp_path / 'ws' / 'build' / 'top.dcp'
+                assert dcp.read_text() == 'MODULE TOP; ENDMODULE'
+
+                failed = await dispatcher.run_job(_job(tmp_path / 'ws2', '1',
+                                                       {'rc': b'3'}))
+                assert failed.worker == 'old'
+                assert failed.returncode == 3
+
+                with pytest.raises(NoWorkerError):
+                    await dispatcher.run_job(_job(tmp_path / 'ws3', '9'))
+            finally:
+                await old.close()
+                await new.close()
+            # 任务目录已清理
+            assert not any((tmp_path / 'work_new').iterdir())
+
+        asyncio.run(asyncio.wait_for(main(), timeout=30))
+
+    def test_parallel_jobs_spread_across_workers(self, tmp_path):
+        """并发任务分配到不同的节点"""
+        async def main():
+            workers = [_worker(tmp_path, f'w{i}', ['1']) for i in range(2)]
+            for w in workers:
+                await w.start()
+            dispatcher = RemoteDispatcher([f'127.0.0.1:{w.port}' for w in workers],
+                                          token=TOKEN)
+            try:
+                results = await asyncio.gather(*(
+                    dispatcher.run_job(_job(tmp_path / f'ws{i}', '1'))
+                    for i in range(2)))
+            finally:
+                for w in workers:
+                    await w.close()
+            assert sorted(r.worker for r in results) == ['w0', 'w1']
+
+        asyncio.run(asyncio.wait_for(main(), timeout=30))
+
+    def test_reject_unsafe_paths(self, tmp_path):
+        """节点拒绝跳出任务目录的文件路径"""
+        async def main():
+            w = _worker(tmp_path, 'w', ['1'])
+            await w.start()
+            dispatcher = RemoteDispatcher([f'127.0.0.1:{w.port}'], token=TOKEN)
+            job = _job(tmp_path / 'ws', '1', {'../escape.txt': b'x'})
+            try:
+                with pytest.raises(RemoteError):
+                    await dispatcher.run_job(job)
+            finally:
+                await w.close()
+            assert not (tmp_path / 'escape.txt').exists()
+
+        asyncio.run(asyncio.wait_for(main(), timeout=30))
+
+    def test_reject_unauthorized_jobs(self, tmp_path, monkeypatch):
+        """节点默认只监听本机，拒绝令牌错误的任务和非Vivado批处理命令，不使用调度端的环境变量"""
+        monkeypatch.setenv('FPGAB_WORKER_TEST', 'worker')
+        assert BuildWorker().host == '127.0.0.1'
+
+        async def main():
+            w = _worker(tmp_path, 'w', ['1'])
+            await w.start()
+            batch = [TOOL_PLACEHOLDER, '-mode', 'batch', '-source']
+            try:
+                for token, command in [
+                    ('wrong', None),
+                    (None, None),
+                    (TOKEN, [TOOL_PLACEHOLDER, '-c', 'import os']),
+                    (TOKEN, batch + ['/etc/passwd']),
+                    (TOKEN, batch + ['missing.tcl']),
+                ]:
+                    dispatcher = RemoteDispatcher([f'127.0.0.1:{w.port}'], token=token)
+                    with pytest.raises(RemoteError):
+                        await dispatcher.run_job(_job(tmp_path / 'ws', '1',
+                                                      command=command))
+                assert not (tmp_path / 'ws' / 'build').exists()
+
+                script = (b"import os, pathlib; pathlib.Path('env.txt').write_text("
+                          b"os.environ.get('FPGAB_WORKER_TEST', ''))")
+                job = _job(tmp_path / 'ok', '1', {'.fpgab_remote/build.tcl': script})
+                dispatcher = RemoteDispatcher([f'127.0.0.1:{w.port}'], token=TOKEN)
+                result = await dispatcher.run_job(job)
+            finally:
+                await w.close()
+            assert result.returncode == 0
+            assert (tmp_path / 'ok' / 'env.txt').read_text() == 'worker'
+
+        asyncio.run(asyncio.wait_for(main(), timeout=30))
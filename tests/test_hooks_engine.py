@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+钩子引擎测试
+"""
+
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+import pytest
+
+# 添加src目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from core.hooks import HookEngine, HookError, failure_policy, parse_hooks, stage_hooks
+
+PYTHON = f'"{sys.executable}"'
+
+
+def _py(code):
+    return f'{PYTHON} -c "{code}"'
+
+
+def _run(hooks, tmp_path, stage='test', **kwargs):
+    lines = []
+    engine = HookEngine(tmp_path, reporter=lines.append, **kwargs)
+    return asyncio.run(engine.run_async(hooks, stage)), lines
+
+
+class TestHookEngine:
+    """钩子引擎测试类"""
+
+    def test_parse(self):
+        """字符串命令合并为一个顺序钩子，字典声明依赖"""
+        hooks = parse_hooks('echo a\necho b', 'pre_build')
+        assert [(h.name, h.commands) for h in hooks] == \
+            [('pre_build', ['echo a', 'echo b'])]
+
+        items = ['echo a', {'name': 'gen', 'run': 'make', 'outputs': 'out.txt'},
+                 {'name': 'pack', 'run': ['x', 'y'], 'depends_on': ['gen'],
+                  'timeout': 5}]
+        hooks = parse_hooks(items, 'post_bitstream', on_failure='continue')
+        assert [h.name for h in hooks] == ['post_bitstream', 'gen', 'pack']
+        assert hooks[1].outputs == ['out.txt'] and hooks[1].depends_on == []
+        assert hooks[2].timeout == 5 and hooks[2].on_failure == 'continue'
+
+        with pytest.raises(HookError):
+            parse_hooks([{'name': 'a', 'run': 'x', 'depends_on': ['missing']}],
+                        'pre_build')
+        with pytest.raises(HookError):
+            parse_hooks([{'name': 'a', 'run': 'x', 'depends_on': ['b']},
+                         {'name': 'b', 'run': 'x', 'depends_on': ['a']}], 'pre_build')
+        with pytest.raises(HookError):
+            parse_hooks('echo a', 'pre_build', on_failure='ask')
+
+    def test_parallel_and_ordered(self, tmp_path):
+        """独立钩子并行运行，依赖的钩子在其后运行"""
+        sleep = _py('import time; time.sleep(0.6)')
+        write = _py("open('c.txt','w').write('x')")
+        hooks = parse_hooks([{'name': 'a', 'run': sleep}, {'name': 'b', 'run': sleep},
+                             {'name': 'c', 'run': write, 'depends_on': ['a', 'b']}],
+                            'pre_build')
+        start = time.monotonic()
+        run, lines = _run(hooks, tmp_path)
+        assert run.success
+        assert time.monotonic() - start < 1.1
+        assert (tmp_path / 'c.txt').exists()
+
+    def test_skip_up_to_date(self, tmp_path):
+        """输出比输入新时跳过，输入或命令变化时重新运行"""
+        (tmp_path / 'in.txt').write_text('x')
+        copy = _py("open('out.txt','w').write(open('in.txt').read())")
+        item = {'name': 'copy', 'run': copy, 'inputs': ['in.txt'],
+                'outputs': ['out.txt']}
+        state_dir = tmp_path / '.fpgab'
+
+        run, _ = _run(parse_hooks([item], 'post'), tmp_path, state_dir=state_dir)
+        assert run.results['copy'].status == 'ok'
+        run, _ = _run(parse_hooks([item], 'post'), tmp_path, state_dir=state_dir)
+        assert run.results['copy'].status == 'skipped'
+
+        stat = (tmp_path / 'out.txt').stat()
+        os.utime(tmp_path / 'in.txt', ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        run, _ = _run(parse_hooks([item], 'post'), tmp_path, state_dir=state_dir)
+        assert run.results['copy'].status == 'ok'
+
+        item['run'] += ' && echo changed'
+        run, _ = _run(parse_hooks([item], 'post'), tmp_path, state_dir=state_dir)
+        assert run.results['copy'].status == 'ok'
+
+    def test_failure_policy(self, tmp_path):
+        """abort策略阻止依赖钩子，continue策略只记录警告"""
+        hooks = parse_hooks([{'name': 'bad', 'run': _py('import sys; sys.exit(3)')},
+                             {'name': 'after', 'run': 'echo after',
+                              'depends_on': ['bad']}], 'pre_build')
+        run, _ = _run(hooks, tmp_path)
+        assert not run.success
+        assert run.results['bad'].returncode == 3
+        assert run.results['after'].status == 'blocked'
+
+        hooks = parse_hooks([{'name': 'bad', 'run': _py('import sys; sys.exit(1)'),
+                              'on_failure': 'continue'},
+                             {'name': 'ok', 'run': 'echo ok'}], 'pre_build')
+        run, _ = _run(hooks, tmp_path)
+        assert run.success and len(run.errors) == 1
+
+    def test_timeout_and_streaming(self, tmp_path):
+        """超时终止钩子，输出带钩子名前缀实时转发"""
+        slow = _py("print('started', flush=True); import time; time.sleep(30)")
+        hooks = parse_hooks([{'name': 'slow', 'run': slow, 'timeout': 1}], 'pre_build')
+        start = time.monotonic()
+        run, lines = _run(hooks, tmp_path)
+        assert time.monotonic() - start < 10
+        assert run.results['slow'].status == 'timeout'
+        assert '  [slow] started' in lines
+
+    def test_stage_hooks_config(self, monkeypatch):
+        """失败策略取自配置，环境变量和参数依次优先"""
+        config = {'build': {'hooks': {'on_failure': 'continue', 'timeout': 60,
+                                      'pre_build': 'echo a'}}}
+        hooks = stage_hooks(config, 'pre_build')
+        assert hooks[0].on_failure == 'continue' and hooks[0].timeout == 60
+        monkeypatch.setenv('FPGABUILDER_HOOK_FAILURE', 'abort')
+        assert stage_hooks(config, 'pre_build')[0].on_failure == 'abort'
+        assert stage_hooks(config, 'pre_build', 'continue')[0].on_failure == 'continue'
+
+    def test_post_build_hooks_warn_by_default(self, monkeypatch):
+        """构建后钩子默认只警告，pre_build默认中止"""
+        monkeypatch.delenv('FPGABUILDER_HOOK_FAILURE', raising=False)
+        assert failure_policy({}, 'pre_build') == 'abort'
+        assert failure_policy({}, 'post_bitstream') == 'continue'
+        assert failure_policy({}, 'post-bitstream') == 'continue'
+        assert failure_policy({}, 'bin_merge_script') == 'continue'
+        assert failure_policy({}, 'post_bitstream', 'abort') == 'abort'
+        config = {'build': {'hooks': {'on_failure': 'abort'}}}
+        assert failure_policy(config, 'post_bitstream') == 'abort'
+
+    def test_cli_option_does_not_touch_environment(self, tmp_path, monkeypatch):
+        """--hook-failure 通过参数传递，不修改进程环境变量"""
+        from click.testing import CliRunner
+        from core.cli import cli
+
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.delenv('FPGABUILDER_HOOK_FAILURE', raising=False)
+        (tmp_path / 'fpga_project.yaml').write_text(
+            'project: {name: demo}\nfpga: {vendor: unknown, part: x}\n',
+            encoding='utf-8')
+        CliRunner().invoke(cli, ['build', '--hook-failure', 'continue'])
+        assert 'FPGABUILDER_HOOK_FAILURE' not in os.environ
+
+    def test_cli_hook_does_not_prompt(self, tmp_path, monkeypatch):
+        """CLI钩子失败时不交互询问，直接按策略返回"""
+        from core.cli import CLI
+        monkeypatch.chdir(tmp_path)
+        fail = _py('import sys; sys.exit(1)')
+        assert CLI._execute_hook(fail, 'pre-build') is False
+        assert CLI._execute_hook(fail, 'pre-build', on_failure='continue') is True
+        assert CLI._execute_hook('echo ok', 'pre-build') is True
+
+    def test_plugin_post_bitstream_policy(self, tmp_path, monkeypatch):
+        """插件中的post_bitstream钩子失败默认不使比特流阶段失败，策略通过插件属性传入"""
+        from plugins.vivado.plugin import VivadoPlugin
+
+        monkeypatch.delenv('FPGABUILDER_HOOK_FAILURE', raising=False)
+        plugin = VivadoPlugin()
+        plugin.working_dir = tmp_path
+        commands = [_py('import sys; sys.exit(1)')]
+        run = asyncio.run(plugin._run_hooks_async({}, 'post_bitstream', commands))
+        assert run.success and len(run.errors) == 1
+        plugin.hook_failure = 'abort'
+        run = asyncio.run(plugin._run_hooks_async({}, 'post_bitstream', commands))
+        assert not run.success
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+实现策略探索测试
+"""
+
+import asyncio
+import json
+import re
+import sys
+from pathlib import Path
+import pytest
+
+# 添加src目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from core.plugin_base import BuildResult
+from plugins.vivado.impl_sweep import (
+    ImplementationSweep, SweepError, SweepResult, SweepVariant, TimingSummary,
+    expand_sweep, format_results, load_results, parse_timing_summary, rank_results,
+)
+from plugins.vivado.tcl_templates import ImplementationBranchTemplate
+
+
+TIMING_REPORT = """
+------------------------------------------------------------------------------------------------
+| Design Timing Summary
+| ---------------------
+------------------------------------------------------------------------------------------------
+
+    WNS(ns)      TNS(ns)  TNS Failing Endpoints  TNS Total Endpoints      WHS(ns)      THS(ns)  THS Failing Endpoints  THS Total Endpoints     WPWS(ns)     TPWS(ns)  TPWS Failing Endpoints  TPWS Total Endpoints
+    -------      -------  ---------------------  -------------------      -------      -------  ---------------------  -------------------     --------     --------  ----------------------  --------------------
+     {wns:>6}       {tns:>6}                      3                 1024        0.052        0.000                      0                 1024        3.500        0.000                       0                   55
+"""  # noqa: E501
+
+
+class FakeVivado:
+    """按分支名称返回预设时序结果的假Vivado"""
+
+    def __init__(self, timings, delays=None):
+        self.timings = timings
+        self.delays = delays or {}
+        self.running = 0
+        self.peak = 0
+        self.started = []
+
+    async def _run_vivado_tcl_async(self, tcl_script, script_name, config=None,
+                                    on_output=None):
+        work_dir = Path(re.search(r'file mkdir "([^"]+)"', tcl_script).group(1))
+        name = work_dir.name
+        self.started.append(name)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delays.get(name, 0.01))
+        finally:
+            self.running -= 1
+        wns, tns = self.timings[name]
+        report = TIMING_REPORT.format(wns=wns, tns=tns)
+        (work_dir / 'timing_summary.rpt').write_text(report)
+        (work_dir / 'routed.dcp').write_text('dcp')
+        return BuildResult(success=True, artifacts={}, logs={}, metrics={})
+
+
+class TestImplementationSweep:
+    """实现策略探索测试类"""
+
+    def test_parse_timing_summary(self):
+        """解析Design Timing Summary表"""
+        timing = parse_timing_summary(TIMING_REPORT.format(wns='-0.125', tns='-1.500'))
+        assert timing == TimingSummary(wns=-0.125, tns=-1.5, whs=0.052, ths=0.0)
+        assert not timing.met
+        assert parse_timing_summary('no table here') is None
+
+    def test_expand_sweep(self):
+        """策略、指令笛卡尔积和显式分支的展开"""
+        variants = expand_sweep({
+            'strategies': ['Performance_Explore'],
+            'directives': {'place': ['Explore', 'ExtraNetDelay_high'],
+                           'route': ['Explore', 'AggressiveExplore']},
+            'runs': [{'name': 'Performance_Explore', 'strategy': 'Performance_Explore',
+                      'route': 'NoTimingRelaxation'}],
+        })
+        names = [v.name for v in variants]
+        assert len(variants) == 6
+        assert len(set(names)) == 6
+        assert 'Explore_AggressiveExplore' in names
+        assert variants[-1].route == 'NoTimingRelaxation'
+        assert variants[-1].place == 'Explore'
+        assert len(expand_sweep(None)) > 1
+
+        with pytest.raises(SweepError):
+            expand_sweep({'strategies': ['NoSuchStrategy']})
+
+    def test_impl_node_reserves_all_branches(self, tmp_path, monkeypatch):
+        """impl节点按同时运行的分支数预留资源"""
+        from plugins.vivado.plugin import VivadoPlugin
+
+        monkeypatch.chdir(tmp_path)
+        plugin = VivadoPlugin()
+        plugin.working_dir = tmp_path
+        plugin.initialize = lambda config=None: True
+
+        def impl_resources(sweep):
+            config = {'project': {'name': 'demo'}, 'fpga': {'part': 'xc7a35t'},
+                      'build': {'implementation': {'sweep': sweep}}}
+            nodes = {node.name: node for node in plugin.build_graph_nodes(config)}
+            return nodes['impl'].resources
+
+        single = impl_resources({'enabled': False})
+        strategies = ['Performance_Explore', 'Performance_NetDelay_high',
+                      'Area_Explore']
+        assert impl_resources({'strategies': strategies, 'jobs': 2}) == \
+            {k: v * 2 for k, v in single.items()}
+        assert impl_resources({'strategies': strategies, 'jobs': 8}) == \
+            {k: v * 3 for k, v in single.items()}
+        assert single['cpu'] == 1 and single['license'] == 1
+
+    def test_rank_results(self):
+        """按WNS/TNS/THS排序，失败分支排在最后"""
+        def result(name, wns, tns, success=True):
+            timing = TimingSummary(wns=wns, tns=tns, whs=0.1, ths=0.0)
+            return SweepResult(variant=SweepVariant(name), work_dir=name,
+                               success=success, timing=timing)
+        ranked = rank_results([
+            result('a', -0.2, -3.0), result('b', 0.1, 0.0), result('c', -0.2, -1.0),
+            result('d', 1.0, 0.0, success=False),
+        ])
+        assert [r.variant.name for r in ranked] == ['b', 'c', 'a', 'd']
+        assert len(format_results(ranked)) == 6
+
+    def test_sweep_runs_branches_concurrently(self, tmp_path):
+        """分支在--jobs限制内并行运行，结果写入sweep_results.json"""
+        variants = [SweepVariant(name) for name in ('v1', 'v2', 'v3', 'v4')]
+        fake = FakeVivado({'v1': ('-0.300', '-4.000'), 'v2': ('0.150', '0.000'),
+                           'v3': ('-0.050', '-0.100'), 'v4': ('0.020', '0.000')})
+        sweep = ImplementationSweep(fake, {}, tmp_path / 'synth.dcp',
+                                    tmp_path / 'sweep', variants, jobs=2,
+                                    reporter=lambda m: None)
+        ranked = asyncio.run(sweep.run_async())
+
+        assert fake.peak == 2
+        assert [r.variant.name for r in ranked] == ['v2', 'v4', 'v3', 'v1']
+        data = json.loads((tmp_path / 'sweep' / 'sweep_results.json').read_text())
+        assert data['best'] == 'v2'
+        assert [r.variant.name for r in load_results(tmp_path / 'sweep')] == \
+            ['v2', 'v4', 'v3', 'v1']
+        assert (tmp_path / 'sweep' / 'v1' / 'implement.tcl').is_file()
+
+    def test_stop_on_pass_cancels_losers(self, tmp_path):
+        """有分支满足时序后取消其余分支"""
+        variants = [SweepVariant(name) for name in ('fast', 'slow', 'queued')]
+        fake = FakeVivado({'fast': ('0.100', '0.000'), 'slow': ('0.500', '0.000'),
+                           'queued': ('0.900', '0.000')},
+                          delays={'fast': 0.01, 'slow': 5.0, 'queued': 5.0})
+        sweep = ImplementationSweep(fake, {}, tmp_path / 'synth.dcp',
+                                    tmp_path / 'sweep', variants, jobs=2,
+                                    stop_on_pass=True, reporter=lambda m: None)
+        ranked = asyncio.run(asyncio.wait_for(sweep.run_async(), timeout=3))
+
+        assert ranked[0].variant.name == 'fast' and ranked[0].met
+        assert all(r.cancelled for r in ranked[1:])
+        assert 'queued' not in fake.started
+
+    def test_branch_template(self):
+        """实现分支脚本从综合检查点出发，使用指定指令"""
+        script = ImplementationBranchTemplate(
+            {'build': {'hooks': {'pre_impl': 'puts pre'}}}, 'C:\\proj\\synth.dcp',
+            '/tmp/sweep/v1',
+            {'opt': 'Explore', 'place': 'ExtraNetDelay_high',
+             'phys_opt': 'AggressiveExplore', 'route': 'Explore'},
+            post_route_phys_opt=True
+        ).render()
+        assert 'open_checkpoint "C:/proj/synth.dcp"' in script
+        assert 'place_design -directive ExtraNetDelay_high' in script
+        assert script.index('puts pre') < script.index('opt_design')
+        assert 'write_checkpoint -force "/tmp/sweep/v1/routed.dcp"' in script
+        assert script.count('phys_opt_design') == 2
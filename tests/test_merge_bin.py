@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+二进制文件流式合并测试
+"""
+
+import os
+import sys
+import tracemalloc
+from pathlib import Path
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from scripts.merge_bin import BinMerger
+
+
+def _component(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+class TestMergeBin:
+    """二进制文件合并测试类"""
+
+    def test_gaps_filled_with_pad_byte(self, tmp_path):
+        """组件按偏移写入，空隙填充0xFF，与添加顺序无关"""
+        merger = BinMerger(tmp_path / 'boot.bin')
+        merger.add_component(_component(tmp_path, 'b.bin', b'BBBB'), '0x10')
+        merger.add_component(_component(tmp_path, 'a.bin', b'AA'), '0x4')
+        merger.merge_simple()
+
+        expected = b'\xff' * 4 + b'AA' + b'\xff' * 10 + b'BBBB'
+        assert (tmp_path / 'boot.bin').read_bytes() == expected
+
+    def test_zero_pad_and_fallback_copy(self, tmp_path, monkeypatch):
+        """填充值为0时生成空洞，系统调用不可用时退回缓冲区复制"""
+        monkeypatch.delattr(os, 'copy_file_range', raising=False)
+        monkeypatch.delattr(os, 'sendfile', raising=False)
+        merger = BinMerger(tmp_path / 'boot.bin', pad_byte=0)
+        merger.add_component(_component(tmp_path, 'a.bin', b'\x01\x02'), '1')
+        merger.add_component(_component(tmp_path, 'b.bin', b'\x03'), '8')
+        merger.merge_simple()
+
+        expected = b'\x00\x01\x02' + b'\x00' * 5 + b'\x03'
+        assert (tmp_path / 'boot.bin').read_bytes() == expected
+        with pytest.raises(ValueError):
+            BinMerger(tmp_path / 'boot.bin', pad_byte=0x100)
+
+    def test_overlap_detected_before_writing(self, tmp_path):
+        """区间重叠在写入前报错，包括被更长组件完全覆盖的情况"""
+        merger = BinMerger(tmp_path / 'boot.bin')
+        merger.add_component(_component(tmp_path, 'big.bin', b'x' * 32), '0')
+        merger.add_component(_component(tmp_path, 'mid.bin', b'y' * 4), '8')
+        merger.add_component(_component(tmp_path, 'tail.bin', b'z' * 4), '24')
+
+        overlaps = [(a['name'], b['name']) for a, b in merger.find_overlaps()]
+        assert overlaps == [('big.bin', 'mid.bin'), ('big.bin', 'tail.bin')]
+        with pytest.raises(ValueError, match='重叠'):
+            merger.merge_simple()
+        assert not (tmp_path / 'boot.bin').exists()
+        assert not merger.validate_offsets()
+
+    def test_constant_memory(self, tmp_path):
+        """大镜像合并的内存占用与组件和空隙大小无关"""
+        size = 16 * 1024 * 1024
+        big = tmp_path / 'bitstream.bin'
+        with open(big, 'wb') as f:
+            f.truncate(size)
+        merger = BinMerger(tmp_path / 'boot.bin')
+        merger.CHUNK_SIZE = 1024 * 1024
+        merger.add_component(_component(tmp_path, 'fsbl.bin', b'F' * 16), '0')
+        merger.add_component(str(big), str(size))
+
+        tracemalloc.start()
+        try:
+            merger.merge_simple()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        assert peak < 4 * merger.CHUNK_SIZE
+        assert (tmp_path / 'boot.bin').stat().st_size == 2 * size
+        with open(tmp_path / 'boot.bin', 'rb') as f:
+            assert f.read(17) == b'F' * 16 + b'\xff'
+            f.seek(size - 1)
+            assert f.read(2) == b'\xff\x00'
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+多工程构建测试
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+import pytest
+import yaml
+
+# 添加src目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from core.build_graph import BuildGraph, BuildNode, ResourcePool
+from core.multi_project import (MultiProjectBuilder, MultiProjectError,
+                                discover_projects, format_summary, order_projects)
+from core.plugin_base import BuildResult
+
+
+def _load(config_file):
+    with open(config_file, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+def _write_project(root, name, **extra):
+    root.mkdir(parents=True, exist_ok=True)
+    config = {'project': {'name': name}}
+    config.update(extra)
+    (root / 'fpga_project.yaml').write_text(yaml.safe_dump(config), encoding='utf-8')
+
+
+class TestMultiProject:
+    """多工程构建测试类"""
+
+    def test_discover_and_order(self, tmp_path):
+        """发现工程、跳过构建目录，并按IP依赖排序"""
+        _write_project(tmp_path / 'app', 'app',
+                       source={'ip_repo_paths': ['../ip_lib/ip_repo']})
+        _write_project(tmp_path / 'ip_lib', 'ip_lib')
+        _write_project(tmp_path / 'board', 'board',
+                       project={'name': 'board', 'depends_on': ['app']})
+        # 构建输出目录中的配置文件不应被当作工程
+        _write_project(tmp_path / 'app' / 'build', 'stale')
+
+        entries = discover_projects(tmp_path, _load)
+        assert sorted(e.name for e in entries) == ['app', 'board', 'ip_lib']
+        by_name = {e.name: e for e in entries}
+        assert by_name['app'].depends_on == ['ip_lib']
+        assert by_name['board'].depends_on == ['app']
+        assert [e.name for e in order_projects(entries)] == ['ip_lib', 'app', 'board']
+
+    def test_cycle_detected(self, tmp_path):
+        """循环依赖时报错"""
+        _write_project(tmp_path / 'a', 'a', project={'name': 'a', 'depends_on': ['b']})
+        _write_project(tmp_path / 'b', 'b', project={'name': 'b', 'depends_on': ['a']})
+        with pytest.raises(MultiProjectError):
+            order_projects(discover_projects(tmp_path, _load))
+
+    def test_shared_pool_and_dependency_order(self, tmp_path):
+        """所有工程共享作业池，下游工程在上游成功后开始"""
+        _write_project(tmp_path / 'ip_lib', 'ip_lib')
+        _write_project(tmp_path / 'app', 'app',
+                       project={'name': 'app', 'depends_on': ['ip_lib']})
+        _write_project(tmp_path / 'other', 'other')
+        entries = discover_projects(tmp_path, _load)
+
+        events = []
+        state = {'running': 0, 'peak': 0}
+
+        def graph_factory(entry, report):
+            async def action():
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+                events.append(('start', entry.name))
+                await asyncio.sleep(0.02)
+                events.append(('end', entry.name))
+                state['running'] -= 1
+                return BuildResult(success=True, artifacts={}, logs={}, metrics={})
+            nodes = [BuildNode('bitstream', action, resources={'cpu': 1})]
+            return BuildGraph(nodes, entry.config, state_dir=entry.root / '.fpgab',
+                              base_dir=entry.root, reporter=report)
+
+        messages = []
+        builder = MultiProjectBuilder(
+            entries, graph_factory, lambda graph: ['bitstream'], jobs=2, memory=None,
+            reporter=messages.append)
+        summaries = builder.run()
+
+        assert all(s.success for s in summaries)
+        assert state['peak'] <= 2
+        assert events.index(('end', 'ip_lib')) < events.index(('start', 'app'))
+        assert all(m.startswith('[') for m in messages)
+
+        lines = format_summary(summaries, 1.0)
+        assert any(line.startswith('app') for line in lines)
+        assert '成功 3' in lines[-1]
+
+    def test_failed_dependency_blocks_downstream(self, tmp_path):
+        """上游工程失败时下游工程不运行"""
+        _write_project(tmp_path / 'ip_lib', 'ip_lib')
+        _write_project(tmp_path / 'app', 'app',
+                       project={'name': 'app', 'depends_on': ['ip_lib']})
+        entries = discover_projects(tmp_path, _load)
+        calls = []
+
+        def graph_factory(entry, report):
+            async def action():
+                calls.append(entry.name)
+                success = entry.name != 'ip_lib'
+                return BuildResult(success=success, artifacts={}, logs={}, metrics={})
+            return BuildGraph([BuildNode('bitstream', action)], entry.config,
+                              state_dir=entry.root / '.fpgab', base_dir=entry.root,
+                              reporter=report)
+
+        summaries = MultiProjectBuilder(
+            entries, graph_factory, lambda graph: ['bitstream'], jobs=2, memory=None,
+            reporter=lambda m: None).run()
+        by_name = {s.name: s for s in summaries}
+        assert calls == ['ip_lib']
+        assert not by_name['app'].success and 'ip_lib' in by_name['app'].error
+
+    def test_hooks_run_per_project(self, tmp_path):
+        """每个工程与单工程构建一样执行pre_build和post_bitstream钩子"""
+        python = f'"{sys.executable}"'
+        hooks = {
+            'pre_build': f'{python} -c "open(\'pre.txt\', \'w\').write(\'x\')"',
+            'post_bitstream': f'{python} -c "open(\'post.txt\', \'w\').write(\'x\')"',
+        }
+        _write_project(tmp_path / 'a', 'a', build={'hooks': hooks})
+        failing = dict(hooks, pre_build=f'{python} -c "exit(1)"')
+        _write_project(tmp_path / 'b', 'b', build={'hooks': failing})
+        entries = discover_projects(tmp_path, _load)
+        calls = []
+
+        def graph_factory(entry, report):
+            async def action():
+                calls.append(entry.name)
+                assert (entry.root / 'pre.txt').exists()
+                return BuildResult(success=True, artifacts={}, logs={}, metrics={})
+            return BuildGraph([BuildNode('bitstream', action)], entry.config,
+                              state_dir=entry.root / '.fpgab', base_dir=entry.root,
+                              reporter=report)
+
+        summaries = MultiProjectBuilder(
+            entries, graph_factory, lambda graph: ['bitstream'], jobs=2, memory=None,
+            reporter=lambda m: None).run()
+        by_name = {s.name: s for s in summaries}
+        assert calls == ['a']
+        assert by_name['a'].success and (tmp_path / 'a' / 'post.txt').exists()
+        assert not by_name['b'].success and by_name['b'].failed == ['pre_build']
+        assert not (tmp_path / 'b' / 'post.txt').exists()
+
+    def test_resource_pool_limits(self):
+        """资源池按容量限制并发，超出容量的请求在空闲时仍可运行"""
+        pool = ResourcePool({'cpu': 2, 'license': 1, 'memory': None})
+        state = {'running': 0, 'licensed': 0, 'peak': 0, 'peak_licensed': 0}
+
+        async def job(request):
+            await pool.acquire(request)
+            state['running'] += 1
+            state['licensed'] += request.get('license', 0)
+            state['peak'] = max(state['peak'], state['running'])
+            state['peak_licensed'] = max(state['peak_licensed'], state['licensed'])
+            await asyncio.sleep(0.01)
+            state['running'] -= 1
+            state['licensed'] -= request.get('license', 0)
+            await pool.release(request)
+
+        async def main():
+            await asyncio.gather(
+                *[job({'cpu': 1, 'license': 1}) for _ in range(3)],
+                *[job({'cpu': 1}) for _ in range(3)],
+                job({'cpu': 8}),
+            )
+
+        asyncio.run(asyncio.wait_for(main(), timeout=5))
+        assert state['peak'] <= 2
+        assert state['peak_licensed'] == 1
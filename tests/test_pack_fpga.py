@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+pack_fpga 单遍打包流程测试
+"""
+
+import hashlib
+import os
+import stat
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+
+# 添加项目根目录和src目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / 'src'))
+
+from plugins.vivado.bitfile import Bitfile, parse_header
+import pack_fpga
+
+BIT_FILE = Path(__file__).parent / 'data' / 'cfgmem' / 'demo.bit'
+
+
+def _run_pack(tmp_path, *args):
+    result = subprocess.run(
+        [sys.executable, str(project_root / 'pack_fpga.py'), '--pure-fpga',
+         '--bootgen', str(tmp_path / 'missing-bootgen'),
+         '--output-dir', str(tmp_path / 'bin'),
+         '--version-file', str(tmp_path / 'none.yaml'), *args],
+        cwd=tmp_path, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stdout + result.stderr
+    return result
+
+
+def _variant(tmp_path, name, marker):
+    """复制demo.bit并修改配置数据的最后一个字节"""
+    data = bytearray(BIT_FILE.read_bytes())
+    data[-1] = marker
+    path = tmp_path / name
+    path.write_bytes(bytes(data))
+    return path
+
+
+class TestPackFpga:
+    """打包流程测试类"""
+
+    def test_stream_image_single_pass(self, tmp_path):
+        """一次遍历完成时间戳修补、摘要计算和写入"""
+        data = bytearray(BIT_FILE.read_bytes())
+        offset = parse_header(bytes(data)).time_offset
+        data[offset:offset + 8] = b'00:11:22'
+        reads = []
+
+        def chunks():
+            for start in range(0, len(data), 64):
+                reads.append(start)
+                yield memoryview(data)[start:start + 64]
+
+        temp, md5, sha256, size = pack_fpga.stream_image(chunks(), len(data), tmp_path,
+                                                         b'12:34:56')
+        output = Path(temp).read_bytes()
+        assert output == BIT_FILE.read_bytes()
+        assert reads == list(range(0, len(data), 64))
+        assert (md5, sha256, size) == (hashlib.md5(output).hexdigest(),
+                                       hashlib.sha256(output).hexdigest(), len(output))
+
+    @pytest.mark.skipif(sys.platform == 'win32', reason='Windows不支持POSIX权限位')
+    def test_output_file_mode(self, tmp_path):
+        """发布文件按umask设置权限，而不是mkstemp的0600"""
+        umask = os.umask(0o022)
+        try:
+            temp, _, _, _ = pack_fpga.stream_image(iter([b'data']), 4, tmp_path)
+            assert stat.S_IMODE(os.stat(temp).st_mode) == 0o644
+
+            _run_pack(tmp_path, '--bit', str(BIT_FILE))
+            bins = list((tmp_path / 'bin').glob('V*.bin'))
+            assert len(bins) == 1
+            assert stat.S_IMODE(os.stat(bins[0]).st_mode) == 0o644
+        finally:
+            os.umask(umask)
+
+    def test_headerless_timestamp_beyond_window(self, tmp_path):
+        """没有bit文件头时扫描整个文件，时间戳在文件头范围之外且跨块也能修补"""
+        offset = pack_fpga.BIN_HEADER_WINDOW * 2 + 61  # 跨越第一个64字节块边界
+        data = bytearray(b'\xff' * (offset + 1000))
+        data[offset:offset + 8] = b'00:11:22'
+        expected = bytearray(data)
+        expected[offset:offset + 8] = b'12:34:56'
+
+        def chunks():
+            for start in range(0, len(data), 64):
+                yield memoryview(data)[start:start + 64]
+
+        temp, md5, _, size = pack_fpga.stream_image(chunks(), len(data), tmp_path,
+                                                    b'12:34:56')
+        assert Path(temp).read_bytes() == expected
+        assert (md5, size) == (hashlib.md5(expected).hexdigest(), len(expected))
+
+        bin_file = tmp_path / 'boot.bin'
+        bin_file.write_bytes(bytes(data))
+        with open(bin_file, 'rb') as f:
+            assert pack_fpga.scan_timestamp_offset(f, chunk_size=64) == offset
+        assert pack_fpga.fix_bin_timestamp(bin_file, BIT_FILE)
+        assert bin_file.read_bytes() == expected
+
+        # 完全没有时间戳时内容原样输出
+        plain = b'\xff' * 5000
+        chunks = iter([plain[:3000], plain[3000:]])
+        temp, _, _, size = pack_fpga.stream_image(chunks, len(plain), tmp_path,
+                                                  b'12:34:56')
+        assert Path(temp).read_bytes() == plain and size == len(plain)
+
+    def test_bin_input_left_untouched(self, tmp_path):
+        """bin输入按同名bit修补时间戳后写入版本文件名，原文件不变"""
+        stale = bytearray(BIT_FILE.read_bytes())
+        offset = parse_header(bytes(stale)).time_offset
+        stale[offset:offset + 8] = b'00:11:22'
+        (tmp_path / 'top.bit').write_bytes(BIT_FILE.read_bytes())
+        (tmp_path / 'top.ltx').write_text('probes')
+        source = tmp_path / 'top.bin'
+        source.write_bytes(bytes(stale))
+
+        _run_pack(tmp_path, '--bit', str(source))
+
+        output_dir = tmp_path / 'bin'
+        [bin_file] = output_dir.glob('V*.bin')
+        content = bin_file.read_bytes()
+        md5 = hashlib.md5(content).hexdigest()
+        assert content == BIT_FILE.read_bytes()
+        assert source.read_bytes() == bytes(stale)
+        assert bin_file.stem.endswith(md5[:6])
+        assert (output_dir / f'{bin_file.stem}.ltx').read_text() == 'probes'
+        assert (output_dir / 'APP_MD5_TXT').read_text() == f"MD5哈希值: {md5}\n"
+        sha256_text = (output_dir / 'APP_SHA256_TXT').read_text()
+        assert hashlib.sha256(content).hexdigest() in sha256_text
+        assert not [path for path in output_dir.iterdir() if path.name.startswith('.')]
+
+    def test_parallel_images(self, tmp_path):
+        """多个bit文件在线程池中并行打包"""
+        first = _variant(tmp_path, 'a.bit', 0x11)
+        second = _variant(tmp_path, 'b.bit', 0x22)
+
+        _run_pack(tmp_path, '--jobs', '2', '--bit', str(first), str(second))
+
+        output_dir = tmp_path / 'bin'
+        names = (output_dir / 'BINNAME').read_text().splitlines()
+        assert len(names) == 2 and len(set(names)) == 2
+        for name, source in zip(names, (first, second)):
+            with Bitfile(source) as bit:
+                assert Path(name).read_bytes() == bit.payload.tobytes()
+        assert len((output_dir / 'APP_MD5_TXT').read_text().splitlines()) == 2
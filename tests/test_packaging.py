@@ -83,6 +83,36 @@ class TestPackaging:
         assert 'sys.path' in content, "runtime_hook.py应修改sys.path"
         assert 'plugins' in content, "runtime_hook.py应处理插件导入"
 
+    def test_onedir_spec(self):
+        """单目录模式生成带版本号的程序目录，单文件模式保持不变"""
+        from scripts.package import Packager
+
+        packager = Packager(self.dist_dir)
+        onedir = packager.pyinstaller_spec(onefile=False)
+        onefile = packager.pyinstaller_spec(onefile=True)
+        compile(onedir, 'FPGABuilder.spec', 'exec')
+        compile(onefile, 'FPGABuilder.spec', 'exec')
+
+        assert 'COLLECT(' in onedir and 'exclude_binaries=True' in onedir
+        assert f"name='FPGABuilder-{packager.version}'" in onedir
+        assert 'COLLECT(' not in onefile
+        assert "'core.startup'" in onefile
+
+    def test_runtime_hook_lazy(self):
+        """运行时钩子不预先导入插件，并记录启动阶段耗时"""
+        script = (
+            "import runpy, sys; runpy.run_path({hook!r}); "
+            "assert 'plugins.vivado.plugin' not in sys.modules; "
+            "from core import startup; "
+            "assert [p for p, _ in startup.phases()] == ['运行时钩子']"
+        ).format(hook=str(project_root / "scripts" / "runtime_hook.py"))
+        env = dict(os.environ, FPGABUILDER_DEBUG='1')
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True,
+                                text=True, cwd=self.temp_dir, env=env)
+
+        assert result.returncode == 0, result.stderr
+        assert '启动阶段耗时' in result.stderr and '运行时钩子' in result.stderr
+
     def test_package_script_executable(self):
         """测试打包脚本可执行"""
         package_script = project_root / "scripts" / "package.py"
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+基于清单的插件发现测试
+"""
+
+import json
+import sys
+from pathlib import Path
+import pytest
+
+# 添加src目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from core import plugin_manager as plugin_manager_module
+from core.plugin_base import PluginType
+from core.plugin_manager import PluginManager, PluginManagerError, PluginManifest
+
+PLUGIN_SOURCE = '''
+from core.plugin_base import BuildResult, PluginType, ToolPlugin, register_plugin
+
+INIT_CALLS = []
+
+
+@register_plugin
+class {cls}(ToolPlugin):
+    @property
+    def name(self):
+        return "{name}"
+
+    @property
+    def plugin_type(self):
+        return PluginType.TOOL
+
+    @property
+    def tool_name(self):
+        return "{name}"
+
+    def initialize(self):
+        INIT_CALLS.append(self)
+        return True
+
+    def execute(self, config):
+        return BuildResult(success=True, artifacts={{}}, logs={{}}, metrics={{}})
+'''
+
+
+def _plugin_package(plugin_dir, package, name, cls, manifest=True):
+    root = plugin_dir / package
+    root.mkdir(parents=True)
+    (root / '__init__.py').write_text('')
+    (root / 'plugin.py').write_text(PLUGIN_SOURCE.format(name=name, cls=cls))
+    if manifest:
+        (root / 'plugin.json').write_text(json.dumps({
+            'name': name, 'type': 'tool', 'entry_point': f'.plugin:{cls}',
+            'version': '0.1.0',
+        }))
+
+
+def _manager(plugin_dir):
+    manager = PluginManager(plugin_dirs=[plugin_dir], use_entry_points=False)
+    manager.plugin_dirs = [plugin_dir]
+    manager.discover_plugins()
+    return manager
+
+
+class TestPluginDiscovery:
+    """插件发现测试类"""
+
+    def test_discovery_imports_nothing(self, tmp_path):
+        """发现阶段只读取清单，首次使用时才导入并初始化"""
+        plugin_dir = tmp_path / 'plugins'
+        _plugin_package(plugin_dir, 'lazy_demo', 'lazy-demo', 'LazyDemoPlugin')
+        manager = _manager(plugin_dir)
+
+        assert 'plugins.lazy_demo.plugin' not in sys.modules
+        manifest = manager.get_manifests()['lazy-demo']
+        assert manifest.plugin_type == PluginType.TOOL
+        assert manifest.entry_point == 'plugins.lazy_demo.plugin:LazyDemoPlugin'
+        assert manager.has_plugin('lazy-demo')
+
+        plugin = manager.get_plugin('lazy-demo')
+        module = sys.modules['plugins.lazy_demo.plugin']
+        assert plugin is manager.get_tool_plugin('lazy-demo')
+        assert module.INIT_CALLS == [plugin]
+        assert manager.get_all_tool_plugins() == {'lazy-demo': plugin}
+        assert len(module.INIT_CALLS) == 1
+
+    def test_type_query_loads_only_matching(self, tmp_path):
+        """按类型查询只加载该类型的插件"""
+        plugin_dir = tmp_path / 'plugins'
+        _plugin_package(plugin_dir, 'typed_demo', 'typed-demo', 'TypedDemoPlugin')
+        manager = _manager(plugin_dir)
+
+        assert manager.get_all_vendor_plugins() == {}
+        assert 'plugins.typed_demo.plugin' not in sys.modules
+        assert list(manager.get_plugins_by_type(PluginType.TOOL)) == ['typed-demo']
+
+    def test_legacy_package_without_manifest(self, tmp_path):
+        """没有清单的旧插件包在需要完整列表时导入"""
+        plugin_dir = tmp_path / 'plugins'
+        _plugin_package(plugin_dir, 'legacy_demo', 'legacy-demo', 'LegacyDemoPlugin',
+                        manifest=False)
+        (plugin_dir / 'legacy_demo' / '__init__.py').write_text(
+            'from .plugin import LegacyDemoPlugin\n')
+        manager = _manager(plugin_dir)
+
+        assert 'plugins.legacy_demo' not in sys.modules
+        assert 'legacy-demo' in manager.get_all_plugins()
+
+    def test_manifest_validation(self, tmp_path, monkeypatch):
+        """清单缺少字段或类型未知时报错，入口点插件按需导入"""
+        with pytest.raises(PluginManagerError):
+            PluginManifest.from_dict({'name': 'x', 'type': 'tool'}, 'plugin.json')
+        with pytest.raises(PluginManagerError):
+            PluginManifest.from_dict(
+                {'name': 'x', 'type': 'compiler', 'entry_point': 'a:B'}, 'plugin.json')
+        with pytest.raises(PluginManagerError):
+            PluginManifest.from_dict(
+                {'name': 'x', 'type': 'tool', 'entry_point': '.plugin:B'},
+                'plugin.json')
+
+        # 已安装发行包中的插件模块
+        site = tmp_path / 'site'
+        site.mkdir()
+        (site / 'fpgab_ep_demo.py').write_text(
+            PLUGIN_SOURCE.format(name='ep-demo', cls='EntryPointDemoPlugin'))
+        monkeypatch.syspath_prepend(str(site))
+
+        plugin_dir = tmp_path / 'plugins'
+        (plugin_dir / 'broken').mkdir(parents=True)
+        (plugin_dir / 'broken' / '__init__.py').write_text('')
+        (plugin_dir / 'broken' / 'plugin.json').write_text('{"name": "broken"}')
+        manifests = [PluginManifest('ep-demo', 'fpgab_ep_demo:EntryPointDemoPlugin',
+                                    source='demo-dist')]
+        monkeypatch.setattr(plugin_manager_module, 'entry_point_manifests',
+                            lambda: manifests)
+
+        manager = PluginManager(plugin_dirs=[plugin_dir])
+        manager.plugin_dirs = [plugin_dir]
+        manager.discover_plugins()
+        assert 'broken' not in manager.get_manifests()
+        assert 'fpgab_ep_demo' not in sys.modules
+        # 入口点未声明类型，按类型查询时导入后判断
+        assert list(manager.get_all_tool_plugins()) == ['ep-demo']
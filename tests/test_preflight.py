@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+RTL展开预检测试
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# 添加src目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from core.plugin_base import BuildResult
+from plugins.vivado.file_scanner import FileScanner
+from plugins.vivado.plugin import VivadoPlugin
+from plugins.vivado.preflight import (
+    PreflightCache, PreflightResult, SharedElaboration, black_box_sources,
+    black_box_stubs, classify_output, part_family, preflight_script, preflight_settings,
+    source_fingerprint,
+)
+
+# Vivado 2023.2 对缺失模块运行 synth_design -rtl 时的输出格式（含连锁错误）
+MISSING_IP_LOG = (Path(__file__).parent / 'data' / 'preflight' /
+                  'missing_ip.log').read_text().splitlines()
+
+
+def _config(preflight=True):
+    return {
+        'project': {'name': 'demo', 'version': '1.0'},
+        'project_dir': 'build',
+        'fpga': {'part': 'xc7a35tcsg324-1', 'top_module': 'top'},
+        'source': {'hdl': [{'pattern': 'src/*.v', 'include_dirs': ['src']}],
+                   'ip_cores': [{'path': 'ip/clk_wiz_0.xci'}]},
+        'build': {'synthesis': {'preflight': preflight}},
+    }
+
+
+def _write_design(root):
+    (root / 'src').mkdir()
+    (root / 'ip').mkdir()
+    (root / 'src' / 'top.v').write_text(
+        '`include "defs.vh"\nmodule top(input a, output b);\n'
+        '  clk_wiz_0 #(.DIV(2)) u_clk (.clk_in1(a), .clk_out1(b));\nendmodule\n')
+    (root / 'src' / 'defs.vh').write_text('`define WIDTH 8\n')
+    (root / 'ip' / 'clk_wiz_0.xci').write_text('{}')
+
+
+class _FakeRun:
+    """记录预检脚本并返回给定输出的Vivado运行"""
+
+    def __init__(self, lines, returncode=0):
+        self.lines = lines
+        self.returncode = returncode
+        self.scripts = []
+
+    async def __call__(self, tcl_script, script_name, config=None, on_output=None):
+        self.scripts.append(tcl_script)
+        for line in self.lines:
+            on_output('stdout', line)
+        return BuildResult(success=self.returncode == 0, artifacts={}, logs={},
+                           metrics={})
+
+
+def _plugin(tmp_path, run):
+    plugin = VivadoPlugin()
+    plugin.working_dir = tmp_path
+    plugin.initialize = lambda config=None: True
+    plugin._run_vivado_tcl_async = run
+    return plugin
+
+
+class TestPreflight:
+    """RTL展开预检测试类"""
+
+    def test_settings(self):
+        """布尔值和字典两种写法"""
+        assert preflight_settings(_config(True)) == {'enabled': True, 'cache': True}
+        assert preflight_settings(_config({'cache': False})) == \
+            {'enabled': True, 'cache': False}
+        assert preflight_settings(_config({'enabled': False})) is None
+        assert preflight_settings({}) is None
+
+    def test_script_and_classification(self):
+        """非工程模式展开，错误不再按文本过滤"""
+        files = [{'path': 'src/top.v', 'language': 'verilog'},
+                 {'path': 'src/defs.vh', 'language': 'verilog'}]
+        script = preflight_script('xc7a35t', 'top', files)
+        assert script.startswith('create_project -in_memory -part xc7a35t\n')
+        assert 'read_verilog {{src/top.v}}' in script
+        assert 'defs.vh' not in script
+        assert 'catch {synth_design -rtl -name rtl_1 -top top -part xc7a35t}' in script
+
+        # 没有桩模块的黑盒（例如只在VHDL中实例化）：缺失模块及其连锁错误降为警告并计数
+        errors, warnings, demoted = classify_output(MISSING_IP_LOG, {'clk_wiz_0'})
+        assert errors == [] and demoted == 4
+        assert len(warnings) == 4
+
+        errors, _, demoted = classify_output(MISSING_IP_LOG, set())
+        assert len(errors) == 4 and demoted == 0
+
+        syntax = 'ERROR: [Synth 8-2715] syntax error near endmodule [src/top.v:4]'
+        errors, _, _ = classify_output(MISSING_IP_LOG + [syntax], {'clk_wiz_0'})
+        assert syntax in errors and any('[Synth 8-6156]' in line for line in errors)
+
+    def test_black_box_stubs(self, tmp_path):
+        """按实例化语句生成黑盒桩模块，已有Vivado桩文件时直接读入"""
+        _write_design(tmp_path)
+        (tmp_path / 'src' / 'sys.v').write_text(
+            'module sys(input clk);\n  // system_wrapper u_old (.x(clk));\n'
+            '  system_wrapper u_bd (clk, 1\'b0, {clk, clk});\nendmodule\n')
+        config = _config()
+        config['source']['block_design'] = {'bd_file': 'bd/system.bd'}
+        (tmp_path / 'bd').mkdir()
+        (tmp_path / 'bd' / 'system.bd').write_text('{}')
+        scanned = FileScanner(tmp_path).scan_files(config)
+
+        stub_path = tmp_path / 'build' / '.fpgab' / 'stubs.v'
+        build_dir = Path('build')
+        black_boxes, files = black_box_sources(scanned, stub_path, build_dir, 'demo',
+                                               tmp_path)
+        assert black_boxes == {'clk_wiz_0', 'system', 'system_wrapper'}
+        assert files == [{'path': str(stub_path), 'language': 'verilog'}]
+        stubs = stub_path.read_text()
+        assert ('(* black_box *) module clk_wiz_0 #(parameter DIV = 0)'
+                '(clk_in1, clk_out1);') in stubs
+        assert '(* black_box *) module system_wrapper(p0, p1, p2);' in stubs
+        assert 'module system(' not in stubs  # 没有实例化的模块不生成
+
+        # IP核目录中有Vivado生成的桩文件时使用它
+        (tmp_path / 'ip' / 'clk_wiz_0_stub.v').write_text(
+            'module clk_wiz_0(clk_in1, clk_out1);\nendmodule\n')
+        _, files = black_box_sources(scanned, stub_path, build_dir, 'demo', tmp_path)
+        assert files[0]['path'] == str(tmp_path / 'ip' / 'clk_wiz_0_stub.v')
+        assert 'clk_wiz_0' not in stub_path.read_text()
+
+        # 源文件中自己定义的wrapper不按黑盒处理
+        (tmp_path / 'src' / 'system_wrapper.v').write_text(
+            'module system_wrapper(input a, b, c);\nendmodule\n')
+        scanned = FileScanner(tmp_path).scan_files(config)
+        black_boxes, _ = black_box_sources(scanned, stub_path, build_dir, 'demo',
+                                           tmp_path)
+        assert 'system_wrapper' not in black_boxes
+        assert black_box_stubs(scanned['hdl'], {'missing'}, tmp_path) == ''
+
+    def test_fingerprint(self, tmp_path, monkeypatch):
+        """源文件和包含目录中的头文件修改都改变指纹"""
+        monkeypatch.chdir(tmp_path)
+        _write_design(tmp_path)
+        hdl = FileScanner(tmp_path).scan_files(_config())['hdl']
+        first = source_fingerprint(hdl, 'xc7a35t', 'top', base_dir=tmp_path)
+        assert source_fingerprint(hdl, 'xc7a35t', 'top', base_dir=tmp_path) == first
+        assert source_fingerprint(hdl, 'xc7a35t', 'top', {'SIM': None},
+                                  base_dir=tmp_path) != first
+
+        (tmp_path / 'src' / 'defs.vh').write_text('`define WIDTH 16\n')
+        assert source_fingerprint(hdl, 'xc7a35t', 'top', base_dir=tmp_path) != first
+
+    def test_cache_roundtrip(self, tmp_path):
+        """缓存保存通过/失败结果"""
+        cache = PreflightCache(tmp_path / 'preflight.json')
+        assert cache.get('a') is None
+        cache.put('a', PreflightResult(success=False, errors=['ERROR: x']))
+        cached = cache.get('a')
+        assert cached.cached and not cached.success
+        assert cached.errors == ['ERROR: x']
+
+    def test_preflight_cached_by_fingerprint(self, tmp_path, monkeypatch):
+        """未变化的设计跳过预检，失败结果同样被复用"""
+        monkeypatch.chdir(tmp_path)
+        _write_design(tmp_path)
+        config = _config()
+
+        run = _FakeRun(['WARNING: [Synth 8-7071] port b of module top is unconnected'])
+        plugin = _plugin(tmp_path, run)
+        assert asyncio.run(plugin.preflight_async(config)).success
+        assert asyncio.run(plugin.preflight_async(config)).logs['preflight'] == 'cached'
+        assert len(run.scripts) == 1
+        # 黑盒模块由生成的桩模块提供
+        stub_file = tmp_path / 'build' / '.fpgab' / 'preflight_stubs.v'
+        assert stub_file.as_posix() in run.scripts[0]
+
+        (tmp_path / 'src' / 'top.v').write_text(
+            'module top(input a output b);\nendmodule\n')
+        run.lines = ['ERROR: [Synth 8-2715] syntax error near output [src/top.v:1]']
+        result = asyncio.run(plugin.preflight_async(config))
+        assert not result.success and 'syntax error' in result.errors[0]
+        assert len(run.scripts) == 2
+        assert not asyncio.run(plugin.preflight_async(config)).success
+        assert len(run.scripts) == 2
+
+    def test_demoted_result_not_cached(self, tmp_path, monkeypatch):
+        """有错误被降为警告的结果不缓存"""
+        monkeypatch.chdir(tmp_path)
+        _write_design(tmp_path)
+        (tmp_path / 'src' / 'top.v').write_text(
+            'module top(input a, output b);\nendmodule\n')
+        config = _config()
+
+        run = _FakeRun(MISSING_IP_LOG)
+        plugin = _plugin(tmp_path, run)
+        assert asyncio.run(plugin.preflight_async(config)).success
+        result = asyncio.run(plugin.preflight_async(config))
+        assert result.logs['preflight'] == 'executed'
+        assert len(run.scripts) == 2
+
+    def test_elaboration_shared_across_parts(self, tmp_path, monkeypatch):
+        """构建矩阵中只有器件型号不同的变体共享一次展开，不同系列各自展开"""
+        monkeypatch.chdir(tmp_path)
+        _write_design(tmp_path)
+        run = _FakeRun([])
+        share = SharedElaboration()
+
+        def variant(name, part):
+            config = _config({'cache': False})
+            config['project_dir'] = f'build/{name}'
+            config['fpga']['part'] = part
+            plugin = _plugin(tmp_path, run)
+            plugin.elaboration_share = share
+            return plugin.preflight_async(config)
+
+        async def main():
+            return await asyncio.gather(variant('a35t', 'xc7a35tcsg324-1'),
+                                        variant('a100t', 'xc7a100tcsg324-1'),
+                                        variant('zu9', 'xczu9eg-ffvb1156-2-e'))
+
+        assert all(result.success for result in asyncio.run(main()))
+        assert part_family('xc7a100tcsg324-1') == 'xc7a'
+        assert part_family('xczu9eg-ffvb1156-2-e') == 'xczu'
+        assert len(run.scripts) == 2
+        assert (share.misses, share.hits) == (2, 1)
+
+    def test_preflight_node_parallel(self, tmp_path, monkeypatch):
+        """预检节点不依赖工程创建和IP核生成，综合依赖预检"""
+        monkeypatch.chdir(tmp_path)
+        _write_design(tmp_path)
+        plugin = _plugin(tmp_path, _FakeRun([]))
+        nodes = {node.name: node for node in plugin.build_graph_nodes(_config())}
+        assert nodes['preflight'].deps == []
+        assert 'preflight' in nodes['synth'].deps
+        assert 'preflight' not in nodes['ip_generate'].deps
+
+        nodes = {node.name: node for node in plugin.build_graph_nodes(_config(False))}
+        assert 'preflight' not in nodes
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+发布镜像归档测试
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+import pytest
+from click.testing import CliRunner
+
+# 添加src目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from core.cli import cli
+from core.release_archive import ArchiveError, ReleaseArchive, parse_release_name
+
+
+def _release(directory, name, content, ltx=None):
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f'{name}.bin'
+    path.write_bytes(content)
+    if ltx is not None:
+        (directory / f'{name}.ltx').write_text(ltx)
+    return path
+
+
+class TestReleaseArchive:
+    """发布镜像归档测试类"""
+
+    def test_deduplicated_by_content(self, tmp_path):
+        """相同内容只保存一份，发布名称是指向内容文件的硬链接"""
+        archive = ReleaseArchive(tmp_path / 'archive')
+        first = _release(tmp_path / 'bin', 'V26.02.0.0.2_0227_abc1234_0f1e2d',
+                         b'image' * 1000, ltx='probes')
+        second = _release(tmp_path / 'bin', 'V26.02.0.0.2_0301_def5678_0f1e2d',
+                          b'image' * 1000, ltx='probes')
+
+        record = archive.add(first, ltx_path=first.with_suffix('.ltx'))
+        archive.add(second, ltx_path=second.with_suffix('.ltx'))
+
+        assert (record.version, record.date, record.git_head) == \
+            ('V26.02.0.0.2', '0227', 'abc1234')
+        stats = archive.stats()
+        assert (stats['releases'], stats['objects']) == (2, 2)  # 一份bin内容 + 一份ltx内容
+        assert stats['dedup_ratio'] == pytest.approx(2 * 5000 / (5000 + len('probes')))
+        linked = archive.releases_dir / f'{first.stem}.bin'
+        assert linked.read_bytes() == first.read_bytes()
+        assert os.stat(linked).st_ino == os.stat(archive.path(first.stem)).st_ino
+        assert (archive.releases_dir / f'{second.stem}.ltx').read_text() == 'probes'
+
+    def test_index_queries(self, tmp_path):
+        """按git HEAD前缀、版本、日期和SHA256查询"""
+        archive = ReleaseArchive(tmp_path / 'archive')
+        for index, (name, content) in enumerate([
+            ('V26.02.0.0.1_0226_aaa1111_000001', b'one'),
+            ('V26.02.0.0.2_0227_abc1234_000002', b'two'),
+            ('V26.02.0.0.2_0228_ABC9999_000003', b'three'),
+        ]):
+            archive.add(_release(tmp_path / 'bin', name, content), link=False)
+
+        assert [r.name for r in archive.find(git_head='abc')] == \
+            ['V26.02.0.0.2_0228_ABC9999_000003', 'V26.02.0.0.2_0227_abc1234_000002']
+        assert [r.date for r in archive.find(version='V26.02.0.0.2')] == \
+            ['0228', '0227']
+        assert [r.git_head for r in archive.find(date='0226')] == ['aaa1111']
+        sha = archive.get('V26.02.0.0.1_0226_aaa1111_000001').sha256
+        assert [r.name for r in archive.find(sha256=sha[:10])] == \
+            ['V26.02.0.0.1_0226_aaa1111_000001']
+        assert len(archive.find(limit=2)) == 2
+        assert not (archive.releases_dir).exists()
+        assert parse_release_name('top') == {}
+
+    def test_gc_retention(self, tmp_path):
+        """回收时保留固定的、最新的和期限内的发布，删除不再引用的内容"""
+        archive = ReleaseArchive(tmp_path / 'archive')
+        names = []
+        for index in range(4):
+            name = f'V1.0.0.0.{index}_0101_{index:07d}_00000{index}'
+            path = _release(tmp_path / 'bin', name, bytes([index]) * 64)
+            names.append(archive.add(path).name)
+        # 最早的两个发布改成10天前归档，其中第一个固定
+        with archive._connect() as connection:
+            connection.execute("UPDATE releases SET created = ? WHERE name IN (?, ?)",
+                               (time.time() - 10 * 86400, names[0], names[1]))
+        archive.pin(names[0])
+        with pytest.raises(ArchiveError):
+            archive.pin('missing')
+
+        preview = archive.gc(keep_last=1, max_age_days=5, dry_run=True)
+        assert preview == {'releases': [names[1]], 'objects': 1, 'bytes': 64}
+        assert archive.get(names[1]) is not None and archive.stats()['objects'] == 4
+
+        result = archive.gc(keep_last=1, max_age_days=5)
+        assert result == {'releases': [names[1]], 'objects': 1, 'bytes': 64}
+        assert archive.get(names[1]) is None
+        assert not (archive.releases_dir / f'{names[1]}.bin').exists()
+        assert archive.stats()['objects'] == 3
+
+    def test_pack_archive_cli(self, tmp_path, monkeypatch):
+        """fpgab pack --archive 读取 pack_fpga.py 的 BINNAME 并归档"""
+        monkeypatch.chdir(tmp_path)
+        bin_file = _release(tmp_path / 'bin', 'V26.02.0.0.2_0227_abc1234_0f1e2d',
+                            b'image', ltx='probes')
+        (tmp_path / 'bin' / 'BINNAME').write_text(str(bin_file))
+        archive_dir = tmp_path / 'archive'
+        archive_opt = ['--archive-dir', str(archive_dir)]
+
+        runner = CliRunner()
+        result = runner.invoke(cli, ['pack', '--archive', *archive_opt])
+        assert result.exit_code == 0, result.output
+        assert '[OK] 已归档 V26.02.0.0.2_0227_abc1234_0f1e2d' in result.output
+
+        result = runner.invoke(cli, ['archive', 'list', *archive_opt,
+                                     '--git-head', 'abc'])
+        assert result.exit_code == 0 and bin_file.stem in result.output
+        assert ReleaseArchive(archive_dir).get(bin_file.stem).ltx_sha256 is not None
+
+        result = runner.invoke(cli, ['archive', 'gc', *archive_opt, '--keep-last', '0'])
+        assert result.exit_code == 0 and '删除 1 个发布' in result.output
+
+    def test_readd_drops_stale_ltx(self, tmp_path):
+        """覆盖同名发布且不再带.ltx时删除旧的.ltx链接"""
+        archive = ReleaseArchive(tmp_path / 'archive')
+        name = 'V1.0.0.0.1_0101_abc1234_000001'
+        path = _release(tmp_path / 'bin', name, b'first', ltx='probes')
+        archive.add(path, ltx_path=path.with_suffix('.ltx'))
+        assert (archive.releases_dir / f'{name}.ltx').exists()
+
+        path.write_bytes(b'second')
+        record = archive.add(path)
+        assert record.ltx_sha256 is None
+        assert (archive.releases_dir / f'{name}.bin').read_bytes() == b'second'
+        assert not (archive.releases_dir / f'{name}.ltx').exists()
+
+        archive.add(path, link=False)
+        assert not (archive.releases_dir / f'{name}.bin').exists()
+
+    def test_pin_cli(self, tmp_path):
+        """fpgab archive pin/unpin 固定和取消固定发布"""
+        archive_dir = tmp_path / 'archive'
+        archive_opt = ['--archive-dir', str(archive_dir)]
+        archive = ReleaseArchive(archive_dir)
+        path = _release(tmp_path / 'bin', 'V1.0.0.0.1_0101_abc1234_000001', b'image')
+        name = archive.add(path).name
+
+        runner = CliRunner()
+        result = runner.invoke(cli, ['archive', 'pin', *archive_opt, name])
+        assert result.exit_code == 0 and f'[OK] 已固定 {name}' in result.output
+        assert archive.get(name).pinned
+        result = runner.invoke(cli, ['archive', 'gc', *archive_opt, '--keep-last', '0'])
+        assert result.exit_code == 0 and archive.get(name) is not None
+
+        result = runner.invoke(cli, ['archive', 'unpin', *archive_opt, name])
+        assert result.exit_code == 0 and not archive.get(name).pinned
+        result = runner.invoke(cli, ['archive', 'pin', *archive_opt, 'missing'])
+        assert result.exit_code == 1 and '[ERROR] 发布不存在: missing' in result.output
+
+    def test_pack_archive_from_other_dir(self, tmp_path, monkeypatch):
+        """BINNAME中相对于pack_fpga.py运行目录的路径按 --from 目录解析"""
+        monkeypatch.chdir(tmp_path)
+        output_dir = tmp_path / 'other' / 'bin'
+        bin_file = _release(output_dir, 'V26.02.0.0.2_0227_abc1234_0f1e2d', b'image',
+                            ltx='probes')
+        (output_dir / 'BINNAME').write_text(f'bin/{bin_file.name}\n')
+        archive_dir = tmp_path / 'archive'
+
+        runner = CliRunner()
+        result = runner.invoke(cli, ['pack', '--archive', '--archive-dir',
+                                     str(archive_dir), '--from', 'other/bin'])
+        assert result.exit_code == 0, result.output
+        record = ReleaseArchive(archive_dir).get(bin_file.stem)
+        assert record is not None and record.ltx_sha256 is not None
+
+        (output_dir / 'BINNAME').write_text('bin/missing.bin\n')
+        result = runner.invoke(cli, ['pack', '--archive', '--archive-dir',
+                                     str(archive_dir), '--from', 'other/bin'])
+        assert result.exit_code == 1 and '[ERROR] 归档' in result.output
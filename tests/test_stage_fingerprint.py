@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+阶段有效配置指纹测试
+"""
+
+import json
+import sys
+from pathlib import Path
+import pytest
+
+# 添加src目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from core.build_graph import (BuildGraph, BuildNode, config_fingerprint,
+                              normalize_config_keys)
+from core.config import ConfigError, ConfigManager
+from core.plugin_base import BuildResult
+from plugins.vivado.plugin import stage_config_keys
+from plugins.vivado.tcl_templates import BuildFlowTemplate
+
+CONFIG = {
+    'project': {'name': 'demo', 'version': '1.0.0'},
+    'fpga': {'part': 'xc7a35tcsg324-1', 'top_module': 'top'},
+    'build': {
+        'synthesis': {'strategy': 'default',
+                      'options': {'flatten': 'rebuilt', 'retiming': True}},
+        'bitstream': {'options': {'compress': True}},
+    },
+    'documentation': {'enabled': True},
+}
+
+
+class TestStageFingerprint:
+    """阶段有效配置指纹测试类"""
+
+    def test_order_independent(self):
+        """键的声明顺序和字典键顺序不影响指纹"""
+        keys = ['build.synthesis', 'fpga.part']
+        reordered = {
+            'fpga': {'top_module': 'top', 'part': 'xc7a35tcsg324-1'},
+            'build': {'synthesis': {'options': {'retiming': True, 'flatten': 'rebuilt'},
+                                    'strategy': 'default'}},
+        }
+        assert config_fingerprint(CONFIG, keys) == \
+            config_fingerprint(reordered, list(reversed(keys)))
+        duplicated = ['build.synthesis.options', 'build', 'fpga.part', 'fpga.part']
+        assert normalize_config_keys(duplicated) == ['build', 'fpga.part']
+
+    def test_unrelated_changes_keep_synth_fingerprint(self):
+        """修改文档或比特流选项不改变综合的指纹"""
+        manager = ConfigManager()
+        synth = manager.stage_fingerprint('synth', CONFIG)
+        bitstream = manager.stage_fingerprint('bitstream', CONFIG)
+
+        changed = json.loads(json.dumps(CONFIG))
+        changed['documentation']['enabled'] = False
+        changed['build']['bitstream']['options']['compress'] = False
+        assert manager.stage_fingerprint('synth', changed) == synth
+        assert manager.stage_fingerprint('bitstream', changed) != bitstream
+
+        changed['build']['synthesis']['options']['flatten'] = 'none'
+        assert manager.stage_fingerprint('synth', changed) != synth
+
+    def test_registry_from_templates(self):
+        """阶段配置键来自模板声明，并注册到ConfigManager"""
+        keys = stage_config_keys()
+        assert set(BuildFlowTemplate.config_keys()['synth']) <= set(keys['synth'])
+        assert 'fpga.part' in keys['synth'] and 'build.bitstream' not in keys['synth']
+        assert ConfigManager.stage_keys()['synth'] == keys['synth']
+
+        manager = ConfigManager()
+        manager.config_data = CONFIG
+        assert manager.stage_fingerprint('synth') == \
+            manager.stage_fingerprint('synth', CONFIG)
+        assert manager.stage_fingerprint(['fpga.part']) == \
+            config_fingerprint(CONFIG, ['fpga.part'])
+        with pytest.raises(ConfigError):
+            manager.stage_fingerprint('no_such_stage')
+
+    def test_record_next_to_outputs(self, tmp_path):
+        """构建图在阶段输出目录旁记录有效配置指纹"""
+        async def synth():
+            out = tmp_path / 'build' / 'synth_1'
+            out.mkdir(parents=True, exist_ok=True)
+            (out / 'top.dcp').write_text('dcp')
+            return BuildResult(success=True, artifacts={}, logs={}, metrics={})
+
+        keys = ConfigManager.stage_keys()['synth']
+        nodes = [BuildNode('synth', synth, outputs=['build/synth_1/*.dcp'],
+                           config_keys=keys)]
+        graph = BuildGraph(nodes, CONFIG, tmp_path / 'build' / '.fpgab',
+                           base_dir=tmp_path, reporter=lambda message: None)
+        assert graph.run(['synth']).success
+
+        record_file = tmp_path / 'build' / 'synth_1' / '.fpgab-synth.json'
+        record = json.loads(record_file.read_text())
+        assert record['stage'] == 'synth'
+        assert record['config_fingerprint'] == \
+            ConfigManager().stage_fingerprint('synth', CONFIG)
+        assert sorted(record['config']) == normalize_config_keys(keys)
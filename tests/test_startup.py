@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+CLI冷启动基准测试
+
+用 python -X importtime 运行命令，统计导入耗时。--version、--help 和
+debug status 不应导入配置校验、GitPython、asyncio和厂商插件等重量级模块，
+除解释器启动和click本身之外的导入耗时不应超过预算（扣除同一环境中只导入
+click的耗时，使预算与机器速度基本无关）。
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+
+# 添加src目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+IMPORT_CLICK = "import click"
+RUN_CLI = (
+    "import sys; sys.path.insert(0, {src!r}); from core.cli import main; "
+    "sys.argv = ['fpgab'] + sys.argv[1:]; main()"
+).format(src=str(project_root / 'src'))
+
+# 各命令在click之外的导入耗时预算（毫秒，取多次运行的最小值）；
+# 第二项表示是否在包含 fpga_project.yaml 的工程目录中运行
+BUDGETS_MS = {
+    (('--version',), False): 40,
+    (('--help',), False): 40,
+    (('debug', 'status'), False): 120,
+    (('debug', 'status'), True): 120,
+}
+
+PROJECT_CONFIG = """
+project:
+  name: demo
+  version: 1.0.0
+fpga:
+  vendor: xilinx
+  part: xc7a35tcsg324-1
+  top_module: top
+"""
+
+HEAVY_MODULES = ['jsonschema', 'pydantic', 'git', 'asyncio', 'plugins.vivado.plugin',
+                 'core.project']
+
+
+def _importtime(args, cwd, code=RUN_CLI):
+    """运行命令，返回(导入的模块, 导入总耗时毫秒)"""
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code, *args],
+                            cwd=cwd, env=env, capture_output=True, text=True,
+                            timeout=60)
+    assert result.returncode == 0, result.stderr[-2000:]
+    modules, total_us = set(), 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|', 2)
+        if not cumulative.strip().isdigit():
+            continue  # 表头
+        modules.add(name.strip())
+        if not name[1:].startswith(' '):
+            total_us += int(cumulative)  # 只累计顶层导入
+    return modules, total_us / 1000.0
+
+
+class TestStartup:
+    """CLI冷启动测试类"""
+
+    @pytest.mark.parametrize('args,in_project', list(BUDGETS_MS))
+    def test_cold_start_budget(self, args, in_project, tmp_path):
+        """启动时不导入重量级模块，导入耗时在预算内"""
+        if in_project:
+            # 工程目录中 debug status 会比较各阶段的配置指纹
+            (tmp_path / 'fpga_project.yaml').write_text(PROJECT_CONFIG,
+                                                        encoding='utf-8')
+        _importtime(args, tmp_path)  # 生成字节码缓存
+        runs = [_importtime(args, tmp_path) for _ in range(5)]
+        baseline = min(_importtime((), tmp_path, IMPORT_CLICK)[1] for _ in range(5))
+
+        modules = runs[0][0]
+        heavy = [name for name in HEAVY_MODULES if name in modules]
+        assert not heavy, f"fpgab {' '.join(args)} 导入了重量级模块: {heavy}"
+
+        elapsed = min(total for _, total in runs) - baseline
+        budget = BUDGETS_MS[args, in_project]
+        assert elapsed < budget, \
+            f"fpgab {' '.join(args)} 除click外导入耗时 {elapsed:.1f}ms 超出预算 {budget}ms"
+
+    def test_lazy_exports(self):
+        """core 包的导出按需导入"""
+        code = ("import sys; sys.path.insert(0, {src!r}); import core; "
+                "assert 'core.config' not in sys.modules; "
+                "from core import ConfigManager; "
+                "assert 'core.config' in sys.modules").format(
+            src=str(project_root / 'src'))
+        subprocess.run([sys.executable, '-c', code], check=True, timeout=60)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+工具检测缓存测试
+"""
+
+import os
+import sys
+import stat
+from pathlib import Path
+import pytest
+
+# 添加src目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from core import tool_cache
+from core.plugin_base import ToolDetector
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="使用shell脚本模拟vivado")
+class TestToolCache:
+    """工具检测缓存测试类"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path, monkeypatch):
+        """使用临时HOME和模拟的vivado可执行文件"""
+        monkeypatch.setenv('HOME', str(tmp_path))
+        monkeypatch.setenv('FPGABUILDER_TOOL_CACHE', '1')
+        self.counter = tmp_path / 'calls'
+        self.vivado = tmp_path / 'Vivado' / '2023.2' / 'bin' / 'vivado'
+        self.vivado.parent.mkdir(parents=True)
+        self._write_vivado('2023.2')
+
+    def _write_vivado(self, version):
+        self.vivado.write_text(
+            "#!/bin/sh\n"
+            f"echo x >> '{self.counter}'\n"
+            f"echo 'Vivado v{version} (64-bit)'\n"
+        )
+        self.vivado.chmod(self.vivado.stat().st_mode | stat.S_IEXEC)
+
+    def _calls(self):
+        return len(self.counter.read_text().split()) if self.counter.exists() else 0
+
+    def test_detection_probes_once(self):
+        """重复检测只运行一次版本命令"""
+        config = {'fpga': {'vivado_path': str(self.vivado.parent)}}
+        for _ in range(3):
+            info = ToolDetector.detect_vivado_with_config(config)
+            assert info.version == '2023.2'
+        assert self._calls() == 1
+        assert (Path(os.environ['HOME']) / '.fpga_builder' / 'tools.json').exists()
+
+    def test_invalidated_when_binary_changes(self):
+        """可执行文件变化后重新探测"""
+        assert ToolDetector.get_version_from_executable(self.vivado) == '2023.2'
+        self._write_vivado('2024.1')
+        st = self.vivado.stat()
+        os.utime(self.vivado, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+        assert ToolDetector.get_version_from_executable(self.vivado) == '2024.1'
+        assert self._calls() == 2
+
+    def test_snapshot_reports_stale_entries(self):
+        """快照标记已失效的条目"""
+        ToolDetector.get_version_from_executable(self.vivado)
+        cache = tool_cache.ToolCache()
+        key = str(self.vivado.absolute())
+        assert cache.snapshot()['executables'][key]['fresh']
+        self._write_vivado('2019.1.1')
+        assert not cache.snapshot()['executables'][key]['fresh']
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+多版本工具链清单测试
+"""
+
+import sys
+from pathlib import Path
+import pytest
+
+# 添加src目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from core.tool_inventory import ToolInventory
+
+
+def _make_install(root: Path, product: str, version: str, tools, settings=True):
+    install_dir = root / product / version
+    (install_dir / 'bin').mkdir(parents=True)
+    # 数据目录不应被扫描
+    (install_dir / 'data' / 'parts').mkdir(parents=True)
+    for tool in tools:
+        name = f"{tool}.bat" if sys.platform == 'win32' else tool
+        (install_dir / 'bin' / name).write_text('')
+    script = 'settings64.bat' if sys.platform == 'win32' else 'settings64.sh'
+    if settings:
+        (install_dir / script).write_text('')
+    return install_dir
+
+
+class TestToolInventory:
+    """工具链清单测试类"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """创建模拟安装目录"""
+        self.root = tmp_path / 'Xilinx'
+        for version in ('2019.2', '2022.2', '2023.2', '2024.1'):
+            _make_install(self.root, 'Vivado', version, ['vivado', 'bootgen'])
+        _make_install(self.root, 'Vitis_HLS', '2023.2', ['vitis_hls'])
+        self.inventory_path = tmp_path / 'inventory.json'
+
+    def _inventory(self):
+        return ToolInventory(path=self.inventory_path, roots=[self.root])
+
+    def test_records_all_versions(self):
+        """记录所有版本及settings脚本"""
+        inventory = self._inventory()
+        inventory.refresh()
+        assert inventory.versions('vivado') == ['2019.2', '2022.2', '2023.2', '2024.1']
+        assert inventory.versions('bootgen') == ['2019.2', '2022.2', '2023.2', '2024.1']
+
+        install = inventory.select('vivado', '2022.2')
+        assert Path(install.install_dir) == self.root / 'Vivado' / '2022.2'
+        assert install.settings_script.startswith(install.install_dir)
+        assert inventory.select('vitis_hls').version == '2023.2'
+        # 未指定版本时选择最新版本
+        assert inventory.select('vivado').version == '2024.1'
+        assert inventory.select('vivado', '2020.1') is None
+
+    def test_persisted_and_incremental(self):
+        """清单持久化，刷新时复用未变化的目录"""
+        first = self._inventory()
+        stats = first.refresh()
+        assert stats['reused'] == 0
+        # 不进入安装目录内部的数据目录
+        assert not any('data' in Path(d).parts for d in first._dirs)
+
+        second = self._inventory()
+        assert second.select('vivado', '2023.2') is not None
+        _make_install(self.root, 'Vivado', '2025.1', ['vivado'])
+        stats = second.refresh()
+        assert stats['reused'] > 0
+        assert second.versions('vivado')[-1] == '2025.1'
+
+    def test_config_selects_version(self, monkeypatch, tmp_path):
+        """配置中的vivado_version从清单中选择安装"""
+        from core.plugin_base import ToolDetector
+        monkeypatch.setenv('HOME', str(tmp_path))
+        config = {'fpga': {'vivado_version': '2019.2', 'tool_roots': [str(self.root)]}}
+        info = ToolDetector.detect_vivado_with_config(config)
+        assert info.version == '2019.2'
+        assert Path(info.path).parent.parent == self.root / 'Vivado' / '2019.2'
+        assert info.settings_script is not None
+
+    def test_rescan_on_miss(self):
+        """持久化清单中没有所需版本时增量扫描一次"""
+        self._inventory().refresh()
+        _make_install(self.root, 'Vivado', '2025.1', ['vivado'])
+
+        inventory = self._inventory()
+        refreshes = []
+        original = inventory.refresh
+        inventory.refresh = \
+            lambda force=False: refreshes.append(force) or original(force)
+        install = inventory.select('vivado', '2025.1')
+        assert install is not None and install.version == '2025.1'
+        assert refreshes == [False]
+
+        # 扫描后仍不存在的版本不再重复扫描
+        assert inventory.select('vivado', '2099.1') is None
+        assert inventory.select('quartus') is None
+        assert refreshes == [False]
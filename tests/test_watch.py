@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+监视模式测试
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+import pytest
+
+# 添加src目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+from core.file_watch import FileWatcher
+from plugins.vivado.file_scanner import FileScanner
+from plugins.vivado.watch import (HdlDependencyGraph, SessionTimeout, VivadoSession,
+                                  WatchSession, elaboration_script)
+
+# 模拟 vivado -mode tcl：执行source的脚本时按内容输出消息
+FAKE_VIVADO = r'''
+import re, sys
+for line in sys.stdin:
+    if line.strip() == 'exit':
+        break
+    match = re.search(r'source -notrace \{([^}]*)\}', line)
+    script = open(match.group(1)).read() if match else ''
+    rc = 0
+    if 'hang' in script:
+        import time
+        time.sleep(60)
+    if 'long_line' in script:
+        print('x' * 200000)
+    if '-top bad' in script:
+        print("ERROR: [Synth 8-439] module 'missing' not found")
+        rc = 1
+    elif 'read_xdc' in script:
+        print("CRITICAL WARNING: [Vivado 12-584] No ports matched 'clk_typo'")
+    for top in re.findall(r'-top (\w+)', script):
+        print('elaborated ' + top)
+    print('Vivado% @@FPGAB_DONE@@ ' + str(rc))
+    sys.stdout.flush()
+'''
+
+
+def _write_design(root):
+    (root / 'src').mkdir()
+    (root / 'src' / 'leaf.v').write_text(
+        'module leaf(input a, output b);\nassign b = a;\nendmodule\n')
+    (root / 'src' / 'mid.v').write_text(
+        'module mid(input a, output b);\n  leaf u_leaf (.a(a), .b(b));\nendmodule\n')
+    (root / 'src' / 'top.v').write_text(
+        '`include "defs.vh"\nmodule top(input a, output b);\n'
+        '  mid u_mid (.a(a), .b(b));\nendmodule\n')
+    (root / 'src' / 'defs.vh').write_text('`define WIDTH 8\n')
+    (root / 'top.xdc').write_text('set_property PACKAGE_PIN E3 [get_ports a]\n')
+
+
+def _config():
+    return {
+        'project': {'name': 'demo', 'version': '1.0'},
+        'fpga': {'part': 'xc7a35tcsg324-1', 'top_module': 'top'},
+        'source': {'hdl': [{'pattern': 'src/*.v', 'include_dirs': ['src']}],
+                   'constraints': [{'path': 'top.xdc'}]},
+    }
+
+
+class TestWatch:
+    """监视模式测试类"""
+
+    def test_dependency_roots(self, tmp_path, monkeypatch):
+        """内容修改只展开该模块，接口修改从父模块展开"""
+        monkeypatch.chdir(tmp_path)
+        _write_design(tmp_path)
+        hdl = FileScanner(tmp_path).scan_files(_config())['hdl']
+        graph = HdlDependencyGraph(hdl)
+        leaf = (tmp_path / 'src' / 'leaf.v').absolute()
+
+        assert graph.parents['leaf'] == {'mid'}
+        assert graph.descendants('top') == {'top', 'mid', 'leaf'}
+        names = [Path(f['path']).name for f in graph.hierarchy_files('mid')]
+        assert names == ['leaf.v', 'mid.v']
+
+        leaf.write_text('module leaf(input a, output b);\nassign b = ~a;\nendmodule\n')
+        interface = graph.refresh({leaf})
+        assert interface == set()
+        affected = graph.modules_affected_by({leaf})
+        assert graph.check_roots(affected, interface) == ['leaf']
+
+        leaf.write_text('module leaf(input a, input c, output b);\n'
+                        'assign b = a & c;\nendmodule\n')
+        interface = graph.refresh({leaf})
+        assert interface == {'leaf'}
+        affected = graph.modules_affected_by({leaf})
+        assert graph.check_roots(affected, interface) == ['mid']
+
+        # 头文件修改影响include它的模块
+        header = (tmp_path / 'src' / 'defs.vh').absolute()
+        assert graph.modules_affected_by({header}) == {'top'}
+
+    def test_elaboration_script(self):
+        """RTL展开脚本只读入给定文件"""
+        files = [{'path': 'src/leaf.v', 'language': 'verilog'},
+                 {'path': 'src/pkg.sv', 'language': 'systemverilog'}]
+        script = elaboration_script('xc7a35t', 'mid', files,
+                                    defines={'SIM': None, 'WIDTH': 8},
+                                    include_dirs=['src'])
+        assert 'read_verilog {{src/leaf.v}}' in script
+        assert 'read_verilog -sv {{src/pkg.sv}}' in script
+        assert 'synth_design -rtl -name rtl_1 -top mid -part xc7a35t' in script
+        assert '-verilog_define {{SIM} {WIDTH=8}}' in script
+
+    def test_polling_debounce(self, tmp_path):
+        """轮询模式下连续修改合并为一批"""
+        a, b, other = tmp_path / 'a.v', tmp_path / 'b.v', tmp_path / 'notes.txt'
+        for path in (a, b, other):
+            path.write_text('x')
+
+        async def main():
+            watcher = FileWatcher([a, b], debounce=0.3, poll_interval=0.05,
+                                  use_polling=True)
+            watcher.start()
+            await asyncio.sleep(0.1)
+            a.write_text('changed')
+            other.write_text('changed')
+            await asyncio.sleep(0.1)
+            b.write_text('changed too')
+            (tmp_path / 'c.v').write_text('new')
+            batch = await asyncio.wait_for(watcher.next_batch(), 5)
+            watcher.close()
+            return batch
+
+        batch = asyncio.run(main())
+        assert {p.name for p in batch} == {'a.v', 'b.v', 'c.v'}
+
+    def test_session_checks(self, tmp_path, monkeypatch):
+        """在常驻会话中运行展开和约束检查"""
+        monkeypatch.chdir(tmp_path)
+        _write_design(tmp_path)
+        fake = tmp_path / 'fake_vivado.py'
+        fake.write_text(FAKE_VIVADO)
+        config = _config()
+
+        async def main():
+            session = VivadoSession([sys.executable, str(fake)], cwd=tmp_path)
+            watcher = FileWatcher([], use_polling=True)
+            scanner = FileScanner(tmp_path)
+            watch = WatchSession(config, scanner.scan_files, session, watcher,
+                                 reporter=lambda message: None)
+            assert (tmp_path / 'src' / 'defs.vh').absolute() in watcher.files
+            await session.start()
+            try:
+                leaf = (tmp_path / 'src' / 'leaf.v').absolute()
+                leaf.write_text('module leaf(input a, output b);\n'
+                                'assign b = 1\'b0;\nendmodule\n')
+                results = await watch.handle({leaf})
+                checks = [(r.check.kind, r.check.target, r.success) for r in results]
+                assert checks == [('rtl', 'leaf', True)]
+
+                results = await watch.handle({(tmp_path / 'top.xdc').absolute()})
+                assert results[0].check.kind == 'xdc'
+                assert not results[0].success
+                assert 'clk_typo' in results[0].errors[0]
+
+                # 新文件触发重新扫描并从顶层展开
+                (tmp_path / 'src' / 'extra.v').write_text('module extra; endmodule\n')
+                extra = (tmp_path / 'src' / 'extra.v').absolute()
+                results = await watch.handle({extra})
+                assert results[0].check.target == 'top'
+                assert (tmp_path / 'src' / 'extra.v').absolute() in watch.graph.files
+
+                returncode, lines = await session.run('synth_design -rtl -top bad\n')
+                assert returncode == 1
+                assert lines[0].startswith('ERROR:')
+            finally:
+                await session.close()
+            assert not session.alive
+
+        asyncio.run(asyncio.wait_for(main(), timeout=20))
+
+    def test_session_timeout_and_long_lines(self, tmp_path):
+        """超长输出行可以读取；超时的脚本终止会话，重新启动后可继续使用"""
+        fake = tmp_path / 'fake_vivado.py'
+        fake.write_text(FAKE_VIVADO)
+
+        async def main():
+            session = VivadoSession([sys.executable, str(fake)], cwd=tmp_path,
+                                    timeout=2)
+            await session.start()
+            try:
+                returncode, lines = await session.run('puts long_line\n')
+                assert returncode == 0 and len(lines[0]) == 200000
+
+                with pytest.raises(SessionTimeout):
+                    await session.run('hang\n')
+                assert not session.alive
+
+                await session.start()
+                result = await session.run('synth_design -rtl -top top\n')
+                assert result == (0, ['elaborated top'])
+            finally:
+                await session.close()
+
+        asyncio.run(asyncio.wait_for(main(), timeout=20))